@@ -4,8 +4,85 @@ AI 提供商基类
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Any, Optional, Tuple
+import asyncio
+import hashlib
 import json
+import os
+import threading
+
+
+def provider_concurrency(provider_name: str) -> int:
+    """单个提供商的并发上限：AI_PROVIDER_CONCURRENCY_<NAME> 优先，其次 AI_PROVIDER_CONCURRENCY（默认 8）"""
+    for name in (f"AI_PROVIDER_CONCURRENCY_{provider_name.upper()}", "AI_PROVIDER_CONCURRENCY"):
+        raw = (os.getenv(name) or "").strip()
+        if raw:
+            try:
+                return max(1, int(raw))
+            except ValueError:
+                pass
+    return 8
+
+
+class AsyncClientPool:
+    """
+    异步客户端与并发信号量的共享池
+    - 客户端按 (事件循环, 类型, 凭据摘要) 复用，同一凭据的请求共享连接池
+    - 信号量按 (事件循环, 提供商) 划分，所属事件循环关闭后条目一并丢弃
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[int, str, str], Tuple[asyncio.AbstractEventLoop, Any]] = {}
+        self._semaphores: Dict[Tuple[int, str], Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _identity(*parts: Optional[str]) -> str:
+        return hashlib.sha1("\x00".join(p or "" for p in parts).encode("utf-8")).hexdigest()
+
+    def _prune(self) -> None:
+        for table in (self._clients, self._semaphores):
+            for key, (loop, _) in list(table.items()):
+                if loop.is_closed():
+                    table.pop(key, None)
+
+    def client(self, kind: str, factory: Callable[[], Any], *identity: Optional[str]) -> Any:
+        loop = asyncio.get_running_loop()
+        key = (id(loop), kind, self._identity(*identity))
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None or entry[0] is not loop:
+                self._prune()
+                entry = (loop, factory())
+                self._clients[key] = entry
+            return entry[1]
+
+    def semaphore(self, provider_name: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        key = (id(loop), provider_name)
+        with self._lock:
+            entry = self._semaphores.get(key)
+            if entry is None or entry[0] is not loop:
+                entry = (loop, asyncio.Semaphore(provider_concurrency(provider_name)))
+                self._semaphores[key] = entry
+            return entry[1]
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环上的客户端（应用关闭时调用）"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            victims = [self._clients.pop(key)[1] for key, (owner, _) in list(self._clients.items()) if owner is loop]
+        for client in victims:
+            close = getattr(client, "aclose", None) or getattr(client, "close", None)
+            if close is not None:
+                try:
+                    await close()
+                except Exception:
+                    pass
+
+
+client_pool = AsyncClientPool()
 
 
 class AIModel:
@@ -86,3 +163,9 @@ class BaseProvider(ABC):
     def register_model(self, model: AIModel):
         """注册模型"""
         self.models[model.model_id] = model
+
+    @asynccontextmanager
+    async def slot(self):
+        """占用一个提供商并发名额；流式调用在整个流期间持有"""
+        async with client_pool.semaphore(self.provider_name):
+            yield
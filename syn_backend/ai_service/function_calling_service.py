@@ -3,18 +3,29 @@
 替代 OpenManus 框架，提供可控的单次调用模式
 
 特点：
-- 直接调用 OpenAI 兼容接口
+- 直接调用 OpenAI 兼容接口（连接池按凭据复用，不再每轮新建客户端）
 - 单次响应，不会无限循环执行
 - 支持自定义工具函数
-- 完全可控的执行流程
+- 同一轮的多个工具调用并发执行；有副作用的工具（side_effects=True）按原顺序串行
+- stream() 逐个产出工具结果等中间事件，call() 在其之上汇总最终结果
 """
+import asyncio
 import json
+import os
 import httpx
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, AsyncIterator, List, Optional, Callable, Tuple
 from loguru import logger
 import inspect
 
 
+def _tool_concurrency() -> int:
+    """同一轮内并发执行的只读工具上限（FUNCTION_CALLING_TOOL_CONCURRENCY，默认 8）"""
+    try:
+        return max(1, int(os.getenv("FUNCTION_CALLING_TOOL_CONCURRENCY", "8")))
+    except ValueError:
+        return 8
+
+
 class Tool:
     """工具函数定义"""
     def __init__(
@@ -22,12 +33,15 @@ class Tool:
         name: str,
         description: str,
         parameters: Dict[str, Any],
-        function: Callable
+        function: Callable,
+        side_effects: bool = False
     ):
         self.name = name
         self.description = description
         self.parameters = parameters
         self.function = function
+        # 有副作用（发布 / 删除 / 修改 / 登录等）的工具不与同一轮的其他调用并发
+        self.side_effects = side_effects
 
     def to_openai_format(self) -> Dict[str, Any]:
         """转换为 OpenAI Function Calling 格式"""
@@ -75,6 +89,124 @@ class FunctionCallingService:
         for tool in tools:
             self.register_tool(tool)
 
+    # ---------- LLM 调用 ----------
+
+    def _http(self) -> httpx.AsyncClient:
+        """按 (事件循环, 凭据) 复用的 LLM 客户端，应用关闭时由 client_pool.aclose() 统一关闭"""
+        from .base_provider import client_pool
+
+        return client_pool.client(
+            "function_calling",
+            lambda: httpx.AsyncClient(
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            ),
+            self.api_key,
+            self.base_url,
+        )
+
+    async def _chat(self, payload: Dict[str, Any]) -> httpx.Response:
+        return await self._http().post(
+            f"{self.base_url}/chat/completions",
+            json={"model": self.model, **payload},
+            timeout=self.timeout
+        )
+
+    # ---------- 工具执行 ----------
+
+    async def _run_tool_call(self, tool_call: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """执行单个工具调用，返回 (tool 消息, 调用记录)；参数解析失败时调用记录为 None"""
+        tool_name = tool_call["function"]["name"]
+        tool_args_str = tool_call["function"]["arguments"]
+        tool_call_id = tool_call["id"]
+
+        logger.info(f"🔧 执行工具: {tool_name}")
+        logger.debug(f"   参数: {tool_args_str}")
+
+        record = None
+        try:
+            # 解析参数
+            tool_args = json.loads(tool_args_str)
+
+            # 查找工具
+            if tool_name not in self.tools:
+                error_msg = f"工具 '{tool_name}' 未注册"
+                logger.error(f"❌ {error_msg}")
+                tool_result = {"error": error_msg}
+            else:
+                # 执行工具
+                tool_result = await self.tools[tool_name].execute(**tool_args)
+
+            # 记录工具调用
+            record = {
+                "name": tool_name,
+                "arguments": tool_args,
+                "result": tool_result
+            }
+            content = json.dumps(tool_result, ensure_ascii=False)
+
+        except json.JSONDecodeError as e:
+            error_msg = f"解析工具参数失败: {e}"
+            logger.error(f"❌ {error_msg}")
+            content = json.dumps({"error": error_msg}, ensure_ascii=False)
+        except Exception as e:
+            error_msg = f"工具执行失败: {str(e)}"
+            logger.error(f"❌ {error_msg}")
+            content = json.dumps({"error": error_msg}, ensure_ascii=False)
+
+        # 构建工具响应消息
+        return {
+            "tool_call_id": tool_call_id,
+            "role": "tool",
+            "name": tool_name,
+            "content": content
+        }, record
+
+    def _batches(self, tool_calls: List[Dict[str, Any]]) -> List[List[int]]:
+        """
+        按模型给出的顺序切分：连续的只读调用为一批（批内并发），
+        有副作用的调用单独成批，保证它与前后调用之间的先后关系不变
+        """
+        batches: List[List[int]] = []
+        open_batch = False
+        for index, tool_call in enumerate(tool_calls):
+            tool = self.tools.get(tool_call["function"]["name"])
+            if tool is not None and tool.side_effects:
+                batches.append([index])
+                open_batch = False
+            elif open_batch:
+                batches[-1].append(index)
+            else:
+                batches.append([index])
+                open_batch = True
+        return batches
+
+    async def _execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> AsyncIterator[Tuple[int, Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """按批执行，批内按完成先后产出 (序号, tool 消息, 调用记录)"""
+        limit = asyncio.Semaphore(_tool_concurrency())
+
+        async def run(index: int):
+            async with limit:
+                message, record = await self._run_tool_call(tool_calls[index])
+            return index, message, record
+
+        for batch in self._batches(tool_calls):
+            tasks = [asyncio.ensure_future(run(index)) for index in batch]
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    yield await finished
+            finally:
+                # 调用方提前停止读取（如客户端断开）时取消尚未完成的工具
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+
+    # ---------- 对外接口 ----------
+
     async def call(
         self,
         messages: List[Dict[str, str]],
@@ -97,46 +229,75 @@ class FunctionCallingService:
                 "iterations": int  # 实际迭代次数
             }
         """
-        try:
-            conversation = messages.copy()
-            tool_calls_history = []
-            iteration = 0
-            last_assistant_content = ""
+        result: Dict[str, Any] = {}
+        async for event in self.stream(messages, max_iterations, auto_execute):
+            if event["type"] == "final":
+                result = event["result"]
+        return result
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_iterations: int = 3,
+        auto_execute: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        以事件流的形式执行 Function Calling（同一次调用内的只读工具查询共享缓存）
 
+        事件类型：
+        - iteration: 开始第 N 轮 LLM 调用
+        - assistant: 模型的中间回复（含本轮要执行的工具调用）
+        - tool_result: 单个工具执行完成（按完成先后产出）
+        - final: 最终结果，result 与 call() 的返回值相同
+        """
+        from fastapi_app.services.tool_gateway import tool_gateway
+
+        with tool_gateway.run_scope():
+            async for event in self._stream(messages, max_iterations, auto_execute):
+                yield event
+
+    async def _stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_iterations: int,
+        auto_execute: bool
+    ) -> AsyncIterator[Dict[str, Any]]:
+        conversation = messages.copy()
+        tool_calls_history = []
+        iteration = 0
+        last_assistant_content = ""
+
+        def final(**result) -> Dict[str, Any]:
+            return {"type": "final", "result": result}
+
+        try:
             # 准备工具定义
             tools_definitions = [tool.to_openai_format() for tool in self.tools.values()]
 
             while iteration < max_iterations:
                 iteration += 1
                 logger.info(f"📝 Function Calling 迭代 {iteration}/{max_iterations}")
+                yield {"type": "iteration", "iteration": iteration}
 
                 # 调用 LLM
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.post(
-                        f"{self.base_url}/chat/completions",
-                        headers={
-                            "Authorization": f"Bearer {self.api_key}",
-                            "Content-Type": "application/json"
-                        },
-                        json={
-                            "model": self.model,
-                            "messages": conversation,
-                            "tools": tools_definitions,
-                            "tool_choice": "auto"
-                        }
-                    )
+                response = await self._chat({
+                    "messages": conversation,
+                    "tools": tools_definitions,
+                    "tool_choice": "auto"
+                })
 
-                    if response.status_code != 200:
-                        error_text = response.text
-                        logger.error(f"❌ LLM 调用失败: {error_text}")
-                        return {
-                            "success": False,
-                            "message": f"LLM 调用失败: {error_text[:200]}",
-                            "tool_calls": tool_calls_history,
-                            "iterations": iteration
-                        }
+                if response.status_code != 200:
+                    error_text = response.text
+                    logger.error(f"❌ LLM 调用失败: {error_text}")
+                    yield final(
+                        success=False,
+                        message=f"LLM 调用失败: {error_text[:200]}",
+                        tool_calls=tool_calls_history,
+                        iterations=iteration
+                    )
+                    return
 
-                    result = response.json()
+                result = response.json()
 
                 # 获取 AI 响应
                 choice = result["choices"][0]
@@ -152,100 +313,66 @@ class FunctionCallingService:
                 if finish_reason == "tool_calls" and "tool_calls" in message:
                     if not auto_execute:
                         # 不自动执行，返回工具调用信息
-                        return {
-                            "success": True,
-                            "message": message.get("content", ""),
-                            "tool_calls": message["tool_calls"],
-                            "iterations": iteration,
-                            "pending_execution": True
-                        }
+                        yield final(
+                            success=True,
+                            message=message.get("content", ""),
+                            tool_calls=message["tool_calls"],
+                            iterations=iteration,
+                            pending_execution=True
+                        )
+                        return
 
-                    # 执行工具调用
-                    tool_results = []
-                    for tool_call in message["tool_calls"]:
-                        tool_name = tool_call["function"]["name"]
-                        tool_args_str = tool_call["function"]["arguments"]
-                        tool_call_id = tool_call["id"]
-
-                        logger.info(f"🔧 执行工具: {tool_name}")
-                        logger.debug(f"   参数: {tool_args_str}")
-
-                        try:
-                            # 解析参数
-                            tool_args = json.loads(tool_args_str)
-
-                            # 查找工具
-                            if tool_name not in self.tools:
-                                error_msg = f"工具 '{tool_name}' 未注册"
-                                logger.error(f"❌ {error_msg}")
-                                tool_result = {"error": error_msg}
-                            else:
-                                # 执行工具
-                                tool = self.tools[tool_name]
-                                result_data = await tool.execute(**tool_args)
-                                tool_result = result_data
-
-                            # 记录工具调用
-                            tool_calls_history.append({
-                                "name": tool_name,
-                                "arguments": tool_args,
-                                "result": tool_result
-                            })
-
-                            # 构建工具响应消息
-                            tool_results.append({
-                                "tool_call_id": tool_call_id,
-                                "role": "tool",
-                                "name": tool_name,
-                                "content": json.dumps(tool_result, ensure_ascii=False)
-                            })
-
-                        except json.JSONDecodeError as e:
-                            error_msg = f"解析工具参数失败: {e}"
-                            logger.error(f"❌ {error_msg}")
-                            tool_results.append({
-                                "tool_call_id": tool_call_id,
-                                "role": "tool",
-                                "name": tool_name,
-                                "content": json.dumps({"error": error_msg}, ensure_ascii=False)
-                            })
-                        except Exception as e:
-                            error_msg = f"工具执行失败: {str(e)}"
-                            logger.error(f"❌ {error_msg}")
-                            tool_results.append({
-                                "tool_call_id": tool_call_id,
-                                "role": "tool",
-                                "name": tool_name,
-                                "content": json.dumps({"error": error_msg}, ensure_ascii=False)
-                            })
+                    yield {
+                        "type": "assistant",
+                        "iteration": iteration,
+                        "content": message.get("content") or "",
+                        "tool_calls": [call["function"]["name"] for call in message["tool_calls"]]
+                    }
 
+                    # 执行工具调用：结果按完成先后推送，写回对话时保持与 tool_calls 相同的顺序
+                    tool_results: Dict[int, Dict[str, Any]] = {}
+                    records: Dict[int, Dict[str, Any]] = {}
+                    async for index, tool_message, record in self._execute_tool_calls(message["tool_calls"]):
+                        tool_results[index] = tool_message
+                        if record is not None:
+                            records[index] = record
+                        yield {
+                            "type": "tool_result",
+                            "iteration": iteration,
+                            "tool_call_id": tool_message["tool_call_id"],
+                            "name": tool_message["name"],
+                            "result": record["result"] if record is not None else json.loads(tool_message["content"])
+                        }
+
+                    tool_calls_history.extend(records[i] for i in sorted(records))
                     # 将工具结果添加到对话历史
-                    conversation.extend(tool_results)
+                    conversation.extend(tool_results[i] for i in sorted(tool_results))
 
                     # 继续下一轮对话（让 AI 总结结果）
                     continue
 
                 elif finish_reason == "stop":
                     # AI 完成响应，没有更多工具调用
-                    final_message = message.get("content", "")
                     logger.info(f"✅ Function Calling 完成，迭代次数: {iteration}")
-                    return {
-                        "success": True,
-                        "message": final_message,
-                        "tool_calls": tool_calls_history,
-                        "iterations": iteration
-                    }
+                    yield final(
+                        success=True,
+                        message=message.get("content", ""),
+                        tool_calls=tool_calls_history,
+                        iterations=iteration
+                    )
+                    return
 
                 else:
                     # 其他 finish_reason
                     logger.warning(f"⚠️ 未知的 finish_reason: {finish_reason}")
-                    return {
-                        "success": False,
-                        "message": message.get("content", ""),
-                        "tool_calls": tool_calls_history,
-                        "iterations": iteration,
-                        "finish_reason": finish_reason
-                    }
+                    yield final(
+                        success=False,
+                        message=message.get("content", ""),
+                        tool_calls=tool_calls_history,
+                        iterations=iteration,
+                        finish_reason=finish_reason
+                    )
+                    return
 
             # 达到最大迭代次数
             logger.warning(f"⚠️ 达到最大迭代次数 {max_iterations}")
@@ -260,33 +387,10 @@ class FunctionCallingService:
                         "不要再调用任何工具。"
                     )
                 }]
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.post(
-                        f"{self.base_url}/chat/completions",
-                        headers={
-                            "Authorization": f"Bearer {self.api_key}",
-                            "Content-Type": "application/json"
-                        },
-                        json={
-                            "model": self.model,
-                            "messages": summary_conversation,
-                            "tool_choice": "none",
-                        }
-                    )
+                response = await self._chat({"messages": summary_conversation, "tool_choice": "none"})
                 if response.status_code != 200:
                     # 兼容部分 OpenAI-compatible 实现不支持 tool_choice="none"
-                    async with httpx.AsyncClient(timeout=self.timeout) as client:
-                        response = await client.post(
-                            f"{self.base_url}/chat/completions",
-                            headers={
-                                "Authorization": f"Bearer {self.api_key}",
-                                "Content-Type": "application/json"
-                            },
-                            json={
-                                "model": self.model,
-                                "messages": summary_conversation,
-                            }
-                        )
+                    response = await self._chat({"messages": summary_conversation})
                 if response.status_code == 200:
                     result = response.json()
                     message = result["choices"][0]["message"]
@@ -297,22 +401,22 @@ class FunctionCallingService:
             except Exception as e:
                 logger.warning(f"⚠️ 强制收束调用异常: {e}")
 
-            return {
-                "success": True,
-                "message": best_effort_message,
-                "tool_calls": tool_calls_history,
-                "iterations": iteration,
-                "max_iterations_reached": True
-            }
+            yield final(
+                success=True,
+                message=best_effort_message,
+                tool_calls=tool_calls_history,
+                iterations=iteration,
+                max_iterations_reached=True
+            )
 
         except Exception as e:
             logger.error(f"❌ Function Calling 执行失败: {e}", exc_info=True)
-            return {
-                "success": False,
-                "message": f"执行失败: {str(e)}",
-                "tool_calls": tool_calls_history if 'tool_calls_history' in locals() else [],
-                "iterations": iteration if 'iteration' in locals() else 0
-            }
+            yield final(
+                success=False,
+                message=f"执行失败: {str(e)}",
+                tool_calls=tool_calls_history,
+                iterations=iteration
+            )
 
 
 # ============================================
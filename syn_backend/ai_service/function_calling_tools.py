@@ -3,12 +3,12 @@ Function Calling 工具函数集合
 
 定义了所有可供 AI 调用的工具函数
 """
-import httpx
 import os
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from loguru import logger
 from .function_calling_service import Tool
+from fastapi_app.services.tool_gateway import tool_gateway
 
 
 def _resolve_backend_cwd() -> Path:
@@ -40,7 +40,7 @@ async def get_system_info() -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             # 获取账号信息
             accounts_resp = await client.get("http://localhost:7000/api/v1/accounts/")
             accounts_data = accounts_resp.json()
@@ -95,7 +95,7 @@ async def list_accounts(platform: Optional[str] = None) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             url = "http://localhost:7000/api/v1/accounts/"
             if platform:
                 url += f"?platform={platform}"
@@ -151,7 +151,7 @@ async def list_videos(limit: int = 20) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.get(
                 f"http://localhost:7000/api/v1/files/?limit={limit}"
             )
@@ -217,7 +217,7 @@ async def create_publish_task(
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with tool_gateway.client(timeout=30.0) as client:
             resp = await client.post(
                 "http://localhost:7000/api/v1/tasks/publish",
                 json={
@@ -270,7 +270,8 @@ create_publish_task_tool = Tool(
         },
         "required": ["account_ids", "video_path", "title"]
     },
-    function=create_publish_task
+    function=create_publish_task,
+    side_effects=True
 )
 
 
@@ -294,7 +295,7 @@ async def get_task_status(task_id: str) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.get(
                 f"http://localhost:7000/api/v1/tasks/{task_id}"
             )
@@ -397,7 +398,8 @@ execute_python_script_tool = Tool(
         },
         "required": ["script_path"]
     },
-    function=execute_python_script
+    function=execute_python_script,
+    side_effects=True
 )
 
 
@@ -423,7 +425,7 @@ async def publish_video_to_tencent(file_id: str, custom_title: Optional[str] = N
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with tool_gateway.client(timeout=30.0) as client:
             # 1. 获取文件信息
             file_resp = await client.get(f"http://localhost:7000/api/v1/files/{file_id}")
             file_data = file_resp.json()
@@ -504,7 +506,8 @@ publish_video_to_tencent_tool = Tool(
         },
         "required": ["file_id"]
     },
-    function=publish_video_to_tencent
+    function=publish_video_to_tencent,
+    side_effects=True
 )
 
 
@@ -528,7 +531,7 @@ async def search_files(keyword: Optional[str] = None, file_type: Optional[str] =
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             params = {"limit": limit}
             if keyword:
                 params["keyword"] = keyword
@@ -601,7 +604,7 @@ async def delete_file(file_id: str) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.delete(f"http://localhost:7000/api/v1/files/{file_id}")
 
             if resp.status_code != 200:
@@ -626,7 +629,8 @@ delete_file_tool = Tool(
         },
         "required": ["file_id"]
     },
-    function=delete_file
+    function=delete_file,
+    side_effects=True
 )
 
 
@@ -656,7 +660,7 @@ async def publish_to_multiple_platforms(
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with tool_gateway.client(timeout=30.0) as client:
             # 获取文件信息
             file_resp = await client.get(f"http://localhost:7000/api/v1/files/{file_id}")
             file_data = file_resp.json()
@@ -736,7 +740,8 @@ publish_to_multiple_platforms_tool = Tool(
         },
         "required": ["file_id", "platforms"]
     },
-    function=publish_to_multiple_platforms
+    function=publish_to_multiple_platforms,
+    side_effects=True
 )
 
 
@@ -760,7 +765,7 @@ async def get_analytics_summary(days: int = 7) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             from datetime import datetime, timedelta
 
             end_date = datetime.now()
@@ -837,7 +842,7 @@ async def upload_file(file_path: str, file_type: Optional[str] = None) -> Dict[s
         if not file_path_obj.exists():
             return {"error": f"文件不存在: {file_path}"}
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        async with tool_gateway.client(timeout=60.0) as client:
             async with aiofiles.open(file_path, 'rb') as f:
                 file_content = await f.read()
 
@@ -881,7 +886,8 @@ upload_file_tool = Tool(
         },
         "required": ["file_path"]
     },
-    function=upload_file
+    function=upload_file,
+    side_effects=True
 )
 
 
@@ -903,7 +909,7 @@ async def get_file_details(file_id: str) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.get(f"http://localhost:7000/api/v1/files/{file_id}")
 
             if resp.status_code != 200:
@@ -952,7 +958,7 @@ async def update_file(file_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.patch(
                 f"http://localhost:7000/api/v1/files/{file_id}",
                 json=updates
@@ -985,7 +991,8 @@ update_file_tool = Tool(
         },
         "required": ["file_id", "updates"]
     },
-    function=update_file
+    function=update_file,
+    side_effects=True
 )
 
 
@@ -1003,7 +1010,7 @@ async def batch_delete_files(file_ids: List[str]) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with tool_gateway.client(timeout=30.0) as client:
             resp = await client.post(
                 "http://localhost:7000/api/v1/files/batch-delete",
                 json={"file_ids": file_ids}
@@ -1034,7 +1041,8 @@ batch_delete_files_tool = Tool(
         },
         "required": ["file_ids"]
     },
-    function=batch_delete_files
+    function=batch_delete_files,
+    side_effects=True
 )
 
 
@@ -1049,7 +1057,7 @@ async def get_file_tags() -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.get("http://localhost:7000/api/v1/files/tags")
 
             if resp.status_code != 200:
@@ -1090,7 +1098,7 @@ async def add_file_tags(file_id: str, tags: List[str]) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.post(
                 f"http://localhost:7000/api/v1/files/{file_id}/tags",
                 json={"tags": tags}
@@ -1124,7 +1132,8 @@ add_file_tags_tool = Tool(
         },
         "required": ["file_id", "tags"]
     },
-    function=add_file_tags
+    function=add_file_tags,
+    side_effects=True
 )
 
 
@@ -1143,7 +1152,7 @@ async def get_publish_presets() -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.get("http://localhost:7000/api/v1/publish/presets")
 
             if resp.status_code != 200:
@@ -1184,7 +1193,7 @@ async def create_preset(name: str, config: Dict[str, Any]) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.post(
                 "http://localhost:7000/api/v1/publish/presets",
                 json={"name": name, "config": config}
@@ -1218,7 +1227,8 @@ create_preset_tool = Tool(
         },
         "required": ["name", "config"]
     },
-    function=create_preset
+    function=create_preset,
+    side_effects=True
 )
 
 
@@ -1236,7 +1246,7 @@ async def delete_preset(preset_id: str) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.delete(
                 f"http://localhost:7000/api/v1/publish/presets/{preset_id}"
             )
@@ -1264,7 +1274,8 @@ delete_preset_tool = Tool(
         },
         "required": ["preset_id"]
     },
-    function=delete_preset
+    function=delete_preset,
+    side_effects=True
 )
 
 
@@ -1283,7 +1294,7 @@ async def apply_preset(preset_id: str, file_ids: List[str]) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with tool_gateway.client(timeout=30.0) as client:
             resp = await client.post(
                 f"http://localhost:7000/api/v1/publish/presets/{preset_id}/apply",
                 json={"file_ids": file_ids}
@@ -1318,7 +1329,8 @@ apply_preset_tool = Tool(
         },
         "required": ["preset_id", "file_ids"]
     },
-    function=apply_preset
+    function=apply_preset,
+    side_effects=True
 )
 
 
@@ -1333,7 +1345,7 @@ async def get_otp_events() -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.get("http://localhost:7000/api/v1/verification/otp-events")
 
             if resp.status_code != 200:
@@ -1381,7 +1393,7 @@ async def batch_publish(
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        async with tool_gateway.client(timeout=60.0) as client:
             resp = await client.post(
                 "http://localhost:7000/api/v1/publish/batch",
                 json={
@@ -1433,7 +1445,8 @@ batch_publish_tool = Tool(
         },
         "required": ["file_ids", "platforms"]
     },
-    function=batch_publish
+    function=batch_publish,
+    side_effects=True
 )
 
 
@@ -1457,7 +1470,7 @@ async def platform_login(platform: str, credentials: Dict[str, str]) -> Dict[str
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        async with tool_gateway.client(timeout=60.0) as client:
             resp = await client.post(
                 f"http://localhost:7000/api/v1/platforms/{platform}/login",
                 json=credentials
@@ -1492,7 +1505,8 @@ platform_login_tool = Tool(
         },
         "required": ["platform", "credentials"]
     },
-    function=platform_login
+    function=platform_login,
+    side_effects=True
 )
 
 
@@ -1511,7 +1525,7 @@ async def verify_cookie(platform: str, cookie_data: str) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with tool_gateway.client(timeout=30.0) as client:
             resp = await client.post(
                 f"http://localhost:7000/api/v1/platforms/{platform}/verify-cookie",
                 json={"cookie_data": cookie_data}
@@ -1546,7 +1560,8 @@ verify_cookie_tool = Tool(
         },
         "required": ["platform", "cookie_data"]
     },
-    function=verify_cookie
+    function=verify_cookie,
+    side_effects=True
 )
 
 
@@ -1565,7 +1580,7 @@ async def get_login_status(session_id: str) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.get(
                 f"http://localhost:7000/api/v1/platforms/login/status?session_id={session_id}"
             )
@@ -1614,7 +1629,7 @@ async def start_login_session(platform: str, account_id: str) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with tool_gateway.client(timeout=30.0) as client:
             resp = await client.post(
                 "http://localhost:7000/api/v1/platforms/login/start",
                 json={"platform": platform, "account_id": account_id}
@@ -1649,7 +1664,8 @@ start_login_session_tool = Tool(
         },
         "required": ["platform", "account_id"]
     },
-    function=start_login_session
+    function=start_login_session,
+    side_effects=True
 )
 
 
@@ -1686,7 +1702,7 @@ async def create_matrix_task(
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with tool_gateway.client(timeout=30.0) as client:
             resp = await client.post(
                 "http://localhost:7000/api/v1/matrix/generate_tasks",
                 json={
@@ -1749,7 +1765,8 @@ create_matrix_task_tool = Tool(
         },
         "required": ["platforms", "account_ids", "material_ids"]
     },
-    function=create_matrix_task
+    function=create_matrix_task,
+    side_effects=True
 )
 
 
@@ -1767,7 +1784,7 @@ async def get_matrix_tasks(status: Optional[str] = None) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             url = "http://localhost:7000/api/v1/matrix/tasks"
             if status:
                 url += f"?status={status}"
@@ -1817,7 +1834,7 @@ async def get_matrix_statistics() -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.get("http://localhost:7000/api/v1/matrix/stats")
 
             if resp.status_code != 200:
@@ -1864,7 +1881,7 @@ async def get_account_details(account_id: str) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.get(f"http://localhost:7000/api/v1/accounts/{account_id}")
 
             if resp.status_code != 200:
@@ -1917,7 +1934,7 @@ async def create_account(
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.post(
                 "http://localhost:7000/api/v1/accounts/",
                 json={
@@ -1965,7 +1982,8 @@ create_account_tool = Tool(
         },
         "required": ["platform", "name", "cookie_data"]
     },
-    function=create_account
+    function=create_account,
+    side_effects=True
 )
 
 
@@ -1984,7 +2002,7 @@ async def update_account(account_id: str, updates: Dict[str, Any]) -> Dict[str,
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.patch(
                 f"http://localhost:7000/api/v1/accounts/{account_id}",
                 json=updates
@@ -2017,7 +2035,8 @@ update_account_tool = Tool(
         },
         "required": ["account_id", "updates"]
     },
-    function=update_account
+    function=update_account,
+    side_effects=True
 )
 
 
@@ -2035,7 +2054,7 @@ async def delete_account(account_id: str) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with tool_gateway.client(timeout=10.0) as client:
             resp = await client.delete(f"http://localhost:7000/api/v1/accounts/{account_id}")
 
             if resp.status_code != 200:
@@ -2061,7 +2080,8 @@ delete_account_tool = Tool(
         },
         "required": ["account_id"]
     },
-    function=delete_account
+    function=delete_account,
+    side_effects=True
 )
 
 
@@ -2082,7 +2102,7 @@ async def sync_account_info(account_id: str) -> Dict[str, Any]:
         }
     """
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with tool_gateway.client(timeout=30.0) as client:
             resp = await client.post(
                 f"http://localhost:7000/api/v1/accounts/{account_id}/sync"
             )
@@ -2111,7 +2131,8 @@ sync_account_info_tool = Tool(
         },
         "required": ["account_id"]
     },
-    function=sync_account_info
+    function=sync_account_info,
+    side_effects=True
 )
 
 
@@ -1,19 +1,99 @@
 """
-具体的 AI 提供商实现 - 使用官方 SDK
+具体的 AI 提供商实现 - 全部走异步客户端
 支持：硅基流动（OpenAI 兼容）、火山引擎、通义万象
+
+- OpenAI 兼容接口使用 AsyncOpenAI，火山引擎使用 httpx.AsyncClient + SSE 解析
+- 客户端由 client_pool 按凭据复用（共享连接池），每个提供商有独立的并发上限
+- 流式调用逐块 await，不阻塞事件循环；调用方停止读取时生成器关闭并释放连接
 """
 
-from .base_provider import BaseProvider, AIModel
-from typing import Dict, List, Any, Optional
-import asyncio
+from .base_provider import BaseProvider, AIModel, client_pool
+from typing import Any, AsyncIterator, Dict, List, Optional
 import json
 import logging
 
+import httpx
+
 logger = logging.getLogger(__name__)
 
 
-class SiliconFlowProvider(BaseProvider):
-    """硅基流动 API 提供商 - 使用 OpenAI SDK"""
+def _load_async_openai():
+    try:
+        from openai import AsyncOpenAI
+        return AsyncOpenAI
+    except ImportError as e:
+        logger.warning("OpenAI SDK not installed: %s", e)
+        return None
+
+
+def shared_openai_client(api_key: str, base_url: Optional[str]):
+    """
+    当前事件循环上与 (api_key, base_url) 对应的共享 AsyncOpenAI 客户端
+    （SDK 未安装时返回 None）
+    """
+    async_openai = _load_async_openai()
+    if async_openai is None:
+        return None
+    return client_pool.client(
+        "openai",
+        lambda: async_openai(api_key=api_key, base_url=base_url),
+        api_key,
+        base_url,
+    )
+
+
+async def iter_sse_deltas(response: httpx.Response) -> AsyncIterator[str]:
+    """解析 OpenAI 风格的 SSE 流（data: {...} / data: [DONE]），逐个产出 delta.content"""
+    async for line in response.aiter_lines():
+        line = line.strip()
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        try:
+            event = json.loads(data)
+        except ValueError:
+            continue
+        choices = event.get("choices") or []
+        if choices:
+            content = (choices[0].get("delta") or {}).get("content")
+            if content:
+                yield content
+
+
+class _AsyncOpenAIMixin:
+    """OpenAI 兼容提供商的公共调用逻辑（需要 api_key / provider_name / slot）"""
+
+    _client_base_url: Optional[str] = None
+
+    def _openai(self):
+        return shared_openai_client(self.api_key, self._client_base_url or self.base_url)
+
+    async def _create_completion(self, **params):
+        client = self._openai()
+        if client is None:
+            raise RuntimeError("OpenAI SDK not installed")
+        async with self.slot():
+            return await client.chat.completions.create(**params)
+
+    async def _stream_completion(self, **params) -> AsyncIterator[str]:
+        client = self._openai()
+        if client is None:
+            yield "[ERROR] OpenAI SDK not installed"
+            return
+        async with self.slot():
+            stream = await client.chat.completions.create(stream=True, **params)
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.close()
+
+
+class SiliconFlowProvider(_AsyncOpenAIMixin, BaseProvider):
+    """硅基流动 API 提供商 - 使用 OpenAI SDK（异步）"""
 
     _DEFAULT_MODELS = [
         AIModel("Qwen/Qwen2.5-72B-Instruct", "通义千问 2.5 72B", "siliconflow", max_tokens=8192),
@@ -28,17 +108,7 @@ class SiliconFlowProvider(BaseProvider):
     def __init__(self, api_key: str):
         super().__init__(api_key, base_url="https://api.siliconflow.cn/v1")
         self._init_models()
-        try:
-            from openai import OpenAI
-            print(f"[SiliconFlow] Initializing with API key: {api_key[:20]}...")
-            self.client = OpenAI(api_key=api_key, base_url=self.base_url)
-            print(f"[SiliconFlow] Client initialized successfully")
-        except ImportError as e:
-            print(f"[SiliconFlow] OpenAI SDK not installed: {e}")
-            self.client = None
-        except Exception as e:
-            print(f"[SiliconFlow] Error initializing OpenAI client: {e}")
-            self.client = None
+        self.sdk_available = _load_async_openai() is not None
 
     @property
     def provider_name(self) -> str:
@@ -52,22 +122,17 @@ class SiliconFlowProvider(BaseProvider):
     async def test_connection(self) -> Dict[str, Any]:
         """测试连接"""
         try:
-            if self.client is None:
+            if not self.sdk_available:
                 return {
                     "status": "failed",
                     "provider": "siliconflow",
                     "error": "OpenAI SDK not installed"
                 }
-            
-            # 在线程池中运行同步调用
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.client.chat.completions.create(
-                    model="Qwen/Qwen2.5-7B-Instruct",
-                    messages=[{"role": "user", "content": "test"}],
-                    max_tokens=10
-                )
+
+            await self._create_completion(
+                model="Qwen/Qwen2.5-7B-Instruct",
+                messages=[{"role": "user", "content": "test"}],
+                max_tokens=10
             )
             return {"status": "success", "provider": "siliconflow"}
         except Exception as e:
@@ -95,7 +160,7 @@ class SiliconFlowProvider(BaseProvider):
             raise ValueError(f"Model {model_id} not found")
 
         try:
-            if self.client is None:
+            if not self.sdk_available:
                 return {
                     "status": "failed",
                     "model": model_id,
@@ -103,18 +168,14 @@ class SiliconFlowProvider(BaseProvider):
                     "error": "OpenAI SDK not installed"
                 }
 
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.client.chat.completions.create(
-                    model=model_id.replace("Pro/", ""),
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens or 2048,
-                    **kwargs
-                )
+            response = await self._create_completion(
+                model=model_id.replace("Pro/", ""),
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens or 2048,
+                **kwargs
             )
-            
+
             return {
                 "status": "success",
                 "model": model_id,
@@ -148,33 +209,21 @@ class SiliconFlowProvider(BaseProvider):
             raise ValueError(f"Model {model_id} not found")
 
         try:
-            if self.client is None:
-                yield "[ERROR] OpenAI SDK not installed"
-                return
-
-            loop = asyncio.get_event_loop()
-            stream = await loop.run_in_executor(
-                None,
-                lambda: self.client.chat.completions.create(
-                    model=model_id.replace("Pro/", ""),
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens or 2048,
-                    stream=True,
-                    **kwargs
-                )
-            )
-            
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+            async for text in self._stream_completion(
+                model=model_id.replace("Pro/", ""),
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens or 2048,
+                **kwargs
+            ):
+                yield text
         except Exception as e:
             logger.error(f"SiliconFlow stream_call_model failed: {str(e)}")
             yield f"[ERROR] {str(e)}"
 
 
 class VolcanoEngineProvider(BaseProvider):
-    """火山引擎 API 提供商 - 使用官方 volcengine SDK"""
+    """火山引擎 API 提供商 - 方舟 OpenAI 兼容接口（httpx 异步 + SSE）"""
 
     _DEFAULT_MODELS = [
         AIModel("doubao-pro-32k", "豆包 Pro 32K", "volcanoengine", max_tokens=32768),
@@ -185,26 +234,6 @@ class VolcanoEngineProvider(BaseProvider):
     def __init__(self, api_key: str):
         super().__init__(api_key, base_url="https://ark.cn-beijing.volces.com/api/v3")
         self._init_models()
-        try:
-            # 火山引擎 SDK 需要更复杂的初始化
-            # api_key 格式通常是 "region|access_key|secret_key"
-            self.client = None
-            self._setup_volcengine_client()
-        except ImportError:
-            logger.warning("volcengine SDK not installed")
-            self.client = None
-
-    def _setup_volcengine_client(self):
-        """设置火山引擎客户端"""
-        try:
-            from volcengine.service import Service
-            
-            # 解析 API Key
-            # 火山引擎的 API 认证需要 access_key 和 secret_key
-            # 这里假设 api_key 是合并后的格式
-            self.service = Service('cv', 'cn-beijing', self.api_key)
-        except Exception as e:
-            logger.warning(f"Failed to setup volcengine client: {str(e)}")
 
     @property
     def provider_name(self) -> str:
@@ -215,55 +244,41 @@ class VolcanoEngineProvider(BaseProvider):
         for model in self._DEFAULT_MODELS:
             self.register_model(model)
 
+    def _http(self) -> httpx.AsyncClient:
+        return client_pool.client(
+            "httpx",
+            lambda: httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                },
+                timeout=httpx.Timeout(60.0, connect=10.0),
+            ),
+            self.api_key,
+            self.base_url,
+        )
+
     async def test_connection(self) -> Dict[str, Any]:
         """测试连接"""
+        # 火山引擎没有标准的 test_connection API，改为测试一个简单的调用
         try:
-            # 火山引擎没有标准的 test_connection API
-            # 改为测试一个简单的调用
-            loop = asyncio.get_event_loop()
-            
-            # 使用异步执行器运行同步调用
-            result = await loop.run_in_executor(
-                None,
-                self._test_connection_sync
-            )
-            return result
-        except Exception as e:
-            logger.error(f"VolcanoEngine test_connection failed: {str(e)}")
-            return {
-                "status": "failed",
-                "provider": "volcanoengine",
-                "error": str(e)
-            }
-
-    def _test_connection_sync(self) -> Dict[str, Any]:
-        """同步测试连接"""
-        try:
-            import requests
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            }
             payload = {
                 "model": "doubao-lite-32k",
                 "messages": [{"role": "user", "content": "test"}],
                 "max_tokens": 10,
             }
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                json=payload,
-                headers=headers,
-                timeout=10
-            )
+            async with self.slot():
+                response = await self._http().post("/chat/completions", json=payload, timeout=10)
             if response.status_code == 200:
                 return {"status": "success", "provider": "volcanoengine"}
-            else:
-                return {
-                    "status": "failed",
-                    "provider": "volcanoengine",
-                    "error": f"HTTP {response.status_code}"
-                }
+            return {
+                "status": "failed",
+                "provider": "volcanoengine",
+                "error": f"HTTP {response.status_code}"
+            }
         except Exception as e:
+            logger.error(f"VolcanoEngine test_connection failed: {str(e)}")
             return {
                 "status": "failed",
                 "provider": "volcanoengine",
@@ -287,41 +302,6 @@ class VolcanoEngineProvider(BaseProvider):
             raise ValueError(f"Model {model_id} not found")
 
         try:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                self._call_model_sync,
-                model_id,
-                messages,
-                temperature,
-                max_tokens,
-                kwargs
-            )
-            return result
-        except Exception as e:
-            logger.error(f"VolcanoEngine call_model failed: {str(e)}")
-            return {
-                "status": "failed",
-                "model": model_id,
-                "provider": "volcanoengine",
-                "error": str(e)
-            }
-
-    def _call_model_sync(
-        self,
-        model_id: str,
-        messages: List[Dict[str, str]],
-        temperature: float,
-        max_tokens: Optional[int],
-        kwargs: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """同步调用模型"""
-        try:
-            import requests
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            }
             payload = {
                 "model": model_id,
                 "messages": messages,
@@ -329,13 +309,9 @@ class VolcanoEngineProvider(BaseProvider):
                 "max_tokens": max_tokens or 2048,
                 **kwargs
             }
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                json=payload,
-                headers=headers,
-                timeout=60
-            )
-            
+            async with self.slot():
+                response = await self._http().post("/chat/completions", json=payload)
+
             if response.status_code == 200:
                 data = response.json()
                 return {
@@ -345,14 +321,14 @@ class VolcanoEngineProvider(BaseProvider):
                     "content": data.get("choices", [{}])[0].get("message", {}).get("content", ""),
                     "usage": data.get("usage", {}),
                 }
-            else:
-                return {
-                    "status": "failed",
-                    "model": model_id,
-                    "provider": "volcanoengine",
-                    "error": f"HTTP {response.status_code}: {response.text}"
-                }
+            return {
+                "status": "failed",
+                "model": model_id,
+                "provider": "volcanoengine",
+                "error": f"HTTP {response.status_code}: {response.text}"
+            }
         except Exception as e:
+            logger.error(f"VolcanoEngine call_model failed: {str(e)}")
             return {
                 "status": "failed",
                 "model": model_id,
@@ -373,11 +349,6 @@ class VolcanoEngineProvider(BaseProvider):
             raise ValueError(f"Model {model_id} not found")
 
         try:
-            import requests
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            }
             payload = {
                 "model": model_id,
                 "messages": messages,
@@ -386,36 +357,21 @@ class VolcanoEngineProvider(BaseProvider):
                 "stream": True,
                 **kwargs
             }
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                json=payload,
-                headers=headers,
-                timeout=60,
-                stream=True
-            )
-            
-            if response.status_code == 200:
-                for line in response.iter_lines():
-                    if line:
-                        line_str = line.decode('utf-8').strip()
-                        if line_str.startswith("data: "):
-                            try:
-                                data = json.loads(line_str[6:])
-                                if "choices" in data:
-                                    delta = data["choices"][0].get("delta", {})
-                                    if "content" in delta:
-                                        yield delta["content"]
-                            except:
-                                pass
-            else:
-                yield f"[ERROR] HTTP {response.status_code}: {response.text}"
+            async with self.slot():
+                async with self._http().stream("POST", "/chat/completions", json=payload) as response:
+                    if response.status_code != 200:
+                        body = (await response.aread()).decode("utf-8", errors="replace")
+                        yield f"[ERROR] HTTP {response.status_code}: {body}"
+                        return
+                    async for text in iter_sse_deltas(response):
+                        yield text
         except Exception as e:
             logger.error(f"VolcanoEngine stream_call_model failed: {str(e)}")
             yield f"[ERROR] {str(e)}"
 
 
-class TongyiProvider(BaseProvider):
-    """阿里通义万象 API 提供商 - 使用 DashScope SDK"""
+class TongyiProvider(_AsyncOpenAIMixin, BaseProvider):
+    """阿里通义 API 提供商 - DashScope OpenAI 兼容模式（异步）"""
 
     _DEFAULT_MODELS = [
         AIModel("qwen-turbo", "通义千问 Turbo", "tongyi", max_tokens=8192),
@@ -424,20 +380,9 @@ class TongyiProvider(BaseProvider):
     ]
 
     def __init__(self, api_key: str):
-        super().__init__(api_key, base_url="https://dashscope.aliyuncs.com/api/v1")
+        super().__init__(api_key, base_url="https://dashscope.aliyuncs.com/compatible-mode/v1")
         self._init_models()
-        try:
-            import dashscope
-            print(f"[Tongyi] Initializing with API key: {api_key[:20]}...")
-            dashscope.api_key = api_key
-            self.dashscope = dashscope
-            print(f"[Tongyi] Client initialized successfully")
-        except ImportError as e:
-            print(f"[Tongyi] DashScope SDK not installed: {e}")
-            self.dashscope = None
-        except Exception as e:
-            print(f"[Tongyi] Error initializing DashScope: {e}")
-            self.dashscope = None
+        self.sdk_available = _load_async_openai() is not None
 
     @property
     def provider_name(self) -> str:
@@ -451,47 +396,21 @@ class TongyiProvider(BaseProvider):
     async def test_connection(self) -> Dict[str, Any]:
         """测试连接"""
         try:
-            if self.dashscope is None:
+            if not self.sdk_available:
                 return {
                     "status": "failed",
                     "provider": "tongyi",
-                    "error": "DashScope SDK not installed"
+                    "error": "OpenAI SDK not installed"
                 }
-            
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                self._test_connection_sync
-            )
-            return result
-        except Exception as e:
-            logger.error(f"Tongyi test_connection failed: {str(e)}")
-            return {
-                "status": "failed",
-                "provider": "tongyi",
-                "error": str(e)
-            }
 
-    def _test_connection_sync(self) -> Dict[str, Any]:
-        """同步测试连接"""
-        try:
-            from dashscope import Generation
-            
-            response = Generation.call(
+            await self._create_completion(
                 model="qwen-turbo",
                 messages=[{"role": "user", "content": "test"}],
                 max_tokens=10
             )
-            
-            if response.status_code == 200:
-                return {"status": "success", "provider": "tongyi"}
-            else:
-                return {
-                    "status": "failed",
-                    "provider": "tongyi",
-                    "error": f"HTTP {response.status_code}"
-                }
+            return {"status": "success", "provider": "tongyi"}
         except Exception as e:
+            logger.error(f"Tongyi test_connection failed: {str(e)}")
             return {
                 "status": "failed",
                 "provider": "tongyi",
@@ -515,84 +434,35 @@ class TongyiProvider(BaseProvider):
             raise ValueError(f"Model {model_id} not found")
 
         try:
-            if self.dashscope is None:
+            if not self.sdk_available:
                 return {
                     "status": "failed",
                     "model": model_id,
                     "provider": "tongyi",
-                    "error": "DashScope SDK not installed"
+                    "error": "OpenAI SDK not installed"
                 }
 
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                self._call_model_sync,
-                model_id,
-                messages,
-                temperature,
-                max_tokens,
-                kwargs
-            )
-            return result
-        except Exception as e:
-            logger.error(f"Tongyi call_model failed: {str(e)}")
-            return {
-                "status": "failed",
-                "model": model_id,
-                "provider": "tongyi",
-                "error": str(e)
-            }
-
-    def _call_model_sync(
-        self,
-        model_id: str,
-        messages: List[Dict[str, str]],
-        temperature: float,
-        max_tokens: Optional[int],
-        kwargs: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """同步调用模型"""
-        try:
-            from dashscope import Generation
-            
-            response = Generation.call(
+            response = await self._create_completion(
                 model=model_id,
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens or 2048,
                 **kwargs
             )
-            
-            if response.status_code == 200:
-                # DashScope 的响应结构是：response.output.text
-                # choices 通常为 None，使用 text 字段获取内容
-                content = ""
-                if hasattr(response, 'output') and response.output:
-                    if hasattr(response.output, 'text'):
-                        content = response.output.text
-                    elif hasattr(response.output, 'choices') and response.output.choices:
-                        # 备选方案，如果有 choices
-                        content = response.output.choices[0].message.content
-                
-                return {
-                    "status": "success",
-                    "model": model_id,
-                    "provider": "tongyi",
-                    "content": content,
-                    "usage": {
-                        "prompt_tokens": response.usage.input_tokens if hasattr(response, 'usage') and response.usage else 0,
-                        "completion_tokens": response.usage.output_tokens if hasattr(response, 'usage') and response.usage else 0,
-                        "total_tokens": (response.usage.input_tokens + response.usage.output_tokens) if hasattr(response, 'usage') and response.usage else 0,
-                    },
-                }
-            else:
-                return {
-                    "status": "failed",
-                    "model": model_id,
-                    "provider": "tongyi",
-                    "error": f"HTTP {response.status_code}: {response.message}"
-                }
+            usage = response.usage
+            return {
+                "status": "success",
+                "model": model_id,
+                "provider": "tongyi",
+                "content": response.choices[0].message.content,
+                "usage": {
+                    "prompt_tokens": usage.prompt_tokens if usage else 0,
+                    "completion_tokens": usage.completion_tokens if usage else 0,
+                    "total_tokens": usage.total_tokens if usage else 0,
+                },
+            }
         except Exception as e:
+            logger.error(f"Tongyi call_model failed: {str(e)}")
             return {
                 "status": "failed",
                 "model": model_id,
@@ -613,73 +483,44 @@ class TongyiProvider(BaseProvider):
             raise ValueError(f"Model {model_id} not found")
 
         try:
-            if self.dashscope is None:
-                yield "[ERROR] DashScope SDK not installed"
-                return
-
-            from dashscope import Generation
-            
-            # DashScope 使用流式处理
-            response = Generation.call(
+            async for text in self._stream_completion(
                 model=model_id,
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens or 2048,
-                stream=True,
                 **kwargs
-            )
-            
-            for event in response:
-                if event.status_code == 200:
-                    # 使用 text 字段而不是 choices
-                    if hasattr(event, 'output') and event.output:
-                        if hasattr(event.output, 'text') and event.output.text:
-                            yield event.output.text
-                        elif hasattr(event.output, 'choices') and event.output.choices:
-                            # 备选方案
-                            yield event.output.choices[0].message.content
-                else:
-                    yield f"[ERROR] HTTP {event.status_code}: {event.message}"
-                    break
+            ):
+                yield text
         except Exception as e:
             logger.error(f"Tongyi stream_call_model failed: {str(e)}")
             yield f"[ERROR] {str(e)}"
 
 
-class OpenAICompatibleProvider(BaseProvider):
+class OpenAICompatibleProvider(_AsyncOpenAIMixin, BaseProvider):
     """通用 OpenAI 兼容 API 提供商"""
 
     def __init__(self, api_key: str, base_url: str):
         super().__init__(api_key, base_url=base_url)
-        self.client = None
         self._models_cache = None
         self._models_cache_time = None
         self._cache_ttl = 300  # 缓存 5 分钟
         self._init_client()
 
     def _init_client(self):
-        try:
-            from openai import OpenAI
-            
-            processed_base_url = self.base_url
-            if processed_base_url:
-                # Auto-correct base_url if user includes /models, /v1/models or /chat/completions
-                processed_base_url = processed_base_url.rstrip("/")
-                if processed_base_url.endswith("/v1/models"):
-                    processed_base_url = processed_base_url[:-10]
-                elif processed_base_url.endswith("/models"):
-                    processed_base_url = processed_base_url[:-7]
-                elif processed_base_url.endswith("/chat/completions"):
-                    processed_base_url = processed_base_url[:-17]
-            
-            logger.debug("[OpenAI Compatible] Initializing with Base URL: %s", processed_base_url)
-            self.client = OpenAI(api_key=self.api_key, base_url=processed_base_url)
-        except ImportError:
-            logger.warning("[OpenAI Compatible] OpenAI SDK not installed")
-            self.client = None
-        except Exception as e:
-            logger.warning("[OpenAI Compatible] Error initializing client: %s", e)
-            self.client = None
+        processed_base_url = self.base_url
+        if processed_base_url:
+            # Auto-correct base_url if user includes /models, /v1/models or /chat/completions
+            processed_base_url = processed_base_url.rstrip("/")
+            if processed_base_url.endswith("/v1/models"):
+                processed_base_url = processed_base_url[:-10]
+            elif processed_base_url.endswith("/models"):
+                processed_base_url = processed_base_url[:-7]
+            elif processed_base_url.endswith("/chat/completions"):
+                processed_base_url = processed_base_url[:-17]
+
+        logger.debug("[OpenAI Compatible] Initializing with Base URL: %s", processed_base_url)
+        self._client_base_url = processed_base_url
+        self.sdk_available = _load_async_openai() is not None
 
     @property
     def provider_name(self) -> str:
@@ -687,7 +528,7 @@ class OpenAICompatibleProvider(BaseProvider):
 
     async def get_available_models(self, model_type: Optional[str] = None, sub_type: Optional[str] = None) -> List[AIModel]:
         """获取可用模型列表，支持筛选"""
-        if not self.client:
+        if not self.sdk_available:
             return []
 
         # 检查缓存
@@ -698,7 +539,6 @@ class OpenAICompatibleProvider(BaseProvider):
                 logger.debug("[OpenAI Compatible] Using cached models (%d models)", len(self._models_cache))
                 return self._models_cache
 
-        loop = asyncio.get_event_loop()
         try:
             # 总是获取所有模型，忽略 type/sub_type 过滤参数，防止 API 不支持导致返回空
             logger.debug(
@@ -707,14 +547,8 @@ class OpenAICompatibleProvider(BaseProvider):
                 sub_type
             )
 
-            response = await loop.run_in_executor(
-                None,
-                self.client.models.list
-            )
-
-            # 使用 built-in type 函数
-            import builtins
-            logger.debug("[OpenAI Compatible] Raw response type: %s", builtins.type(response))
+            async with self.slot():
+                response = await self._openai().models.list()
 
             models: List[AIModel] = []
             # 检查 response 是否有 data 属性，或者它本身就是列表
@@ -747,38 +581,21 @@ class OpenAICompatibleProvider(BaseProvider):
 
     async def test_connection(self) -> Dict[str, Any]:
         """测试连接 - 只检查客户端是否可用，不获取模型列表"""
-        try:
-            if self.client is None:
-                return {"status": "failed", "error": "OpenAI SDK not installed"}
+        if not self.sdk_available:
+            return {"status": "failed", "error": "OpenAI SDK not installed"}
 
-            # 只检查客户端是否初始化成功，不实际调用 API
-            # 这样可以避免频繁的网络请求
-            return {
-                "status": "success",
-                "provider": "openai_compatible"
-            }
-        except Exception as e:
-            logger.error(f"OpenAI Compatible test_connection failed: {str(e)}")
-            return {
-                "status": "failed",
-                "provider": "openai_compatible",
-                "error": str(e)
-            }
+        # 只检查 SDK 是否可用，不实际调用 API，避免频繁的网络请求
+        return {
+            "status": "success",
+            "provider": "openai_compatible"
+        }
 
     async def call_model(self, model_id: str, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
-        if self.client is None:
+        if not self.sdk_available:
             return {"status": "failed", "error": "Client not initialized"}
-        
+
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.client.chat.completions.create(
-                    model=model_id,
-                    messages=messages,
-                    **kwargs
-                )
-            )
+            response = await self._create_completion(model=model_id, messages=messages, **kwargs)
             return {
                 "status": "success",
                 "content": response.choices[0].message.content,
@@ -790,24 +607,12 @@ class OpenAICompatibleProvider(BaseProvider):
             return {"status": "failed", "error": str(e)}
 
     async def stream_call_model(self, model_id: str, messages: List[Dict[str, str]], **kwargs):
-        if self.client is None:
+        if not self.sdk_available:
             yield "[ERROR] Client not initialized"
             return
 
         try:
-            loop = asyncio.get_event_loop()
-            stream = await loop.run_in_executor(
-                None,
-                lambda: self.client.chat.completions.create(
-                    model=model_id,
-                    messages=messages,
-                    stream=True,
-                    **kwargs
-                )
-            )
-            
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+            async for text in self._stream_completion(model=model_id, messages=messages, **kwargs):
+                yield text
         except Exception as e:
             yield f"[ERROR] {str(e)}"
@@ -36,6 +36,7 @@ import httpx
 import json
 import asyncio
 import re
+import time
 
 from httpx import Response
 
@@ -109,6 +110,12 @@ class BaseCrawler:
             else:
                 raise
 
+        # 由 CrawlerClientRegistry 共享时为 True：async with 退出不关闭连接池
+        # (True when shared through CrawlerClientRegistry: leaving `async with` keeps the pool open)
+        self.shared = False
+        self.leases = 0
+        self.last_used = time.monotonic()
+
     async def fetch_response(self, endpoint: str) -> Response:
         """获取数据 (Get data)
 
@@ -351,7 +358,12 @@ class BaseCrawler:
         await self.aclient.aclose()
 
     async def __aenter__(self):
+        self.leases += 1
+        self.last_used = time.monotonic()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.aclient.aclose()
+        self.leases -= 1
+        self.last_used = time.monotonic()
+        if not self.shared:
+            await self.aclient.aclose()
@@ -38,7 +38,7 @@ import time  # 时间操作
 import yaml  # 配置文件
 
 # 基础爬虫客户端和哔哩哔哩API端点
-from crawlers.base_crawler import BaseCrawler
+from crawlers.client_registry import crawler_registry
 from crawlers.bilibili.web.endpoints import BilibiliAPIEndpoints
 # 哔哩哔哩工具类
 from crawlers.bilibili.web.utils import EndpointGenerator, bv2av, ResponseAnalyzer
@@ -76,8 +76,8 @@ class BilibiliWebCrawler:
     async def fetch_one_video(self, bv_id: str) -> dict:
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建请求endpoint
             endpoint = f"{BilibiliAPIEndpoints.POST_DETAIL}?bvid={bv_id}"
@@ -89,8 +89,8 @@ class BilibiliWebCrawler:
     async def fetch_video_playurl(self, bv_id: str, cid: str, qn: str = "64") -> dict:
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 通过模型生成基本请求参数
             params = PlayUrl(bvid=bv_id, cid=cid, qn=qn)
@@ -110,8 +110,8 @@ class BilibiliWebCrawler:
         """
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 通过模型生成基本请求参数
             params = UserPostVideos(mid=uid, pn=pn)
@@ -126,8 +126,8 @@ class BilibiliWebCrawler:
     async def fetch_collect_folders(self, uid: str) -> dict:
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建请求endpoint
             endpoint = f"{BilibiliAPIEndpoints.COLLECT_FOLDERS}?up_mid={uid}"
@@ -146,8 +146,8 @@ class BilibiliWebCrawler:
         """
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         # 发送请求，获取请求响应结果
         async with base_crawler as crawler:
             endpoint = f"{BilibiliAPIEndpoints.COLLECT_VIDEOS}?media_id={folder_id}&pn={pn}&ps=20&keyword=&order=mtime&type=0&tid=0&platform=web"
@@ -158,8 +158,8 @@ class BilibiliWebCrawler:
     async def fetch_user_profile(self, uid: str) -> dict:
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 通过模型生成基本请求参数
             params = UserProfile(mid=uid)
@@ -174,8 +174,8 @@ class BilibiliWebCrawler:
     async def fetch_com_popular(self, pn: int) -> dict:
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 通过模型生成基本请求参数
             params = ComPopular(pn=pn)
@@ -192,8 +192,8 @@ class BilibiliWebCrawler:
         sort = 1
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建请求endpoint
             endpoint = f"{BilibiliAPIEndpoints.VIDEO_COMMENTS}?type=1&oid={bv_id}&sort={sort}&nohot=0&ps=20&pn={pn}"
@@ -211,8 +211,8 @@ class BilibiliWebCrawler:
         """
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建请求endpoint
             endpoint = f"{BilibiliAPIEndpoints.COMMENT_REPLY}?type=1&oid={bv_id}&root={rpid}&&ps=20&pn={pn}"
@@ -224,8 +224,8 @@ class BilibiliWebCrawler:
     async def fetch_user_dynamic(self, uid: str, offset: str) -> dict:
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 通过模型生成基本请求参数
             params = UserDynamic(host_mid=uid, offset=offset)
@@ -241,8 +241,8 @@ class BilibiliWebCrawler:
     async def fetch_video_danmaku(self, cid: str):
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建请求endpoint
             endpoint = f"https://comment.bilibili.com/{cid}.xml"
@@ -254,8 +254,8 @@ class BilibiliWebCrawler:
     async def fetch_live_room_detail(self, room_id: str) -> dict:
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建请求endpoint
             endpoint = f"{BilibiliAPIEndpoints.LIVEROOM_DETAIL}?room_id={room_id}"
@@ -267,8 +267,8 @@ class BilibiliWebCrawler:
     async def fetch_live_videos(self, room_id: str) -> dict:
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建请求endpoint
             endpoint = f"{BilibiliAPIEndpoints.LIVE_VIDEOS}?cid={room_id}&quality=4"
@@ -280,8 +280,8 @@ class BilibiliWebCrawler:
     async def fetch_live_streamers(self, area_id: str, pn: int):
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建请求endpoint
             endpoint = f"{BilibiliAPIEndpoints.LIVE_STREAMER}?platform=web&parent_area_id={area_id}&page={pn}"
@@ -300,8 +300,8 @@ class BilibiliWebCrawler:
     async def fetch_video_parts(self, bv_id: str) -> str:
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建请求endpoint
             endpoint = f"{BilibiliAPIEndpoints.VIDEO_PARTS}?bvid={bv_id}"
@@ -313,8 +313,8 @@ class BilibiliWebCrawler:
     async def fetch_all_live_areas(self) -> dict:
         # 获取请求头信息
         kwargs = await self.get_bilibili_headers()
-        # 创建基础爬虫对象
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫对象
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建请求endpoint
             endpoint = BilibiliAPIEndpoints.LIVE_AREAS
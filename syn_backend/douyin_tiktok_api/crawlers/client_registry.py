@@ -0,0 +1,198 @@
+# ==============================================================================
+# 长连接爬虫客户端注册表 (Long-lived crawler client registry)
+#
+# 各平台 handler 原本每次请求都新建 BaseCrawler（即新的 httpx.AsyncClient、
+# transport 与 semaphore），用完即关闭。这里按 (事件循环, 代理, 请求头) 复用
+# BaseCrawler 实例，使同一身份的请求共享连接池；空闲超时的客户端会被回收。
+# ==============================================================================
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from crawlers.base_crawler import BaseCrawler
+from crawlers.utils.logger import logger
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw.strip())
+    except ValueError:
+        return default
+
+
+class CrawlerClientRegistry:
+    """
+    共享 BaseCrawler 注册表 (Shared BaseCrawler registry)
+
+    - 键：事件循环 + 代理 + 请求头（Cookie 只以摘要参与计算）
+    - handler 仍以 ``async with crawler`` 使用，共享实例退出时不会关闭连接
+    - 空闲超过 idle_timeout 或超出 max_clients 时关闭最久未使用且无人借用的实例
+    - 每个事件循环上有一个后台任务每 sweep_interval 秒回收一次空闲实例，
+      没有共享实例后自行退出，下一次 get() 时重新启动
+    """
+
+    def __init__(self, idle_timeout: int = 300, max_clients: int = 64):
+        self.idle_timeout = max(0, idle_timeout)
+        self.max_clients = max(1, max_clients)
+        self._clients: Dict[Tuple[int, str], Tuple[asyncio.AbstractEventLoop, BaseCrawler]] = {}
+        self.sweep_interval = max(1.0, self.idle_timeout / 2)
+        self._lock = threading.Lock()
+        self._sweepers: Dict[int, asyncio.Task] = {}
+        self._metrics = {"hits": 0, "misses": 0, "evicted_idle": 0, "evicted_lru": 0}
+
+    @classmethod
+    def from_env(cls) -> "CrawlerClientRegistry":
+        return cls(
+            idle_timeout=_env_int("CRAWLER_CLIENT_IDLE_TIMEOUT", 300),
+            max_clients=_env_int("CRAWLER_CLIENT_MAX", 64),
+        )
+
+    @staticmethod
+    def _identity(proxies: Optional[dict], crawler_headers: Optional[dict], options: dict) -> str:
+        headers = dict(crawler_headers or {})
+        for name in list(headers):
+            if name.lower() == "cookie":
+                headers[name] = hashlib.sha1(str(headers[name]).encode("utf-8")).hexdigest()
+        raw = json.dumps(
+            {"proxies": proxies or {}, "headers": headers, "options": options},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, proxies: dict = None, crawler_headers: dict = None, **options) -> BaseCrawler:
+        """
+        获取共享的 BaseCrawler (Get a shared BaseCrawler)
+
+        Args:
+            proxies (dict): 代理 (Proxies)
+            crawler_headers (dict): 请求头 (Request headers)
+            **options: 透传给 BaseCrawler 的其它参数 (max_retries / timeout ...)
+
+        Returns:
+            BaseCrawler: 与相同身份的其它请求共享连接池的实例
+        """
+        loop = asyncio.get_running_loop()
+        key = (id(loop), self._identity(proxies, crawler_headers, options))
+        stale = []
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None and entry[0] is loop and not entry[1].aclient.is_closed:
+                crawler = entry[1]
+                crawler.last_used = time.monotonic()
+                self._metrics["hits"] += 1
+            else:
+                crawler = BaseCrawler(proxies=proxies, crawler_headers=crawler_headers, **options)
+                crawler.shared = True
+                self._clients[key] = (loop, crawler)
+                self._metrics["misses"] += 1
+                stale = self._collect_stale(loop, keep=key)
+
+        for crawler_loop, victim in stale:
+            # 只能在所属事件循环上关闭；循环已关闭时连接已随之失效，直接丢弃
+            if crawler_loop is loop:
+                loop.create_task(victim.close())
+        self._ensure_sweeper(loop)
+        return crawler
+
+    def _ensure_sweeper(self, loop: asyncio.AbstractEventLoop) -> None:
+        if not self.idle_timeout:
+            return
+        sweeper = self._sweepers.get(id(loop))
+        if sweeper is not None and not sweeper.done() and sweeper.get_loop() is loop:
+            return
+        self._sweepers[id(loop)] = loop.create_task(self._sweep(loop))
+
+    async def _sweep(self, loop: asyncio.AbstractEventLoop) -> None:
+        """定期回收本事件循环上的空闲客户端 (Periodic idle eviction on this loop)"""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.warning("回收空闲爬虫客户端失败：{0}".format(e))
+            with self._lock:
+                if not any(crawler_loop is loop for crawler_loop, _ in self._clients.values()):
+                    if self._sweepers.get(id(loop)) is asyncio.current_task():
+                        del self._sweepers[id(loop)]
+                    return
+
+    def _collect_stale(self, loop: asyncio.AbstractEventLoop, keep: Tuple[int, str]):
+        now = time.monotonic()
+        victims = []
+        for key, (crawler_loop, crawler) in list(self._clients.items()):
+            if key == keep:
+                continue
+            if crawler_loop.is_closed():
+                victims.append(self._clients.pop(key))
+            elif (
+                self.idle_timeout
+                and crawler.leases <= 0
+                and now - crawler.last_used > self.idle_timeout
+            ):
+                victims.append(self._clients.pop(key))
+                self._metrics["evicted_idle"] += 1
+
+        overflow = len(self._clients) - self.max_clients
+        if overflow > 0:
+            idle = sorted(
+                (
+                    (crawler.last_used, key)
+                    for key, (crawler_loop, crawler) in self._clients.items()
+                    if key != keep and crawler.leases <= 0 and crawler_loop is loop
+                ),
+            )
+            for _, key in idle[:overflow]:
+                victims.append(self._clients.pop(key))
+                self._metrics["evicted_lru"] += 1
+        return victims
+
+    async def evict_idle(self) -> int:
+        """关闭当前事件循环上空闲超时的客户端 (Close idle clients on the running loop)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            victims = self._collect_stale(loop, keep=(0, ""))
+        closed = 0
+        for crawler_loop, crawler in victims:
+            if crawler_loop is loop:
+                await crawler.close()
+                closed += 1
+        if closed:
+            logger.info("回收空闲爬虫客户端 {0} 个".format(closed))
+        return closed
+
+    async def close_all(self) -> None:
+        loop = asyncio.get_running_loop()
+        sweeper = self._sweepers.pop(id(loop), None)
+        if sweeper is not None and sweeper is not asyncio.current_task():
+            sweeper.cancel()
+        with self._lock:
+            victims = [
+                self._clients.pop(key)
+                for key, (crawler_loop, _) in list(self._clients.items())
+                if crawler_loop is loop
+            ]
+        for _, crawler in victims:
+            await crawler.close()
+
+    def stats(self) -> dict:
+        lookups = self._metrics["hits"] + self._metrics["misses"]
+        return {
+            **self._metrics,
+            "hit_rate": round(self._metrics["hits"] / lookups, 4) if lookups else None,
+            "clients": len(self._clients),
+            "leased": sum(1 for _, crawler in self._clients.values() if crawler.leases > 0),
+            "idle_timeout": self.idle_timeout,
+            "max_clients": self.max_clients,
+        }
+
+
+crawler_registry = CrawlerClientRegistry.from_env()
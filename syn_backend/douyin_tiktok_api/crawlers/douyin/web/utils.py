@@ -38,6 +38,7 @@ import random
 import re
 import time
 import urllib
+from collections import deque
 from pathlib import Path
 from typing import Union
 from urllib.parse import urlencode, quote
@@ -106,12 +107,7 @@ class TokenManager:
     }
 
     @classmethod
-    def gen_real_msToken(cls) -> str:
-        """
-        生成真实的msToken,当出现错误时返回虚假的值
-        (Generate a real msToken and return a false value when an error occurs)
-        """
-
+    def _msToken_request(cls):
         payload = json.dumps(
             {
                 "magic": cls.token_conf["magic"],
@@ -125,7 +121,31 @@ class TokenManager:
             "User-Agent": cls.token_conf["User-Agent"],
             "Content-Type": "application/json",
         }
+        return payload, headers
 
+    @classmethod
+    def _parse_msToken(cls, response, strict: bool = False) -> str:
+        msToken = str(httpx.Cookies(response.cookies).get("msToken"))
+        if len(msToken) not in [120, 128]:
+            if strict:
+                raise APIResponseError("Douyin msToken 返回长度异常：{0}".format(msToken))
+            logger.warning(
+                "Douyin msToken 返回长度异常：{0}，将使用虚假 msToken。".format(msToken)
+            )
+            return cls.gen_false_msToken()
+        return msToken
+
+    @classmethod
+    def gen_real_msToken(cls) -> str:
+        """
+        生成真实的msToken,当出现错误时返回虚假的值
+        (Generate a real msToken and return a false value when an error occurs)
+
+        同步版本会阻塞调用线程，异步代码请使用 agen_real_msToken 或 token_pool
+        (Blocking; async code should use agen_real_msToken or token_pool)
+        """
+
+        payload, headers = cls._msToken_request()
         transport = httpx.HTTPTransport(retries=5)
         with _build_httpx_client(transport=transport, proxies=cls.proxies, timeout=10.0) as client:
             max_attempts = 3
@@ -145,15 +165,7 @@ class TokenManager:
                         return cls.gen_false_msToken()
 
                     response.raise_for_status()
-
-                    msToken = str(httpx.Cookies(response.cookies).get("msToken"))
-                    if len(msToken) not in [120, 128]:
-                        logger.warning(
-                            "Douyin msToken 返回长度异常：{0}，将使用虚假 msToken。".format(msToken)
-                        )
-                        return cls.gen_false_msToken()
-
-                    return msToken
+                    return cls._parse_msToken(response)
 
                 except Exception as e:
                     if attempt < max_attempts:
@@ -163,11 +175,86 @@ class TokenManager:
                     logger.info("将使用本地生成的虚假msToken参数，以继续请求。")
                     return cls.gen_false_msToken()
 
+    @classmethod
+    async def afetch_real_msToken(cls, client: httpx.AsyncClient = None) -> str:
+        """
+        异步获取真实的msToken，失败时抛出异常而不是返回虚假的值
+        (Async fetch of a real msToken; raises on failure instead of returning a false value)
+        """
+
+        payload, headers = cls._msToken_request()
+        own_client = client is None
+        if own_client:
+            client = _build_httpx_async_client(
+                transport=httpx.AsyncHTTPTransport(retries=2), proxies=cls.proxies, timeout=10.0
+            )
+        try:
+            max_attempts = 3
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    response = await client.post(
+                        cls.token_conf["url"], content=payload, headers=headers
+                    )
+                    if response.status_code in {429, 500, 502, 503, 504} and attempt < max_attempts:
+                        await asyncio.sleep(0.5 * attempt)
+                        continue
+
+                    response.raise_for_status()
+                    return cls._parse_msToken(response, strict=True)
+
+                except APIResponseError:
+                    raise
+                except Exception:
+                    if attempt < max_attempts:
+                        await asyncio.sleep(0.5 * attempt)
+                        continue
+                    raise
+        finally:
+            if own_client:
+                await client.aclose()
+
+    @classmethod
+    async def agen_real_msToken(cls, client: httpx.AsyncClient = None) -> str:
+        """
+        异步生成真实的msToken，失败时返回虚假的值
+        (Async variant of gen_real_msToken; never blocks the event loop)
+        """
+
+        try:
+            return await cls.afetch_real_msToken(client)
+        except Exception as e:
+            logger.error("请求Douyin msToken API时发生错误：{0}".format(e))
+            logger.info("将使用本地生成的虚假msToken参数，以继续请求。")
+            return cls.gen_false_msToken()
+
     @classmethod
     def gen_false_msToken(cls) -> str:
         """生成随机msToken (Generate random msToken)"""
         return gen_random_str(126) + "=="
 
+    @classmethod
+    def _raise_ttwid_error(cls, exc: Exception):
+        if isinstance(exc, httpx.RequestError):
+            # 捕获所有与 httpx 请求相关的异常情况 (Captures all httpx request-related exceptions)
+            raise APIConnectionError(
+                "请求端点失败，请检查当前网络环境。 链接：{0}，代理：{1}，异常类名：{2}，异常详细信息：{3}"
+                .format(cls.ttwid_conf["url"], cls.proxies, cls.__name__, exc)
+            )
+        # 捕获 httpx 的状态代码错误 (captures specific status code errors from httpx)
+        if exc.response.status_code == 401:
+            raise APIUnauthorizedError(
+                "参数验证失败，请更新 Douyin_TikTok_Download_API 配置文件中的 {0}，以匹配 {1} 新规则"
+                .format("ttwid", "douyin")
+            )
+
+        elif exc.response.status_code == 404:
+            raise APINotFoundError("ttwid无法找到API端点")
+        else:
+            raise APIResponseError("链接：{0}，状态码 {1}：{2} ".format(
+                exc.response.url, exc.response.status_code, exc.response.text
+            )
+            )
+
     @classmethod
     def gen_ttwid(cls) -> str:
         """
@@ -186,28 +273,30 @@ class TokenManager:
                 ttwid = str(httpx.Cookies(response.cookies).get("ttwid"))
                 return ttwid
 
-            except httpx.RequestError as exc:
-                # 捕获所有与 httpx 请求相关的异常情况 (Captures all httpx request-related exceptions)
-                raise APIConnectionError(
-                    "请求端点失败，请检查当前网络环境。 链接：{0}，代理：{1}，异常类名：{2}，异常详细信息：{3}"
-                    .format(cls.ttwid_conf["url"], cls.proxies, cls.__name__, exc)
-                )
+            except (httpx.RequestError, httpx.HTTPStatusError) as exc:
+                cls._raise_ttwid_error(exc)
 
-            except httpx.HTTPStatusError as e:
-                # 捕获 httpx 的状态代码错误 (captures specific status code errors from httpx)
-                if e.response.status_code == 401:
-                    raise APIUnauthorizedError(
-                        "参数验证失败，请更新 Douyin_TikTok_Download_API 配置文件中的 {0}，以匹配 {1} 新规则"
-                        .format("ttwid", "douyin")
-                    )
+    @classmethod
+    async def agen_ttwid(cls, client: httpx.AsyncClient = None) -> str:
+        """
+        异步生成ttwid (Async variant of gen_ttwid)
+        """
 
-                elif e.response.status_code == 404:
-                    raise APINotFoundError("ttwid无法找到API端点")
-                else:
-                    raise APIResponseError("链接：{0}，状态码 {1}：{2} ".format(
-                        e.response.url, e.response.status_code, e.response.text
-                    )
-                    )
+        own_client = client is None
+        if own_client:
+            client = httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(retries=2), timeout=10.0)
+        try:
+            response = await client.post(
+                cls.ttwid_conf["url"], content=cls.ttwid_conf["data"]
+            )
+            response.raise_for_status()
+            return str(httpx.Cookies(response.cookies).get("ttwid"))
+
+        except (httpx.RequestError, httpx.HTTPStatusError) as exc:
+            cls._raise_ttwid_error(exc)
+        finally:
+            if own_client:
+                await client.aclose()
 
 
 class VerifyFpManager:
@@ -246,6 +335,177 @@ class VerifyFpManager:
         return cls.gen_verify_fp()
 
 
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw.strip())
+    except ValueError:
+        return default
+
+
+class TokenPool:
+    """
+    预取令牌池 (Pre-fetched token pool)
+
+    后台任务提前拉取 msToken / verify_fp 并按 TTL 维护，热路径上 get() 为 O(1)
+    且从不等待网络；拉取失败的令牌不会入池，池为空时才回退到本地生成的令牌。
+    (A background task keeps msToken / verify_fp values fresh; get() is O(1) and never
+    awaits the network. Failed fetches are never pooled; generated tokens are only
+    handed out when the pool is empty.)
+    """
+
+    KINDS = ("msToken", "verify_fp")
+
+    def __init__(
+            self,
+            size: int = 4,
+            ttl: dict = None,
+            refresh_margin: int = 120,
+            refresh_interval: int = 30,
+    ):
+        self.size = max(1, size)
+        self.ttl = {"msToken": 1800, "verify_fp": 3600, **(ttl or {})}
+        # 距过期不足 refresh_margin 秒的令牌视为需要补充 (tokens this close to expiry get replaced)
+        self.refresh_margin = max(0, refresh_margin)
+        self.refresh_interval = max(1, refresh_interval)
+        self._tokens = {kind: deque() for kind in self.KINDS}
+        self._runner = None
+        self._refill_now = None
+        self._metrics = {"hits": 0, "fallbacks": 0, "fetched": 0, "fetch_errors": 0}
+
+    @classmethod
+    def from_env(cls) -> "TokenPool":
+        return cls(
+            size=_env_int("DOUYIN_TOKEN_POOL_SIZE", 4),
+            ttl={
+                "msToken": _env_int("DOUYIN_MSTOKEN_TTL", 1800),
+                "verify_fp": _env_int("DOUYIN_VERIFY_FP_TTL", 3600),
+            },
+            refresh_margin=_env_int("DOUYIN_TOKEN_REFRESH_MARGIN", 120),
+            refresh_interval=_env_int("DOUYIN_TOKEN_REFRESH_INTERVAL", 30),
+        )
+
+    def get(self, kind: str) -> str:
+        """
+        取一个未过期的令牌（轮转使用），池为空时返回本地生成的令牌
+        (Hand out a live token round-robin; falls back to a generated token when empty)
+        """
+        self._ensure_started()
+        tokens = self._tokens[kind]
+        now = time.monotonic()
+        while tokens:
+            value, expires_at = tokens[0]
+            if expires_at <= now:
+                tokens.popleft()
+                continue
+            tokens.rotate(-1)
+            self._metrics["hits"] += 1
+            if len(tokens) < self.size and self._refill_now is not None:
+                self._refill_now.set()
+            return value
+
+        self._metrics["fallbacks"] += 1
+        if self._refill_now is not None:
+            self._refill_now.set()
+        return self._fallback(kind)
+
+    @staticmethod
+    def _fallback(kind: str) -> str:
+        if kind == "msToken":
+            return TokenManager.gen_false_msToken()
+        return VerifyFpManager.gen_verify_fp()
+
+    def _ensure_started(self) -> None:
+        if self._runner is not None and not self._runner.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 同步上下文（如模块导入时）不启动后台任务 (no loop: serve fallbacks only)
+            return
+        self._refill_now = asyncio.Event()
+        self._runner = loop.create_task(self._run())
+
+    def _missing(self, kind: str) -> int:
+        now = time.monotonic()
+        fresh = deque(item for item in self._tokens[kind] if item[1] > now)
+        self._tokens[kind] = fresh
+        deadline = now + self.refresh_margin
+        return max(0, self.size - sum(1 for _, expires_at in fresh if expires_at > deadline))
+
+    async def _fetch(self, kind: str, client: httpx.AsyncClient) -> str:
+        if kind == "msToken":
+            # 失败时抛异常：虚假 msToken 不能按真实令牌的 TTL 入池 (never pool a false msToken)
+            return await TokenManager.afetch_real_msToken(client)
+        return VerifyFpManager.gen_verify_fp()
+
+    async def refill(self, client: httpx.AsyncClient) -> None:
+        for kind in self.KINDS:
+            missing = self._missing(kind)
+            if not missing:
+                continue
+            results = await asyncio.gather(
+                *[self._fetch(kind, client) for _ in range(missing)], return_exceptions=True
+            )
+            expires_at = time.monotonic() + self.ttl[kind]
+            for value in results:
+                if isinstance(value, Exception) or not value or value == "None":
+                    self._metrics["fetch_errors"] += 1
+                    continue
+                self._tokens[kind].append((value, expires_at))
+                self._metrics["fetched"] += 1
+            # 即将过期的旧令牌仍可使用，但总量不超过 2 倍容量 (bound the pool size)
+            while len(self._tokens[kind]) > self.size * 2:
+                oldest = min(self._tokens[kind], key=lambda item: item[1])
+                self._tokens[kind].remove(oldest)
+
+    async def _run(self) -> None:
+        client = _build_httpx_async_client(
+            transport=httpx.AsyncHTTPTransport(retries=2), proxies=TokenManager.proxies, timeout=10.0
+        )
+        try:
+            while True:
+                try:
+                    await self.refill(client)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("刷新抖音令牌池失败：{0}".format(e))
+                self._refill_now.clear()
+                try:
+                    await asyncio.wait_for(self._refill_now.wait(), timeout=self.refresh_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await client.aclose()
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._runner = None
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            **self._metrics,
+            "running": bool(self._runner and not self._runner.done()),
+            "available": {
+                kind: sum(1 for _, expires_at in tokens if expires_at > now)
+                for kind, tokens in self._tokens.items()
+            },
+        }
+
+
+token_pool = TokenPool.from_env()
+
+
 class BogusManager:
 
     # 字符串方法生成X-Bogus参数
@@ -40,7 +40,7 @@ from urllib.parse import urlencode, quote  # URL编码
 import yaml  # 配置文件
 
 # 基础爬虫客户端和抖音API端点
-from crawlers.base_crawler import BaseCrawler
+from crawlers.client_registry import crawler_registry
 from crawlers.douyin.web.endpoints import DouyinAPIEndpoints
 # 抖音接口数据请求模型
 from crawlers.douyin.web.models import (
@@ -69,6 +69,10 @@ with open(f"{path}/config.yaml", "r", encoding="utf-8") as f:
 
 class DouyinWebCrawler:
 
+    def __init__(self, cookie: str = None):
+        # 实例级 Cookie（按账号采集时使用，不改写全局配置）
+        self.cookie = cookie
+
     # 从配置文件中获取抖音的请求头
     async def get_douyin_headers(self):
         douyin_config = config["TokenManager"]["douyin"]
@@ -77,7 +81,7 @@ class DouyinWebCrawler:
                 "Accept-Language": douyin_config["headers"]["Accept-Language"],
                 "User-Agent": douyin_config["headers"]["User-Agent"],
                 "Referer": douyin_config["headers"]["Referer"],
-                "Cookie": douyin_config["headers"]["Cookie"],
+                "Cookie": self.cookie or douyin_config["headers"]["Cookie"],
             },
             "proxies": {"http://": douyin_config["proxies"]["http"], "https://": douyin_config["proxies"]["https"]},
         }
@@ -89,8 +93,8 @@ class DouyinWebCrawler:
     async def fetch_one_video(self, aweme_id: str):
         # 获取抖音的实时Cookie
         kwargs = await self.get_douyin_headers()
-        # 创建一个基础爬虫
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫（相同代理/请求头复用连接池）
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建一个作品详情的BaseModel参数
             params = PostDetail(aweme_id=aweme_id)
@@ -112,7 +116,7 @@ class DouyinWebCrawler:
     # 获取用户发布作品数据
     async def fetch_user_post_videos(self, sec_user_id: str, max_cursor: int, count: int):
         kwargs = await self.get_douyin_headers()
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             params = UserPost(sec_user_id=sec_user_id, max_cursor=max_cursor, count=count)
             # endpoint = BogusManager.xb_model_2_endpoint(
@@ -132,7 +136,7 @@ class DouyinWebCrawler:
     # 获取用户喜欢作品数据
     async def fetch_user_like_videos(self, sec_user_id: str, max_cursor: int, count: int):
         kwargs = await self.get_douyin_headers()
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             params = UserLike(sec_user_id=sec_user_id, max_cursor=max_cursor, count=count)
             # endpoint = BogusManager.xb_model_2_endpoint(
@@ -152,7 +156,7 @@ class DouyinWebCrawler:
     async def fetch_user_collection_videos(self, cookie: str, cursor: int = 0, count: int = 20):
         kwargs = await self.get_douyin_headers()
         kwargs["headers"]["Cookie"] = cookie
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             params = UserCollection(cursor=cursor, count=count)
             endpoint = BogusManager.xb_model_2_endpoint(
@@ -164,7 +168,7 @@ class DouyinWebCrawler:
     # 获取用户合辑作品数据
     async def fetch_user_mix_videos(self, mix_id: str, cursor: int = 0, count: int = 20):
         kwargs = await self.get_douyin_headers()
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             params = UserMix(mix_id=mix_id, cursor=cursor, count=count)
             endpoint = BogusManager.xb_model_2_endpoint(
@@ -176,7 +180,7 @@ class DouyinWebCrawler:
     # 获取用户直播流数据
     async def fetch_user_live_videos(self, webcast_id: str, room_id_str=""):
         kwargs = await self.get_douyin_headers()
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             params = UserLive(web_rid=webcast_id, room_id_str=room_id_str)
             endpoint = BogusManager.xb_model_2_endpoint(
@@ -188,7 +192,7 @@ class DouyinWebCrawler:
     # 获取指定用户的直播流数据
     async def fetch_user_live_videos_by_room_id(self, room_id: str):
         kwargs = await self.get_douyin_headers()
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             params = UserLive2(room_id=room_id)
             endpoint = BogusManager.xb_model_2_endpoint(
@@ -200,7 +204,7 @@ class DouyinWebCrawler:
     # 获取直播间送礼用户排行榜
     async def fetch_live_gift_ranking(self, room_id: str, rank_type: int = 30):
         kwargs = await self.get_douyin_headers()
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             params = LiveRoomRanking(room_id=room_id, rank_type=rank_type)
             endpoint = BogusManager.xb_model_2_endpoint(
@@ -212,7 +216,7 @@ class DouyinWebCrawler:
     # 获取指定用户的信息
     async def handler_user_profile(self, sec_user_id: str):
         kwargs = await self.get_douyin_headers()
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             params = UserProfile(sec_user_id=sec_user_id)
             endpoint = BogusManager.xb_model_2_endpoint(
@@ -224,7 +228,7 @@ class DouyinWebCrawler:
     # 获取指定视频的评论数据
     async def fetch_video_comments(self, aweme_id: str, cursor: int = 0, count: int = 20):
         kwargs = await self.get_douyin_headers()
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             params = PostComments(aweme_id=aweme_id, cursor=cursor, count=count)
             endpoint = BogusManager.xb_model_2_endpoint(
@@ -236,7 +240,7 @@ class DouyinWebCrawler:
     # 获取指定视频的评论回复数据
     async def fetch_video_comments_reply(self, item_id: str, comment_id: str, cursor: int = 0, count: int = 20):
         kwargs = await self.get_douyin_headers()
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             params = PostCommentsReply(item_id=item_id, comment_id=comment_id, cursor=cursor, count=count)
             endpoint = BogusManager.xb_model_2_endpoint(
@@ -248,7 +252,7 @@ class DouyinWebCrawler:
     # 获取抖音热榜数据
     async def fetch_hot_search_result(self):
         kwargs = await self.get_douyin_headers()
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             params = BaseRequestModel()
             endpoint = BogusManager.xb_model_2_endpoint(
@@ -262,14 +266,14 @@ class DouyinWebCrawler:
     # 生成真实msToken
     async def gen_real_msToken(self, ):
         result = {
-            "msToken": TokenManager().gen_real_msToken()
+            "msToken": await TokenManager.agen_real_msToken()
         }
         return result
 
     # 生成ttwid
     async def gen_ttwid(self, ):
         result = {
-            "ttwid": TokenManager().gen_ttwid()
+            "ttwid": await TokenManager.agen_ttwid()
         }
         return result
 
@@ -39,7 +39,7 @@ import yaml  # 配置文件
 import os  # 系统操作
 
 # 基础爬虫客户端和TikTokAPI端点
-from crawlers.base_crawler import BaseCrawler
+from crawlers.client_registry import crawler_registry
 from crawlers.tiktok.app.endpoints import TikTokAPIEndpoints
 from crawlers.utils.utils import model_to_query_string
 
@@ -90,8 +90,8 @@ class TikTokAPPCrawler:
         params = FeedVideoDetail(aweme_id=aweme_id)
         param_str = model_to_query_string(params)
         url = f"{TikTokAPIEndpoints.HOME_FEED}?{param_str}"
-        # 创建一个基础爬虫
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫（相同代理/请求头复用连接池）
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             response = await crawler.fetch_get_json(url)
             response = response.get("aweme_list")[0]
@@ -39,7 +39,7 @@ import yaml  # 配置文件
 import os  # 系统操作
 
 # 基础爬虫客户端和TikTokAPI端点
-from crawlers.base_crawler import BaseCrawler
+from crawlers.client_registry import crawler_registry
 from crawlers.tiktok.web.endpoints import TikTokAPIEndpoints
 from crawlers.utils.utils import extract_valid_urls
 
@@ -100,8 +100,8 @@ class TikTokWebCrawler:
     async def fetch_one_video(self, itemId: str):
         # 获取TikTok的实时Cookie
         kwargs = await self.get_tiktok_headers()
-        # 创建一个基础爬虫
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫（相同代理/请求头复用连接池）
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建一个作品详情的BaseModel参数
             params = PostDetail(itemId=itemId)
@@ -116,8 +116,8 @@ class TikTokWebCrawler:
     async def fetch_user_profile(self, secUid: str, uniqueId: str):
         # 获取TikTok的实时Cookie
         kwargs = await self.get_tiktok_headers()
-        # 创建一个基础爬虫
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫（相同代理/请求头复用连接池）
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建一个用户详情的BaseModel参数
             params = UserProfile(secUid=secUid, uniqueId=uniqueId)
@@ -133,8 +133,8 @@ class TikTokWebCrawler:
         # 获取TikTok的实时Cookie
         kwargs = await self.get_tiktok_headers()
         # proxies = {"http://": 'http://43.159.29.191:24144', "https://": 'http://43.159.29.191:24144'}
-        # 创建一个基础爬虫
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫（相同代理/请求头复用连接池）
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建一个用户作品的BaseModel参数
             params = UserPost(secUid=secUid, cursor=cursor, count=count, coverFormat=coverFormat)
@@ -149,8 +149,8 @@ class TikTokWebCrawler:
     async def fetch_user_like(self, secUid: str, cursor: int = 0, count: int = 30, coverFormat: int = 2):
         # 获取TikTok的实时Cookie
         kwargs = await self.get_tiktok_headers()
-        # 创建一个基础爬虫
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫（相同代理/请求头复用连接池）
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建一个用户点赞的BaseModel参数
             params = UserLike(secUid=secUid, cursor=cursor, count=count, coverFormat=coverFormat)
@@ -167,8 +167,8 @@ class TikTokWebCrawler:
         # 获取TikTok的实时Cookie
         kwargs = await self.get_tiktok_headers()
         kwargs["headers"]["Cookie"] = cookie
-        # 创建一个基础爬虫
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫（相同代理/请求头复用连接池）
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建一个用户收藏的BaseModel参数
             params = UserCollect(cookie=cookie, secUid=secUid, cursor=cursor, count=count, coverFormat=coverFormat)
@@ -183,8 +183,8 @@ class TikTokWebCrawler:
     async def fetch_user_play_list(self, secUid: str, cursor: int = 0, count: int = 30):
         # 获取TikTok的实时Cookie
         kwargs = await self.get_tiktok_headers()
-        # 创建一个基础爬虫
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫（相同代理/请求头复用连接池）
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建一个用户播放列表的BaseModel参数
             params = UserPlayList(secUid=secUid, cursor=cursor, count=count)
@@ -199,8 +199,8 @@ class TikTokWebCrawler:
     async def fetch_user_mix(self, mixId: str, cursor: int = 0, count: int = 30):
         # 获取TikTok的实时Cookie
         kwargs = await self.get_tiktok_headers()
-        # 创建一个基础爬虫
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫（相同代理/请求头复用连接池）
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建一个用户合辑的BaseModel参数
             params = UserMix(mixId=mixId, cursor=cursor, count=count)
@@ -216,8 +216,8 @@ class TikTokWebCrawler:
         # 获取TikTok的实时Cookie
         kwargs = await self.get_tiktok_headers()
         # proxies = {"http://": 'http://43.159.18.174:25263', "https://": 'http://43.159.18.174:25263'}
-        # 创建一个基础爬虫
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫（相同代理/请求头复用连接池）
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建一个作品评论的BaseModel参数
             params = PostComment(aweme_id=aweme_id, cursor=cursor, count=count, current_region=current_region)
@@ -233,8 +233,8 @@ class TikTokWebCrawler:
                                        current_region: str = ""):
         # 获取TikTok的实时Cookie
         kwargs = await self.get_tiktok_headers()
-        # 创建一个基础爬虫
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫（相同代理/请求头复用连接池）
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建一个作品评论的BaseModel参数
             params = PostCommentReply(item_id=item_id, comment_id=comment_id, cursor=cursor, count=count,
@@ -250,8 +250,8 @@ class TikTokWebCrawler:
     async def fetch_user_fans(self, secUid: str, count: int = 30, maxCursor: int = 0, minCursor: int = 0):
         # 获取TikTok的实时Cookie
         kwargs = await self.get_tiktok_headers()
-        # 创建一个基础爬虫
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫（相同代理/请求头复用连接池）
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建一个用户关注的BaseModel参数
             params = UserFans(secUid=secUid, count=count, maxCursor=maxCursor, minCursor=minCursor)
@@ -266,8 +266,8 @@ class TikTokWebCrawler:
     async def fetch_user_follow(self, secUid: str, count: int = 30, maxCursor: int = 0, minCursor: int = 0):
         # 获取TikTok的实时Cookie
         kwargs = await self.get_tiktok_headers()
-        # 创建一个基础爬虫
-        base_crawler = BaseCrawler(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
+        # 获取共享的基础爬虫（相同代理/请求头复用连接池）
+        base_crawler = crawler_registry.get(proxies=kwargs["proxies"], crawler_headers=kwargs["headers"])
         async with base_crawler as crawler:
             # 创建一个用户关注的BaseModel参数
             params = UserFollow(secUid=secUid, count=count, maxCursor=maxCursor, minCursor=minCursor)
@@ -345,8 +345,11 @@ chromium_channel = "chromium"
                     context_str += f"- {key}: {value}\n"
                 full_prompt = f"{goal}{context_str}"
 
-            # 运行 agent
-            result = await self._agent.run(full_prompt)
+            # 运行 agent（本次运行内的只读查询共享缓存）
+            from fastapi_app.services.tool_gateway import tool_gateway
+
+            with tool_gateway.run_scope():
+                result = await self._agent.run(full_prompt)
 
             # 提取执行步骤
             steps = []
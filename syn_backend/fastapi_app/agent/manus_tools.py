@@ -26,6 +26,8 @@ _ensure_openmanus_path()
 
 from app.tool.base import BaseTool, ToolResult
 
+from fastapi_app.services.tool_gateway import tool_gateway
+
 
 # 后端 API 基础 URL（本地）
 API_BASE_URL = os.getenv("MANUS_API_BASE_URL", "http://localhost:7000/api/v1")
@@ -52,7 +54,7 @@ async def _fetch_valid_account_ids(platform: Optional[int] = None) -> List[str]:
     if platform_code:
         params["platform"] = platform_code
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with tool_gateway.client(timeout=30.0) as client:
         response = await client.get(f"{API_BASE_URL}/accounts", params=params)
         response.raise_for_status()
         result = response.json()
@@ -123,7 +125,7 @@ class ListAccountsTool(BaseTool):
                 "all": None             # 全部 -> 不过滤
             }
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with tool_gateway.client(timeout=30.0) as client:
                 params = {}
                 if platform:
                     params["platform"] = platform
@@ -194,7 +196,7 @@ class ListFilesTool(BaseTool):
     ) -> ToolResult:
         """列出视频文件"""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with tool_gateway.client(timeout=30.0) as client:
                 params = {"limit": limit}
                 if keyword:
                     params["keyword"] = keyword
@@ -265,7 +267,7 @@ class GetFileDetailTool(BaseTool):
     async def execute(self, file_id: int, **kwargs) -> ToolResult:
         """获取文件详情"""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with tool_gateway.client(timeout=30.0) as client:
                 response = await client.get(f"{API_BASE_URL}/files/{file_id}")
                 response.raise_for_status()
                 # 修复：API 直接返回 FileResponse JSON，不需要 .get("data")
@@ -328,7 +330,7 @@ class GenerateAIMetadataTool(BaseTool):
     ) -> ToolResult:
         """生成AI元数据"""
         try:
-            async with httpx.AsyncClient(timeout=180.0) as client:
+            async with tool_gateway.client(timeout=180.0) as client:
                 response = await client.post(
                     f"{API_BASE_URL}/files/batch-generate-metadata",
                     json={
@@ -556,7 +558,7 @@ class PublishBatchVideosTool(BaseTool):
             if items:
                 batch_data["items"] = items
 
-            async with httpx.AsyncClient(timeout=180.0) as client:
+            async with tool_gateway.client(timeout=180.0) as client:
                 response = await client.post(
                     f"{API_BASE_URL}/publish/batch",
                     json=batch_data
@@ -678,7 +680,7 @@ class CreatePublishPlanTool(BaseTool):
                 "time_point": time_point or ""
             }
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with tool_gateway.client(timeout=60.0) as client:
                 response = await client.post(
                     f"{API_BASE_URL}/publish/presets",
                     json=preset_data
@@ -715,7 +717,7 @@ class ListPublishPlansTool(BaseTool):
     async def execute(self, **kwargs) -> ToolResult:
         """列出发布预设"""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with tool_gateway.client(timeout=30.0) as client:
                 response = await client.get(f"{API_BASE_URL}/publish/presets")
                 response.raise_for_status()
                 result = response.json()
@@ -784,7 +786,7 @@ class UsePresetToPublishTool(BaseTool):
             if override_accounts:
                 params["override_accounts"] = override_accounts
 
-            async with httpx.AsyncClient(timeout=180.0) as client:
+            async with tool_gateway.client(timeout=180.0) as client:
                 response = await client.post(
                     f"{API_BASE_URL}/publish/presets/{preset_id}/use",
                     params=params
@@ -830,7 +832,7 @@ class GetTaskStatusTool(BaseTool):
     async def execute(self, task_id: str, **kwargs) -> ToolResult:
         """获取任务状态"""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with tool_gateway.client(timeout=30.0) as client:
                 response = await client.get(
                     f"{API_BASE_URL}/tasks/{task_id}"
                 )
@@ -884,7 +886,7 @@ class ListTasksStatusTool(BaseTool):
     ) -> ToolResult:
         """列出任务状态"""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with tool_gateway.client(timeout=30.0) as client:
                 params = {"limit": limit}
                 if status and status != "all":
                     params["status"] = status
@@ -970,7 +972,7 @@ class DataAnalyticsTool(BaseTool):
     ) -> ToolResult:
         """获取数据分析报告"""
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with tool_gateway.client(timeout=60.0) as client:
                 params = {
                     "report_type": report_type
                 }
@@ -1041,7 +1043,7 @@ class ExternalVideoCrawlerTool(BaseTool):
     ) -> ToolResult:
         """执行外部视频数据抓取"""
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with tool_gateway.client(timeout=60.0) as client:
                 crawl_data = {
                     "url": url,
                     "minimal": minimal
@@ -1157,7 +1159,7 @@ class AccountVideoCrawlerTool(BaseTool):
             resolved_user_id = user_id
             resolved_name = None
 
-            async with httpx.AsyncClient(timeout=120.0) as client:
+            async with tool_gateway.client(timeout=120.0) as client:
                 # 如果没有 user_id，尝试通过 name 从账号库匹配
                 if not resolved_user_id:
                     if not name:
@@ -27,6 +27,8 @@ _ensure_openmanus_path()
 
 from app.tool.base import BaseTool, ToolResult
 
+from fastapi_app.services.tool_gateway import tool_gateway
+
 # 后端 API 基础 URL（本地）
 API_BASE_URL = os.getenv("MANUS_API_BASE_URL", "http://localhost:7000/api/v1")
 
@@ -86,7 +88,7 @@ class IPPoolTool(BaseTool):
     ) -> ToolResult:
         """执行 IP 池操作"""
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with tool_gateway.client(timeout=60.0) as client:
                 if action == "list":
                     response = await client.get(f"{API_BASE_URL}/ip-pool")
                     response.raise_for_status()
@@ -180,7 +182,7 @@ class DataAnalyticsTool(BaseTool):
     ) -> ToolResult:
         """获取数据分析报告"""
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with tool_gateway.client(timeout=60.0) as client:
                 params = {
                     "report_type": report_type
                 }
@@ -249,7 +251,7 @@ class RunScriptTool(BaseTool):
     ) -> ToolResult:
         """执行后端脚本"""
         try:
-            async with httpx.AsyncClient(timeout=300.0) as client:
+            async with tool_gateway.client(timeout=300.0) as client:
                 script_data = {
                     "script_name": script_name,
                     "args": args or {}
@@ -324,7 +326,7 @@ class CookieManagerTool(BaseTool):
     ) -> ToolResult:
         """执行 Cookie 操作"""
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with tool_gateway.client(timeout=60.0) as client:
                 if action == "list":
                     params = {}
                     if platform:
@@ -417,7 +419,7 @@ class ExternalVideoCrawlerTool(BaseTool):
     ) -> ToolResult:
         """执行外部视频数据抓取"""
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with tool_gateway.client(timeout=60.0) as client:
                 crawl_data = {
                     "url": url,
                     "minimal": minimal
@@ -532,7 +534,7 @@ class AccountVideoCrawlerTool(BaseTool):
             platform = (platform or "").lower()
             resolved_user_id = user_id
             resolved_name = None
-            async with httpx.AsyncClient(timeout=120.0) as client:
+            async with tool_gateway.client(timeout=120.0) as client:
                 if not resolved_user_id:
                     if not name:
                         return ToolResult(error="请提供 user_id 或 name（账号库名称）")
@@ -25,6 +25,8 @@ _ensure_openmanus_path()
 
 from app.tool.base import BaseTool, ToolResult
 
+from fastapi_app.services.tool_gateway import tool_gateway
+
 # TikTok/Douyin/Bilibili API 基础 URL (已集成到后端 7000 端口)
 # 注意: douyin_tiktok_api 已挂载在 /api/v1/douyin-tiktok 路径下
 DOUYIN_API_BASE_URL = os.getenv("DOUYIN_API_BASE_URL", "http://localhost:7000/api/v1/douyin-tiktok/api/douyin/web")
@@ -69,7 +71,7 @@ class DouyinFetchUserInfoTool(BaseTool):
             if "douyin.com/user/" in url_or_sec_user_id:
                 sec_user_id = url_or_sec_user_id.split("/user/")[-1].split("?")[0]
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with tool_gateway.client(timeout=60.0) as client:
                 response = await client.get(
                     f"{DOUYIN_API_BASE_URL}/fetch_user_detail",
                     params={"sec_user_id": sec_user_id}
@@ -141,7 +143,7 @@ class DouyinFetchUserVideosTool(BaseTool):
             if "douyin.com/user/" in url_or_sec_user_id:
                 sec_user_id = url_or_sec_user_id.split("/user/")[-1].split("?")[0]
 
-            async with httpx.AsyncClient(timeout=90.0) as client:
+            async with tool_gateway.client(timeout=90.0) as client:
                 response = await client.get(
                     f"{DOUYIN_API_BASE_URL}/fetch_user_post_videos",
                     params={
@@ -239,7 +241,7 @@ class DouyinFetchVideoDetailTool(BaseTool):
 
             aweme_id = extract_aweme_id(url_or_id)
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with tool_gateway.client(timeout=60.0) as client:
                 response = await client.get(
                     f"{DOUYIN_API_BASE_URL}/fetch_one_video",
                     params={"aweme_id": aweme_id}
@@ -310,7 +312,7 @@ class TikTokFetchUserInfoTool(BaseTool):
                 unique_id = url_or_unique_id.split("@")[-1].split("?")[0].split("/")[0]
             unique_id = unique_id.lstrip("@")
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with tool_gateway.client(timeout=60.0) as client:
                 response = await client.get(
                     f"{TIKTOK_API_BASE_URL}/fetch_user_detail",
                     params={"unique_id": unique_id}
@@ -379,7 +381,7 @@ class TikTokFetchUserVideosTool(BaseTool):
                 unique_id = url_or_unique_id.split("@")[-1].split("?")[0].split("/")[0]
             unique_id = unique_id.lstrip("@")
 
-            async with httpx.AsyncClient(timeout=90.0) as client:
+            async with tool_gateway.client(timeout=90.0) as client:
                 response = await client.get(
                     f"{TIKTOK_API_BASE_URL}/fetch_user_post_videos",
                     params={
@@ -450,7 +452,7 @@ class TikTokFetchVideoDetailTool(BaseTool):
             if "tiktok.com/" in url_or_video_id and "/video/" in url_or_video_id:
                 video_id = url_or_video_id.split("/video/")[-1].split("?")[0]
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with tool_gateway.client(timeout=60.0) as client:
                 response = await client.get(
                     f"{TIKTOK_API_BASE_URL}/fetch_one_video",
                     params={"aweme_id": video_id}
@@ -520,7 +522,7 @@ class BilibiliFetchUserInfoTool(BaseTool):
             if "space.bilibili.com/" in url_or_uid:
                 uid = url_or_uid.split("/")[-1].split("?")[0]
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with tool_gateway.client(timeout=60.0) as client:
                 response = await client.get(
                     f"{BILIBILI_API_BASE_URL}/fetch_user_profile",
                     params={"uid": uid}
@@ -583,7 +585,7 @@ class BilibiliFetchUserVideosTool(BaseTool):
             if "space.bilibili.com/" in url_or_uid:
                 uid = url_or_uid.split("/")[-1].split("?")[0]
 
-            async with httpx.AsyncClient(timeout=90.0) as client:
+            async with tool_gateway.client(timeout=90.0) as client:
                 response = await client.get(
                     f"{BILIBILI_API_BASE_URL}/fetch_user_post_videos",
                     params={
@@ -656,7 +658,7 @@ class BilibiliFetchVideoDetailTool(BaseTool):
                 # 处理短链接（需要先解析）
                 pass
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with tool_gateway.client(timeout=60.0) as client:
                 response = await client.get(
                     f"{BILIBILI_API_BASE_URL}/fetch_one_video",
                     params={"bv_id": bvid}
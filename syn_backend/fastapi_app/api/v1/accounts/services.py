@@ -5,7 +5,6 @@
 import sys
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-import asyncio
 import random
 
 # 添加路径以导入现有模块
@@ -225,33 +224,16 @@ class AccountService:
             sample_accounts = accounts[:sample_size]
 
             validator = FastCookieValidator()
-            tasks = [
-                validator.validate_cookie_fast(
-                    acc.get("platform"),
-                    account_file=acc.get("cookie_file"),
-                    fallback=fallback,
-                )
-                for acc in sample_accounts
-            ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
             checked = 0
             valid = 0
             expired = 0
             details = []
-            for acc, result in zip(sample_accounts, results):
+            async for acc, result in validator.validate_many(sample_accounts, fallback=fallback):
                 checked += 1
-                new_status = "expired"
-                error = None
-                elapsed_ms = None
-                source = None
-                if isinstance(result, Exception):
-                    error = str(result)
-                else:
-                    new_status = "valid" if result.get("status") == "valid" else "expired"
-                    error = result.get("error")
-                    elapsed_ms = result.get("elapsed_ms")
-                    source = result.get("source")
+                new_status = "valid" if result.get("status") == "valid" else "expired"
+                error = result.get("error")
+                elapsed_ms = result.get("elapsed_ms")
+                source = result.get("source")
 
                 self.manager.update_account_status(acc.get("platform"), acc.get("account_id"), new_status)
                 if new_status == "valid":
@@ -112,43 +112,47 @@ async def stream_manus_execution(
             agent._agent.current_step = 0
             agent._agent.state = AgentState.RUNNING
 
-            while step_count < max_dynamic_steps:
-                step_count += 1
-
-                try:
-                    yield f"data: {json.dumps({'type': 'thinking', 'content': f'执行第 {step_count} 步...'})}\n\n"
-
-                    # 执行单步
-                    step_result = await agent._agent.step()
-
-                    # 检查是否有工具调用
-                    if hasattr(agent._agent, 'tool_calls') and agent._agent.tool_calls:
-                        last_tool_call = agent._agent.tool_calls[-1]
-
-                        # 发送工具调用事件
-                        tool_data = {
-                            "type": "tool_call",
-                            "step": step_count,
-                            "tool_name": last_tool_call.function.name if hasattr(last_tool_call, 'function') else "unknown",
-                            "arguments": str(last_tool_call.function.arguments) if hasattr(last_tool_call, 'function') else "{}",
-                        }
-                        yield f"data: {json.dumps(tool_data)}\n\n"
-                        await asyncio.sleep(0.1)
+            from fastapi_app.services.tool_gateway import tool_gateway
 
-                    # 发送步骤结果
-                    yield f"data: {json.dumps({'type': 'step_complete', 'step': step_count, 'result': str(step_result)[:200]})}\n\n"
+            # 本次运行内的只读工具查询共享缓存
+            with tool_gateway.run_scope():
+                while step_count < max_dynamic_steps:
+                    step_count += 1
 
-                    # 检查是否完成
-                    if agent._agent.state == AgentState.FINISHED:
-                        yield f"data: {json.dumps({'type': 'thinking', 'content': '任务已完成!'})}\n\n"
-                        break
+                    try:
+                        yield f"data: {json.dumps({'type': 'thinking', 'content': f'执行第 {step_count} 步...'})}\n\n"
+
+                        # 执行单步
+                        step_result = await agent._agent.step()
+
+                        # 检查是否有工具调用
+                        if hasattr(agent._agent, 'tool_calls') and agent._agent.tool_calls:
+                            last_tool_call = agent._agent.tool_calls[-1]
+
+                            # 发送工具调用事件
+                            tool_data = {
+                                "type": "tool_call",
+                                "step": step_count,
+                                "tool_name": last_tool_call.function.name if hasattr(last_tool_call, 'function') else "unknown",
+                                "arguments": str(last_tool_call.function.arguments) if hasattr(last_tool_call, 'function') else "{}",
+                            }
+                            yield f"data: {json.dumps(tool_data)}\n\n"
+                            await asyncio.sleep(0.1)
 
-                    await asyncio.sleep(0.1)
+                        # 发送步骤结果
+                        yield f"data: {json.dumps({'type': 'step_complete', 'step': step_count, 'result': str(step_result)[:200]})}\n\n"
 
-                except Exception as step_error:
-                    logger.error(f"Step {step_count} failed: {step_error}")
-                    yield f"data: {json.dumps({'type': 'error', 'step': step_count, 'error': str(step_error)})}\n\n"
-                    break
+                        # 检查是否完成
+                        if agent._agent.state == AgentState.FINISHED:
+                            yield f"data: {json.dumps({'type': 'thinking', 'content': '任务已完成!'})}\n\n"
+                            break
+
+                        await asyncio.sleep(0.1)
+
+                    except Exception as step_error:
+                        logger.error(f"Step {step_count} failed: {step_error}")
+                        yield f"data: {json.dumps({'type': 'error', 'step': step_count, 'error': str(step_error)})}\n\n"
+                        break
 
         # 阶段 5: 发送最终结果
         final_result = {
@@ -389,13 +389,17 @@ async def chat(request: ChatRequest):
                 detail="Chat 服务未配置，请在 AI 模型配置页面添加 'chat' 类型的配置"
             )
 
-        # 使用 OpenAI 兼容客户端
-        from openai import AsyncOpenAI
+        # 使用共享的 OpenAI 兼容客户端（同一凭据复用连接池）
+        from ai_service.base_provider import client_pool
+        from ai_service.providers import shared_openai_client
 
-        client = AsyncOpenAI(
-            api_key=config['api_key'],
-            base_url=config.get('base_url', 'https://api.siliconflow.cn/v1')
+        client = shared_openai_client(
+            config['api_key'],
+            config.get('base_url', 'https://api.siliconflow.cn/v1'),
         )
+        if client is None:
+            raise HTTPException(status_code=500, detail="OpenAI SDK not installed")
+        chat_slots = client_pool.semaphore("chat")
         model_name = config.get('model_name', 'deepseek-ai/DeepSeek-V3')
 
         # 构建消息列表（优先使用 messages，其次使用 context + message）
@@ -448,11 +452,12 @@ async def chat(request: ChatRequest):
         # 调用模型
         if not request.stream:
             # 非流式响应
-            response = await client.chat.completions.create(
-                model=model_name,
-                messages=messages,
-                stream=False
-            )
+            async with chat_slots:
+                response = await client.chat.completions.create(
+                    model=model_name,
+                    messages=messages,
+                    stream=False
+                )
 
             return {
                 "status": "success",
@@ -460,18 +465,21 @@ async def chat(request: ChatRequest):
                 "role": "assistant"
             }
         else:
-            # 流式响应
+            # 流式响应：逐块 await，客户端读得慢时上游也随之暂停；断开时关闭上游流并释放名额
             async def generate():
                 try:
-                    stream = await client.chat.completions.create(
-                        model=model_name,
-                        messages=messages,
-                        stream=True
-                    )
-
-                    async for chunk in stream:
-                        if chunk.choices[0].delta.content:
-                            yield chunk.choices[0].delta.content
+                    async with chat_slots:
+                        stream = await client.chat.completions.create(
+                            model=model_name,
+                            messages=messages,
+                            stream=True
+                        )
+                        try:
+                            async for chunk in stream:
+                                if chunk.choices and chunk.choices[0].delta.content:
+                                    yield chunk.choices[0].delta.content
+                        finally:
+                            await stream.close()
 
                 except Exception as e:
                     yield f"[ERROR] {str(e)}"
@@ -1840,6 +1848,7 @@ class FunctionCallingRequest(BaseModel):
     messages: List[Dict[str, str]]
     max_iterations: Optional[int] = 30
     auto_execute: Optional[bool] = True
+    stream: Optional[bool] = False
 
 
 @router.post("/function-calling", summary="执行 Function Calling（原生）")
@@ -1857,7 +1866,8 @@ async def function_calling(request: FunctionCallingRequest):
         request: {
             "messages": [{"role": "user", "content": "..."}],
             "max_iterations": 3,  # 最大迭代次数
-            "auto_execute": true  # 是否自动执行工具调用
+            "auto_execute": true,  # 是否自动执行工具调用
+            "stream": false  # true 时以 SSE 推送 iteration / assistant / tool_result / final 事件
         }
 
     Returns:
@@ -1883,6 +1893,27 @@ async def function_calling(request: FunctionCallingRequest):
         # 注册工具
         service.register_tools(ALL_TOOLS)
 
+        if request.stream:
+            # 每个工具完成即推送结果，不必等整轮结束
+            async def generate():
+                async for event in service.stream(
+                    messages=request.messages,
+                    max_iterations=request.max_iterations,
+                    auto_execute=request.auto_execute
+                ):
+                    yield f"data: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+                yield f"data: {json.dumps({'type': 'done'})}\n\n"
+
+            return StreamingResponse(
+                generate(),
+                media_type="text/event-stream",
+                headers={
+                    "Cache-Control": "no-cache",
+                    "Connection": "keep-alive",
+                    "X-Accel-Buffering": "no"
+                }
+            )
+
         # 执行 Function Calling
         result = await service.call(
             messages=request.messages,
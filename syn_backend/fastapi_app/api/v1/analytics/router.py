@@ -5,6 +5,7 @@ from typing import Optional
 from fastapi import APIRouter, Query, HTTPException, Body
 from pydantic import BaseModel, Field
 from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi_app.core.config import settings
 from myUtils.analytics_db import (
     ensure_analytics_schema,
@@ -12,8 +13,9 @@ from myUtils.analytics_db import (
     get_analytics_videos,
     get_chart_data,
     insert_video_analytics,
+    iter_video_analytics_export,
     update_video_analytics,
-    upsert_video_analytics_by_key,
+    upsert_video_analytics_bulk,
 )
 from fastapi_app.api.v1.analytics.douyin_sec_uid_resolver import resolve_douyin_sec_uid as resolve_douyin_sec_uid_raw
 from datetime import datetime
@@ -25,6 +27,7 @@ import re
 import asyncio
 import json
 import subprocess
+from myUtils.collection_engine import CollectionCheckpoint, CollectionCursorStore, CollectionSweep, sweep_key
 from myUtils.cookie_manager import cookie_manager
 from platforms.path_utils import resolve_cookie_file
 
@@ -214,15 +217,6 @@ def _set_bilibili_cookie(cookie_header: str) -> None:
         return
 
 
-async def _set_douyin_cookie(crawler: Any, cookie_header: str) -> None:
-    if not cookie_header or crawler is None:
-        return
-    try:
-        await crawler.update_cookie(cookie_header)
-    except Exception:
-        return
-
-
 def _read_cookie_file_for_account(account: Dict[str, Any]) -> Dict[str, Any]:
     return cookie_manager._read_cookie_file(account.get("cookie_file") or "")
 
@@ -370,6 +364,7 @@ async def _collect_bilibili_accounts(account_ids: Optional[List[str]] = None) ->
                 vlist = _parse_bilibili_vlist(payload)
                 if not vlist:
                     break
+                records = []
                 for item in vlist:
                     video_id = item.get("bvid") or item.get("aid")
                     if not video_id:
@@ -397,7 +392,8 @@ async def _collect_bilibili_accounts(account_ids: Optional[List[str]] = None) ->
                         "share_count": item.get("share") or 0,
                         "raw_data": item,
                     }
-                    upsert_video_analytics_by_key(DB_PATH, platform="bilibili", video_id=str(video_id), data=record)
+                    records.append(record)
+                upsert_video_analytics_bulk(DB_PATH, records, platform="bilibili")
                 pn += 1
             success += 1
         except Exception as exc:  # noqa: BLE001
@@ -433,18 +429,15 @@ async def _collect_douyin_tiktok_accounts(
     if account_ids:
         accounts = [acc for acc in accounts if acc.get("account_id") in set(account_ids)]
 
-    success = 0
-    failed: List[Dict[str, Any]] = []
-
     max_pages = 100
+    cursor_store = CollectionCursorStore(DB_PATH)
 
-    for account in accounts:
+    async def _collect_account(account: Dict[str, Any]) -> Dict[str, Any]:
         account_id = account.get("account_id")
         cookie_data = cookie_manager._read_cookie_file(account.get("cookie_file") or "")
         cookie_header = _build_cookie_header(cookie_data, domain_filter="douyin.com") or _build_cookie_header(cookie_data)
-        crawler = DouyinWebCrawler()
-        if cookie_header:
-            await _set_douyin_cookie(crawler, cookie_header)
+        # 每个账号使用自己的 Cookie：客户端按 Cookie 在注册表中复用，不再逐个改写 config.yaml
+        crawler = DouyinWebCrawler(cookie=cookie_header or None)
 
         sec_user_id = (sec_user_ids or {}).get(account_id)
         if not sec_user_id:
@@ -456,11 +449,12 @@ async def _collect_douyin_tiktok_accounts(
             if sec_user_id:
                 _persist_douyin_sec_uid(account, sec_user_id)
         if not sec_user_id:
-            failed.append({"account_id": account_id, "error": "missing sec_user_id"})
-            continue
+            return {"success": False, "error": "missing sec_user_id"}
 
         cursor = 0
         pages = 0
+        # 增量：已知且超出本轮刷新层级（hot/warm/cold）的作品不再写库，整页都是则停止翻页
+        plan = await asyncio.to_thread(cursor_store.plan, "douyin", account_id)
         try:
             while pages < max_pages:
                 pages += 1
@@ -469,12 +463,19 @@ async def _collect_douyin_tiktok_accounts(
                 if not aweme_list:
                     break
 
+                page = [
+                    {"video_id": str(item.get("aweme_id") or ""), "publish_time": item.get("create_time")}
+                    for item in aweme_list
+                    if isinstance(item, dict)
+                ]
+                keep_ids = {v["video_id"] for v in plan.select(page)}
+                records = []
                 for item in aweme_list:
                     if not isinstance(item, dict):
                         continue
                     stats = item.get("statistics") or {}
                     video_id = item.get("aweme_id") or ""
-                    if not video_id:
+                    if not video_id or str(video_id) not in keep_ids:
                         continue
                     cover = None
                     try:
@@ -497,18 +498,36 @@ async def _collect_douyin_tiktok_accounts(
                         "collect_count": stats.get("collect_count") or 0,
                         "raw_data": item,
                     }
-                    upsert_video_analytics_by_key(DB_PATH, platform="douyin", video_id=str(video_id), data=record)
+                    records.append(record)
+                if records:
+                    upsert_video_analytics_bulk(DB_PATH, records, platform="douyin")
 
                 data = payload.get("data") if isinstance(payload, dict) else {}
                 has_more = data.get("has_more") if isinstance(data, dict) else None
                 cursor = data.get("max_cursor", cursor + page_size) if isinstance(data, dict) else cursor + page_size
-                if not has_more:
+                if not plan.observe(page, cursor) or not has_more:
                     break
-            success += 1
+            await asyncio.to_thread(cursor_store.commit, plan)
+            return {"success": True, "count": plan.kept, **plan.summary()}
         except Exception as exc:  # noqa: BLE001
-            failed.append({"account_id": account_id, "error": str(exc)})
+            return {"success": False, "error": str(exc)}
 
-    return {"success": success, "failed": len(failed), "errors": failed}
+    async def _collect_one(account: Dict[str, Any], sweep: CollectionSweep) -> Dict[str, Any]:
+        async with sweep.slot("api", "douyin"):
+            return await _collect_account(account)
+
+    # 账号之间并发（按平台限流，带全局截止时间与检查点），不再逐个串行
+    sweep = CollectionSweep(
+        sweep_key("analytics_douyin", sorted(account_ids) if account_ids else None),
+        checkpoint=CollectionCheckpoint(DB_PATH),
+    )
+    results = await sweep.run(accounts, _collect_one)
+    failed = [
+        {"account_id": d.get("account_id"), "error": d.get("error")}
+        for d in results["details"]
+        if not d.get("success")
+    ]
+    return {"success": results["success"], "failed": len(failed), "errors": failed}
 
 
 async def _collect_xhs_mediacrawler_accounts(account_ids: Optional[List[str]] = None) -> Dict[str, Any]:
@@ -565,6 +584,75 @@ async def get_analytics(
 
 
 
+EXPORT_HEADERS = [
+    'ID', '视频ID', '标题', '平台', '视频链接',
+    '发布日期', '播放量', '点赞量', '评论量', '收藏量', '最后更新'
+]
+EXPORT_BATCH_SIZE = 1000
+XLSX_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+XLSX_READ_CHUNK = 64 * 1024
+
+
+def _iter_export_csv(rows):
+    """逐批输出 CSV：每 EXPORT_BATCH_SIZE 行编码一次，首块带 BOM 方便 Excel 识别 UTF-8"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_HEADERS)
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= EXPORT_BATCH_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _build_export_xlsx(rows):
+    """write-only 模式逐行写入，结果落到 SpooledTemporaryFile（小文件留内存，大文件转磁盘）"""
+    import tempfile
+    import openpyxl  # type: ignore
+    from openpyxl.cell import WriteOnlyCell  # type: ignore
+    from openpyxl.styles import Font, Alignment  # type: ignore
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("视频数据")
+    header_font = Font(bold=True)
+    header_alignment = Alignment(horizontal='center', vertical='center')
+    header_cells = []
+    for header in EXPORT_HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = header_font
+        cell.alignment = header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+    for row in rows:
+        ws.append(row)
+
+    output = tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_MAX_BYTES)
+    try:
+        wb.save(output)
+        output.seek(0)
+    except Exception:
+        output.close()
+        raise
+    return output
+
+
+def _iter_file(fileobj):
+    try:
+        while True:
+            chunk = fileobj.read(XLSX_READ_CHUNK)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
+
+
 @router.get("/export", summary="导出分析数据")
 async def export_analytics(
     startDate: Optional[str] = Query(None),
@@ -574,7 +662,10 @@ async def export_analytics(
     accounts: Optional[List[str]] = Query(None, description="List of account IDs"),
     format: str = Query("csv", pattern="^(csv|excel)$", description="导出格式 csv 或 excel")
 ):
-    """导出分析数据为 CSV（默认）或 Excel（若依赖存在）"""
+    """
+    导出分析数据为 CSV（默认）或 Excel（若依赖存在）
+    不设行数上限：数据按批从游标读取，CSV 边读边发送；Excel 用 write-only 模式写入临时文件后分块发送
+    """
     try:
         # Support legacy single platform param by adding it to list if present
         if platform and platform != "all":
@@ -585,45 +676,24 @@ async def export_analytics(
         # Build account_ids list from accounts param
         account_ids = accounts
 
-        videos = get_analytics_videos(
+        if format == "excel":
+            try:
+                import openpyxl  # type: ignore  # noqa: F401
+            except ImportError:
+                format = "csv"
+
+        rows = iter_video_analytics_export(
             DB_PATH,
             startDate,
             endDate,
-            limit=10000,
             platforms=platforms,
-            account_ids=account_ids
+            account_ids=account_ids,
+            batch_size=EXPORT_BATCH_SIZE,
         )
-        if format == "excel":
-            try:
-                import openpyxl  # type: ignore
-                from openpyxl.styles import Font, Alignment  # type: ignore
-            except ImportError:
-                format = "csv"
 
         if format == "csv":
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow([
-                'ID', '视频ID', '标题', '平台', '视频链接',
-                '发布日期', '播放量', '点赞量', '评论量', '收藏量', '最后更新'
-            ])
-            for video in videos:
-                writer.writerow([
-                    video.get('id'),
-                    video.get('videoId'),
-                    video.get('title'),
-                    video.get('platform'),
-                    video.get('videoUrl', ''),
-                    video.get('publishDate'),
-                    video.get('playCount', 0),
-                    video.get('likeCount', 0),
-                    video.get('commentCount', 0),
-                    video.get('collectCount', 0),
-                    video.get('lastUpdated')
-                ])
-            output.seek(0)
             return StreamingResponse(
-                iter([output.getvalue()]),
+                _iter_export_csv(rows),
                 media_type="text/csv",
                 headers={
                     "Content-Disposition": "attachment; filename=analytics_export.csv",
@@ -631,40 +701,10 @@ async def export_analytics(
                 }
             )
         else:
-            # Excel 导出
-            import openpyxl  # type: ignore
-            from openpyxl.styles import Font, Alignment  # type: ignore
-
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "视频数据"
-            headers = [
-                'ID', '视频ID', '标题', '平台', '视频链接',
-                '发布日期', '播放量', '点赞量', '评论量', '收藏量', '最后更新'
-            ]
-            header_font = Font(bold=True)
-            header_alignment = Alignment(horizontal='center', vertical='center')
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.alignment = header_alignment
-            for row_idx, video in enumerate(videos, 2):
-                ws.cell(row=row_idx, column=1, value=video.get('id'))
-                ws.cell(row=row_idx, column=2, value=video.get('videoId'))
-                ws.cell(row=row_idx, column=3, value=video.get('title'))
-                ws.cell(row=row_idx, column=4, value=video.get('platform'))
-                ws.cell(row=row_idx, column=5, value=video.get('videoUrl', ''))
-                ws.cell(row=row_idx, column=6, value=video.get('publishDate'))
-                ws.cell(row=row_idx, column=7, value=video.get('playCount', 0))
-                ws.cell(row=row_idx, column=8, value=video.get('likeCount', 0))
-                ws.cell(row=row_idx, column=9, value=video.get('commentCount', 0))
-                ws.cell(row=row_idx, column=10, value=video.get('collectCount', 0))
-                ws.cell(row=row_idx, column=11, value=video.get('lastUpdated'))
-            output = io.BytesIO()
-            wb.save(output)
-            output.seek(0)
+            # Excel 导出：zip 格式需写完才能发送，构建放到线程池避免阻塞事件循环
+            output = await run_in_threadpool(_build_export_xlsx, rows)
             return StreamingResponse(
-                iter([output.getvalue()]),
+                _iter_file(output),
                 media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 headers={"Content-Disposition": "attachment; filename=analytics_export.xlsx"}
             )
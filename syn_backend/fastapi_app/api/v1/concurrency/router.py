@@ -21,7 +21,9 @@ class ConcurrencyConfig(BaseModel):
     account_max: Optional[int] = Field(None, description="账号级别最大并发数", ge=1, le=10)
     task_type_max: Optional[Dict[str, int]] = Field(None, description="任务类型最大并发数")
     enabled: Optional[bool] = Field(None, description="是否启用并发控制")
-    timeout: Optional[int] = Field(None, description="令牌超时时间（秒）", ge=60, le=3600)
+    timeout: Optional[int] = Field(None, description="令牌超时时间（秒，已由 lease_ttl 取代）", ge=60, le=3600)
+    lease_ttl: Optional[int] = Field(None, description="令牌租约（秒），持有期间自动续租", ge=10, le=3600)
+    max_wait: Optional[int] = Field(None, description="排队等待上限（秒）", ge=1, le=600)
 
 
 class ConcurrencyUsageResponse(BaseModel):
@@ -89,7 +91,9 @@ async def update_concurrency_config(config: ConcurrencyConfig):
       - publish: 发布任务最大并发数
       - batch_publish: 批量发布任务最大并发数
     - enabled: 是否启用并发控制
-    - timeout: 令牌超时时间（秒，60-3600）
+    - timeout: 令牌超时时间（秒，60-3600，兼容旧配置）
+    - lease_ttl: 令牌租约（秒，10-3600），任务执行期间心跳续租
+    - max_wait: 排队等待上限（秒，1-600），按先来先得顺序排队
 
     说明:
     - 只需要传递需要更新的字段
@@ -212,6 +216,8 @@ async def reset_concurrency_config():
       - batch_publish: 0
     - enabled: true
     - timeout: 300
+    - lease_ttl: 60
+    - max_wait: 60
 
     说明:
     - 默认只启用账号级并发控制（防止同账号冲突）
@@ -0,0 +1,223 @@
+"""
+分片 / 断点续传上传
+
+协议：init → PUT 分片（query 参数 offset）→ complete
+- 分片请求体边接收边写入 UPLOAD_DIR/chunks/{upload_id}.part，不在内存中缓冲整个文件
+- 写入过程中滚动计算 SHA-256；进程重启后从磁盘已有数据重算一次再继续
+- 会话状态保存在同目录 {upload_id}.json，中断后查询会话拿到 received 偏移即可续传
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import aiofiles
+
+from fastapi_app.core.config import settings
+from fastapi_app.core.exceptions import BadRequestException, ConflictException, NotFoundException
+from fastapi_app.core.logger import logger
+
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+HASH_READ_SIZE = 1024 * 1024
+
+
+@dataclass
+class UploadSession:
+    upload_id: str
+    filename: str
+    size: int
+    chunk_size: int
+    received: int = 0
+    sha256: Optional[str] = None  # 客户端声明的哈希（可选，complete 时校验）
+    display_filename: Optional[str] = None
+    note: Optional[str] = None
+    group: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "completed": self.received >= self.size}
+
+
+class ChunkedUploadManager:
+    """分片上传会话管理（单进程内按 upload_id 串行写入）"""
+
+    def __init__(self, root: Path, *, max_size_mb: int = 4096, ttl_seconds: int = 24 * 3600):
+        self.root = Path(root)
+        self.max_size_mb = max_size_mb
+        self.ttl_seconds = ttl_seconds
+        self._hashers: Dict[str, "hashlib._Hash"] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    # ---------- 会话 ----------
+
+    def _part_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.part"
+
+    def _meta_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.json"
+
+    def _save(self, session: UploadSession) -> None:
+        session.updated_at = time.time()
+        tmp = self._meta_path(session.upload_id).with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(asdict(session), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self._meta_path(session.upload_id))
+
+    def load(self, upload_id: str) -> UploadSession:
+        try:
+            uuid.UUID(upload_id)
+        except ValueError:
+            raise NotFoundException("上传会话不存在")
+        meta = self._meta_path(upload_id)
+        if not meta.exists():
+            raise NotFoundException("上传会话不存在或已过期")
+        return UploadSession(**json.loads(meta.read_text(encoding="utf-8")))
+
+    def create(
+        self,
+        filename: str,
+        size: int,
+        *,
+        chunk_size: Optional[int] = None,
+        sha256: Optional[str] = None,
+        display_filename: Optional[str] = None,
+        note: Optional[str] = None,
+        group: Optional[str] = None,
+    ) -> UploadSession:
+        if not filename:
+            raise BadRequestException("文件名不能为空")
+        if size <= 0:
+            raise BadRequestException("文件大小无效")
+        if size > self.max_size_mb * 1024 * 1024:
+            raise BadRequestException(f"文件过大: {size / (1024 * 1024):.2f}MB，限制{self.max_size_mb}MB")
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.cleanup_stale()
+        session = UploadSession(
+            upload_id=str(uuid.uuid4()),
+            filename=Path(filename).name,
+            size=int(size),
+            chunk_size=min(max(int(chunk_size or DEFAULT_CHUNK_SIZE), 256 * 1024), MAX_CHUNK_SIZE),
+            sha256=(sha256 or "").lower() or None,
+            display_filename=display_filename,
+            note=note,
+            group=group,
+        )
+        self._part_path(session.upload_id).touch()
+        self._save(session)
+        self._hashers[session.upload_id] = hashlib.sha256()
+        return session
+
+    def discard(self, upload_id: str) -> None:
+        self._hashers.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+        for path in (self._part_path(upload_id), self._meta_path(upload_id)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def cleanup_stale(self) -> int:
+        """删除超过 ttl 未更新的会话"""
+        removed = 0
+        if not self.root.exists():
+            return removed
+        cutoff = time.time() - self.ttl_seconds
+        for meta in self.root.glob("*.json"):
+            try:
+                if meta.stat().st_mtime < cutoff:
+                    self.discard(meta.stem)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info(f"[Upload] Removed {removed} stale chunked upload session(s)")
+        return removed
+
+    # ---------- 写入 ----------
+
+    def _lock(self, upload_id: str) -> asyncio.Lock:
+        lock = self._locks.get(upload_id)
+        if lock is None:
+            lock = self._locks[upload_id] = asyncio.Lock()
+        return lock
+
+    async def _hasher(self, session: UploadSession) -> "hashlib._Hash":
+        """内存中没有滚动哈希（进程重启）时，截断到已确认偏移并从磁盘重算"""
+        hasher = self._hashers.get(session.upload_id)
+        if hasher is not None:
+            return hasher
+        hasher = hashlib.sha256()
+        part = self._part_path(session.upload_id)
+        async with aiofiles.open(part, "r+b") as f:
+            await f.truncate(session.received)
+            remaining = session.received
+            while remaining > 0:
+                block = await f.read(min(HASH_READ_SIZE, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        self._hashers[session.upload_id] = hasher
+        return hasher
+
+    async def write_chunk(self, upload_id: str, offset: int, body: AsyncIterator[bytes]) -> UploadSession:
+        """
+        以流的方式追加一个分片。offset 小于已接收字节数时跳过重叠部分（重传幂等），
+        大于时返回 409 并提示应从 received 继续。
+        """
+        async with self._lock(upload_id):
+            session = await asyncio.to_thread(self.load, upload_id)
+            if offset > session.received:
+                raise ConflictException(f"分片不连续: 期望 offset={session.received}")
+
+            hasher = await self._hasher(session)
+            skip = session.received - offset
+            limit = session.size - session.received
+            written = 0
+            try:
+                async with aiofiles.open(self._part_path(upload_id), "r+b") as f:
+                    await f.seek(session.received)
+                    async for data in body:
+                        if skip:
+                            if len(data) <= skip:
+                                skip -= len(data)
+                                continue
+                            data = data[skip:]
+                            skip = 0
+                        if written + len(data) > limit:
+                            raise BadRequestException("分片超出声明的文件大小")
+                        await f.write(data)
+                        hasher.update(data)
+                        written += len(data)
+                    await f.flush()
+            except BaseException:
+                # 分片未完整写入（客户端断开 / 越界）：丢弃滚动哈希，下次从已确认偏移重算
+                self._hashers.pop(upload_id, None)
+                raise
+
+            session.received += written
+            await asyncio.to_thread(self._save, session)
+            return session
+
+    async def finalize(self, upload_id: str) -> Tuple[UploadSession, Path, str]:
+        """校验大小与哈希，返回 (会话, 分片文件路径, sha256)；文件由调用方移动或删除"""
+        async with self._lock(upload_id):
+            session = await asyncio.to_thread(self.load, upload_id)
+            if session.received != session.size:
+                raise ConflictException(f"上传未完成: {session.received}/{session.size}")
+            digest = (await self._hasher(session)).hexdigest()
+            if session.sha256 and session.sha256 != digest:
+                self.discard(upload_id)
+                raise BadRequestException("文件校验失败（SHA-256 不一致），请重新上传")
+            return session, self._part_path(upload_id), digest
+
+
+chunked_uploads = ChunkedUploadManager(Path(settings.UPLOAD_DIR) / "chunks")
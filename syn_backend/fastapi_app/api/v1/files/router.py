@@ -1,10 +1,12 @@
 import os
 import uuid
 import asyncio
+import hashlib
+import shutil
 from datetime import datetime, timezone
 from pathlib import Path
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
-from typing import Optional
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Request, status
+from typing import Optional, Tuple
 from fastapi_app.db.session import main_db_pool
 from fastapi_app.schemas.file import (
     FileResponse, FileListResponse, FileStatsResponse, FileUpdate, FileRenameRequest,
@@ -13,6 +15,7 @@ from fastapi_app.schemas.file import (
 )
 from fastapi_app.schemas.common import Response
 from fastapi_app.api.v1.files.services import FileService
+from fastapi_app.api.v1.files.chunked_upload import chunked_uploads
 from fastapi_app.core.exceptions import NotFoundException, BadRequestException
 from fastapi_app.core.logger import logger
 from fastapi_app.core.config import settings
@@ -37,6 +40,33 @@ def get_file_service():
     return FileService()
 
 
+UPLOAD_READ_SIZE = 1024 * 1024
+SIMPLE_UPLOAD_LIMIT_MB = 160
+
+
+async def _stream_upload_to_disk(file: UploadFile, dest: Path, max_mb: float) -> Tuple[int, str]:
+    """按块把 UploadFile 写到磁盘（不整体读入内存），同时计算 SHA-256；超限立即中止"""
+    hasher = hashlib.sha256()
+    size = 0
+    limit = int(max_mb * 1024 * 1024)
+    try:
+        with open(dest, "wb") as f:
+            while True:
+                block = await file.read(UPLOAD_READ_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                if size > limit:
+                    raise BadRequestException(f"文件过大: 超过{max_mb:.0f}MB限制")
+                hasher.update(block)
+                await asyncio.to_thread(f.write, block)
+    except BaseException:
+        if dest.exists():
+            dest.unlink()
+        raise
+    return size, hasher.hexdigest()
+
+
 @router.get(
     "/",
     response_model=FileListResponse,
@@ -47,8 +77,9 @@ def get_file_service():
     支持筛选条件:
     - status: 文件状态 (pending/published)
     - group: 分组名称
-    - keyword: 搜索关键词（支持文件名、标题、描述、标签）
+    - keyword: 搜索关键词（支持文件名、标题、描述、标签；≥3 字走全文索引并按相关度排序）
     - skip/limit: 分页参数（limit=0表示不限制）
+    - cursor: 上一页返回的 next_cursor（keyset 分页，传入后忽略 skip）
     """
 )
 @router.get(
@@ -62,11 +93,14 @@ async def list_files(
     keyword: Optional[str] = None,
     skip: int = 0,
     limit: int = 0,
+    cursor: Optional[str] = None,
     db=Depends(get_db),
     service: FileService = Depends(get_file_service)
 ):
     """获取文件列表"""
-    return await service.list_files(db, status=status, group=group, keyword=keyword, skip=skip, limit=limit)
+    return await service.list_files(
+        db, status=status, group=group, keyword=keyword, skip=skip, limit=limit, cursor=cursor
+    )
 
 
 @router.get(
@@ -304,16 +338,8 @@ async def upload_file(
         if not file.filename:
             raise BadRequestException("文件名不能为空")
 
-        # Calculate file size
-        content = await file.read()
-        filesize_mb = len(content) / (1024 * 1024)
-
-        # Validate size (160MB limit)
-        if filesize_mb > 160:
-            raise BadRequestException(f"文件过大: {filesize_mb:.2f}MB，限制160MB")
-
-        # Validate disk space
-        if not service.validate_disk_space(filesize_mb):
+        # Validate disk space (declared size when the client sent one)
+        if not service.validate_disk_space((file.size or 0) / (1024 * 1024)):
             raise BadRequestException("磁盘空间不足")
 
         # Generate unique filename
@@ -321,9 +347,9 @@ async def upload_file(
         unique_filename = f"{uuid.uuid4()}{ext}"
         file_path = Path(settings.VIDEO_FILES_DIR) / unique_filename
 
-        # Save file
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Stream to disk (160MB limit)
+        size_bytes, _ = await _stream_upload_to_disk(file, file_path, SIMPLE_UPLOAD_LIMIT_MB)
+        filesize_mb = size_bytes / (1024 * 1024)
 
         logger.info(f"File uploaded: {file.filename} -> {file_path} ({filesize_mb:.2f}MB)")
 
@@ -371,16 +397,8 @@ async def upload_and_save(
         if not file.filename:
             raise BadRequestException("文件名不能为空")
 
-        # Calculate file size
-        content = await file.read()
-        filesize_mb = len(content) / (1024 * 1024)
-
-        # Validate size (160MB limit)
-        if filesize_mb > 160:
-            raise BadRequestException(f"文件过大: {filesize_mb:.2f}MB，限制160MB")
-
-        # Validate disk space
-        if not service.validate_disk_space(filesize_mb):
+        # Validate disk space (declared size when the client sent one)
+        if not service.validate_disk_space((file.size or 0) / (1024 * 1024)):
             raise BadRequestException("磁盘空间不足")
 
         # Optional display filename (sanitize, keep extension)
@@ -398,9 +416,9 @@ async def upload_and_save(
         unique_filename = f"{uuid.uuid4()}{ext}"
         file_path = Path(settings.VIDEO_FILES_DIR) / unique_filename
 
-        # Save file
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Stream to disk (160MB limit)
+        size_bytes, content_hash = await _stream_upload_to_disk(file, file_path, SIMPLE_UPLOAD_LIMIT_MB)
+        filesize_mb = size_bytes / (1024 * 1024)
 
         # Save database record - ⚠️ 只存储文件名（相对路径），便于跨机器迁移
         file_id = await service.save_file_record(
@@ -409,7 +427,8 @@ async def upload_and_save(
             file_path=unique_filename,  # 只存储文件名，如 "abc123.mp4"
             filesize_mb=filesize_mb,
             note=note,
-            group_name=group
+            group_name=group,
+            content_hash=content_hash,
         )
 
         # 🆕 自动生成首帧预览图（异步，不阻塞响应）
@@ -450,6 +469,170 @@ async def upload_and_save(
         raise HTTPException(status_code=500, detail=f"操作失败: {str(e)}")
 
 
+class ChunkedUploadInitRequest(BaseModel):
+    filename: str = Field(..., description="原始文件名（用于扩展名）")
+    size: int = Field(..., gt=0, description="文件总字节数")
+    sha256: Optional[str] = Field(None, description="文件 SHA-256（可选；complete 时与服务端计算的哈希校验）")
+    chunk_size: Optional[int] = Field(None, description="建议分片大小（字节）")
+    display_filename: Optional[str] = Field(None, description="自定义显示文件名")
+    note: Optional[str] = None
+    group: Optional[str] = None
+
+
+def _dedup_response(existing: dict, display_filename: str) -> Response:
+    return Response(
+        success=True,
+        message="相同内容的素材已存在，秒传完成",
+        data={
+            "id": existing["id"],
+            "filename": existing.get("filename") or display_filename,
+            "file_path": existing["resolved_path"],
+            "size_mb": round(float(existing.get("filesize") or 0), 2),
+            "note": existing.get("note"),
+            "group_name": existing.get("group_name"),
+            "deduplicated": True,
+            "completed": True,
+        },
+    )
+
+
+def _display_filename(filename: str, custom: Optional[str]) -> str:
+    display = Path(filename).name
+    if custom and custom.strip():
+        display = Path(custom.strip()).name  # prevent path traversal
+        if not Path(display).suffix:
+            display = f"{display}{Path(filename).suffix}"
+    return display
+
+
+@router.post(
+    "/uploads",
+    response_model=Response,
+    summary="创建分片上传会话",
+    description="""
+    分片 / 断点续传上传：init → PUT /uploads/{upload_id}?offset=N（请求体为分片原始字节）→ POST complete。
+
+    - 传入的 sha256 只用于 complete 时校验；去重以服务端对收到内容计算的哈希为准，
+      内容与已有素材相同时 complete 返回该素材（deduplicated=true）
+    - 中断后 GET /uploads/{upload_id} 取得 received，从该偏移继续上传
+    """
+)
+async def init_chunked_upload(
+    req: ChunkedUploadInitRequest,
+    service: FileService = Depends(get_file_service),
+):
+    display_filename = _display_filename(req.filename, req.display_filename)
+    # 不按客户端声明的 sha256 返回已有素材：客户端未证明持有内容，去重只在 complete 校验后进行
+    if not service.validate_disk_space(req.size / (1024 * 1024)):
+        raise BadRequestException("磁盘空间不足")
+
+    session = await asyncio.to_thread(
+        chunked_uploads.create,
+        req.filename,
+        req.size,
+        chunk_size=req.chunk_size,
+        sha256=req.sha256,
+        display_filename=display_filename,
+        note=req.note,
+        group=req.group,
+    )
+    return Response(success=True, message="上传会话已创建", data=session.to_dict())
+
+
+@router.get(
+    "/uploads/{upload_id}",
+    response_model=Response,
+    summary="查询分片上传进度（续传偏移）",
+)
+async def get_chunked_upload(upload_id: str):
+    session = await asyncio.to_thread(chunked_uploads.load, upload_id)
+    return Response(success=True, data=session.to_dict())
+
+
+@router.put(
+    "/uploads/{upload_id}",
+    response_model=Response,
+    summary="上传一个分片",
+    description="请求体为分片原始字节，边接收边写盘；offset 必须等于已接收字节数（重传重叠部分会被跳过）。",
+)
+async def put_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="本分片在文件中的起始偏移"),
+):
+    session = await chunked_uploads.write_chunk(upload_id, offset, request.stream())
+    return Response(success=True, data=session.to_dict())
+
+
+@router.post(
+    "/uploads/{upload_id}/complete",
+    response_model=Response,
+    summary="完成分片上传并保存记录",
+)
+async def complete_chunked_upload(
+    upload_id: str,
+    db=Depends(get_db),
+    service: FileService = Depends(get_file_service),
+):
+    session, part_path, content_hash = await chunked_uploads.finalize(upload_id)
+
+    existing = await service.find_by_content_hash(db, content_hash)
+    if existing:
+        await asyncio.to_thread(chunked_uploads.discard, upload_id)
+        logger.info(f"Chunked upload deduplicated after transfer: {session.filename} -> file #{existing['id']}")
+        return _dedup_response(existing, session.display_filename or session.filename)
+
+    unique_filename = f"{uuid.uuid4()}{Path(session.filename).suffix}"
+    file_path = Path(settings.VIDEO_FILES_DIR) / unique_filename
+    filesize_mb = session.size / (1024 * 1024)
+    try:
+        # 同一文件系统上为 rename；跨盘时退化为复制
+        await asyncio.to_thread(shutil.move, str(part_path), str(file_path))
+        file_id = await service.save_file_record(
+            db,
+            filename=session.display_filename or session.filename,
+            file_path=unique_filename,
+            filesize_mb=filesize_mb,
+            note=session.note,
+            group_name=session.group,
+            content_hash=content_hash,
+        )
+    except Exception as e:
+        if file_path.exists():
+            file_path.unlink()
+        await asyncio.to_thread(chunked_uploads.discard, upload_id)
+        logger.error(f"Chunked upload complete error: {e}")
+        raise HTTPException(status_code=500, detail=f"操作失败: {str(e)}")
+
+    await asyncio.to_thread(chunked_uploads.discard, upload_id)
+    logger.info(f"Chunked upload saved: {session.filename} -> {file_path} ({filesize_mb:.2f}MB, ID: {file_id})")
+    return Response(
+        success=True,
+        message="文件上传并保存成功",
+        data={
+            "id": file_id,
+            "filename": session.display_filename or session.filename,
+            "file_path": str(file_path),
+            "size_mb": round(filesize_mb, 2),
+            "note": session.note,
+            "group_name": session.group,
+            "deduplicated": False,
+            "completed": True,
+        },
+    )
+
+
+@router.delete(
+    "/uploads/{upload_id}",
+    response_model=Response,
+    summary="取消分片上传",
+)
+async def abort_chunked_upload(upload_id: str):
+    await asyncio.to_thread(chunked_uploads.load, upload_id)
+    await asyncio.to_thread(chunked_uploads.discard, upload_id)
+    return Response(success=True, message="上传已取消")
+
+
 @router.patch(
     "/{file_id}/rename",
     response_model=Response,
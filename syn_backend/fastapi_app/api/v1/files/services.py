@@ -17,8 +17,19 @@ from fastapi_app.core.exceptions import NotFoundException, BadRequestException
 from fastapi_app.schemas.file import FileResponse, FileListResponse, FileStatsResponse, FileUpdate
 from fastapi_app.core.logger import logger
 from fastapi_app.db.runtime import mysql_enabled, sa_connection
+from fastapi_app.db.file_search import (
+    FTS_COLUMNS,
+    FTS_TABLE,
+    decode_cursor,
+    encode_cursor,
+    ensure_mysql_fulltext,
+    ensure_sqlite_fts,
+    mysql_match_expression,
+    sqlite_match_expression,
+)
 from fastapi_app.cache.redis_client import get_redis
 from fastapi_app.core.timezone_utils import now_beijing_naive, now_beijing_iso
+from fastapi_app.services.video_metadata_prober import video_metadata_prober
 from utils.video_frames import extract_first_frame
 from utils.video_probe import probe_video_metadata
 from platforms.path_utils import resolve_video_file
@@ -249,6 +260,10 @@ class FileService:
             to_add.append("ALTER TABLE file_records ADD COLUMN ai_tags TEXT")
         if "ai_generated_at" not in columns:
             to_add.append("ALTER TABLE file_records ADD COLUMN ai_generated_at TIMESTAMP")
+        # 上传时计算的 SHA-256，用于秒传去重
+        if "content_hash" not in columns:
+            to_add.append("ALTER TABLE file_records ADD COLUMN content_hash TEXT")
+            to_add.append("CREATE INDEX IF NOT EXISTS idx_file_records_content_hash ON file_records(content_hash)")
 
         for sql in to_add:
             try:
@@ -272,6 +287,36 @@ class FileService:
             return {}
         return probe_video_metadata(resolved)
 
+    def _schedule_metadata_probe(self, row_dict: dict) -> bool:
+        """
+        Queue a background probe when filesize/duration/dimensions are missing.
+        Fixes the in-memory filesize from stat() so the response is usable right away;
+        returns True while the record is waiting for the prober.
+        """
+        filesize = row_dict.get("filesize")
+        bad_size = (
+            not isinstance(filesize, (int, float))
+            or (isinstance(filesize, float) and (math.isnan(filesize) or not math.isfinite(filesize)))
+            or filesize <= 0
+        )
+        missing_meta = (
+            row_dict.get("duration") is None
+            or row_dict.get("video_width") is None
+            or row_dict.get("video_height") is None
+        )
+        if not bad_size and not missing_meta:
+            return False
+        try:
+            stored_path = row_dict.get("file_path")
+            resolved_path = self._resolve_video_path(stored_path) if isinstance(stored_path, str) else None
+            if not resolved_path:
+                return False
+            if bad_size:
+                row_dict["filesize"] = Path(resolved_path).stat().st_size / (1024 * 1024)
+            return video_metadata_prober.submit(int(row_dict["id"]), resolved_path)
+        except Exception:
+            return False
+
     def _resolve_video_path(self, file_path: str | None) -> Optional[str]:
         if not file_path:
             return None
@@ -312,6 +357,8 @@ class FileService:
             "ALTER TABLE file_records ADD COLUMN video_height INT NULL",
             "ALTER TABLE file_records ADD COLUMN aspect_ratio VARCHAR(32) NULL",
             "ALTER TABLE file_records ADD COLUMN orientation VARCHAR(16) NULL",
+            "ALTER TABLE file_records ADD COLUMN content_hash CHAR(64) NULL",
+            "CREATE INDEX idx_file_records_content_hash ON file_records(content_hash)",
         ]:
             try:
                 conn.execute(text(sql))
@@ -369,9 +416,17 @@ class FileService:
         group: Optional[str] = None,
         keyword: Optional[str] = None,
         skip: int = 0,
-        limit: int = 0
+        limit: int = 0,
+        cursor: Optional[str] = None,
     ) -> FileListResponse:
-        """List files with filtering and pagination"""
+        """
+        List files with filtering and pagination.
+
+        Keyword search uses the full-text index (ranked by relevance) when the
+        keyword is long enough, otherwise LIKE. Passing `cursor` (the previous
+        page's `next_cursor`) switches to keyset pagination and ignores `skip`.
+        """
+        after = decode_cursor(cursor)
         if mysql_enabled():
             warnings.warn("SQLite file_records path is deprecated; using MySQL via DATABASE_URL", DeprecationWarning)
             where = ["1=1"]
@@ -383,13 +438,29 @@ class FileService:
             if group:
                 where.append("group_name = :group_name")
                 params["group_name"] = group
+            match_expr = None
             if keyword:
-                kw = f"%{keyword}%"
-                where.append("(filename LIKE :kw OR title LIKE :kw OR description LIKE :kw OR tags LIKE :kw OR note LIKE :kw)")
-                params["kw"] = kw
+                with sa_connection() as conn:
+                    if ensure_mysql_fulltext(conn):
+                        match_expr = mysql_match_expression(keyword)
+                if match_expr:
+                    where.append(f"MATCH({', '.join(FTS_COLUMNS)}) AGAINST (:match IN BOOLEAN MODE)")
+                    params["match"] = match_expr
+                else:
+                    kw = f"%{keyword}%"
+                    where.append("(filename LIKE :kw OR title LIKE :kw OR description LIKE :kw OR tags LIKE :kw OR note LIKE :kw)")
+                    params["kw"] = kw
 
             where_sql = " AND ".join(where)
-            order_sql = " ORDER BY upload_time DESC, id DESC"
+            if match_expr:
+                # MATCH score: higher is more relevant
+                sort_expr = f"MATCH({', '.join(FTS_COLUMNS)}) AGAINST (:match IN BOOLEAN MODE)"
+                order_sql = " ORDER BY _sort DESC, id DESC"
+                keyset_sql = f" AND ({sort_expr} < :after_sort OR ({sort_expr} = :after_sort AND id < :after_id))"
+            else:
+                sort_expr = "upload_time"
+                order_sql = " ORDER BY upload_time DESC, id DESC"
+                keyset_sql = " AND (upload_time < :after_sort OR (upload_time = :after_sort AND id < :after_id))"
 
             with sa_connection() as conn:
                 total = conn.execute(
@@ -397,15 +468,32 @@ class FileService:
                     params,
                 ).mappings().one()["cnt"]
 
-                sql = f"SELECT * FROM file_records WHERE {where_sql}{order_sql}"
+                page_where = where_sql
+                page_params = dict(params)
+                if after is not None:
+                    page_where += keyset_sql
+                    page_params.update({"after_sort": after[0], "after_id": int(after[1])})
+                sql = f"SELECT *, {sort_expr} AS _sort FROM file_records WHERE {page_where}{order_sql}"
                 if limit > 0:
-                    sql += " LIMIT :limit OFFSET :offset"
-                    params = {**params, "limit": int(limit), "offset": int(skip)}
-                rows = conn.execute(text(sql), params).mappings().all()
+                    sql += " LIMIT :limit"
+                    page_params["limit"] = int(limit)
+                    if after is None:
+                        sql += " OFFSET :offset"
+                        page_params["offset"] = int(skip)
+                rows = conn.execute(text(sql), page_params).mappings().all()
+
+            next_cursor = None
+            if limit > 0 and len(rows) == limit:
+                last_sort = rows[-1]["_sort"]
+                next_cursor = encode_cursor([
+                    last_sort if isinstance(last_sort, (int, float)) or last_sort is None else str(last_sort),
+                    rows[-1]["id"],
+                ])
 
             items: List[FileResponse] = []
             for row in rows:
                 row_dict = dict(row)
+                metadata_pending = self._schedule_metadata_probe(row_dict)
                 items.append(
                     FileResponse(
                         id=row_dict["id"],
@@ -431,95 +519,93 @@ class FileService:
                         video_height=row_dict.get("video_height"),
                         aspect_ratio=row_dict.get("aspect_ratio"),
                         orientation=row_dict.get("orientation"),
+                        metadata_pending=metadata_pending,
                     )
                 )
 
-            return FileListResponse(total=int(total), items=items)
+            return FileListResponse(total=int(total), items=items, next_cursor=next_cursor)
 
         cursor = db.cursor()
         self._ensure_file_record_columns(cursor, db)
 
         # Build query
-        query = "SELECT * FROM file_records WHERE 1=1"
+        where = ["1=1"]
         params = []
 
         if status:
-            query += " AND status = ?"
+            where.append("f.status = ?")
             params.append(status)
 
         if group:
-            query += " AND group_name = ?"
+            where.append("f.group_name = ?")
             params.append(group)
 
-        # 添加全局搜索功能（文件名、标题、描述、标签）
+        # 添加全局搜索功能（文件名、标题、描述、标签、备注）：优先走 FTS5 全文索引
+        match_expr = None
         if keyword:
-            keyword_like = f"%{keyword}%"
-            query += """ AND (
-                filename LIKE ? OR
-                title LIKE ? OR
-                description LIKE ? OR
-                tags LIKE ? OR
-                note LIKE ?
-            )"""
-            params.extend([keyword_like, keyword_like, keyword_like, keyword_like, keyword_like])
+            if ensure_sqlite_fts(db):
+                match_expr = sqlite_match_expression(keyword)
+            if match_expr:
+                where.append(f"{FTS_TABLE} MATCH ?")
+                params.append(match_expr)
+            else:
+                keyword_like = f"%{keyword}%"
+                where.append("""(
+                    f.filename LIKE ? OR
+                    f.title LIKE ? OR
+                    f.description LIKE ? OR
+                    f.tags LIKE ? OR
+                    f.note LIKE ?
+                )""")
+                params.extend([keyword_like, keyword_like, keyword_like, keyword_like, keyword_like])
+
+        if match_expr:
+            from_sql = f"{FTS_TABLE} JOIN file_records f ON f.id = {FTS_TABLE}.rowid"
+            # bm25(): lower is more relevant
+            sort_expr = f"bm25({FTS_TABLE})"
+            order_sql = " ORDER BY _sort ASC, f.id DESC"
+            keyset_sql = f" AND ({sort_expr} > ? OR ({sort_expr} = ? AND f.id < ?))"
+        else:
+            from_sql = "file_records f"
+            sort_expr = "COALESCE(f.upload_time, '')"
+            order_sql = " ORDER BY _sort DESC, f.id DESC"
+            keyset_sql = f" AND ({sort_expr} < ? OR ({sort_expr} = ? AND f.id < ?))"
+        where_sql = " AND ".join(where)
 
         # Count total
-        count_query = query.replace("SELECT *", "SELECT COUNT(*)")
-        cursor.execute(count_query, params)
+        cursor.execute(f"SELECT COUNT(*) FROM {from_sql} WHERE {where_sql}", params)
         total = cursor.fetchone()[0]
 
         # Get paginated results
-        query += " ORDER BY upload_time DESC"
+        page_where = where_sql
+        page_params = list(params)
+        if after is not None:
+            page_where += keyset_sql
+            page_params.extend([after[0], after[0], int(after[1])])
+        query = f"SELECT f.*, {sort_expr} AS _sort FROM {from_sql} WHERE {page_where}{order_sql}"
 
         # 只有当limit > 0时才添加分页限制
         if limit > 0:
-            query += " LIMIT ? OFFSET ?"
-            params.extend([limit, skip])
+            query += " LIMIT ?"
+            page_params.append(limit)
+            if after is None:
+                query += " OFFSET ?"
+                page_params.append(skip)
 
-        cursor.execute(query, params)
+        cursor.execute(query, page_params)
         rows = cursor.fetchall()
 
+        next_cursor = None
+        if limit > 0 and len(rows) == limit:
+            next_cursor = encode_cursor([rows[-1]["_sort"], rows[-1]["id"]])
+
         files = []
         for row in rows:
             # Convert Row to dict for easier access
             row_dict = dict(row)
 
-            # Best-effort 修复缺失/异常的 filesize、duration（避免前端出现 NaN / 不显示时长）
-            try:
-                stored_path = row_dict.get("file_path")
-                resolved_path = self._resolve_video_path(stored_path) if isinstance(stored_path, str) else None
-                if resolved_path and Path(resolved_path).exists():
-                    filesize = row_dict.get("filesize")
-                    if not isinstance(filesize, (int, float)) or (isinstance(filesize, float) and (math.isnan(filesize) or not math.isfinite(filesize))) or filesize <= 0:
-                        corrected = Path(resolved_path).stat().st_size / (1024 * 1024)
-                        row_dict["filesize"] = corrected
-                        cursor.execute("UPDATE file_records SET filesize = ? WHERE id = ?", (corrected, row_dict["id"]))
-                        db.commit()
-
-                    if row_dict.get("duration") is None:
-                        meta = self._probe_video_metadata(resolved_path)
-                        duration = meta.get("duration")
-                        if duration:
-                            row_dict["duration"] = duration
-                            cursor.execute("UPDATE file_records SET duration = ? WHERE id = ?", (duration, row_dict["id"]))
-                            db.commit()
-
-                    if row_dict.get("video_width") is None or row_dict.get("video_height") is None:
-                        meta = self._probe_video_metadata(resolved_path)
-                        w, h = meta.get("width"), meta.get("height")
-                        ar, ori = meta.get("aspect_ratio"), meta.get("orientation")
-                        if w and h:
-                            row_dict["video_width"] = w
-                            row_dict["video_height"] = h
-                            row_dict["aspect_ratio"] = ar
-                            row_dict["orientation"] = ori
-                            cursor.execute(
-                                "UPDATE file_records SET video_width = ?, video_height = ?, aspect_ratio = ?, orientation = ? WHERE id = ?",
-                                (w, h, ar, ori, row_dict["id"]),
-                            )
-                            db.commit()
-            except Exception:
-                pass
+            # 缺失/异常的 filesize、duration、分辨率交给后台探测，不在请求路径上调用 ffprobe
+            metadata_pending = self._schedule_metadata_probe(row_dict)
 
             files.append(FileResponse(
                 id=row_dict['id'],
@@ -545,9 +631,10 @@ class FileService:
                 video_height=row_dict.get("video_height"),
                 aspect_ratio=row_dict.get("aspect_ratio"),
                 orientation=row_dict.get("orientation"),
+                metadata_pending=metadata_pending,
             ))
 
-        return FileListResponse(total=total, items=files)
+        return FileListResponse(total=total, items=files, next_cursor=next_cursor)
 
     async def get_file(self, db, file_id: int) -> Optional[FileResponse]:
         """Get single file by ID"""
@@ -630,7 +717,8 @@ class FileService:
         file_path: str,
         filesize_mb: float,
         note: Optional[str] = None,
-        group_name: Optional[str] = None
+        group_name: Optional[str] = None,
+        content_hash: Optional[str] = None,
     ) -> int:
         """Save file record to database"""
         if mysql_enabled():
@@ -705,6 +793,15 @@ class FileService:
                     )
                     file_id = getattr(res, "lastrowid", None)
 
+                if file_id is not None and content_hash:
+                    try:
+                        conn.execute(
+                            text("UPDATE file_records SET content_hash = :h WHERE id = :id"),
+                            {"h": content_hash, "id": file_id},
+                        )
+                    except Exception as e:
+                        logger.debug(f"[FileService] content_hash not stored: {e}")
+
             logger.info(f"File record saved (MySQL): {filename} (ID: {file_id})")
             fid = int(file_id) if file_id is not None else 0
             if fid:
@@ -732,8 +829,8 @@ class FileService:
         cursor.execute("""
             INSERT INTO file_records (
                 filename, file_path, filesize, upload_time, status, note, group_name, title, duration,
-                video_width, video_height, aspect_ratio, orientation
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                video_width, video_height, aspect_ratio, orientation, content_hash
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             filename,
             file_path,
@@ -748,6 +845,7 @@ class FileService:
             video_height,
             aspect_ratio,
             orientation,
+            content_hash,
         ))
 
         db.commit()
@@ -760,6 +858,38 @@ class FileService:
             logger.debug(f"First-frame extraction skipped: {e}")
         return file_id
 
+    async def find_by_content_hash(self, db, content_hash: str) -> Optional[dict]:
+        """按 SHA-256 查找已存在且磁盘文件仍在的素材（秒传去重）"""
+        if not content_hash:
+            return None
+        if mysql_enabled():
+            with sa_connection() as conn:
+                self._ensure_file_record_columns_mysql(conn)
+                rows = conn.execute(
+                    text(
+                        "SELECT id, filename, file_path, filesize, note, group_name FROM file_records "
+                        "WHERE content_hash = :h ORDER BY id DESC"
+                    ),
+                    {"h": content_hash},
+                ).mappings().all()
+                rows = [dict(r) for r in rows]
+        else:
+            cursor = db.cursor()
+            self._ensure_file_record_columns(cursor, db)
+            cursor.execute(
+                "SELECT id, filename, file_path, filesize, note, group_name FROM file_records "
+                "WHERE content_hash = ? ORDER BY id DESC",
+                (content_hash,),
+            )
+            columns = [c[0] for c in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        for row in rows:
+            resolved = self._resolve_video_path(row.get("file_path"))
+            if resolved:
+                return {**row, "resolved_path": resolved}
+        return None
+
     async def generate_ai_cover(
         self,
         db,
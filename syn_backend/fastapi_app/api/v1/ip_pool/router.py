@@ -224,14 +224,9 @@ async def check_ip_health(
     if not ip:
         raise HTTPException(status_code=404, detail="IP不存在")
     
+    # 检测结果（状态 / 延迟）由服务写入存储
     healthy = await service.check_ip_health(ip)
     
-    # 更新状态
-    if healthy:
-        service.update_ip_status(ip_id, IPStatus.AVAILABLE)
-    else:
-        service.update_ip_status(ip_id, IPStatus.FAILED)
-    
     return {
         "status": "success",
         "result": {
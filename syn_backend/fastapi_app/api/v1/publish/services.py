@@ -12,11 +12,12 @@ from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor
 import asyncio
 import warnings
+from types import SimpleNamespace
 
 from sqlalchemy import text
 
 # 时区工具
-from fastapi_app.core.timezone_utils import now_beijing_naive, to_beijing
+from fastapi_app.core.timezone_utils import now_beijing_naive, to_beijing, to_beijing_naive
 
 # 添加路径以导入现有模块
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent))
@@ -322,7 +323,10 @@ class PublishService:
         # 🔧 FIX: 定时发布时，使用定时时间作为间隔控制的基准时间
         if timer_config and timer_config.get("scheduled_time"):
             try:
-                base_time = datetime.fromisoformat(timer_config["scheduled_time"])
+                # 客户端可能带时区（+00:00 / Z），统一换算为 naive 北京时间
+                base_time = to_beijing_naive(
+                    datetime.fromisoformat(str(timer_config["scheduled_time"]).replace("Z", "+00:00"))
+                )
                 logger.info(f"[IntervalControl] 使用定时时间作为基准: {base_time.strftime('%Y-%m-%d %H:%M:%S')}")
             except Exception as e:
                 logger.warning(f"[IntervalControl] 解析定时时间失败，使用当前时间: {e}")
@@ -680,11 +684,26 @@ class PublishService:
                 from fastapi_app.tasks.publish_tasks import publish_single_task
                 from fastapi_app.tasks.task_state_manager import task_state_manager
 
-                result = publish_single_task.apply_async(
-                    kwargs={'task_data': task_data},
-                    priority=priority,
-                    task_id=task_id  # 使用自定义 task_id
-                )
+                not_before = task_data.get("not_before")
+                run_at = to_beijing_naive(datetime.fromisoformat(not_before)) if not_before else None
+                if run_at and run_at > now_beijing_naive():
+                    # 延时任务进入调度器，到点再投递给 Celery
+                    from fastapi_app.tasks.delayed_scheduler import get_delayed_scheduler
+
+                    get_delayed_scheduler().schedule(
+                        job_id=task_id,
+                        run_at=run_at,
+                        task_name=publish_single_task.name,
+                        kwargs={'task_data': task_data},
+                        priority=priority,
+                    )
+                    result = SimpleNamespace(id=task_id)
+                else:
+                    result = publish_single_task.apply_async(
+                        kwargs={'task_data': task_data},
+                        priority=priority,
+                        task_id=task_id  # 使用自定义 task_id
+                    )
 
                 # 保存任务状态到 Redis（实时状态）
                 task_state_manager.create_task(
@@ -291,6 +291,25 @@ async def system_health_check():
         raise HTTPException(status_code=500, detail=f"健康检查失败: {str(e)}")
 
 
+@router.get("/db-pool/stats", summary="数据库连接池统计")
+async def db_pool_stats():
+    """
+    SQLAlchemy 连接池指标（checkout / overflow / 等待时间 / 连接复用率）
+    """
+    try:
+        from fastapi_app.db.runtime import mysql_enabled
+        from fastapi_app.db.sqlalchemy_engine import get_pool_stats
+
+        return {
+            "status": "success",
+            "backend": "mysql" if mysql_enabled() else "sqlite",
+            "engines": get_pool_stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取连接池统计失败: {str(e)}")
+
+
 @router.get("/playwright-worker/health", summary="Playwright Worker 健康信息")
 async def playwright_worker_health():
     """代理 Worker 的 /health（便于在 API Docs 里一键检查）。"""
@@ -1,8 +1,11 @@
 """
 任务队列路由（FastAPI 迁移版）
 """
+import re
+from datetime import datetime
 from typing import Optional, Dict, Any, List
-from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi import APIRouter, Body, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from loguru import logger
 
@@ -284,19 +287,139 @@ async def task_stats(request: Request):
     return {"success": True, "data": stats}
 
 
+@router.get("/publish-runtime/stats")
+async def publish_runtime_stats():
+    """发布 Worker 累计耗时拆分：运行时准备（驱动 / 浏览器启动）与实际上传"""
+    from fastapi_app.tasks.publish_runtime import cluster_stats
+
+    return {"success": True, "data": cluster_stats()}
+
+
+_STREAM_ID_RE = re.compile(r"^\d+-\d+$")
+
+
+def _event_subscription(
+    task_ids: Optional[str],
+    parent_task_id: Optional[str],
+    task_type: Optional[str],
+    last_event_id: Optional[str],
+):
+    from fastapi_app.tasks.task_events import EventFilter, get_event_hub
+
+    hub = get_event_hub()
+    if hub is None:
+        raise HTTPException(status_code=503, detail="Redis 不可用，无法订阅任务事件")
+    ids = [t.strip() for t in (task_ids or "").split(",") if t.strip()]
+    matcher = EventFilter(task_ids=ids, parent_task_id=parent_task_id, task_type=task_type)
+    resume_from = last_event_id if last_event_id and _STREAM_ID_RE.match(last_event_id) else None
+    return hub, matcher, resume_from
+
+
+@router.get("/events")
+async def task_events_stream(
+    request: Request,
+    task_ids: Optional[str] = Query(None, description="只订阅这些任务（逗号分隔）"),
+    parent_task_id: Optional[str] = Query(None, description="只订阅某个批量任务的子任务"),
+    task_type: Optional[str] = Query(None, description="只订阅某类任务，如 publish"),
+    last_event_id: Optional[str] = Query(None, description="从该事件之后继续（也可用 Last-Event-ID 请求头）"),
+):
+    """
+    任务状态变更推送（SSE），替代轮询 /tasks/status
+
+    事件类型:
+    - task: 任务状态变更（id 为事件 id，断线重连时浏览器会自动带上 Last-Event-ID）
+    - resync: 断线太久，期间的事件已被裁剪，客户端应重新拉取一次任务列表
+    """
+    from fastapi_app.tasks.task_events import format_sse, iter_task_events
+
+    hub, matcher, resume_from = _event_subscription(
+        task_ids, parent_task_id, task_type, request.headers.get("last-event-id") or last_event_id
+    )
+
+    async def event_source():
+        yield "retry: 3000\n\n"
+        async for message in iter_task_events(hub, matcher, resume_from, request.is_disconnected):
+            yield format_sse(message)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"  # 禁用 nginx 缓冲
+        }
+    )
+
+
+@router.websocket("/ws")
+async def task_events_websocket(
+    websocket: WebSocket,
+    task_ids: Optional[str] = None,
+    parent_task_id: Optional[str] = None,
+    task_type: Optional[str] = None,
+    last_event_id: Optional[str] = None,
+):
+    """任务状态变更推送（WebSocket），消息格式与 SSE 的 data 相同并带 type 字段"""
+    from fastapi_app.tasks.task_events import iter_task_events
+
+    try:
+        hub, matcher, resume_from = _event_subscription(task_ids, parent_task_id, task_type, last_event_id)
+    except HTTPException as e:
+        await websocket.close(code=1011, reason=str(e.detail))
+        return
+
+    await websocket.accept()
+    events = iter_task_events(hub, matcher, resume_from)
+    try:
+        async for message in events:
+            await websocket.send_json(message)
+    except (WebSocketDisconnect, RuntimeError):
+        # 客户端断开后，下一次发送（最迟为心跳）会失败
+        pass
+    finally:
+        await events.aclose()
+
+
+@router.get("/delayed/stats")
+async def delayed_scheduler_stats():
+    """延时发布调度器状态：待投递 / 投递中数量、队首剩余时间"""
+    from fastapi_app.tasks.delayed_scheduler import get_delayed_scheduler
+
+    return {"success": True, "data": get_delayed_scheduler().stats()}
+
+
+@router.post("/delayed/{task_id}/reschedule")
+async def reschedule_delayed_task(
+    task_id: str,
+    run_at: datetime = Body(..., embed=True, description="新的执行时间（无时区时按北京时间）"),
+):
+    """修改尚未投递的延时发布任务的执行时间"""
+    from fastapi_app.tasks.delayed_scheduler import get_delayed_scheduler
+
+    if not get_delayed_scheduler().reschedule(task_id, run_at):
+        raise HTTPException(status_code=404, detail="延时任务不存在或已投递")
+    return {"success": True, "data": {"task_id": task_id, "run_at": run_at.isoformat()}}
+
+
 @router.get("/", include_in_schema=True)
 @router.get("", include_in_schema=False)
 async def list_tasks(
     request: Request,
     limit: int = Query(100, ge=1, le=1000),
-    status: Optional[str] = Query(None, description="过滤状态：pending/running/success/failed/cancelled")
+    status: Optional[str] = Query(None, description="过滤状态：pending/running/success/failed/cancelled（可逗号分隔多个）"),
+    task_type: Optional[str] = Query(None, description="过滤任务类型（可逗号分隔多个）"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的 next_cursor）"),
 ):
     # 优先使用 Redis TaskStateManager，如果不可用则回退到旧的 SQLite task_manager
     from fastapi_app.tasks.task_state_manager import task_state_manager
 
     try:
-        # 从 Redis 获取任务列表
-        tasks = task_state_manager.list_tasks(status=status, limit=limit)
+        # 从 Redis 获取任务列表（索引 + MGET，按创建时间倒序）
+        page = task_state_manager.list_tasks_page(
+            status=status, task_type=task_type, limit=limit, cursor=cursor
+        )
+        tasks = page["items"]
         summary = _summarize_tasks(tasks)
 
         # 添加 stats 字段（从 TaskStateManager 获取）
@@ -308,6 +431,7 @@ async def list_tasks(
             "total": len(tasks),
             "summary": summary,
             "stats": stats,
+            "next_cursor": page["next_cursor"],
         }
     except Exception as e:
         # 回退到旧的 SQLite 任务管理器
@@ -329,10 +453,12 @@ async def list_tasks(
 async def list_tasks_alias(
     request: Request,
     limit: int = Query(100, ge=1, le=1000),
-    status: Optional[str] = Query(None, description="过滤状态：pending/running/success/failed/cancelled")
+    status: Optional[str] = Query(None, description="过滤状态：pending/running/success/failed/cancelled"),
+    task_type: Optional[str] = Query(None, description="过滤任务类型"),
+    cursor: Optional[str] = Query(None, description="分页游标"),
 ):
     """兼容前端 /api/tasks/list 调用"""
-    return await list_tasks(request, limit, status)
+    return await list_tasks(request, limit, status, task_type, cursor)
 
 
 @router.get("/{task_id}")
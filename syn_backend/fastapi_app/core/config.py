@@ -92,11 +92,23 @@ class Settings(BaseSettings):
     # When empty, the app uses SQLite files above.
     DATABASE_URL: str = ""
 
+    # SQLAlchemy connection pool (one engine per process, shared by sa_connection)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # 等待空闲连接的秒数
+    DB_POOL_RECYCLE: int = 1800  # MySQL 连接回收周期（秒），需小于 wait_timeout
+    DB_SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
     # Redis / Celery (optional)
     REDIS_URL: str = "redis://:123456@localhost:6379/0"
     CELERY_BROKER_URL: str = ""  # defaults to REDIS_URL when empty
     CELERY_RESULT_BACKEND: str = ""  # defaults to REDIS_URL when empty
 
+    # 外部平台请求限流（redis：所有 API 进程 / Celery Worker 共享配额；local：仅进程内）
+    RATE_LIMIT_BACKEND: str = "redis"
+    RATE_LIMIT_KEY_PREFIX: str = "ratelimit"
+    RATE_LIMIT_HOST_RPM: int = 60  # 单个出站域名每分钟请求数
+
     # 文件存储路径
     DATA_DIR: str = str(_resolve_default_data_dir(BASE_DIR))
     COOKIE_FILES_DIR: str = str(Path(DATA_DIR) / "cookiesFile")
@@ -111,6 +123,10 @@ class Settings(BaseSettings):
         if parent_video_dir.exists():
             VIDEO_FILES_DIR = str(parent_video_dir)
 
+    # 素材元数据后台探测（ffprobe 进程池）
+    METADATA_PROBE_WORKERS: int = 2
+    METADATA_PROBE_BATCH_SIZE: int = 16
+
     # 任务队列配置
     TASK_QUEUE_MAX_WORKERS: int = 3  # 并发任务数（降低资源占用）
     TASK_MAX_RETRIES: int = 3
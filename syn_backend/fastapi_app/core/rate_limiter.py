@@ -4,14 +4,20 @@
 功能:
 1. 平台级别限流
 2. 账号级别限流
-3. 令牌桶算法实现
-4. 异步支持
+3. 出站域名级别限流
+4. 令牌桶算法实现（Redis Lua 脚本原子计算，所有 API 进程与 Celery Worker 共享配额）
+5. Redis 不可用时退回进程内令牌桶
+6. 异步 / 同步两种获取方式
+7. 发布任务使用独立的发布配额，非阻塞获取（由 Celery 按等待时间重新入队）
 """
 
 import asyncio
+import math
+import threading
 import time
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
 from collections import defaultdict
 
 
@@ -89,14 +95,149 @@ class TokenBucket:
             return self.tokens
 
 
+@dataclass(frozen=True)
+class BucketSpec:
+    """一个令牌桶的规则：key 相同的请求共享令牌"""
+
+    key: str
+    capacity: float
+    refill_rate: float  # 个/秒
+    cost: float = 1
+
+
+def _bucket_state(tokens: Optional[float], ts_ms: Optional[float], capacity: float, rate_per_ms: float, now_ms: float) -> float:
+    if tokens is None or ts_ms is None:
+        return capacity
+    return min(capacity, tokens + max(0.0, now_ms - ts_ms) * rate_per_ms)
+
+
+class LocalBucketBackend:
+    """
+    进程内令牌桶（与 Redis 脚本语义一致）
+    用 threading.Lock 而不是 asyncio.Lock：Celery 线程池中每个线程有各自的事件循环
+    """
+
+    name = "local"
+
+    def __init__(self):
+        self._state: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, specs: Sequence[BucketSpec]) -> float:
+        """所有桶都有足够令牌时一起扣减并返回 0，否则不扣减并返回需要等待的秒数"""
+        now_ms = time.time() * 1000
+        with self._lock:
+            levels = []
+            wait_ms = 0.0
+            for spec in specs:
+                rate = spec.refill_rate / 1000
+                tokens, ts = self._state.get(spec.key, (None, None))
+                level = _bucket_state(tokens, ts, spec.capacity, rate, now_ms)
+                levels.append(level)
+                if level < spec.cost:
+                    wait_ms = max(wait_ms, math.ceil((spec.cost - level) / rate))
+            if wait_ms > 0:
+                return wait_ms / 1000
+            for spec, level in zip(specs, levels):
+                self._state[spec.key] = (level - spec.cost, now_ms)
+            return 0.0
+
+    def available(self, spec: BucketSpec) -> float:
+        with self._lock:
+            tokens, ts = self._state.get(spec.key, (None, None))
+            return _bucket_state(tokens, ts, spec.capacity, spec.refill_rate / 1000, time.time() * 1000)
+
+    def reset(self, prefix: str) -> None:
+        with self._lock:
+            for key in [k for k in self._state if k.startswith(prefix)]:
+                del self._state[key]
+
+
+# KEYS: 桶 key；ARGV: 每个桶依次 capacity, 每毫秒补充令牌数, cost
+# 使用 Redis 服务器时间，避免多台机器时钟不一致
+_ACQUIRE_SCRIPT = """
+pcall(redis.replicate_commands)
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local levels = {}
+local wait = 0
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local cost = tonumber(ARGV[i * 3])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1])
+    local ts = tonumber(state[2])
+    local level = capacity
+    if tokens ~= nil and ts ~= nil then
+        level = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    end
+    levels[i] = level
+    if level < cost then
+        local w = math.ceil((cost - level) / rate)
+        if w > wait then wait = w end
+    end
+end
+if wait > 0 then
+    return wait
+end
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local cost = tonumber(ARGV[i * 3])
+    redis.call('HSET', KEYS[i], 'tokens', tostring(levels[i] - cost), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[i], math.ceil(capacity / rate) + 1000)
+end
+return 0
+"""
+
+
+class RedisBucketBackend:
+    """Redis 令牌桶：一次 EVALSHA 原子地检查并扣减请求涉及的所有桶"""
+
+    name = "redis"
+
+    def __init__(self, redis_client: Any):
+        self._redis = redis_client
+        self._script = redis_client.register_script(_ACQUIRE_SCRIPT)
+
+    def try_acquire(self, specs: Sequence[BucketSpec]) -> float:
+        args: List[str] = []
+        for spec in specs:
+            args += [repr(float(spec.capacity)), repr(spec.refill_rate / 1000), repr(float(spec.cost))]
+        wait_ms = self._script(keys=[spec.key for spec in specs], args=args)
+        return int(wait_ms) / 1000
+
+    def available(self, spec: BucketSpec) -> float:
+        tokens, ts = self._redis.hmget(spec.key, "tokens", "ts")
+        seconds, micros = self._redis.time()
+        now_ms = int(seconds) * 1000 + int(micros) // 1000
+        return _bucket_state(
+            float(tokens) if tokens is not None else None,
+            float(ts) if ts is not None else None,
+            spec.capacity,
+            spec.refill_rate / 1000,
+            now_ms,
+        )
+
+    def reset(self, prefix: str) -> None:
+        keys = list(self._redis.scan_iter(match=f"{prefix}*", count=500))
+        if keys:
+            self._redis.delete(*keys)
+
+
 class RateLimiter:
     """
     速率限制器
     
     支持:
-    - 平台级别限流（全局）
-    - 账号级别限流（细粒度）
+    - 平台级别限流（全局，所有进程共享）
+    - 账号级别限流（细粒度，最小请求间隔）
+    - 出站域名级别限流
     - 自定义限流规则
+
+    一次 acquire 涉及的所有桶要么全部扣减、要么都不扣减。
+    Redis 出错时退回进程内令牌桶，REDIS_RETRY_SECONDS 后再尝试 Redis。
     """
     
     # 平台限流配置（请求/分钟）
@@ -122,69 +263,208 @@ class RateLimiter:
             "min_interval_seconds": 30
         }
     }
+
+    # 发布配额（与上面的 API 请求配额相互独立）：
+    # 平台每小时发布数（全集群共享）、同一账号两次发布的最小间隔
+    PUBLISH_LIMITS = {
+        "douyin": {"publishes_per_hour": 60, "account_interval_seconds": 120},
+        "kuaishou": {"publishes_per_hour": 40, "account_interval_seconds": 180},
+        "xiaohongshu": {"publishes_per_hour": 30, "account_interval_seconds": 300},
+        "channels": {"publishes_per_hour": 30, "account_interval_seconds": 300},
+        "bilibili": {"publishes_per_hour": 30, "account_interval_seconds": 180},
+    }
+
+    # 出站域名限流配置（请求/分钟），未列出的域名使用 host_rpm
+    HOST_LIMITS: Dict[str, int] = {}
+
+    REDIS_RETRY_SECONDS = 30
+    POLL_INTERVAL_CAP = 5.0
+    INTERVAL_GRACE_SECONDS = 1.0
     
-    def __init__(self):
-        """初始化速率限制器"""
-        self.platform_buckets: Dict[str, TokenBucket] = {}
-        self.account_buckets: Dict[str, TokenBucket] = {}
+    def __init__(
+        self,
+        redis_client: Optional[Any] = None,
+        key_prefix: str = "ratelimit",
+        host_rpm: int = 60,
+    ):
+        """
+        初始化速率限制器
+
+        Args:
+            redis_client: Redis 客户端（None 时仅使用进程内令牌桶）
+            key_prefix: Redis key 前缀
+            host_rpm: 未配置的出站域名每分钟请求数
+        """
+        self.key_prefix = key_prefix
+        self.host_rpm = host_rpm
+        self.local = LocalBucketBackend()
+        self.redis_backend: Optional[RedisBucketBackend] = None
+        if redis_client is not None:
+            try:
+                self.redis_backend = RedisBucketBackend(redis_client)
+            except Exception as e:
+                print(f"⚠️ [RateLimiter] Redis 限流不可用，使用进程内限流: {e}")
+        self._redis_down_until = 0.0
         self.last_request_time: Dict[str, float] = defaultdict(float)
-        self._lock = asyncio.Lock()
-        
-        # 初始化平台级别令牌桶
-        for platform, config in self.PLATFORM_LIMITS.items():
-            capacity = config["requests_per_minute"]
-            refill_rate = capacity / 60  # 每秒生成的令牌数
-            self.platform_buckets[platform] = TokenBucket(capacity, refill_rate)
+
+    @classmethod
+    def from_settings(cls) -> "RateLimiter":
+        from fastapi_app.core.config import settings
+
+        redis_client = None
+        if (getattr(settings, "RATE_LIMIT_BACKEND", "redis") or "").strip().lower() == "redis":
+            from fastapi_app.cache.redis_client import get_redis
+
+            redis_client = get_redis()
+        return cls(
+            redis_client=redis_client,
+            key_prefix=getattr(settings, "RATE_LIMIT_KEY_PREFIX", "ratelimit"),
+            host_rpm=int(getattr(settings, "RATE_LIMIT_HOST_RPM", 60)),
+        )
+
+    @property
+    def backend_name(self) -> str:
+        if self.redis_backend is not None and time.monotonic() >= self._redis_down_until:
+            return RedisBucketBackend.name
+        return LocalBucketBackend.name
+
+    def _platform_spec(self, platform: str) -> BucketSpec:
+        rpm = self.PLATFORM_LIMITS[platform]["requests_per_minute"]
+        return BucketSpec(f"{self.key_prefix}:platform:{platform}", rpm, rpm / 60)
+
+    def build_specs(
+        self,
+        platform: Optional[str],
+        account_id: Optional[str] = None,
+        host: Optional[str] = None,
+    ) -> List[BucketSpec]:
+        """一次请求涉及的令牌桶：平台配额、账号（无账号时为平台）最小间隔、出站域名配额"""
+        specs: List[BucketSpec] = []
+        config = self.PLATFORM_LIMITS.get(platform or "")
+        if config:
+            specs.append(self._platform_spec(platform))
+            interval_key = f"account:{platform}:{account_id}" if account_id else f"interval:{platform}"
+            # 容量为 1 的桶等价于最小请求间隔
+            specs.append(BucketSpec(f"{self.key_prefix}:{interval_key}", 1, 1 / config["min_interval_seconds"]))
+        if host:
+            host = (urlparse(host).hostname if "//" in host else host.split("/")[0]).lower()
+            rpm = self.HOST_LIMITS.get(host, self.host_rpm)
+            specs.append(BucketSpec(f"{self.key_prefix}:host:{host}", rpm, rpm / 60))
+        return specs
+
+    def build_publish_specs(self, platform: str, account_id: Optional[str] = None) -> List[BucketSpec]:
+        """一次发布涉及的令牌桶：平台发布配额 + 账号发布间隔（与 API 请求桶使用不同的 key）"""
+        config = self.PUBLISH_LIMITS.get(platform)
+        if not config:
+            return []
+        per_hour = config["publishes_per_hour"]
+        specs = [BucketSpec(f"{self.key_prefix}:publish:platform:{platform}", per_hour, per_hour / 3600)]
+        if account_id:
+            specs.append(BucketSpec(
+                f"{self.key_prefix}:publish:account:{platform}:{account_id}",
+                1,
+                1 / config["account_interval_seconds"],
+            ))
+        return specs
+
+    def try_acquire_publish(self, platform: str, account_id: Optional[str] = None) -> float:
+        """
+        非阻塞地获取一次发布配额：成功返回 0，否则返回需要等待的秒数（不扣减）。
+        Celery 任务据此 retry(countdown=...)，不占用 Worker 线程等待。
+        """
+        specs = self.build_publish_specs(platform, account_id)
+        return self.try_acquire(specs) if specs else 0.0
+
+    def try_acquire(self, specs: Sequence[BucketSpec]) -> float:
+        """尝试一次：成功返回 0，否则返回建议等待秒数"""
+        if self.redis_backend is not None and time.monotonic() >= self._redis_down_until:
+            try:
+                return self.redis_backend.try_acquire(specs)
+            except Exception as e:
+                self._redis_down_until = time.monotonic() + self.REDIS_RETRY_SECONDS
+                print(f"⚠️ [RateLimiter] Redis 限流失败，{self.REDIS_RETRY_SECONDS}秒内使用进程内限流: {e}")
+        return self.local.try_acquire(specs)
+
+    def _describe(self, platform: Optional[str], account_id: Optional[str], host: Optional[str]) -> str:
+        key = f"{platform}_{account_id}" if account_id else (platform or "")
+        return f"{key}@{host}" if host else key
+
+    def _deadline(self, platform: Optional[str], timeout: Optional[float]) -> Optional[float]:
+        """超时从最小请求间隔等待结束后开始计算：同账号的下一次请求总是先等满间隔"""
+        if timeout is None:
+            return None
+        config = self.PLATFORM_LIMITS.get(platform or "")
+        if not config:
+            return time.monotonic() + timeout
+        # 等待时间按毫秒向上取整，且 Redis 使用服务器时钟，留出少量余量
+        return time.monotonic() + timeout + config["min_interval_seconds"] + self.INTERVAL_GRACE_SECONDS
     
     async def acquire(
         self,
-        platform: str,
+        platform: Optional[str],
         account_id: Optional[str] = None,
-        timeout: Optional[float] = 30
+        timeout: Optional[float] = 30,
+        host: Optional[str] = None,
     ) -> bool:
         """
         获取执行许可
         
         Args:
-            platform: 平台名称
+            platform: 平台名称（None 时只按出站域名限流）
             account_id: 账号ID（可选，用于账号级别限流）
-            timeout: 超时时间（秒）
+            timeout: 等满最小请求间隔后再等待配额的超时时间（秒），None表示无限等待
+            host: 出站域名或 URL（可选，用于域名级别限流）
         
         Returns:
             是否获得许可
         """
-        # 1. 检查平台级别限流
-        platform_bucket = self.platform_buckets.get(platform)
-        if not platform_bucket:
-            print(f"⚠️ [RateLimiter] 未知平台: {platform}，跳过限流")
+        specs = self.build_specs(platform, account_id, host)
+        key = self._describe(platform, account_id, host)
+        if not specs:
+            if platform:
+                print(f"⚠️ [RateLimiter] 未知平台: {platform}，跳过限流")
             return True
-        
-        # 2. 检查最小时间间隔
-        key = f"{platform}_{account_id}" if account_id else platform
-        now = time.time()
-        
-        async with self._lock:
-            last_time = self.last_request_time.get(key, 0)
-            min_interval = self.PLATFORM_LIMITS[platform]["min_interval_seconds"]
-            
-            wait_time = min_interval - (now - last_time)
-            if wait_time > 0:
-                print(f"⏳ [RateLimiter] {key} 需要等待 {wait_time:.1f}秒")
-                await asyncio.sleep(wait_time)
-        
-        # 3. 消耗平台令牌
-        success = await platform_bucket.consume(tokens=1, timeout=timeout)
-        
-        if not success:
-            print(f"❌ [RateLimiter] {platform} 限流超时")
-            return False
-        
-        # 4. 更新最后请求时间
-        async with self._lock:
-            self.last_request_time[key] = time.time()
-        
+
+        deadline = self._deadline(platform, timeout)
+        while True:
+            # Redis 往返是同步调用，放到线程里执行，不阻塞事件循环
+            wait = await asyncio.to_thread(self.try_acquire, specs)
+            if wait <= 0:
+                break
+            if deadline is not None and time.monotonic() + wait > deadline:
+                print(f"❌ [RateLimiter] {key} 限流超时")
+                return False
+            print(f"⏳ [RateLimiter] {key} 需要等待 {wait:.1f}秒")
+            # 其他进程可能同时在等同一个桶，等待后重新竞争
+            await asyncio.sleep(min(wait, self.POLL_INTERVAL_CAP))
+
+        if platform:
+            self.last_request_time[platform] = time.time()
         print(f"✅ [RateLimiter] {key} 获得执行许可")
         return True
+
+    def acquire_blocking(
+        self,
+        platform: Optional[str],
+        account_id: Optional[str] = None,
+        timeout: Optional[float] = 30,
+        host: Optional[str] = None,
+    ) -> bool:
+        """acquire 的同步版本，供 Celery 任务等同步代码使用"""
+        specs = self.build_specs(platform, account_id, host)
+        if not specs:
+            return True
+        deadline = self._deadline(platform, timeout)
+        while True:
+            wait = self.try_acquire(specs)
+            if wait <= 0:
+                if platform:
+                    self.last_request_time[platform] = time.time()
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                print(f"❌ [RateLimiter] {self._describe(platform, account_id, host)} 限流超时")
+                return False
+            time.sleep(min(wait, self.POLL_INTERVAL_CAP))
     
     async def get_platform_status(self, platform: str) -> Dict:
         """
@@ -196,15 +476,20 @@ class RateLimiter:
         Returns:
             状态信息
         """
-        bucket = self.platform_buckets.get(platform)
-        if not bucket:
+        config = self.PLATFORM_LIMITS.get(platform)
+        if not config:
             return {"error": "未知平台"}
-        
-        available = await bucket.get_available_tokens()
-        config = self.PLATFORM_LIMITS[platform]
+
+        spec = self._platform_spec(platform)
+        backend = self.redis_backend if self.backend_name == RedisBucketBackend.name else self.local
+        try:
+            available = backend.available(spec)
+        except Exception:
+            available = self.local.available(spec)
         
         return {
             "platform": platform,
+            "backend": self.backend_name,
             "available_tokens": round(available, 2),
             "capacity": config["requests_per_minute"],
             "min_interval_seconds": config["min_interval_seconds"],
@@ -213,27 +498,34 @@ class RateLimiter:
     
     async def reset_platform(self, platform: str):
         """
-        重置平台限流状态
+        重置平台限流状态（平台配额与该平台下所有账号间隔）
         
         Args:
             platform: 平台名称
         """
-        if platform in self.platform_buckets:
-            config = self.PLATFORM_LIMITS[platform]
-            capacity = config["requests_per_minute"]
-            refill_rate = capacity / 60
-            self.platform_buckets[platform] = TokenBucket(capacity, refill_rate)
-            
-            # 清除时间记录
-            keys_to_remove = [k for k in self.last_request_time.keys() if k.startswith(platform)]
-            for key in keys_to_remove:
-                del self.last_request_time[key]
+        if platform in self.PLATFORM_LIMITS:
+            prefixes = [
+                f"{self.key_prefix}:platform:{platform}",
+                f"{self.key_prefix}:interval:{platform}",
+                f"{self.key_prefix}:account:{platform}:",
+                f"{self.key_prefix}:publish:platform:{platform}",
+                f"{self.key_prefix}:publish:account:{platform}:",
+            ]
+            for prefix in prefixes:
+                self.local.reset(prefix)
+                if self.redis_backend is not None:
+                    try:
+                        self.redis_backend.reset(prefix)
+                    except Exception as e:
+                        print(f"⚠️ [RateLimiter] 重置 Redis 限流状态失败: {e}")
+            self.last_request_time.pop(platform, None)
             
             print(f"🔄 [RateLimiter] 已重置平台限流: {platform}")
 
 
 # 全局限流器实例
 _rate_limiter_instance: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
 
 
 def get_rate_limiter() -> RateLimiter:
@@ -245,5 +537,7 @@ def get_rate_limiter() -> RateLimiter:
     """
     global _rate_limiter_instance
     if _rate_limiter_instance is None:
-        _rate_limiter_instance = RateLimiter()
+        with _rate_limiter_lock:
+            if _rate_limiter_instance is None:
+                _rate_limiter_instance = RateLimiter.from_settings()
     return _rate_limiter_instance
@@ -64,6 +64,27 @@ def to_beijing(dt: datetime) -> datetime:
     return dt.astimezone(BEIJING_TZ)
 
 
+def to_beijing_naive(dt: datetime) -> datetime:
+    """
+    转换为不带时区信息的北京时间（可与 now_beijing_naive() 直接比较）
+
+    Args:
+        dt: 原始时间；aware 时间按其时区换算，naive 时间视为已是北京时间
+
+    Returns:
+        datetime: 北京时间（naive）
+
+    Example:
+        >>> to_beijing_naive(datetime.fromisoformat("2025-01-15T02:30:00+00:00"))
+        datetime.datetime(2025, 1, 15, 10, 30)
+    """
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(BEIJING_TZ).replace(tzinfo=None)
+
+
 def to_utc(dt: datetime) -> datetime:
     """
     将北京时间转换为 UTC 时间
@@ -0,0 +1,149 @@
+"""
+Full-text search index for the material library (file_records).
+
+SQLite: external-content FTS5 table with the trigram tokenizer (substring
+matching that also works for Chinese text without word segmentation), kept in
+sync by triggers so every writer of file_records is covered.
+MySQL: InnoDB FULLTEXT index WITH PARSER ngram.
+
+Queries shorter than the tokenizer's n-gram size cannot use the index and fall
+back to LIKE (callers check `*_match_expression` returning None).
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import sqlite3
+from typing import Any, List, Optional
+
+from sqlalchemy import text
+
+from fastapi_app.core.logger import logger
+
+
+FTS_TABLE = "file_records_fts"
+FTS_COLUMNS = ("filename", "title", "description", "tags", "note")
+MYSQL_FULLTEXT_INDEX = "ft_file_records_text"
+
+# trigram tokenizer => 3 chars; MySQL ngram_token_size defaults to 2
+SQLITE_MIN_QUERY_CHARS = 3
+MYSQL_MIN_QUERY_CHARS = 2
+
+_sqlite_fts_ready: dict[str, bool] = {}
+_mysql_fulltext_ready: Optional[bool] = None
+
+
+def _db_key(conn: sqlite3.Connection) -> str:
+    try:
+        row = conn.execute("PRAGMA database_list").fetchone()
+        return str(row[2]) if row else ""
+    except Exception:
+        return ""
+
+
+def ensure_sqlite_fts(conn: sqlite3.Connection) -> bool:
+    """
+    Create the FTS5 table + sync triggers if missing (rebuilding the index once).
+    Returns False when this SQLite build lacks FTS5/trigram support.
+    """
+    key = _db_key(conn)
+    if key in _sqlite_fts_ready:
+        return _sqlite_fts_ready[key]
+
+    cols = ", ".join(FTS_COLUMNS)
+    new_cols = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    old_cols = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+    try:
+        cursor = conn.cursor()
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+        ).fetchone()
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"{cols}, content='file_records', content_rowid='id', tokenize='trigram')"
+        )
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON file_records BEGIN
+                INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.id, {new_cols});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON file_records BEGIN
+                INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {cols} ON file_records BEGIN
+                INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+                INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.id, {new_cols});
+            END
+        """)
+        if not exists:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            logger.info("[DB] file_records FTS5 index built")
+        conn.commit()
+        _sqlite_fts_ready[key] = True
+    except sqlite3.OperationalError as e:
+        # e.g. "no such module: fts5" / "no such tokenizer: trigram" on old SQLite builds
+        logger.warning(f"[DB] FTS5 unavailable, keyword search falls back to LIKE: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        _sqlite_fts_ready[key] = False
+    return _sqlite_fts_ready[key]
+
+
+def ensure_mysql_fulltext(conn) -> bool:
+    """Best-effort creation of the ngram FULLTEXT index on MySQL."""
+    global _mysql_fulltext_ready
+    if _mysql_fulltext_ready is not None:
+        return _mysql_fulltext_ready
+    try:
+        exists = conn.execute(
+            text("SHOW INDEX FROM file_records WHERE Key_name = :name"),
+            {"name": MYSQL_FULLTEXT_INDEX},
+        ).first()
+        if not exists:
+            conn.execute(text(
+                f"ALTER TABLE file_records ADD FULLTEXT INDEX {MYSQL_FULLTEXT_INDEX} "
+                f"({', '.join(FTS_COLUMNS)}) WITH PARSER ngram"
+            ))
+            logger.info("[DB] file_records FULLTEXT(ngram) index created")
+        _mysql_fulltext_ready = True
+    except Exception as e:
+        logger.warning(f"[DB] MySQL FULLTEXT index unavailable, keyword search falls back to LIKE: {e}")
+        _mysql_fulltext_ready = False
+    return _mysql_fulltext_ready
+
+
+def sqlite_match_expression(keyword: str) -> Optional[str]:
+    """Quote the keyword as a single FTS5 phrase (substring semantics like the old LIKE)."""
+    kw = (keyword or "").strip()
+    if len(kw) < SQLITE_MIN_QUERY_CHARS:
+        return None
+    return '"' + kw.replace('"', '""') + '"'
+
+
+def mysql_match_expression(keyword: str) -> Optional[str]:
+    kw = (keyword or "").strip().replace('"', " ").strip()
+    if len(kw) < MYSQL_MIN_QUERY_CHARS:
+        return None
+    return f'"{kw}"'
+
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[List[Any]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        return values if isinstance(values, list) and len(values) == 2 else None
+    except Exception:
+        return None
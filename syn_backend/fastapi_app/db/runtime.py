@@ -4,10 +4,11 @@ from contextlib import contextmanager
 from typing import Generator, Optional
 
 import sqlite3
+import time
 from sqlalchemy.engine import Connection
 
 from fastapi_app.core.config import settings
-from fastapi_app.db.sqlalchemy_engine import get_engine
+from fastapi_app.db.sqlalchemy_engine import get_engine, record_checkout_wait
 
 
 def mysql_enabled() -> bool:
@@ -18,9 +19,12 @@ def mysql_enabled() -> bool:
 def sa_connection() -> Generator[Connection, None, None]:
     """
     SQLAlchemy connection (MySQL when DATABASE_URL is set; otherwise SQLite via SQLAlchemy).
+    Connections come from the cached per-process engine pool.
     """
     engine = get_engine()
+    started_at = time.perf_counter()
     with engine.begin() as conn:
+        record_checkout_wait(engine, started_at)
         yield conn
 
 
@@ -194,6 +194,11 @@ def ensure_main_db_schema(conn: sqlite3.Connection) -> None:
         conn.commit()
         logger.info(f"[DB] Schema ensured; added {added} missing column(s)")
 
+    # Full-text index for material keyword search (kept in sync by triggers)
+    from fastapi_app.db.file_search import ensure_sqlite_fts
+
+    ensure_sqlite_fts(conn)
+
 
 def ensure_default_schema() -> None:
     """
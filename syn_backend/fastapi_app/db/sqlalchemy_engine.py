@@ -1,6 +1,12 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine, Engine
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event, Engine
+from sqlalchemy.pool import QueuePool, StaticPool
 
 from fastapi_app.core.config import settings
 
@@ -15,10 +21,173 @@ def get_database_url() -> str:
     return f"sqlite+pysqlite:///{sqlite_path}"
 
 
-def get_engine() -> Engine:
-    url = get_database_url()
-    connect_args = {}
+class _PoolStats:
+    """Counters fed by pool events and sa_connection() wait timing."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.peak_checked_out = 0
+        self.wait_count = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+
+    def on_connect(self, *_: Any) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, *_: Any) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checkouts - self.checkins)
+
+    def on_checkin(self, *_: Any) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def on_invalidate(self, *_: Any) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total_ms += elapsed_ms
+            self.wait_max_ms = max(self.wait_max_ms, elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            reuse = (self.checkouts - self.connects) / self.checkouts if self.checkouts else None
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "peak_checked_out": self.peak_checked_out,
+                "reuse_ratio": round(reuse, 4) if reuse is not None else None,
+                "wait_count": self.wait_count,
+                "wait_avg_ms": round(self.wait_total_ms / self.wait_count, 3) if self.wait_count else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+            }
+
+
+_engines: Dict[str, Engine] = {}
+_engine_stats: Dict[int, _PoolStats] = {}
+_engine_pid: Optional[int] = None
+_engines_lock = threading.Lock()
+
+
+def _install_sqlite_pragmas(engine: Engine) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.DB_SQLITE_BUSY_TIMEOUT_MS)}")
+        finally:
+            cursor.close()
+
+
+def _build_engine(url: str) -> Engine:
     if url.startswith("sqlite"):
         connect_args = {"check_same_thread": False}
-    return create_engine(url, pool_pre_ping=True, future=True, connect_args=connect_args)
+        if url.rstrip("/").endswith(":memory:"):
+            # In-memory databases only exist on a single connection.
+            return create_engine(url, future=True, connect_args=connect_args, poolclass=StaticPool)
+        engine = create_engine(
+            url,
+            future=True,
+            connect_args=connect_args,
+            poolclass=QueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+        _install_sqlite_pragmas(engine)
+        return engine
+    return create_engine(
+        url,
+        future=True,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+
+
+def _reset_after_fork() -> None:
+    # Pools must not be shared across fork() (Celery prefork / uvicorn workers):
+    # drop the parent's engines without closing the inherited sockets.
+    global _engine_pid
+    pid = os.getpid()
+    if _engine_pid != pid:
+        for engine in _engines.values():
+            engine.dispose(close=False)
+        _engines.clear()
+        _engine_stats.clear()
+        _engine_pid = pid
+
+
+def get_engine(url: Optional[str] = None) -> Engine:
+    """Return the process-wide engine for `url` (defaults to the configured database)."""
+    url = url or get_database_url()
+    engine = _engines.get(url)
+    if engine is not None and _engine_pid == os.getpid():
+        return engine
+    with _engines_lock:
+        _reset_after_fork()
+        engine = _engines.get(url)
+        if engine is None:
+            engine = _build_engine(url)
+            stats = _PoolStats()
+            event.listen(engine, "connect", stats.on_connect)
+            event.listen(engine, "checkout", stats.on_checkout)
+            event.listen(engine, "checkin", stats.on_checkin)
+            event.listen(engine, "invalidate", stats.on_invalidate)
+            _engines[url] = engine
+            _engine_stats[id(engine)] = stats
+        return engine
+
+
+def record_checkout_wait(engine: Engine, started_at: float) -> None:
+    stats = _engine_stats.get(id(engine))
+    if stats is not None:
+        stats.record_wait((time.perf_counter() - started_at) * 1000.0)
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Pool status (size / checked out / overflow) plus event counters for every engine."""
+    out: Dict[str, Any] = {}
+    for engine in list(_engines.values()):
+        pool = engine.pool
+        entry: Dict[str, Any] = {
+            "dialect": engine.dialect.name,
+            "pool_class": pool.__class__.__name__,
+            "status": pool.status(),
+        }
+        if isinstance(pool, QueuePool):
+            entry.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+            })
+        stats = _engine_stats.get(id(engine))
+        if stats is not None:
+            entry.update(stats.snapshot())
+        out[engine.url.render_as_string(hide_password=True)] = entry
+    return out
+
 
+def dispose_engines() -> None:
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _engine_stats.clear()
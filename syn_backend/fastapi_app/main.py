@@ -255,6 +255,10 @@ async def startup_event():
             from fastapi_app.db.sa_models import metadata
             from fastapi_app.db.sqlalchemy_engine import get_engine
             metadata.create_all(get_engine())
+            from fastapi_app.db.file_search import ensure_mysql_fulltext
+            from fastapi_app.db.runtime import sa_connection
+            with sa_connection() as conn:
+                ensure_mysql_fulltext(conn)
             logger.info("[DB] MySQL enabled; ensured SQLAlchemy tables exist")
     except Exception as e:
         logger.warning(f"[DB] MySQL table ensure failed (continuing): {e}")
@@ -322,6 +326,13 @@ async def startup_event():
         logger.warning("AI服务模块未找到，跳过初始化")
 
 
+    # Agent 工具改为进程内直接调用服务（不再 HTTP 回环到本进程）
+    try:
+        from fastapi_app.services.tool_gateway import tool_gateway
+        tool_gateway.bind_app(app)
+    except Exception as e:
+        logger.warning(f"工具网关绑定失败，Agent 工具将回退到 HTTP 调用: {e}")
+
     # 初始化 OpenManus Agent（应用启动时预加载）
     try:
         from fastapi_app.agent.manus_agent import get_manus_agent
@@ -331,6 +342,13 @@ async def startup_event():
     except Exception as e:
         logger.warning(f"OpenManus Agent 初始化失败（可选功能）: {e}")
 
+    # 启动延时发布调度器（到点把定时 / 间隔发布任务投递给 Celery）
+    try:
+        from fastapi_app.tasks.delayed_scheduler import get_delayed_scheduler
+        get_delayed_scheduler().start()
+    except Exception as e:
+        logger.warning(f"延时发布调度器启动失败: {e}")
+
     # 启动账号数据清理调度器（每6小时清理一次）
     try:
         from fastapi_app.core.account_cleanup_scheduler import start_cleanup_scheduler
@@ -354,6 +372,14 @@ async def shutdown_event():
     except Exception as e:
         logger.warning(f"账号数据清理调度器停止失败: {e}")
 
+    # 停止延时发布调度器（仅在已加载时）
+    delayed_module = sys.modules.get("fastapi_app.tasks.delayed_scheduler")
+    if delayed_module is not None:
+        try:
+            delayed_module.stop_delayed_scheduler()
+        except Exception as e:
+            logger.warning(f"延时发布调度器停止失败: {e}")
+
     # 清理 OpenManus Agent
     try:
         if hasattr(app.state, 'manus_agent'):
@@ -363,11 +389,60 @@ async def shutdown_event():
         logger.warning(f"OpenManus Agent 清理失败: {e}")
 
 
+    # 停止素材元数据后台探测
+    try:
+        from fastapi_app.services.video_metadata_prober import video_metadata_prober
+        await video_metadata_prober.shutdown()
+    except Exception as e:
+        logger.warning(f"素材元数据探测停止失败: {e}")
+
+    # 关闭 Cookie 极速校验的 HTTP 连接池
+    try:
+        from myUtils.fast_cookie_validator import close_http_clients
+        await close_http_clients()
+    except Exception as e:
+        logger.warning(f"Cookie 校验连接池关闭失败: {e}")
+
+    # 关闭 Agent 工具网关的共享客户端（仅在已加载时）
+    tool_gateway_module = sys.modules.get("fastapi_app.services.tool_gateway")
+    if tool_gateway_module is not None:
+        try:
+            await tool_gateway_module.tool_gateway.aclose()
+        except Exception as e:
+            logger.warning(f"工具网关客户端关闭失败: {e}")
+
+    # 关闭 AI 提供商共享的异步客户端（仅在已加载时）
+    ai_provider_module = sys.modules.get("ai_service.base_provider")
+    if ai_provider_module is not None:
+        try:
+            await ai_provider_module.client_pool.aclose()
+        except Exception as e:
+            logger.warning(f"AI 客户端连接池关闭失败: {e}")
+
+    # 关闭共享的抖音/TikTok 爬虫客户端与抖音令牌池（仅在已加载时）
+    crawler_registry_module = sys.modules.get("crawlers.client_registry")
+    if crawler_registry_module is not None:
+        try:
+            await crawler_registry_module.crawler_registry.close_all()
+        except Exception as e:
+            logger.warning(f"爬虫客户端关闭失败: {e}")
+    douyin_utils_module = sys.modules.get("crawlers.douyin.web.utils")
+    if douyin_utils_module is not None:
+        try:
+            await douyin_utils_module.token_pool.close()
+        except Exception as e:
+            logger.warning(f"抖音令牌池关闭失败: {e}")
+
     # 关闭数据库连接池
     from .db.session import main_db_pool, cookie_db_pool, ai_logs_db_pool
     main_db_pool.close_all()
     cookie_db_pool.close_all()
     ai_logs_db_pool.close_all()
+    try:
+        from .db.sqlalchemy_engine import dispose_engines
+        dispose_engines()
+    except Exception as e:
+        logger.warning(f"SQLAlchemy 连接池释放失败: {e}")
     logger.info("应用已关闭")
 
 
@@ -66,6 +66,11 @@ class ProxyIP(BaseModel):
     success_count: int = Field(default=0, description="成功次数")
     fail_count: int = Field(default=0, description="失败次数")
     total_used: int = Field(default=0, description="总使用次数")
+
+    # 健康检测
+    check_success: int = Field(default=0, description="健康检测成功次数")
+    check_fail: int = Field(default=0, description="健康检测失败次数")
+    latency_ms: Optional[float] = Field(None, description="探测延迟（毫秒，滑动平均）")
     
     # 时间戳
     last_used_at: Optional[datetime] = Field(None, description="最后使用时间")
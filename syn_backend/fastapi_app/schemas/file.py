@@ -59,6 +59,7 @@ class FileResponse(FileBase):
     published_at: Optional[datetime] = None
     last_platform: Optional[int] = None
     last_accounts: Optional[str] = None
+    metadata_pending: bool = Field(default=False, description="时长/分辨率正在后台探测中")
 
     class Config:
         from_attributes = True
@@ -68,6 +69,7 @@ class FileListResponse(BaseModel):
     """Schema for paginated file list"""
     total: int
     items: List[FileResponse]
+    next_cursor: Optional[str] = Field(default=None, description="下一页游标（keyset 分页），为空表示没有更多")
 
 
 class FileStatsResponse(BaseModel):
@@ -1,10 +1,13 @@
 """
 IP池管理服务
+- 数据保存在 SQLite（见 ip_pool_store.py），使用计数 / 状态更新是单条原子 UPDATE
+- 健康检测并发执行（IP_POOL_CHECK_CONCURRENCY），单次探测有超时（IP_POOL_CHECK_TIMEOUT）并记录延迟
+- 自动分配按使用成功率、检测成功率、延迟与剩余容量加权随机选择
 """
-import json
+import os
+import time
 from pathlib import Path
-from typing import List, Optional, Dict
-from datetime import datetime
+from typing import List, Optional, Dict, Tuple
 import random
 import asyncio
 import httpx
@@ -12,40 +15,42 @@ import httpx
 from fastapi_app.models.ip_pool import (
     ProxyIP, IPStatus, IPSourceType, AddIPRequest, IPStatsResponse
 )
+from fastapi_app.services.ip_pool_store import IPPoolStore
+from fastapi_app.core.config import settings
 from fastapi_app.core.logger import logger
 
 
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+CHECK_CONCURRENCY = max(1, int(_env_float("IP_POOL_CHECK_CONCURRENCY", 50)))
+CHECK_TIMEOUT = _env_float("IP_POOL_CHECK_TIMEOUT", 8.0)
+CHECK_URLS = ("https://www.baidu.com", "https://myip.ipip.net")
+# 延迟权重的参考值：延迟等于该值时权重减半
+LATENCY_REFERENCE_MS = 800.0
+DEFAULT_DB_PATH = Path(settings.BASE_DIR) / "data" / "ip_pool.db"
+DEFAULT_LEGACY_JSON = Path(settings.BASE_DIR) / "data" / "ip_pool.json"
+
+
 class IPPoolService:
     """IP池管理服务"""
     
-    def __init__(self):
-        self.ip_pool_file = Path("data/ip_pool.json")
-        self.ips: Dict[str, ProxyIP] = {}
-        self._load_ips()
-    
-    def _load_ips(self):
-        """从文件加载IP池"""
-        if self.ip_pool_file.exists():
-            try:
-                with open(self.ip_pool_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    for item in data:
-                        ip = ProxyIP(**item)
-                        self.ips[ip.id] = ip
-                logger.info(f"已加载 {len(self.ips)} 个代理IP")
-            except Exception as e:
-                logger.error(f"加载IP池失败: {e}")
-        logger.info("IP池重载完成")  # 触发重载监测
-    
-    def _save_ips(self):
-        """保存IP池到文件"""
-        self.ip_pool_file.parent.mkdir(parents=True, exist_ok=True)
-        try:
-            data = [ip.model_dump(mode="json") for ip in self.ips.values()]
-            with open(self.ip_pool_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"保存IP池失败: {e}")
+    def __init__(self, db_path: Optional[Path] = None, legacy_json: Optional[Path] = None):
+        """
+        Args:
+            db_path: SQLite 存储路径，默认 data/ip_pool.db
+            legacy_json: 需要迁移的旧版 JSON；仅默认存储会自动迁移 data/ip_pool.json
+        """
+        if db_path is None:
+            db_path = DEFAULT_DB_PATH
+            legacy_json = legacy_json or DEFAULT_LEGACY_JSON
+        self.store = IPPoolStore(db_path)
+        if legacy_json is not None:
+            self.store.import_json(Path(legacy_json))
     
     def add_ip(self, request: AddIPRequest) -> ProxyIP:
         """添加IP到池中"""
@@ -65,14 +70,13 @@ class IPPoolService:
             provider=request.provider
         )
         
-        self.ips[ip.id] = ip
-        self._save_ips()
+        self.store.insert([ip])
         logger.info(f"添加IP: {ip.ip}:{ip.port}")
         return ip
     
     def get_ip(self, ip_id: str) -> Optional[ProxyIP]:
         """获取单个IP"""
-        return self.ips.get(ip_id)
+        return self.store.get(ip_id)
     
     def list_ips(
         self,
@@ -81,73 +85,62 @@ class IPPoolService:
         region: Optional[str] = None
     ) -> List[ProxyIP]:
         """获取IP列表"""
-        ips = list(self.ips.values())
-        
-        if status:
-            ips = [ip for ip in ips if ip.status == status]
-        if ip_type:
-            ips = [ip for ip in ips if ip.ip_type == ip_type]
-        if region:
-            ips = [ip for ip in ips if ip.region == region]
-        
-        return ips
+        return self.store.list(
+            status=getattr(status, "value", status),
+            ip_type=getattr(ip_type, "value", ip_type),
+            region=region
+        )
     
     def delete_ip(self, ip_id: str) -> bool:
         """删除IP"""
-        if ip_id in self.ips:
-            ip = self.ips[ip_id]
-            del self.ips[ip_id]
-            self._save_ips()
+        ip = self.store.get(ip_id)
+        if ip and self.store.delete(ip_id):
             logger.info(f"删除IP: {ip.ip}:{ip.port}")
             return True
         return False
     
     def update_ip_status(self, ip_id: str, status: IPStatus):
         """更新IP状态"""
-        if ip_id in self.ips:
-            self.ips[ip_id].status = status
-            self.ips[ip_id].updated_at = datetime.now()
-            self._save_ips()
+        self.store.set_status(ip_id, getattr(status, "value", status))
     
     def bind_account_to_ip(self, ip_id: str, account_id: str) -> bool:
         """绑定账号到IP"""
-        ip = self.ips.get(ip_id)
+        ip = self.store.get(ip_id)
         if not ip:
             raise ValueError(f"IP {ip_id} 不存在")
         
-        # 检查是否已达到绑定上限
-        if len(ip.bound_account_ids) >= ip.max_bindings:
-            raise ValueError(f"IP已达到绑定上限 ({ip.max_bindings})")
-        
-        # 先解绑该账号在其他IP的绑定
-        self.unbind_account(account_id)
+        if account_id in ip.bound_account_ids:
+            return True
         
-        # 添加绑定
-        if account_id not in ip.bound_account_ids:
-            ip.bound_account_ids.append(account_id)
-            ip.updated_at = datetime.now()
-            self._save_ips()
-            logger.info(f"绑定账号 {account_id} 到IP {ip.ip}:{ip.port}")
+        # 检查是否已达到绑定上限（写入时会再次原子校验，防止并发超额）
+        if len(ip.bound_account_ids) >= ip.max_bindings or not self.store.bind(ip_id, account_id):
+            raise ValueError(f"IP已达到绑定上限 ({ip.max_bindings})")
         
+        logger.info(f"绑定账号 {account_id} 到IP {ip.ip}:{ip.port}")
         return True
     
     def unbind_account(self, account_id: str) -> bool:
         """解绑账号"""
-        for ip in self.ips.values():
-            if account_id in ip.bound_account_ids:
-                ip.bound_account_ids.remove(account_id)
-                ip.updated_at = datetime.now()
-                self._save_ips()
-                logger.info(f"解绑账号 {account_id}")
-                return True
+        if self.store.unbind(account_id):
+            logger.info(f"解绑账号 {account_id}")
+            return True
         return False
     
     def get_ip_for_account(self, account_id: str) -> Optional[ProxyIP]:
         """获取账号绑定的IP"""
-        for ip in self.ips.values():
-            if account_id in ip.bound_account_ids:
-                return ip
-        return None
+        return self.store.get_by_account(account_id)
+    
+    @staticmethod
+    def selection_weight(ip: ProxyIP) -> float:
+        """
+        自动分配的权重：使用成功率 × 检测成功率 × 延迟因子 × 容量因子
+        （成功率做拉普拉斯平滑，没有历史的新 IP 按 50% 计）
+        """
+        usage = (ip.success_count + 1) / (ip.total_used + 2)
+        checks = (ip.check_success + 1) / (ip.check_success + ip.check_fail + 2)
+        latency = 1.0 / (1.0 + (ip.latency_ms if ip.latency_ms is not None else LATENCY_REFERENCE_MS) / LATENCY_REFERENCE_MS)
+        free = max(ip.max_bindings - len(ip.bound_account_ids), 0) / max(ip.max_bindings, 1)
+        return usage * checks * latency * (0.5 + free)
     
     def auto_bind_account(
         self,
@@ -156,126 +149,95 @@ class IPPoolService:
     ) -> Optional[ProxyIP]:
         """自动为账号分配IP"""
         # 1. 优先选择同地区的可用IP
-        candidates = []
-        
-        if prefer_region:
-            candidates = [
-                ip for ip in self.ips.values()
-                if ip.region == prefer_region
-                and len(ip.bound_account_ids) < ip.max_bindings
-                and ip.status == IPStatus.AVAILABLE
-            ]
+        candidates = self.store.bindable(prefer_region) if prefer_region else []
         
         # 2. 如果没有同地区的，选择任意可用IP
         if not candidates:
-            candidates = [
-                ip for ip in self.ips.values()
-                if len(ip.bound_account_ids) < ip.max_bindings
-                and ip.status == IPStatus.AVAILABLE
-            ]
-        
-        if not candidates:
-            logger.warning(f"没有可用IP为账号 {account_id} 分配")
-            return None
-        
-        # 选择绑定数最少的IP
-        best_ip = min(candidates, key=lambda x: len(x.bound_account_ids))
-        self.bind_account_to_ip(best_ip.id, account_id)
-        return best_ip
+            candidates = self.store.bindable()
+        
+        # 3. 按权重随机选择；并发绑定导致名额已满时换下一个
+        while candidates:
+            weights = [self.selection_weight(ip) for ip in candidates]
+            ip = random.choices(candidates, weights=weights)[0]
+            if self.store.bind(ip.id, account_id):
+                logger.info(f"绑定账号 {account_id} 到IP {ip.ip}:{ip.port}")
+                return self.store.get(ip.id)
+            candidates.remove(ip)
+        
+        logger.warning(f"没有可用IP为账号 {account_id} 分配")
+        return None
     
-    async def check_ip_health(self, ip: ProxyIP) -> bool:
-        """检测IP健康状态"""
-        try:
-            proxy_url = ip.to_proxy_url()
-            client_kwargs = {"timeout": 10.0}
-            
-            # 只有当proxy_url存在时才设置代理
-            if proxy_url:
-                client_kwargs["proxy"] = proxy_url
-            
+    async def probe_ip(self, ip: ProxyIP, timeout: float = CHECK_TIMEOUT) -> Tuple[bool, Optional[float]]:
+        """探测一次代理：返回 (是否可用, 延迟毫秒)；整个探测不超过 timeout 秒"""
+        client_kwargs = {"timeout": timeout}
+        proxy_url = ip.to_proxy_url()
+        # 只有当proxy_url存在时才设置代理
+        if proxy_url:
+            client_kwargs["proxy"] = proxy_url
+        
+        async def attempt() -> Tuple[bool, Optional[float]]:
             async with httpx.AsyncClient(**client_kwargs) as client:
-                # 测试请求到百度 (国内更稳定)
-                try:
-                    response = await client.get("https://www.baidu.com")
-                    ip.last_check_at = datetime.now()
-                    
-                    if 200 <= response.status_code < 400:
-                        logger.info(f"IP {ip.ip}:{ip.port} 健康检测通过")
-                        return True
-                    else:
-                        logger.warning(f"IP {ip.ip}:{ip.port} 返回状态码 {response.status_code}")
-                        return False
-                except Exception as e:
-                    # 如果百度失败，尝试备用地址 (myip)
+                last_error: Optional[Exception] = None
+                # 先测百度 (国内更稳定)，失败再试备用地址
+                for url in CHECK_URLS:
+                    started = time.perf_counter()
                     try:
-                        response = await client.get("https://myip.ipip.net")
-                        if response.status_code == 200:
-                            return True
-                    except:
-                        pass
-                    raise e
-                    
+                        response = await client.get(url)
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    latency_ms = (time.perf_counter() - started) * 1000
+                    if 200 <= response.status_code < 400:
+                        return True, latency_ms
+                    logger.warning(f"IP {ip.ip}:{ip.port} 返回状态码 {response.status_code}")
+                if last_error:
+                    raise last_error
+                return False, None
+        
+        try:
+            return await asyncio.wait_for(attempt(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"IP {ip.ip}:{ip.port} 健康检测超时 ({timeout}s)")
         except Exception as e:
             logger.error(f"IP {ip.ip}:{ip.port} 健康检测失败: {e}")
-            return False
+        return False, None
     
-    async def batch_check_health(self) -> Dict[str, bool]:
-        """批量检测IP健康状态"""
-        results = {}
-        tasks = []
-        
-        for ip_id, ip in self.ips.items():
-            task = self.check_ip_health(ip)
-            tasks.append((ip_id, task))
-        
-        for ip_id, task in tasks:
-            healthy = await task
-            results[ip_id] = healthy
-            
-            # 更新状态
-            if healthy:
-                self.update_ip_status(ip_id, IPStatus.AVAILABLE)
-            else:
-                self.update_ip_status(ip_id, IPStatus.FAILED)
-        
-        return results
+    async def check_ip_health(self, ip: ProxyIP) -> bool:
+        """检测IP健康状态（结果与延迟写入存储）"""
+        healthy, latency_ms = await self.probe_ip(ip)
+        if healthy:
+            logger.info(f"IP {ip.ip}:{ip.port} 健康检测通过 ({latency_ms:.0f}ms)")
+        status = IPStatus.AVAILABLE if healthy else IPStatus.FAILED
+        self.store.record_check(ip.id, healthy, latency_ms, status.value)
+        return healthy
+    
+    async def batch_check_health(self, concurrency: int = CHECK_CONCURRENCY) -> Dict[str, bool]:
+        """批量检测IP健康状态（最多 concurrency 个探测同时进行）"""
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        ips = self.store.list()
+        
+        async def check(ip: ProxyIP) -> bool:
+            async with semaphore:
+                return await self.check_ip_health(ip)
+        
+        results = await asyncio.gather(*(check(ip) for ip in ips))
+        return {ip.id: healthy for ip, healthy in zip(ips, results)}
     
     def record_usage(self, ip_id: str, success: bool):
-        """记录IP使用结果"""
-        if ip_id in self.ips:
-            ip = self.ips[ip_id]
-            ip.total_used += 1
-            
-            if success:
-                ip.success_count += 1
-            else:
-                ip.fail_count += 1
-            
-            ip.last_used_at = datetime.now()
-            self._save_ips()
+        """记录IP使用结果（原子累加，跨进程安全）"""
+        self.store.record_usage(ip_id, success)
     
     def get_statistics(self) -> IPStatsResponse:
         """获取IP池统计"""
-        total = len(self.ips)
-        available = sum(1 for ip in self.ips.values() if ip.status == IPStatus.AVAILABLE)
-        in_use = sum(1 for ip in self.ips.values() if ip.status == IPStatus.IN_USE)
-        failed = sum(1 for ip in self.ips.values() if ip.status == IPStatus.FAILED)
-        banned = sum(1 for ip in self.ips.values() if ip.status == IPStatus.BANNED)
-        
-        total_bindings = sum(len(ip.bound_account_ids) for ip in self.ips.values())
-        
-        # 计算平均成功率
-        success_rates = [ip.success_rate for ip in self.ips.values() if ip.total_used > 0]
-        avg_success_rate = sum(success_rates) / len(success_rates) if success_rates else 0.0
-        
+        stats = self.store.statistics()
         return IPStatsResponse(
-            total=total,
-            available=available,
-            in_use=in_use,
-            failed=failed,
-            banned=banned,
-            total_bindings=total_bindings,
-            avg_success_rate=round(avg_success_rate, 2)
+            total=stats["total"],
+            available=stats["available"],
+            in_use=stats["in_use"],
+            failed=stats["failed"],
+            banned=stats["banned"],
+            total_bindings=stats["total_bindings"],
+            avg_success_rate=round(stats["avg_success_rate"], 2)
         )
 
 
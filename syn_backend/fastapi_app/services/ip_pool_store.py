@@ -0,0 +1,309 @@
+"""
+IP 池持久化存储（SQLite WAL）
+替代每次调用都整表重写的 data/ip_pool.json：
+
+- 使用计数 / 健康检测结果用单条 UPDATE 原子累加，多个 API / Celery 进程同时写也不会丢计数
+- 账号绑定单独成表（account_id 主键，按 ip_id 建索引），绑定上限在同一条 INSERT 中校验
+- 按 status / region 建索引，发布链路上的「账号 → IP」查询是一次主键查找
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from fastapi_app.core.logger import logger
+from fastapi_app.models.ip_pool import ProxyIP
+
+
+# 独立列保存的字段（参与过滤 / 计数），其余字段放在 payload
+COLUMNS = (
+    "ip", "port", "status", "region", "ip_type", "max_bindings",
+    "success_count", "fail_count", "total_used",
+    "check_success", "check_fail", "latency_ms",
+    "last_used_at", "last_check_at", "updated_at",
+)
+# 探测延迟的指数滑动平均系数
+LATENCY_ALPHA = 0.3
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+class IPPoolStore:
+    """代理 IP 表（单连接 + 锁；跨进程一致性由 SQLite 事务保证）"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS proxy_ips (
+                    id TEXT PRIMARY KEY,
+                    ip TEXT NOT NULL,
+                    port INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    region TEXT,
+                    ip_type TEXT,
+                    max_bindings INTEGER NOT NULL DEFAULT 30,
+                    success_count INTEGER NOT NULL DEFAULT 0,
+                    fail_count INTEGER NOT NULL DEFAULT 0,
+                    total_used INTEGER NOT NULL DEFAULT 0,
+                    check_success INTEGER NOT NULL DEFAULT 0,
+                    check_fail INTEGER NOT NULL DEFAULT 0,
+                    latency_ms REAL,
+                    last_used_at TEXT,
+                    last_check_at TEXT,
+                    updated_at TEXT,
+                    payload TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS ip_bindings (
+                    account_id TEXT PRIMARY KEY,
+                    ip_id TEXT NOT NULL,
+                    bound_at TEXT
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_proxy_ips_status_region ON proxy_ips(status, region)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ip_bindings_ip ON ip_bindings(ip_id)")
+
+    # ---------- 读 ----------
+
+    def _bindings(self, ip_ids: List[str]) -> Dict[str, List[str]]:
+        if not ip_ids:
+            return {}
+        placeholders = ",".join("?" for _ in ip_ids)
+        rows = self._conn.execute(
+            f"SELECT ip_id, account_id FROM ip_bindings WHERE ip_id IN ({placeholders}) ORDER BY bound_at, rowid",
+            ip_ids,
+        ).fetchall()
+        bound: Dict[str, List[str]] = {}
+        for row in rows:
+            bound.setdefault(row["ip_id"], []).append(row["account_id"])
+        return bound
+
+    def _hydrate(self, rows) -> List[ProxyIP]:
+        bound = self._bindings([row["id"] for row in rows])
+        ips = []
+        for row in rows:
+            try:
+                data = json.loads(row["payload"])
+                data.update({name: row[name] for name in COLUMNS if row[name] is not None})
+                data["id"] = row["id"]
+                data["bound_account_ids"] = bound.get(row["id"], [])
+                ips.append(ProxyIP(**data))
+            except Exception as e:
+                logger.error(f"加载代理IP失败 ({row['id']}): {e}")
+        return ips
+
+    def list(self, status: Optional[str] = None, ip_type: Optional[str] = None,
+             region: Optional[str] = None) -> List[ProxyIP]:
+        clauses, params = [], []
+        for column, value in (("status", status), ("ip_type", ip_type), ("region", region)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT * FROM proxy_ips {where} ORDER BY rowid", params).fetchall()
+            return self._hydrate(rows)
+
+    def get(self, ip_id: str) -> Optional[ProxyIP]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM proxy_ips WHERE id = ?", (ip_id,)).fetchall()
+            ips = self._hydrate(rows)
+        return ips[0] if ips else None
+
+    def get_by_account(self, account_id: str) -> Optional[ProxyIP]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.* FROM ip_bindings b JOIN proxy_ips p ON p.id = b.ip_id WHERE b.account_id = ?",
+                (account_id,),
+            ).fetchall()
+            ips = self._hydrate(rows)
+        return ips[0] if ips else None
+
+    def bindable(self, region: Optional[str] = None) -> List[ProxyIP]:
+        """可用且未达到绑定上限的 IP"""
+        sql = """
+            SELECT p.* FROM proxy_ips p
+            WHERE p.status = 'available'
+              AND (SELECT COUNT(*) FROM ip_bindings b WHERE b.ip_id = p.id) < p.max_bindings
+        """
+        params: List = []
+        if region:
+            sql += " AND p.region = ?"
+            params.append(region)
+        with self._lock:
+            return self._hydrate(self._conn.execute(sql, params).fetchall())
+
+    def statistics(self) -> Dict[str, float]:
+        with self._lock:
+            row = self._conn.execute("""
+                SELECT
+                    COUNT(*) AS total,
+                    SUM(status = 'available') AS available,
+                    SUM(status = 'in_use') AS in_use,
+                    SUM(status = 'failed') AS failed,
+                    SUM(status = 'banned') AS banned,
+                    AVG(CASE WHEN total_used > 0 THEN success_count * 100.0 / total_used END) AS avg_success_rate
+                FROM proxy_ips
+            """).fetchone()
+            bindings = self._conn.execute("SELECT COUNT(*) FROM ip_bindings").fetchone()[0]
+        return {
+            "total": row["total"] or 0,
+            "available": row["available"] or 0,
+            "in_use": row["in_use"] or 0,
+            "failed": row["failed"] or 0,
+            "banned": row["banned"] or 0,
+            "total_bindings": bindings,
+            "avg_success_rate": row["avg_success_rate"] or 0.0,
+        }
+
+    # ---------- 写 ----------
+
+    @staticmethod
+    def _row(ip: ProxyIP) -> tuple:
+        data = ip.model_dump(mode="json")
+        columns = tuple(data.get(name) for name in COLUMNS)
+        payload = {k: v for k, v in data.items() if k not in COLUMNS and k not in ("id", "bound_account_ids")}
+        return (ip.id,) + columns + (json.dumps(payload, ensure_ascii=False),)
+
+    def insert(self, ips: Iterable[ProxyIP]) -> None:
+        ips = list(ips)
+        if not ips:
+            return
+        placeholders = ",".join("?" for _ in range(len(COLUMNS) + 2))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO proxy_ips (id, {', '.join(COLUMNS)}, payload) VALUES ({placeholders})",
+                [self._row(ip) for ip in ips],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ip_bindings (account_id, ip_id, bound_at) VALUES (?, ?, ?)",
+                [(account_id, ip.id, _now()) for ip in ips for account_id in ip.bound_account_ids],
+            )
+
+    def delete(self, ip_id: str) -> bool:
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM proxy_ips WHERE id = ?", (ip_id,)).rowcount
+            self._conn.execute("DELETE FROM ip_bindings WHERE ip_id = ?", (ip_id,))
+        return bool(deleted)
+
+    def set_status(self, ip_id: str, status: str) -> bool:
+        with self._lock, self._conn:
+            return bool(self._conn.execute(
+                "UPDATE proxy_ips SET status = ?, updated_at = ? WHERE id = ?", (status, _now(), ip_id)
+            ).rowcount)
+
+    def record_usage(self, ip_id: str, success: bool) -> bool:
+        now = _now()
+        with self._lock, self._conn:
+            return bool(self._conn.execute(
+                """
+                UPDATE proxy_ips
+                SET total_used = total_used + 1,
+                    success_count = success_count + ?,
+                    fail_count = fail_count + ?,
+                    last_used_at = ?
+                WHERE id = ?
+                """,
+                (1 if success else 0, 0 if success else 1, now, ip_id),
+            ).rowcount)
+
+    def record_check(self, ip_id: str, healthy: bool, latency_ms: Optional[float], status: str) -> bool:
+        """记录一次健康检测：状态、检测计数、延迟滑动平均（失败的探测不计入延迟）"""
+        now = _now()
+        with self._lock, self._conn:
+            return bool(self._conn.execute(
+                f"""
+                UPDATE proxy_ips
+                SET status = ?,
+                    check_success = check_success + ?,
+                    check_fail = check_fail + ?,
+                    latency_ms = CASE
+                        WHEN ? IS NULL THEN latency_ms
+                        WHEN latency_ms IS NULL THEN ?
+                        ELSE latency_ms * {1 - LATENCY_ALPHA} + ? * {LATENCY_ALPHA}
+                    END,
+                    last_check_at = ?,
+                    updated_at = ?
+                WHERE id = ?
+                """,
+                (status, 1 if healthy else 0, 0 if healthy else 1,
+                 latency_ms, latency_ms, latency_ms, now, now, ip_id),
+            ).rowcount)
+
+    def bind(self, ip_id: str, account_id: str) -> bool:
+        """
+        绑定账号（同时解除它在其它 IP 上的绑定）；IP 不存在或已达上限时返回 False。
+        上限校验与写入在同一条语句内完成，多进程并发绑定不会超额
+        """
+        with self._lock, self._conn:
+            return bool(self._conn.execute(
+                """
+                INSERT INTO ip_bindings (account_id, ip_id, bound_at)
+                SELECT ?, ?, ?
+                WHERE (SELECT COUNT(*) FROM ip_bindings WHERE ip_id = ?)
+                      < (SELECT max_bindings FROM proxy_ips WHERE id = ?)
+                ON CONFLICT(account_id) DO UPDATE SET ip_id = excluded.ip_id, bound_at = excluded.bound_at
+                """,
+                (account_id, ip_id, _now(), ip_id, ip_id),
+            ).rowcount)
+
+    def unbind(self, account_id: str) -> Optional[str]:
+        """解除账号绑定，返回原来绑定的 ip_id"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT ip_id FROM ip_bindings WHERE account_id = ?", (account_id,)).fetchone()
+            if not row:
+                return None
+            self._conn.execute("DELETE FROM ip_bindings WHERE account_id = ?", (account_id,))
+            self._conn.execute("UPDATE proxy_ips SET updated_at = ? WHERE id = ?", (_now(), row["ip_id"]))
+        return row["ip_id"]
+
+    # ---------- 迁移 ----------
+
+    def import_json(self, json_file: Path) -> int:
+        """
+        一次性迁移旧版 ip_pool.json（表为空时）。
+        迁移状态记在库的 user_version 上，源文件保持原样，重复调用不会重复导入。
+        """
+        with self._lock:
+            migrated = self._conn.execute("PRAGMA user_version").fetchone()[0] >= 1
+            has_rows = self._conn.execute("SELECT 1 FROM proxy_ips LIMIT 1").fetchone()
+        if migrated:
+            return 0
+        ips: List[ProxyIP] = []
+        if json_file.exists() and not has_rows:
+            try:
+                with open(json_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                logger.error(f"加载IP池失败: {e}")
+                return 0
+
+            for item in data:
+                try:
+                    ips.append(ProxyIP(**item))
+                except Exception as e:
+                    logger.error(f"加载代理IP失败: {e}")
+            self.insert(ips)
+            logger.info(f"已从 {json_file} 迁移 {len(ips)} 个代理IP")
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA user_version = 1")
+        return len(ips)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
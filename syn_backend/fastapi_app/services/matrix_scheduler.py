@@ -9,70 +9,60 @@ from collections import deque
 from pathlib import Path
 from datetime import datetime
 import uuid
-import json
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from fastapi_app.models.matrix_task import MatrixTask, TaskStatus
+from fastapi_app.services.matrix_task_store import ACTIVE_STATUSES, MatrixTaskStore
 from fastapi_app.core.logger import logger
 
 
 class MatrixScheduler:
     """矩阵任务调度器"""
 
-    def __init__(self):
+    def __init__(self, db_path: Optional[Path] = None):
         self.pending_queue = deque()  # 待执行队列
         self.retry_queue = deque()    # 重试队列（优先级更高）
-        self.running = []             # 正在执行的任务
-        self.finished = []            # 已完成任务
-        self.failed = []              # 失败任务
+        self.running: Dict[str, MatrixTask] = {}  # 正在执行的任务（按 task_id）
         self._lock = threading.Lock()
-        
-        # 任务索引（快速查找）
+
+        # 活跃任务索引（pending / retry / running）；已完成 / 失败的任务只在存储中
         self.task_index: Dict[str, MatrixTask] = {}
         self.tasks_file = Path("data/matrix_tasks.json")
+        self.store = MatrixTaskStore(db_path or self.tasks_file.with_suffix(".db"))
         self._load_tasks()
 
     def _load_tasks(self):
-        """从文件加载任务"""
-        if self.tasks_file.exists():
-            try:
-                with open(self.tasks_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    for item in data:
-                        try:
-                            task = MatrixTask(**item)
-                            self.task_index[task.task_id] = task
-                            
-                            # 根据状态恢复队列
-                            if task.status == TaskStatus.PENDING:
-                                self.pending_queue.append(task)
-                            elif task.status == TaskStatus.RETRY or task.status == TaskStatus.NEED_VERIFICATION:
-                                self.retry_queue.append(task)
-                            elif task.status == TaskStatus.RUNNING:
-                                # 重启后，运行中的任务重置为 Pending 或 Retry
-                                task.status = TaskStatus.RETRY
-                                task.retry_count += 1
-                                task.error_message = f"System restarted at {datetime.now()}"
-                                self.retry_queue.append(task)
-                            elif task.status == TaskStatus.FINISHED:
-                                self.finished.append(task)
-                            elif task.status == TaskStatus.FAILED:
-                                self.failed.append(task)
-                        except Exception as e:
-                            logger.error(f"Error loading task item: {e}")
-                logger.info(f"已加载 {len(self.task_index)} 个矩阵任务")
-            except Exception as e:
-                logger.error(f"Failed to load matrix tasks: {e}")
-
-    def _save_tasks(self):
-        """保存任务到文件"""
-        self.tasks_file.parent.mkdir(parents=True, exist_ok=True)
+        """从存储恢复活跃任务队列（首次启动时迁移旧 JSON 文件）"""
+        try:
+            self.store.import_json(self.tasks_file)
+            restarted = []
+            for task in self.store.load(ACTIVE_STATUSES):
+                self.task_index[task.task_id] = task
+
+                # 根据状态恢复队列
+                if task.status == TaskStatus.PENDING:
+                    self.pending_queue.append(task)
+                elif task.status == TaskStatus.RETRY or task.status == TaskStatus.NEED_VERIFICATION:
+                    self.retry_queue.append(task)
+                elif task.status == TaskStatus.RUNNING:
+                    # 重启后，运行中的任务重置为 Retry
+                    task.status = TaskStatus.RETRY
+                    task.retry_count += 1
+                    task.error_message = f"System restarted at {datetime.now()}"
+                    self.retry_queue.append(task)
+                    restarted.append(task)
+            # 保留原入队序号，多次重启后的恢复顺序保持一致
+            self._save_tasks(restarted)
+            logger.info(f"已加载 {len(self.task_index)} 个活跃矩阵任务")
+        except Exception as e:
+            logger.error(f"Failed to load matrix tasks: {e}")
+
+    def _save_tasks(self, tasks: List[MatrixTask], enqueued: Optional[List[MatrixTask]] = None):
+        """只持久化发生变化的任务；enqueued 中的任务刷新入队序号"""
         try:
-            # 序列化所有任务
-            data = [t.model_dump(mode="json") for t in self.task_index.values()]
-            with open(self.tasks_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            seqs = {t.task_id: self.store.next_seq() for t in (enqueued or [])}
+            self.store.save(tasks, seqs)
         except Exception as e:
             logger.error(f"Failed to save matrix tasks: {e}")
 
@@ -242,7 +232,7 @@ class MatrixScheduler:
                     )
 
         logger.info(f"矩阵任务生成完成: 总计 {len(all_tasks)} 个任务")
-        self._save_tasks()
+        self._save_tasks(all_tasks, enqueued=all_tasks)
         return all_tasks
     
     def _create_and_add_task(
@@ -318,8 +308,8 @@ class MatrixScheduler:
             if task:
                 task.status = TaskStatus.RUNNING
                 task.started_at = datetime.now()
-                self.running.append(task)
-                self._save_tasks()
+                self.running[task.task_id] = task
+                self._save_tasks([task])
 
         return task
 
@@ -343,11 +333,11 @@ class MatrixScheduler:
 
                 task.status = TaskStatus.RUNNING
                 task.started_at = datetime.now()
-                self.running.append(task)
+                self.running[task.task_id] = task
                 tasks.append(task)
 
             if tasks:
-                self._save_tasks()
+                self._save_tasks(tasks)
 
         return tasks
 
@@ -367,18 +357,18 @@ class MatrixScheduler:
         - need_verification: 需要验证 → retry 队列末尾
         """
         with self._lock:
-            task = self.task_index.get(task_id)
+            task = self.task_index.get(task_id) or self.store.get(task_id)
             if not task:
                 logger.error(f"任务 {task_id} 不存在")
                 return None
 
             # 从当前队列中移除
             self._remove_from_all_queues(task)
+            enqueued: List[MatrixTask] = []
 
             if status == "success":
                 task.status = TaskStatus.FINISHED
                 task.completed_at = datetime.now()
-                self.finished.append(task)
                 logger.info(f"任务 {task_id} 执行成功")
 
             elif status == "fail":
@@ -388,11 +378,11 @@ class MatrixScheduler:
                 if task.retry_count >= task.max_retries:
                     task.status = TaskStatus.FAILED
                     task.completed_at = datetime.now()
-                    self.failed.append(task)
                     logger.error(f"任务 {task_id} 失败 (已达最大重试次数 {task.max_retries})")
                 else:
                     task.status = TaskStatus.RETRY
                     self.retry_queue.append(task)
+                    enqueued.append(task)
                     logger.warning(f"任务 {task_id} 失败，进入重试队列 (重试 {task.retry_count}/{task.max_retries})")
 
             elif status == "need_verification":
@@ -400,67 +390,79 @@ class MatrixScheduler:
                 task.verification_url = verification_url
                 task.error_message = message
                 self.retry_queue.append(task)
+                enqueued.append(task)
                 logger.warning(f"任务 {task_id} 需要验证，移至 retry 队列末尾")
 
-            self._save_tasks()
+            if task.status in (TaskStatus.FINISHED, TaskStatus.FAILED):
+                self.task_index.pop(task_id, None)
+            else:
+                self.task_index[task_id] = task
+            self._save_tasks([task], enqueued=enqueued)
             return task
 
     def _remove_from_all_queues(self, task: MatrixTask):
-        """从所有队列中移除任务"""
-        for queue in [self.pending_queue, self.retry_queue, self.running]:
-            try:
-                queue.remove(task)
-            except (ValueError, AttributeError):
-                pass
+        """从任务当前所在的队列中移除（running 为 O(1)，仅 pending / retry 需要线性查找）"""
+        if self.running.pop(task.task_id, None) is not None:
+            return
+        for queue in (self.retry_queue, self.pending_queue):
+            for queued in queue:
+                if queued.task_id == task.task_id:
+                    queue.remove(queued)
+                    return
 
     def get_task_by_id(self, task_id: str) -> Optional[MatrixTask]:
         """根据ID获取任务"""
-        return self.task_index.get(task_id)
+        return self.task_index.get(task_id) or self.store.get(task_id)
 
     def get_all_tasks(self) -> Dict[str, List[MatrixTask]]:
         """获取所有任务列表"""
+        with self._lock:
+            active = {
+                "pending": list(self.pending_queue),
+                "retry": list(self.retry_queue),
+                "running": list(self.running.values()),
+            }
         return {
-            "pending": list(self.pending_queue),
-            "retry": list(self.retry_queue),
-            "running": self.running.copy(),
-            "finished": self.finished.copy(),
-            "failed": self.failed.copy(),
+            **active,
+            "finished": self.store.load([TaskStatus.FINISHED.value]),
+            "failed": self.store.load([TaskStatus.FAILED.value]),
         }
 
     def get_statistics(self) -> Dict[str, int]:
-        """获取任务统计"""
+        """获取任务统计（已完成 / 失败数量走 status 索引计数）"""
+        counts = self.store.count_by_status()
         return {
             "pending": len(self.pending_queue),
             "retry": len(self.retry_queue),
             "running": len(self.running),
-            "finished": len(self.finished),
-            "failed": len(self.failed),
-            "total": len(self.task_index),
+            "finished": counts.get(TaskStatus.FINISHED.value, 0),
+            "failed": counts.get(TaskStatus.FAILED.value, 0),
+            "total": sum(counts.values()),
         }
 
     def reset(self):
         """重置所有队列"""
-        self.pending_queue.clear()
-        self.retry_queue.clear()
-        self.running.clear()
-        self.finished.clear()
-        self.failed.clear()
-        self.task_index.clear()
-        self._save_tasks()
+        with self._lock:
+            self.pending_queue.clear()
+            self.retry_queue.clear()
+            self.running.clear()
+            self.task_index.clear()
+            self.store.delete_all()
         logger.info("任务调度器已重置")
 
     def cancel_task(self, task_id: str) -> bool:
         """取消任务"""
-        task = self.task_index.get(task_id)
-        if not task:
-            return False
-        
-        self._remove_from_all_queues(task)
-        task.status = TaskStatus.FAILED
-        task.error_message = "用户取消"
-        task.completed_at = datetime.now()
-        self.failed.append(task)
-        self._save_tasks()
+        with self._lock:
+            task = self.task_index.get(task_id)
+            if not task:
+                return False
+
+            self._remove_from_all_queues(task)
+            task.status = TaskStatus.FAILED
+            task.error_message = "用户取消"
+            task.completed_at = datetime.now()
+            self.task_index.pop(task_id, None)
+            self._save_tasks([task])
         logger.info(f"任务 {task_id} 已取消")
         return True
 
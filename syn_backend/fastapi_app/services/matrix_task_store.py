@@ -0,0 +1,168 @@
+"""
+矩阵任务持久化存储（SQLite WAL）
+替代整表重写的 data/matrix_tasks.json：每次状态变化只 UPSERT 变更的任务行，
+按 status / platform / batch_id / scheduled_time 建索引；
+queue_seq 记录入队顺序，重启后按原顺序恢复 pending / retry 队列。
+"""
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from fastapi_app.core.logger import logger
+from fastapi_app.models.matrix_task import MatrixTask
+
+
+ACTIVE_STATUSES = ("pending", "retry", "need_verification", "running")
+
+
+class MatrixTaskStore:
+    """矩阵任务表（单连接 + 锁，调用方已持有调度器锁时开销仅为一次小事务）"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+        self._seq = self._conn.execute("SELECT COALESCE(MAX(queue_seq), 0) FROM matrix_tasks").fetchone()[0]
+
+    def _init_schema(self) -> None:
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS matrix_tasks (
+                    task_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    platform TEXT,
+                    account_id TEXT,
+                    batch_id TEXT,
+                    priority INTEGER,
+                    scheduled_time TEXT,
+                    queue_seq INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    payload TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_matrix_tasks_status_seq ON matrix_tasks(status, queue_seq)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_matrix_tasks_platform ON matrix_tasks(platform)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_matrix_tasks_batch ON matrix_tasks(batch_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_matrix_tasks_scheduled ON matrix_tasks(scheduled_time)")
+
+    def next_seq(self) -> int:
+        """入队序号（pending / retry 队列的恢复顺序）"""
+        with self._lock:
+            self._seq += 1
+            return self._seq
+
+    @staticmethod
+    def _row(task: MatrixTask, seq: int) -> tuple:
+        data = task.model_dump(mode="json")
+        return (
+            task.task_id,
+            data["status"],
+            task.platform,
+            task.account_id,
+            task.batch_id,
+            task.priority,
+            data.get("scheduled_time"),
+            seq,
+            json.dumps(data, ensure_ascii=False),
+        )
+
+    def save(self, tasks: Iterable[MatrixTask], seqs: Optional[Dict[str, int]] = None) -> None:
+        """UPSERT 变更的任务；seqs 给出新入队任务的 queue_seq，未给出则保留原值"""
+        seqs = seqs or {}
+        rows = [self._row(t, seqs.get(t.task_id, -1)) for t in tasks]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO matrix_tasks
+                    (task_id, status, platform, account_id, batch_id, priority, scheduled_time, queue_seq, payload)
+                VALUES (?, ?, ?, ?, ?, ?, ?, MAX(?, 0), ?)
+                ON CONFLICT(task_id) DO UPDATE SET
+                    status = excluded.status,
+                    platform = excluded.platform,
+                    account_id = excluded.account_id,
+                    batch_id = excluded.batch_id,
+                    priority = excluded.priority,
+                    scheduled_time = excluded.scheduled_time,
+                    queue_seq = CASE WHEN ? >= 0 THEN excluded.queue_seq ELSE matrix_tasks.queue_seq END,
+                    updated_at = CURRENT_TIMESTAMP,
+                    payload = excluded.payload
+                """,
+                [row + (row[7],) for row in rows],
+            )
+
+    def load(self, statuses: Iterable[str]) -> List[MatrixTask]:
+        statuses = list(statuses)
+        placeholders = ",".join("?" for _ in statuses)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT payload FROM matrix_tasks WHERE status IN ({placeholders}) ORDER BY queue_seq, rowid",
+                statuses,
+            ).fetchall()
+        return self._parse(rows)
+
+    def get(self, task_id: str) -> Optional[MatrixTask]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM matrix_tasks WHERE task_id = ?", (task_id,)).fetchone()
+        tasks = self._parse([row]) if row else []
+        return tasks[0] if tasks else None
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM matrix_tasks GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def delete_all(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM matrix_tasks")
+
+    @staticmethod
+    def _parse(rows) -> List[MatrixTask]:
+        tasks = []
+        for (payload,) in rows:
+            try:
+                tasks.append(MatrixTask(**json.loads(payload)))
+            except Exception as e:
+                logger.error(f"Error loading task item: {e}")
+        return tasks
+
+    def import_json(self, json_file: Path) -> int:
+        """一次性迁移旧版 matrix_tasks.json（表为空时），完成后重命名为 .migrated"""
+        if not json_file.exists():
+            return 0
+        with self._lock:
+            has_rows = self._conn.execute("SELECT 1 FROM matrix_tasks LIMIT 1").fetchone()
+        if has_rows:
+            return 0
+        try:
+            with open(json_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load matrix tasks: {e}")
+            return 0
+
+        tasks: List[MatrixTask] = []
+        for item in data:
+            try:
+                tasks.append(MatrixTask(**item))
+            except Exception as e:
+                logger.error(f"Error loading task item: {e}")
+        # 旧文件按 task_index 插入顺序保存，即原始入队顺序
+        self.save(tasks, {t.task_id: self.next_seq() for t in tasks})
+        try:
+            json_file.rename(json_file.with_name(json_file.name + ".migrated"))
+        except OSError as e:
+            logger.warning(f"矩阵任务旧文件重命名失败: {e}")
+        logger.info(f"已从 {json_file} 迁移 {len(tasks)} 个矩阵任务")
+        return len(tasks)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
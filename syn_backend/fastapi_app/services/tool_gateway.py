@@ -0,0 +1,288 @@
+"""
+Agent 工具调用网关
+OpenManus / Function Calling 工具原本各自新建 httpx.AsyncClient 回环调用本进程的
+REST API。这里统一为一个与 httpx.AsyncClient 接口兼容的客户端：
+
+- 进程内（FastAPI 启动时 bind_app）：热点接口直接调用服务对象
+  （账号列表 / 素材详情 / 批量发布 / 任务状态），其余接口经 ASGITransport 在进程内分发，
+  不建立 TCP 连接
+- 进程外（独立运行的 Agent / 脚本）：每个事件循环一个共享的 HTTP 客户端（连接池复用）
+- run_scope() 内的只读查询按 (方法, 路径, 参数) 缓存，任何写请求都会清空本次运行的缓存
+"""
+import asyncio
+import contextvars
+import json as jsonlib
+import re
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+
+from fastapi_app.core.config import settings
+from fastapi_app.core.logger import logger
+
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "0.0.0.0", "::1", "internal"}
+
+_run_cache: contextvars.ContextVar[Optional[Dict[Tuple, "ToolResponse"]]] = contextvars.ContextVar(
+    "tool_gateway_run_cache", default=None
+)
+
+DirectHandler = Callable[[re.Match, Dict[str, Any], Any], Awaitable[Tuple[int, Any]]]
+
+
+class ToolResponse:
+    """直接调用服务对象时返回的响应（只实现工具代码用到的 httpx.Response 接口）"""
+
+    def __init__(self, method: str, url: str, status_code: int, payload: Any):
+        self.request = httpx.Request(method, url)
+        self.url = self.request.url
+        self.status_code = status_code
+        self._payload = payload
+
+    @property
+    def is_success(self) -> bool:
+        return 200 <= self.status_code < 300
+
+    @property
+    def text(self) -> str:
+        return jsonlib.dumps(self._payload, ensure_ascii=False, default=str)
+
+    def json(self) -> Any:
+        return self._payload
+
+    def raise_for_status(self) -> "ToolResponse":
+        if not self.is_success:
+            raise httpx.HTTPStatusError(
+                f"{self.status_code} error for {self.request.method} {self.url}",
+                request=self.request,
+                response=self,  # type: ignore[arg-type]
+            )
+        return self
+
+
+class ToolApiClient:
+    """httpx.AsyncClient 的替身：get/post/put/patch/delete/request"""
+
+    def __init__(self, gateway: "ToolGateway", timeout: Optional[float] = None):
+        self._gateway = gateway
+        self._timeout = timeout
+
+    async def request(self, method: str, url: str, *, params: Optional[dict] = None,
+                      json: Any = None, timeout: Optional[float] = None, **kwargs):
+        return await self._gateway.request(
+            method, url, params=params, json=json, timeout=timeout or self._timeout, **kwargs
+        )
+
+    async def get(self, url: str, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs):
+        return await self.request("PUT", url, **kwargs)
+
+    async def patch(self, url: str, **kwargs):
+        return await self.request("PATCH", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs):
+        return await self.request("DELETE", url, **kwargs)
+
+
+class ToolGateway:
+    def __init__(self, api_prefix: str = settings.API_V1_PREFIX):
+        self.api_prefix = api_prefix.rstrip("/")
+        self._app = None
+        self._clients: Dict[Tuple[int, str], Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+        self._lock = threading.Lock()
+        self._direct: List[Tuple[str, re.Pattern, DirectHandler, bool]] = []
+        self.metrics = {"direct": 0, "asgi": 0, "http": 0, "cache_hits": 0}
+        self._register_direct_handlers()
+
+    # ---------- 运行环境 ----------
+
+    def bind_app(self, app) -> None:
+        """FastAPI 启动时调用：之后本进程内的工具调用不再走 HTTP 回环"""
+        self._app = app
+
+    @property
+    def in_process(self) -> bool:
+        return self._app is not None
+
+    @asynccontextmanager
+    async def client(self, timeout: Optional[float] = None):
+        """替代 ``async with httpx.AsyncClient(timeout=...) as client``；底层客户端共享，退出时不关闭"""
+        yield ToolApiClient(self, timeout)
+
+    @contextmanager
+    def run_scope(self):
+        """一次 Agent 运行 / 一轮工具调用的只读查询缓存（嵌套时复用外层缓存）"""
+        if _run_cache.get() is not None:
+            yield
+            return
+        token = _run_cache.set({})
+        try:
+            yield
+        finally:
+            try:
+                _run_cache.reset(token)
+            except ValueError:
+                # 流式生成器可能在另一个上下文中被关闭
+                _run_cache.set(None)
+
+    # ---------- 分发 ----------
+
+    def _split(self, url: str, params: Optional[dict]) -> Tuple[Optional[str], Dict[str, Any]]:
+        """返回 (API 内路径, 合并后的查询参数)；非本机 / 非 API 前缀的地址返回 None"""
+        parts = urlsplit(url)
+        query: Dict[str, Any] = dict(parse_qsl(parts.query))
+        query.update({k: v for k, v in (params or {}).items() if v is not None})
+        if parts.hostname and parts.hostname not in LOCAL_HOSTS:
+            return None, query
+        path = parts.path or "/"
+        if not path.startswith(self.api_prefix + "/"):
+            return None, query
+        return path[len(self.api_prefix):], query
+
+    def _shared_client(self, kind: str) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        key = (id(loop), kind)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None or entry[0] is not loop or entry[1].is_closed:
+                for stale_key, (owner, _) in list(self._clients.items()):
+                    if owner.is_closed():
+                        self._clients.pop(stale_key, None)
+                if kind == "asgi":
+                    client = httpx.AsyncClient(
+                        transport=httpx.ASGITransport(app=self._app),
+                        base_url="http://internal",
+                        follow_redirects=True,
+                    )
+                else:
+                    client = httpx.AsyncClient(
+                        timeout=httpx.Timeout(60.0, connect=10.0),
+                        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+                    )
+                entry = (loop, client)
+                self._clients[key] = entry
+            return entry[1]
+
+    async def request(self, method: str, url: str, *, params: Optional[dict] = None,
+                      json: Any = None, timeout: Optional[float] = None, **kwargs):
+        method = method.upper()
+        cache = _run_cache.get()
+        if method != "GET" and cache:
+            cache.clear()
+
+        path, query = self._split(url, params)
+        if not self.in_process or path is None:
+            self.metrics["http"] += 1
+            if timeout is not None:
+                kwargs["timeout"] = timeout
+            return await self._shared_client("http").request(method, url, params=params, json=json, **kwargs)
+
+        for handler_method, pattern, handler, cacheable in self._direct:
+            match = pattern.fullmatch(path) if handler_method == method else None
+            if match is None:
+                continue
+            key = (method, path, tuple(sorted((k, str(v)) for k, v in query.items())))
+            if cacheable and cache is not None and key in cache:
+                self.metrics["cache_hits"] += 1
+                return cache[key]
+            self.metrics["direct"] += 1
+            status_code, payload = await self._call_direct(handler, match, query, json)
+            response = ToolResponse(method, url, status_code, payload)
+            if cacheable and cache is not None and response.is_success:
+                cache[key] = response
+            return response
+
+        self.metrics["asgi"] += 1
+        return await self._shared_client("asgi").request(
+            method, self.api_prefix + path, params=query, json=json, **kwargs
+        )
+
+    @staticmethod
+    async def _call_direct(handler: DirectHandler, match: re.Match, query: Dict[str, Any], body: Any):
+        from fastapi import HTTPException
+        from pydantic import ValidationError
+        from fastapi_app.core.exceptions import AppException
+
+        try:
+            return await handler(match, query, body)
+        except HTTPException as e:
+            return e.status_code, {"detail": e.detail}
+        except AppException as e:
+            return e.status_code, {"detail": e.message}
+        except ValidationError as e:
+            return 422, {"detail": e.errors()}
+        except Exception as e:
+            logger.error(f"[ToolGateway] direct call failed: {e}")
+            return 500, {"detail": str(e)}
+
+    # ---------- 进程内直连的服务调用 ----------
+
+    def route(self, method: str, pattern: str, *, cacheable: bool = False):
+        def decorator(handler: DirectHandler) -> DirectHandler:
+            self._direct.append((method, re.compile(pattern), handler, cacheable))
+            return handler
+        return decorator
+
+    def _register_direct_handlers(self) -> None:
+        @self.route("GET", r"/accounts/?", cacheable=True)
+        async def list_accounts(match, query, body):
+            from fastapi_app.api.v1.accounts.services import AccountService
+
+            result = await AccountService().list_accounts(
+                platform=query.get("platform"),
+                status=query.get("status"),
+                skip=int(query.get("skip", 0)),
+                limit=min(int(query.get("limit", 100)), 1000),
+            )
+            return 200, {"success": True, "total": result["total"], "items": result["items"]}
+
+        @self.route("GET", r"/files/(?P<file_id>\d+)", cacheable=True)
+        async def get_file(match, query, body):
+            from fastapi_app.api.v1.files.services import FileService
+            from fastapi_app.db.session import main_db_pool
+
+            with main_db_pool.get_connection() as db:
+                record = await FileService().get_file(db, int(match["file_id"]))
+            if not record:
+                return 404, {"detail": f"文件不存在: ID {match['file_id']}"}
+            return 200, record.model_dump(mode="json")
+
+        @self.route("POST", r"/publish/batch")
+        async def publish_batch(match, query, body):
+            from fastapi_app.api.v1.publish.router import publish_batch_videos
+            from fastapi_app.api.v1.publish.services import get_publish_service
+            from fastapi_app.db.session import main_db_pool
+            from fastapi_app.schemas.publish import BatchPublishRequest
+
+            request = BatchPublishRequest(**(body or {}))
+            with main_db_pool.get_connection() as db:
+                result = await publish_batch_videos(request=request, db=db, service=get_publish_service())
+            return 200, result.model_dump(mode="json")
+
+        @self.route("GET", r"/tasks/(?!(?:health|stats|list|events|ws)$)(?P<task_id>[^/]+)")
+        async def task_detail(match, query, body):
+            task_manager = getattr(self._app.state, "task_manager", None)
+            if not task_manager:
+                return 503, {"detail": "任务队列服务未启用"}
+            data = task_manager.get_task_status(match["task_id"])
+            if not data:
+                return 404, {"detail": "任务不存在"}
+            return 200, {"success": True, "data": data}
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            victims = [self._clients.pop(key)[1] for key, (owner, _) in list(self._clients.items()) if owner is loop]
+        for client in victims:
+            await client.aclose()
+
+
+tool_gateway = ToolGateway()
@@ -0,0 +1,307 @@
+"""
+素材元数据后台探测
+list_files 不再在请求路径上同步调用 ffprobe：缺少时长/分辨率的记录被投递到这里，
+由有界进程池批量探测，结果写入持久化缓存（按 path/size/mtime 作键），
+再用 executemany 批量回写 file_records。
+"""
+import asyncio
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from fastapi_app.core.config import settings
+from fastapi_app.core.logger import logger
+from fastapi_app.db.runtime import mysql_enabled, sa_connection, sqlite_connection
+from utils.video_probe import probe_video_metadata_batch
+
+
+_CacheKey = Tuple[str, int, int]
+
+
+class VideoMetadataProber:
+    """后台元数据探测管线（单例，懒启动于当前事件循环）"""
+
+    def __init__(
+        self,
+        *,
+        cache_db_path: Optional[str] = None,
+        max_workers: int = 2,
+        batch_size: int = 16,
+        queue_size: int = 10000,
+        unprobeable_size: int = 10000,
+    ):
+        self.cache_db_path = cache_db_path or str(Path(settings.BASE_DIR) / "db" / "video_probe_cache.db")
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+        self.unprobeable_size = max(1, unprobeable_size)
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._pending_ids: set[int] = set()
+        # ffprobe 无法解析的文件（同一 path/size/mtime 不再重复探测），LRU 限长
+        self._unprobeable: "OrderedDict[int, _CacheKey]" = OrderedDict()
+        self._stats = {"queued": 0, "dropped": 0, "probed": 0, "cache_hits": 0, "written": 0, "errors": 0}
+        self._init_cache_db()
+
+    # ---------- 持久化缓存 ----------
+
+    def _init_cache_db(self) -> None:
+        try:
+            Path(self.cache_db_path).parent.mkdir(parents=True, exist_ok=True)
+            with sqlite3.connect(self.cache_db_path) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS video_probe_cache (
+                        path TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        mtime INTEGER NOT NULL,
+                        duration REAL,
+                        width INTEGER,
+                        height INTEGER,
+                        aspect_ratio TEXT,
+                        orientation TEXT,
+                        probed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (path, size, mtime)
+                    )
+                """)
+        except Exception as e:
+            logger.warning(f"[MetaProbe] 初始化探测缓存失败: {e}")
+
+    @staticmethod
+    def _cache_key(path: str) -> Optional[_CacheKey]:
+        try:
+            st = Path(path).stat()
+            return (str(path), int(st.st_size), int(st.st_mtime))
+        except OSError:
+            return None
+
+    def _cache_lookup(self, keys: List[_CacheKey]) -> Dict[_CacheKey, dict]:
+        found: Dict[_CacheKey, dict] = {}
+        if not keys:
+            return found
+        with sqlite3.connect(self.cache_db_path) as conn:
+            for key in keys:
+                row = conn.execute(
+                    "SELECT duration, width, height, aspect_ratio, orientation FROM video_probe_cache "
+                    "WHERE path = ? AND size = ? AND mtime = ?",
+                    key,
+                ).fetchone()
+                if row:
+                    found[key] = {
+                        "duration": row[0],
+                        "width": row[1],
+                        "height": row[2],
+                        "aspect_ratio": row[3],
+                        "orientation": row[4],
+                    }
+        return found
+
+    def _cache_store(self, entries: List[Tuple[_CacheKey, dict]]) -> None:
+        if not entries:
+            return
+        with sqlite3.connect(self.cache_db_path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO video_probe_cache "
+                "(path, size, mtime, duration, width, height, aspect_ratio, orientation) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (*key, meta.get("duration"), meta.get("width"), meta.get("height"),
+                     meta.get("aspect_ratio"), meta.get("orientation"))
+                    for key, meta in entries
+                ],
+            )
+
+    # ---------- 队列 ----------
+
+    def is_pending(self, file_id: int) -> bool:
+        return file_id in self._pending_ids
+
+    def submit(self, file_id: int, resolved_path: str) -> bool:
+        """
+        投递探测任务（非阻塞）。同一 file_id 在完成前只会排队一次。
+        返回是否处于待探测状态。
+        """
+        if file_id in self._pending_ids:
+            return True
+        failed_key = self._unprobeable.get(file_id)
+        if failed_key is not None:
+            if failed_key == self._cache_key(resolved_path):
+                self._unprobeable.move_to_end(file_id)
+                return False
+            # 文件已变化，重新探测
+            del self._unprobeable[file_id]
+        if not self._ensure_started():
+            return False
+        try:
+            self._queue.put_nowait((file_id, resolved_path))
+        except asyncio.QueueFull:
+            self._stats["dropped"] += 1
+            return False
+        self._pending_ids.add(file_id)
+        self._stats["queued"] += 1
+        return True
+
+    def _ensure_started(self) -> bool:
+        if self._runner is not None and not self._runner.done():
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._pending_ids.clear()
+        self._runner = loop.create_task(self._run())
+        logger.info(f"[MetaProbe] 后台探测已启动 (workers={self.max_workers}, batch={self.batch_size})")
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._process_batch(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.warning(f"[MetaProbe] 批量探测失败: {e}")
+            finally:
+                for file_id, _ in batch:
+                    self._pending_ids.discard(file_id)
+
+    async def _process_batch(self, batch: List[Tuple[int, str]]) -> None:
+        keyed: List[Tuple[int, str, Optional[_CacheKey]]] = [
+            (file_id, path, self._cache_key(path)) for file_id, path in batch
+        ]
+        keys = [k for _, _, k in keyed if k is not None]
+        cached = await asyncio.to_thread(self._cache_lookup, keys)
+        self._stats["cache_hits"] += len(cached)
+
+        to_probe = [(file_id, path, key) for file_id, path, key in keyed if key is not None and key not in cached]
+        probed: Dict[_CacheKey, dict] = {}
+        if to_probe:
+            # 按进程数切分，每个子批次作为一次进程池调用
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            chunks = [to_probe[i::self.max_workers] for i in range(self.max_workers)]
+            chunks = [c for c in chunks if c]
+            results = await asyncio.gather(*[
+                loop.run_in_executor(executor, probe_video_metadata_batch, [path for _, path, _ in chunk])
+                for chunk in chunks
+            ])
+            for chunk, metas in zip(chunks, results):
+                probed.update({key: meta for (_, _, key), meta in zip(chunk, metas)})
+            self._stats["probed"] += len(probed)
+            await asyncio.to_thread(
+                self._cache_store,
+                [(k, m) for k, m in probed.items() if m.get("duration") or m.get("width")],
+            )
+
+        updates = []
+        for file_id, _, key in keyed:
+            if key is None:
+                continue
+            meta = cached.get(key) or probed.get(key) or {}
+            if not (meta.get("duration") or meta.get("width")):
+                self._mark_unprobeable(file_id, key)
+            updates.append({
+                "id": file_id,
+                "filesize": key[1] / (1024 * 1024),
+                "duration": meta.get("duration"),
+                "video_width": meta.get("width"),
+                "video_height": meta.get("height"),
+                "aspect_ratio": meta.get("aspect_ratio"),
+                "orientation": meta.get("orientation"),
+            })
+        if updates:
+            await asyncio.to_thread(self._write_back, updates)
+            self._stats["written"] += len(updates)
+
+    def _mark_unprobeable(self, file_id: int, key: _CacheKey) -> None:
+        self._unprobeable[file_id] = key
+        self._unprobeable.move_to_end(file_id)
+        while len(self._unprobeable) > self.unprobeable_size:
+            self._unprobeable.popitem(last=False)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    # ---------- 回写 ----------
+
+    def _write_back(self, updates: List[dict]) -> None:
+        # COALESCE 保留已有值：只补齐缺失字段，不覆盖用户/其它来源写入的数据
+        if mysql_enabled():
+            with sa_connection() as conn:
+                conn.execute(
+                    text(
+                        "UPDATE file_records SET "
+                        "filesize = CASE WHEN filesize IS NULL OR filesize <= 0 THEN :filesize ELSE filesize END, "
+                        "duration = COALESCE(duration, :duration), "
+                        "video_width = COALESCE(video_width, :video_width), "
+                        "video_height = COALESCE(video_height, :video_height), "
+                        "aspect_ratio = COALESCE(aspect_ratio, :aspect_ratio), "
+                        "orientation = COALESCE(orientation, :orientation) "
+                        "WHERE id = :id"
+                    ),
+                    updates,
+                )
+            return
+
+        with sqlite_connection() as conn:
+            conn.executemany(
+                "UPDATE file_records SET "
+                "filesize = CASE WHEN filesize IS NULL OR filesize <= 0 THEN ? ELSE filesize END, "
+                "duration = COALESCE(duration, ?), "
+                "video_width = COALESCE(video_width, ?), "
+                "video_height = COALESCE(video_height, ?), "
+                "aspect_ratio = COALESCE(aspect_ratio, ?), "
+                "orientation = COALESCE(orientation, ?) "
+                "WHERE id = ?",
+                [
+                    (u["filesize"], u["duration"], u["video_width"], u["video_height"],
+                     u["aspect_ratio"], u["orientation"], u["id"])
+                    for u in updates
+                ],
+            )
+            conn.commit()
+
+    # ---------- 生命周期 ----------
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "pending": len(self._pending_ids),
+            "running": bool(self._runner and not self._runner.done()),
+        }
+
+    async def shutdown(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._runner = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._pending_ids.clear()
+
+
+video_metadata_prober = VideoMetadataProber(
+    max_workers=settings.METADATA_PROBE_WORKERS,
+    batch_size=settings.METADATA_PROBE_BATCH_SIZE,
+)
@@ -4,23 +4,136 @@
 """
 from __future__ import annotations
 
+import threading
 import time
 import uuid
 from contextlib import contextmanager
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from loguru import logger
 
 from fastapi_app.cache.redis_client import get_redis
 
 
+# KEYS: 信号量 ZSET * n, 等待队列 ZSET * n
+# ARGV: now_ms, lease_ms, token, waiter_ttl_ms, enqueue(0/1), wake_prefix, max_1..max_n
+# 维度 i 可获取的条件: 当前持有数 + 排在自己前面的等待者数 < max_i（先来先得）
+_ACQUIRE_LUA = """
+local n = #KEYS / 2
+local now = tonumber(ARGV[1])
+local lease = tonumber(ARGV[2])
+local token = ARGV[3]
+local waiter_ttl = tonumber(ARGV[4])
+local enqueue = ARGV[5] == '1'
+local wake_prefix = ARGV[6]
+local blocked = {}
+for i = 1, n do
+    local sem = KEYS[i]
+    local q = KEYS[n + i]
+    local hb = q .. ':hb'
+    redis.call('ZREMRANGEBYSCORE', sem, '-inf', now)
+    for _, w in ipairs(redis.call('ZRANGE', q, 0, 49)) do
+        local alive = tonumber(redis.call('HGET', hb, w) or '0')
+        if alive < now then
+            redis.call('ZREM', q, w)
+            redis.call('HDEL', hb, w)
+        end
+    end
+    local ahead = redis.call('ZRANK', q, token)
+    if not ahead then
+        ahead = redis.call('ZCARD', q)
+    end
+    if redis.call('ZCARD', sem) + ahead >= tonumber(ARGV[6 + i]) then
+        blocked[#blocked + 1] = i
+    end
+end
+if #blocked == 0 then
+    for i = 1, n do
+        local sem = KEYS[i]
+        local q = KEYS[n + i]
+        redis.call('ZADD', sem, now + lease, token)
+        redis.call('PEXPIRE', sem, lease + 60000)
+        redis.call('ZREM', q, token)
+        redis.call('HDEL', q .. ':hb', token)
+        if redis.call('ZCARD', sem) < tonumber(ARGV[6 + i]) then
+            local nxt = redis.call('ZRANGE', q, 0, 0)[1]
+            if nxt then
+                redis.call('RPUSH', wake_prefix .. nxt, 1)
+                redis.call('PEXPIRE', wake_prefix .. nxt, waiter_ttl)
+            end
+        end
+    end
+    return 0
+end
+if enqueue then
+    for _, i in ipairs(blocked) do
+        local q = KEYS[n + i]
+        redis.call('ZADD', q, 'NX', now, token)
+        redis.call('HSET', q .. ':hb', token, now + waiter_ttl)
+        redis.call('PEXPIRE', q, waiter_ttl * 2)
+        redis.call('PEXPIRE', q .. ':hb', waiter_ttl * 2)
+    end
+end
+return blocked[1]
+"""
+
+# KEYS: 信号量 ZSET * n, 等待队列 ZSET * n
+# ARGV: now_ms, token, wake_prefix, waiter_ttl_ms, max_1..max_n
+_RELEASE_LUA = """
+local n = #KEYS / 2
+local now = tonumber(ARGV[1])
+local token = ARGV[2]
+local wake_prefix = ARGV[3]
+local waiter_ttl = tonumber(ARGV[4])
+for i = 1, n do
+    local sem = KEYS[i]
+    redis.call('ZREM', sem, token)
+    redis.call('ZREMRANGEBYSCORE', sem, '-inf', now)
+    local free = tonumber(ARGV[4 + i]) - redis.call('ZCARD', sem)
+    if free > 0 then
+        for _, w in ipairs(redis.call('ZRANGE', KEYS[n + i], 0, free - 1)) do
+            redis.call('RPUSH', wake_prefix .. w, 1)
+            redis.call('PEXPIRE', wake_prefix .. w, waiter_ttl)
+        end
+    end
+end
+return 1
+"""
+
+# KEYS: 信号量 ZSET * n; ARGV: now_ms, lease_ms, token
+_RENEW_LUA = """
+local renewed = 0
+for i = 1, #KEYS do
+    if redis.call('ZSCORE', KEYS[i], ARGV[3]) then
+        redis.call('ZADD', KEYS[i], 'XX', tonumber(ARGV[1]) + tonumber(ARGV[2]), ARGV[3])
+        redis.call('PEXPIRE', KEYS[i], tonumber(ARGV[2]) + 60000)
+        renewed = renewed + 1
+    end
+end
+return renewed
+"""
+
+
+def _now_ms() -> int:
+    """租约分数的时钟（毫秒），与 Lua 脚本保持一致"""
+    return int(time.time() * 1000)
+
+
 class ConcurrencyController:
     """分布式并发控制器"""
 
-    def __init__(self):
-        self.redis = get_redis()
+    WAITER_TTL_MS = 5000       # 等待者心跳有效期（等待者崩溃后自动出队）
+    WAIT_POLL_SECONDS = 1.0    # BLPOP 单次阻塞上限
+
+    def __init__(self, redis_client: Any = None):
+        self.redis = redis_client if redis_client is not None else get_redis()
         self.config_key = "concurrency:config"
         self.semaphore_prefix = "concurrency:semaphore:"
+        self.queue_prefix = "concurrency:waitq:"
+        self.wake_prefix = "concurrency:wake:"
         self.stats_prefix = "concurrency:stats:"
+        self._acquire_script = self.redis.register_script(_ACQUIRE_LUA) if self.redis else None
+        self._release_script = self.redis.register_script(_RELEASE_LUA) if self.redis else None
+        self._renew_script = self.redis.register_script(_RENEW_LUA) if self.redis else None
 
     def _get_config(self) -> Dict[str, Any]:
         """获取并发控制配置"""
@@ -54,7 +167,9 @@ class ConcurrencyController:
                 "batch_publish": 0      # 批量发布任务不限制
             },
             "enabled": True,            # 是否启用并发控制
-            "timeout": 300              # 令牌超时时间（秒）
+            "timeout": 300,             # 兼容旧配置（已由 lease_ttl + 心跳续租取代）
+            "lease_ttl": 60,            # 令牌租约（秒），持有期间每 lease_ttl/3 秒续租
+            "max_wait": 60              # 排队等待上限（秒），超时抛出 ConcurrencyLimitException
         }
 
     def update_config(self, config: Dict[str, Any]) -> bool:
@@ -75,6 +190,34 @@ class ConcurrencyController:
             logger.error(f"[Concurrency] Failed to update config: {e}")
             return False
 
+    def _limited_dimensions(
+        self,
+        config: Dict[str, Any],
+        platform: Optional[str],
+        account_id: Optional[str],
+        task_type: str,
+    ) -> List[Tuple[str, int]]:
+        """返回需要限流的维度 [(信号量键, 最大并发)]，0 表示不限制的维度会被跳过"""
+        dims: List[Tuple[str, int]] = []
+        global_max = int(config.get("global_max", 0) or 0)
+        if global_max > 0:
+            dims.append(("global", global_max))
+        else:
+            logger.debug("[Concurrency] Global concurrency unlimited (global_max=0)")
+        if platform:
+            platform_max = int(config.get("platform_max", {}).get(platform, 0) or 0)
+            if platform_max > 0:
+                dims.append((f"platform:{platform}", platform_max))
+        if account_id:
+            account_max = int(config.get("account_max", 1) or 0)
+            if account_max > 0:
+                dims.append((f"account:{account_id}", account_max))
+        if task_type:
+            task_type_max = int(config.get("task_type_max", {}).get(task_type, 0) or 0)
+            if task_type_max > 0:
+                dims.append((f"task_type:{task_type}", task_type_max))
+        return dims
+
     @contextmanager
     def acquire(
         self,
@@ -86,11 +229,15 @@ class ConcurrencyController:
         """
         获取并发令牌（上下文管理器）
 
+        所有维度（全局/平台/账号/任务类型）由一个 Lua 脚本原子地一次性获取或全部拒绝；
+        拒绝时进入对应维度的 FIFO 等待队列，阻塞在 BLPOP 上等待释放方唤醒（而非轮询 sleep）。
+        持有期间由后台心跳续租，长时间上传不会因固定 TTL 丢失令牌。
+
         Args:
             platform: 平台名称（douyin, xiaohongshu等）
             account_id: 账号ID
             task_type: 任务类型
-            timeout: 超时时间（秒），None 表示使用配置中的默认值
+            timeout: 租约时长（秒），None 表示使用配置中的 lease_ttl
 
         Yields:
             bool: 是否成功获取令牌
@@ -112,148 +259,144 @@ class ConcurrencyController:
             yield True
             return
 
-        timeout = timeout or config.get("timeout", 300)
-        token = str(uuid.uuid4())
-        acquired_locks = []
-
-        try:
-            # 1. 尝试获取全局并发令牌（0表示无限制）
-            global_max = config.get("global_max", 0)
-            if global_max > 0:  # 只有大于0才进行限制
-                if not self._acquire_semaphore("global", global_max, token, timeout):
-                    logger.warning(f"[Concurrency] Global limit reached ({global_max}), waiting...")
-                    # 等待获取
-                    if not self._wait_and_acquire("global", global_max, token, timeout, max_wait=30):
-                        raise ConcurrencyLimitException("全局并发限制，请稍后重试")
-                acquired_locks.append(("global", token))
-            else:
-                logger.debug("[Concurrency] Global concurrency unlimited (global_max=0)")
-
-            # 2. 尝试获取平台级别令牌
-            if platform:
-                platform_max = config.get("platform_max", {}).get(platform, 0)
-                if platform_max > 0:  # 只有大于0才进行限制
-                    semaphore_key = f"platform:{platform}"
-                    if not self._acquire_semaphore(semaphore_key, platform_max, token, timeout):
-                        logger.warning(f"[Concurrency] Platform {platform} limit reached ({platform_max}), waiting...")
-                        if not self._wait_and_acquire(semaphore_key, platform_max, token, timeout, max_wait=30):
-                            raise ConcurrencyLimitException(f"平台 {platform} 并发限制，请稍后重试")
-                    acquired_locks.append((semaphore_key, token))
-
-            # 3. 尝试获取账号级别令牌（最严格）
-            if account_id:
-                account_max = config.get("account_max", 1)
-                if account_max > 0:  # 只有大于0才进行限制
-                    semaphore_key = f"account:{account_id}"
-                    if not self._acquire_semaphore(semaphore_key, account_max, token, timeout):
-                        logger.warning(f"[Concurrency] Account {account_id} is busy, waiting...")
-                        if not self._wait_and_acquire(semaphore_key, account_max, token, timeout, max_wait=60):
-                            raise ConcurrencyLimitException(f"账号 {account_id} 正在执行任务，请稍后重试")
-                    acquired_locks.append((semaphore_key, token))
-
-            # 4. 尝试获取任务类型令牌
-            if task_type:
-                task_type_max = config.get("task_type_max", {}).get(task_type, 0)
-                if task_type_max > 0:  # 只有大于0才进行限制
-                    semaphore_key = f"task_type:{task_type}"
-                    if not self._acquire_semaphore(semaphore_key, task_type_max, token, timeout):
-                        logger.warning(f"[Concurrency] Task type {task_type} limit reached ({task_type_max})")
-                        if not self._wait_and_acquire(semaphore_key, task_type_max, token, timeout, max_wait=30):
-                            raise ConcurrencyLimitException(f"任务类型 {task_type} 并发限制")
-                    acquired_locks.append((semaphore_key, token))
-
-            # 记录统计信息
+        dims = self._limited_dimensions(config, platform, account_id, task_type)
+        if not dims:
             self._record_stats(platform, account_id, task_type, "acquired")
-
-            logger.debug(f"[Concurrency] Acquired locks: {acquired_locks}")
             yield True
+            return
 
-        except ConcurrencyLimitException:
-            raise
-        except Exception as e:
-            logger.error(f"[Concurrency] Acquire error: {e}")
-            raise
-        finally:
-            # 释放所有已获取的令牌
-            for semaphore_key, token in acquired_locks:
-                self._release_semaphore(semaphore_key, token)
-
-            # 记录统计信息
-            if acquired_locks:
-                self._record_stats(platform, account_id, task_type, "released")
-
-    def _acquire_semaphore(self, key: str, max_count: int, token: str, timeout: int) -> bool:
-        """
-        尝试获取信号量令牌
-
-        Args:
-            key: 信号量键
-            max_count: 最大并发数
-            token: 令牌ID
-            timeout: 超时时间
-
-        Returns:
-            bool: 是否成功获取
-        """
-        semaphore_key = f"{self.semaphore_prefix}{key}"
-        now = time.time()
-        expire_time = now + timeout
+        lease = int(timeout or config.get("lease_ttl") or 60)
+        max_wait = float(config.get("max_wait", 60 if account_id else 30))
+        token = str(uuid.uuid4())
 
+        blocked = self._acquire_all(dims, token, lease, max_wait)
+        if blocked is not None:
+            key = blocked
+            if key.startswith("account:"):
+                raise ConcurrencyLimitException(f"账号 {account_id} 正在执行任务，请稍后重试")
+            if key.startswith("platform:"):
+                raise ConcurrencyLimitException(f"平台 {platform} 并发限制，请稍后重试")
+            if key.startswith("task_type:"):
+                raise ConcurrencyLimitException(f"任务类型 {task_type} 并发限制")
+            raise ConcurrencyLimitException("全局并发限制，请稍后重试")
+
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat_loop,
+            args=(dims, token, lease, heartbeat_stop),
+            name=f"concurrency-lease-{token[:8]}",
+            daemon=True,
+        )
+        heartbeat.start()
+
+        # 记录统计信息
+        self._record_stats(platform, account_id, task_type, "acquired")
+        logger.debug(f"[Concurrency] Acquired {[k for k, _ in dims]} token={token[:8]}")
         try:
-            # 清理过期的令牌
-            self.redis.zremrangebyscore(semaphore_key, 0, now)
-
-            # 尝试添加令牌
-            current_count = self.redis.zcard(semaphore_key)
-            if current_count < max_count:
-                self.redis.zadd(semaphore_key, {token: expire_time})
-                self.redis.expire(semaphore_key, timeout + 60)  # 额外60秒确保清理
-                logger.debug(f"[Concurrency] Acquired {key}: {current_count + 1}/{max_count}")
-                return True
-
-            return False
-        except Exception as e:
-            logger.error(f"[Concurrency] Acquire semaphore error: {e}")
-            return False
-
-    def _wait_and_acquire(
+            yield True
+        finally:
+            heartbeat_stop.set()
+            self._release_all(dims, token)
+            self._record_stats(platform, account_id, task_type, "released")
+
+    def _keys(self, dims: List[Tuple[str, int]]) -> List[str]:
+        sem_keys = [f"{self.semaphore_prefix}{key}" for key, _ in dims]
+        queue_keys = [f"{self.queue_prefix}{key}" for key, _ in dims]
+        return sem_keys + queue_keys
+
+    def _try_acquire(self, dims: List[Tuple[str, int]], token: str, lease: int, enqueue: bool) -> int:
+        """执行一次原子获取；返回 0 表示成功，否则为被阻塞维度的序号（从 1 开始）"""
+        return int(self._acquire_script(
+            keys=self._keys(dims),
+            args=[
+                _now_ms(),
+                lease * 1000,
+                token,
+                self.WAITER_TTL_MS,
+                1 if enqueue else 0,
+                self.wake_prefix,
+                *[max_count for _, max_count in dims],
+            ],
+        ))
+
+    def _acquire_all(
         self,
-        key: str,
-        max_count: int,
+        dims: List[Tuple[str, int]],
         token: str,
-        timeout: int,
-        max_wait: int = 30,
-        poll_interval: float = 0.5
-    ) -> bool:
+        lease: int,
+        max_wait: float,
+    ) -> Optional[str]:
         """
-        等待并获取信号量令牌
-
-        Args:
-            key: 信号量键
-            max_count: 最大并发数
-            token: 令牌ID
-            timeout: 令牌超时时间
-            max_wait: 最大等待时间（秒）
-            poll_interval: 轮询间隔（秒）
-
-        Returns:
-            bool: 是否成功获取
+        获取全部维度的令牌；成功返回 None，超时返回阻塞的维度键
         """
-        start_time = time.time()
-        while time.time() - start_time < max_wait:
-            if self._acquire_semaphore(key, max_count, token, timeout):
-                return True
-            time.sleep(poll_interval)
-
-        return False
+        wake_key = f"{self.wake_prefix}{token}"
+        deadline = time.time() + max_wait
+        blocked_key = dims[0][0]
+        logged = False
+        try:
+            while True:
+                try:
+                    blocked = self._try_acquire(dims, token, lease, enqueue=True)
+                except Exception as e:
+                    logger.error(f"[Concurrency] Acquire script error: {e}")
+                    blocked = 1
+                if blocked == 0:
+                    return None
+                blocked_key = dims[blocked - 1][0]
+                if not logged:
+                    logger.warning(f"[Concurrency] {blocked_key} limit reached ({dims[blocked - 1][1]}), waiting...")
+                    logged = True
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return blocked_key
+                # 阻塞等待释放方唤醒；短超时用于刷新等待心跳并兜底丢失的唤醒/过期租约
+                try:
+                    self.redis.blpop([wake_key], timeout=max(0.05, min(self.WAIT_POLL_SECONDS, remaining)))
+                except Exception as e:
+                    logger.error(f"[Concurrency] Wait error: {e}")
+                    time.sleep(min(self.WAIT_POLL_SECONDS, max(0.0, remaining)))
+        finally:
+            self._leave_queues(dims, token)
 
-    def _release_semaphore(self, key: str, token: str):
-        """释放信号量令牌"""
-        semaphore_key = f"{self.semaphore_prefix}{key}"
+    def _leave_queues(self, dims: List[Tuple[str, int]], token: str) -> None:
         try:
-            removed = self.redis.zrem(semaphore_key, token)
-            if removed:
-                logger.debug(f"[Concurrency] Released {key}")
+            pipe = self.redis.pipeline(transaction=False)
+            for key, _ in dims:
+                queue_key = f"{self.queue_prefix}{key}"
+                pipe.zrem(queue_key, token)
+                pipe.hdel(f"{queue_key}:hb", token)
+            pipe.delete(f"{self.wake_prefix}{token}")
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"[Concurrency] Leave queue error: {e}")
+
+    def _heartbeat_loop(self, dims: List[Tuple[str, int]], token: str, lease: int, stop: threading.Event) -> None:
+        """租约续期：每 lease/3 秒延长一次持有令牌的过期时间"""
+        interval = max(1.0, lease / 3.0)
+        sem_keys = [f"{self.semaphore_prefix}{key}" for key, _ in dims]
+        while not stop.wait(interval):
+            try:
+                renewed = int(self._renew_script(keys=sem_keys, args=[_now_ms(), lease * 1000, token]))
+                if renewed < len(sem_keys):
+                    logger.warning(f"[Concurrency] Lease lost on {len(sem_keys) - renewed} dimension(s) token={token[:8]}")
+            except Exception as e:
+                logger.error(f"[Concurrency] Lease renew error: {e}")
+
+    def _release_all(self, dims: List[Tuple[str, int]], token: str) -> None:
+        """释放全部维度的令牌，并唤醒各维度等待队列中的下一个等待者"""
+        try:
+            self._release_script(
+                keys=self._keys(dims),
+                args=[
+                    _now_ms(),
+                    token,
+                    self.wake_prefix,
+                    self.WAITER_TTL_MS,
+                    *[max_count for _, max_count in dims],
+                ],
+            )
+            logger.debug(f"[Concurrency] Released {[k for k, _ in dims]}")
         except Exception as e:
             logger.error(f"[Concurrency] Release semaphore error: {e}")
 
@@ -286,7 +429,7 @@ class ConcurrencyController:
             return {}
 
         config = self._get_config()
-        now = time.time()
+        now = _now_ms()
         usage = {
             "global": {
                 "current": 0,
@@ -299,13 +442,13 @@ class ConcurrencyController:
         try:
             # 全局使用量
             global_key = f"{self.semaphore_prefix}global"
-            self.redis.zremrangebyscore(global_key, 0, now)
+            self.redis.zremrangebyscore(global_key, "-inf", now)
             usage["global"]["current"] = self.redis.zcard(global_key)
 
             # 平台使用量
             for platform, max_count in config.get("platform_max", {}).items():
                 platform_key = f"{self.semaphore_prefix}platform:{platform}"
-                self.redis.zremrangebyscore(platform_key, 0, now)
+                self.redis.zremrangebyscore(platform_key, "-inf", now)
                 usage["platforms"][platform] = {
                     "current": self.redis.zcard(platform_key),
                     "max": max_count
@@ -314,7 +457,7 @@ class ConcurrencyController:
             # 任务类型使用量
             for task_type, max_count in config.get("task_type_max", {}).items():
                 task_type_key = f"{self.semaphore_prefix}task_type:{task_type}"
-                self.redis.zremrangebyscore(task_type_key, 0, now)
+                self.redis.zremrangebyscore(task_type_key, "-inf", now)
                 usage["task_types"][task_type] = {
                     "current": self.redis.zcard(task_type_key),
                     "max": max_count
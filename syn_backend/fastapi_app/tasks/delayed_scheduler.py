@@ -0,0 +1,497 @@
+"""
+延时任务调度（定时 / 间隔发布）
+发布服务给任务设置 not_before 后，原先直接提交 Celery，由下游轮询判断是否到点。
+这里把延时任务放进按执行时间排序的存储：
+
+- Redis 可用：ZSET（job_id -> 执行时间 ms）+ HASH（job_id -> 任务参数），重启不丢
+- Redis 不可用：SQLite 表 delayed_jobs（run_at 索引）
+- 调度线程只查询队首的执行时间，等待到点再认领；新任务 / 改期 / 取消时立即唤醒
+  （Redis 下通过 pub/sub 唤醒所有进程的调度线程），空闲时每 idle_seconds 才查询一次
+- 认领的任务先移入 inflight（带租约），投递到 Celery 成功后再删除；
+  进程在投递前崩溃时，租约到期后任务自动回到队列（至少投递一次）
+- 新增 / 改期 / 取消都是 O(log n)
+
+多个 API 进程可以同时运行调度线程：认领是原子的，同一任务只会被一个进程投递。
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from loguru import logger
+
+
+DUE_KEY = "celery:delayed:due"
+INFLIGHT_KEY = "celery:delayed:inflight"
+JOBS_KEY = "celery:delayed:jobs"
+WAKE_CHANNEL = "celery:delayed:wake"
+
+RunAt = Union[datetime, float, int]
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw.strip())
+    except ValueError:
+        return default
+
+
+def to_epoch_ms(run_at: RunAt) -> int:
+    """datetime（naive 视为北京时间）或 epoch 秒 -> epoch 毫秒"""
+    if isinstance(run_at, datetime):
+        if run_at.tzinfo is None:
+            from fastapi_app.core.timezone_utils import BEIJING_TZ
+
+            run_at = BEIJING_TZ.localize(run_at)
+        return int(run_at.timestamp() * 1000)
+    return int(float(run_at) * 1000)
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+# 先把租约过期的 inflight 任务放回队列，再原子地认领到期任务
+_CLAIM_SCRIPT = """
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local lease_until = tonumber(ARGV[3])
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('ZADD', KEYS[1], now, id)
+end
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, limit)
+local out = {}
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[1], id)
+    local payload = redis.call('HGET', KEYS[3], id)
+    if payload then
+        redis.call('ZADD', KEYS[2], lease_until, id)
+        table.insert(out, id)
+        table.insert(out, payload)
+    end
+end
+return out
+"""
+
+# 只有仍处于 inflight（未被改期）的任务才删除参数
+_ACK_SCRIPT = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 1 then
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+class RedisDelayedStore:
+    """Redis ZSET 存储：所有进程共享"""
+
+    name = "redis"
+
+    def __init__(self, redis_client: Any):
+        self._redis = redis_client
+        self._claim = redis_client.register_script(_CLAIM_SCRIPT)
+        self._ack = redis_client.register_script(_ACK_SCRIPT)
+        self._pubsub = None
+
+    def put(self, job_id: str, run_at_ms: int, payload: str) -> None:
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.hset(JOBS_KEY, job_id, payload)
+        pipe.zrem(INFLIGHT_KEY, job_id)
+        pipe.zadd(DUE_KEY, {job_id: run_at_ms})
+        pipe.execute()
+
+    def move(self, job_id: str, run_at_ms: int) -> bool:
+        """改期（仅对尚未投递的任务）"""
+        if self._redis.zscore(DUE_KEY, job_id) is None:
+            return False
+        self._redis.zadd(DUE_KEY, {job_id: run_at_ms}, xx=True)
+        return True
+
+    def remove(self, job_id: str) -> bool:
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.zrem(DUE_KEY, job_id)
+        pipe.zrem(INFLIGHT_KEY, job_id)
+        pipe.hdel(JOBS_KEY, job_id)
+        removed = pipe.execute()
+        return bool(removed[0] or removed[1])
+
+    def get(self, job_id: str) -> Optional[Tuple[int, str]]:
+        score = self._redis.zscore(DUE_KEY, job_id)
+        payload = self._redis.hget(JOBS_KEY, job_id)
+        if score is None or payload is None:
+            return None
+        return int(score), payload
+
+    def claim(self, now_ms: int, limit: int, lease_ms: int) -> List[Tuple[str, str]]:
+        flat = self._claim(keys=[DUE_KEY, INFLIGHT_KEY, JOBS_KEY], args=[now_ms, limit, now_ms + lease_ms])
+        return [(flat[i], flat[i + 1]) for i in range(0, len(flat), 2)]
+
+    def ack(self, job_id: str) -> None:
+        self._ack(keys=[INFLIGHT_KEY, JOBS_KEY], args=[job_id])
+
+    def next_due_ms(self) -> Optional[int]:
+        heads = []
+        for key in (DUE_KEY, INFLIGHT_KEY):
+            head = self._redis.zrange(key, 0, 0, withscores=True)
+            if head:
+                heads.append(int(head[0][1]))
+        return min(heads) if heads else None
+
+    def counts(self) -> Dict[str, int]:
+        return {"due": int(self._redis.zcard(DUE_KEY)), "inflight": int(self._redis.zcard(INFLIGHT_KEY))}
+
+    def notify(self) -> None:
+        self._redis.publish(WAKE_CHANNEL, "1")
+
+    def wait(self, timeout: float, local_event: threading.Event) -> None:
+        if self._pubsub is None:
+            self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(WAKE_CHANNEL)
+        deadline = time.monotonic() + timeout
+        while not local_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            # 分段等待，保证 stop() 设置的本地事件能及时生效
+            if self._pubsub.get_message(timeout=min(remaining, 1.0)) is not None:
+                return
+
+    def close(self) -> None:
+        if self._pubsub is not None:
+            try:
+                self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = None
+
+
+class SQLiteDelayedStore:
+    """SQLite 存储（单连接 + 锁）：Redis 不可用时使用，仅本机进程共享"""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS delayed_jobs (
+                job_id TEXT PRIMARY KEY,
+                run_at INTEGER NOT NULL,
+                claimed_until INTEGER,
+                payload TEXT NOT NULL
+            )
+        """)
+        # claimed_until IS NULL 的按 run_at 取队首；已认领的按租约到期时间取
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_delayed_jobs_due ON delayed_jobs(claimed_until, run_at)")
+
+    def put(self, job_id: str, run_at_ms: int, payload: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO delayed_jobs (job_id, run_at, claimed_until, payload) VALUES (?, ?, NULL, ?)
+                ON CONFLICT(job_id) DO UPDATE SET
+                    run_at = excluded.run_at, claimed_until = NULL, payload = excluded.payload
+                """,
+                (job_id, run_at_ms, payload),
+            )
+
+    def move(self, job_id: str, run_at_ms: int) -> bool:
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE delayed_jobs SET run_at = ? WHERE job_id = ? AND claimed_until IS NULL",
+                (run_at_ms, job_id),
+            )
+            return cur.rowcount > 0
+
+    def remove(self, job_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("DELETE FROM delayed_jobs WHERE job_id = ?", (job_id,)).rowcount > 0
+
+    def get(self, job_id: str) -> Optional[Tuple[int, str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_at, payload FROM delayed_jobs WHERE job_id = ? AND claimed_until IS NULL", (job_id,)
+            ).fetchone()
+        return (int(row[0]), row[1]) if row else None
+
+    def claim(self, now_ms: int, limit: int, lease_ms: int) -> List[Tuple[str, str]]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE delayed_jobs SET claimed_until = NULL, run_at = ? WHERE claimed_until <= ?",
+                    (now_ms, now_ms),
+                )
+                rows = self._conn.execute(
+                    """
+                    SELECT job_id, payload FROM delayed_jobs
+                    WHERE claimed_until IS NULL AND run_at <= ?
+                    ORDER BY run_at LIMIT ?
+                    """,
+                    (now_ms, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE delayed_jobs SET claimed_until = ? WHERE job_id = ?",
+                    [(now_ms + lease_ms, job_id) for job_id, _ in rows],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [(job_id, payload) for job_id, payload in rows]
+
+    def ack(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM delayed_jobs WHERE job_id = ? AND claimed_until IS NOT NULL", (job_id,))
+
+    def next_due_ms(self) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute("""
+                SELECT MIN(t) FROM (
+                    SELECT MIN(run_at) AS t FROM delayed_jobs WHERE claimed_until IS NULL
+                    UNION ALL
+                    SELECT MIN(claimed_until) FROM delayed_jobs WHERE claimed_until IS NOT NULL
+                )
+            """).fetchone()
+        return int(row[0]) if row and row[0] is not None else None
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            due, inflight = self._conn.execute(
+                "SELECT COUNT(*) - COUNT(claimed_until), COUNT(claimed_until) FROM delayed_jobs"
+            ).fetchone()
+        return {"due": int(due or 0), "inflight": int(inflight or 0)}
+
+    def notify(self) -> None:
+        # 同进程内由调度器的本地事件唤醒
+        pass
+
+    def wait(self, timeout: float, local_event: threading.Event) -> None:
+        local_event.wait(timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _send_to_celery(job_id: str, task_name: str, kwargs: Dict[str, Any], priority: Optional[int]) -> None:
+    from fastapi_app.tasks.celery_app import celery_app
+
+    options: Dict[str, Any] = {"task_id": job_id}
+    if priority is not None:
+        options["priority"] = priority
+    celery_app.send_task(task_name, kwargs=kwargs, **options)
+
+
+class DelayedScheduler:
+    """延时任务调度器：到点把任务投递给 Celery"""
+
+    def __init__(
+        self,
+        store,
+        dispatch: Optional[Callable[[str, str, Dict[str, Any], Optional[int]], None]] = None,
+        batch_size: int = 200,
+        lease_seconds: int = 60,
+        idle_seconds: int = 30,
+        retry_seconds: int = 10,
+    ):
+        self.store = store
+        self._dispatch = dispatch or _send_to_celery
+        self.batch_size = batch_size
+        self.lease_ms = lease_seconds * 1000
+        self.idle_seconds = idle_seconds
+        self.retry_ms = retry_seconds * 1000
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.dispatched = 0
+        self.failed = 0
+
+    @classmethod
+    def from_env(cls) -> "DelayedScheduler":
+        store = None
+        if (os.getenv("DELAYED_SCHEDULER_BACKEND") or "redis").strip().lower() == "redis":
+            from fastapi_app.cache.redis_client import get_redis
+
+            redis_client = get_redis()
+            if redis_client is not None:
+                try:
+                    redis_client.ping()
+                    store = RedisDelayedStore(redis_client)
+                except Exception as e:
+                    logger.warning(f"[DelayedScheduler] Redis unavailable, using SQLite store: {e}")
+        if store is None:
+            from fastapi_app.core.config import settings
+
+            store = SQLiteDelayedStore(Path(settings.DATA_DIR) / "delayed_jobs.db")
+        return cls(
+            store,
+            batch_size=_env_int("DELAYED_SCHEDULER_BATCH", 200),
+            lease_seconds=_env_int("DELAYED_SCHEDULER_LEASE_SECONDS", 60),
+            idle_seconds=_env_int("DELAYED_SCHEDULER_IDLE_SECONDS", 30),
+        )
+
+    # ---------- 任务操作 ----------
+
+    def schedule(
+        self,
+        job_id: str,
+        run_at: RunAt,
+        task_name: str,
+        kwargs: Dict[str, Any],
+        priority: Optional[int] = None,
+    ) -> int:
+        """新增或覆盖一个延时任务，返回执行时间（epoch ms）"""
+        run_at_ms = to_epoch_ms(run_at)
+        payload = json.dumps(
+            {"task": task_name, "kwargs": kwargs, "priority": priority},
+            ensure_ascii=False,
+            default=str,
+        )
+        self.store.put(job_id, run_at_ms, payload)
+        self._notify()
+        return run_at_ms
+
+    def reschedule(self, job_id: str, run_at: RunAt) -> bool:
+        """修改尚未投递任务的执行时间"""
+        moved = self.store.move(job_id, to_epoch_ms(run_at))
+        if moved:
+            self._notify()
+        return moved
+
+    def cancel(self, job_id: str) -> bool:
+        """取消尚未投递的任务"""
+        removed = self.store.remove(job_id)
+        if removed:
+            self._notify()
+        return removed
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        found = self.store.get(job_id)
+        if not found:
+            return None
+        run_at_ms, payload = found
+        return {"job_id": job_id, "run_at_ms": run_at_ms, **json.loads(payload)}
+
+    def _notify(self) -> None:
+        self._wake.set()
+        try:
+            self.store.notify()
+        except Exception as e:
+            logger.debug(f"[DelayedScheduler] notify failed: {e}")
+
+    # ---------- 投递 ----------
+
+    def run_due(self, now_ms: Optional[int] = None) -> int:
+        """认领并投递所有已到期的任务，返回投递数量"""
+        total = 0
+        while True:
+            now = now_ms if now_ms is not None else _now_ms()
+            claimed = self.store.claim(now, self.batch_size, self.lease_ms)
+            for job_id, payload in claimed:
+                self._deliver(job_id, payload, now)
+            total += len(claimed)
+            if len(claimed) < self.batch_size:
+                return total
+
+    def _deliver(self, job_id: str, payload: str, now_ms: int) -> None:
+        try:
+            job = json.loads(payload)
+            self._dispatch(job_id, job["task"], job.get("kwargs") or {}, job.get("priority"))
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"[DelayedScheduler] Dispatch {job_id} failed, retry in {self.retry_ms // 1000}s: {e}")
+            self.store.put(job_id, now_ms + self.retry_ms, payload)
+            return
+        self.store.ack(job_id)
+        self.dispatched += 1
+
+    def _loop(self) -> None:
+        logger.info(f"[DelayedScheduler] Started ({self.store.name} store)")
+        while not self._stopping.is_set():
+            try:
+                self._wake.clear()
+                self.run_due()
+                next_due = self.store.next_due_ms()
+                timeout = float(self.idle_seconds)
+                if next_due is not None:
+                    timeout = min(timeout, max(0.0, (next_due - _now_ms()) / 1000))
+                if timeout > 0:
+                    self.store.wait(timeout, self._wake)
+            except Exception as e:
+                logger.error(f"[DelayedScheduler] Loop error: {e}")
+                self._stopping.wait(1.0)
+        logger.info("[DelayedScheduler] Stopped")
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._loop, name="delayed-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        next_due = self.store.next_due_ms()
+        return {
+            "backend": self.store.name,
+            "running": bool(self._thread and self._thread.is_alive()),
+            **self.store.counts(),
+            "next_due_in_seconds": round((next_due - _now_ms()) / 1000, 3) if next_due is not None else None,
+            "dispatched": self.dispatched,
+            "failed": self.failed,
+        }
+
+
+_scheduler: Optional[DelayedScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_delayed_scheduler() -> DelayedScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = DelayedScheduler.from_env()
+    return _scheduler
+
+
+def stop_delayed_scheduler() -> None:
+    global _scheduler
+    with _scheduler_lock:
+        scheduler, _scheduler = _scheduler, None
+    if scheduler is not None:
+        scheduler.stop()
+
+
+def cancel_delayed(job_id: str) -> bool:
+    """取消延时任务（调度器未初始化时初始化后再取消，保证跨进程生效）"""
+    try:
+        return get_delayed_scheduler().cancel(job_id)
+    except Exception as e:
+        logger.debug(f"[DelayedScheduler] cancel {job_id} failed: {e}")
+        return False
@@ -0,0 +1,191 @@
+"""
+发布 Worker 的常驻运行时
+Celery 使用 threads 池且 prefetch=1，原先每个发布任务都新建事件循环、BatchPublishService、
+Playwright 驱动和 Chromium，短任务的大部分时间花在启动上。这里每个 Worker 线程保留：
+
+- 一个长期存在的事件循环（任务之间不关闭）
+- 一个 BrowserPool：Playwright 驱动只启动一次，同启动参数的浏览器复用，每个账号一个全新 context
+- 一个 BatchPublishService 实例
+
+Worker 退出时（worker_shutdown / worker_process_shutdown 信号）统一关闭浏览器与事件循环。
+每个任务的耗时拆成 setup（运行时初始化 + 驱动 / 浏览器启动）与 upload（其余部分），
+写入任务结果的 runtime 字段，并累加到 Redis，供 /tasks/publish-runtime/stats 查询。
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from fastapi_app.cache.redis_client import get_redis
+
+
+STATS_KEY = "celery:publish_runtime:stats"
+SHUTDOWN_TIMEOUT = 30
+
+
+class PublishRuntime:
+    """单个 Worker 线程的发布运行时"""
+
+    def __init__(self):
+        from playwright_worker.browser_pool import BrowserPool
+
+        started = time.monotonic()
+        self.thread_name = threading.current_thread().name
+        self.loop = asyncio.new_event_loop()
+        self.pool = BrowserPool.from_env()
+        self.service = None
+        self.tasks_run = 0
+        self.closed = False
+        # 首个任务承担运行时自身的初始化耗时
+        self._pending_setup = time.monotonic() - started
+
+    def _launch_seconds(self) -> float:
+        return float(self.pool.stats()["launch_seconds"])
+
+    async def _publish(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        await self.pool.evict_idle()
+        return await self.service.handle_single_publish(task_data)
+
+    def run(self, task_data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """在本线程的常驻事件循环上执行一次发布，返回 (发布结果, 耗时拆分)"""
+        from myUtils.playwright_session import use_browser_pool
+
+        started = time.monotonic()
+        setup, self._pending_setup = self._pending_setup, 0.0
+        if self.service is None:
+            from myUtils.batch_publish_service import BatchPublishService
+
+            self.service = BatchPublishService(task_manager=None)
+        setup += time.monotonic() - started
+
+        asyncio.set_event_loop(self.loop)
+        launch_before = self._launch_seconds()
+        try:
+            with use_browser_pool(self.pool):
+                result = self.loop.run_until_complete(self._publish(task_data))
+        finally:
+            self.tasks_run += 1
+            launched = self._launch_seconds() - launch_before
+            wall = time.monotonic() - started
+            setup += launched
+            timing = {
+                "wall_seconds": round(wall, 3),
+                "setup_seconds": round(setup, 3),
+                "upload_seconds": round(max(wall - setup, 0.0), 3),
+                "warm": launched == 0,
+            }
+            _record(timing)
+        return result, timing
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self.loop.is_running():
+                # 任务仍在执行（非正常退出），交给所属线程的循环处理
+                asyncio.run_coroutine_threadsafe(self.pool.close(), self.loop).result(SHUTDOWN_TIMEOUT)
+                return
+            self.loop.run_until_complete(self.pool.close())
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+        except Exception as e:
+            logger.warning(f"[PublishRuntime] Close runtime of {self.thread_name} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"thread": self.thread_name, "tasks": self.tasks_run, "browser_pool": self.pool.stats()}
+
+
+_local = threading.local()
+_runtimes: List[PublishRuntime] = []
+_runtimes_lock = threading.Lock()
+_totals: Dict[str, float] = {"tasks": 0, "warm_tasks": 0, "wall_seconds": 0.0, "setup_seconds": 0.0, "upload_seconds": 0.0}
+
+
+def get_runtime() -> PublishRuntime:
+    runtime: Optional[PublishRuntime] = getattr(_local, "runtime", None)
+    if runtime is None or runtime.closed or runtime.loop.is_closed():
+        runtime = PublishRuntime()
+        _local.runtime = runtime
+        with _runtimes_lock:
+            _runtimes.append(runtime)
+        logger.info(f"[PublishRuntime] Created runtime for worker thread {runtime.thread_name}")
+    return runtime
+
+
+def shutdown_runtimes(**_signal_kwargs) -> None:
+    """Worker 退出时关闭所有线程的浏览器与事件循环（可重复调用）"""
+    with _runtimes_lock:
+        runtimes = list(_runtimes)
+        _runtimes.clear()
+    for runtime in runtimes:
+        runtime.close()
+    if runtimes:
+        logger.info(f"[PublishRuntime] Closed {len(runtimes)} worker runtime(s)")
+
+
+def _record(timing: Dict[str, float]) -> None:
+    increments = {
+        "tasks": 1,
+        "warm_tasks": 1 if timing["warm"] else 0,
+        "wall_seconds": timing["wall_seconds"],
+        "setup_seconds": timing["setup_seconds"],
+        "upload_seconds": timing["upload_seconds"],
+    }
+    with _runtimes_lock:
+        for name, value in increments.items():
+            _totals[name] += value
+
+    redis = get_redis()
+    if not redis:
+        return
+    try:
+        pipe = redis.pipeline(transaction=False)
+        for name, value in increments.items():
+            pipe.hincrbyfloat(STATS_KEY, name, value)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"[PublishRuntime] Failed to record stats: {e}")
+
+
+def _summarize(totals: Dict[str, float]) -> Dict[str, Any]:
+    tasks = int(totals.get("tasks", 0))
+    wall = float(totals.get("wall_seconds", 0.0))
+    setup = float(totals.get("setup_seconds", 0.0))
+    return {
+        "tasks": tasks,
+        "warm_tasks": int(totals.get("warm_tasks", 0)),
+        "wall_seconds": round(wall, 3),
+        "setup_seconds": round(setup, 3),
+        "upload_seconds": round(float(totals.get("upload_seconds", 0.0)), 3),
+        "setup_ratio": round(setup / wall, 4) if wall else None,
+        "avg_setup_seconds": round(setup / tasks, 3) if tasks else None,
+    }
+
+
+def local_stats() -> Dict[str, Any]:
+    """本进程（Worker）内的统计"""
+    with _runtimes_lock:
+        totals = dict(_totals)
+        runtimes = list(_runtimes)
+    return {**_summarize(totals), "runtimes": [r.stats() for r in runtimes]}
+
+
+def cluster_stats() -> Dict[str, Any]:
+    """所有 Worker 累计的统计（Redis 不可用时返回本进程数据）"""
+    redis = get_redis()
+    if not redis:
+        return _summarize(_totals)
+    try:
+        raw = redis.hgetall(STATS_KEY) or {}
+    except Exception as e:
+        logger.debug(f"[PublishRuntime] Failed to read stats: {e}")
+        return _summarize(_totals)
+    return _summarize({
+        (k.decode() if isinstance(k, bytes) else k): float(v)
+        for k, v in raw.items()
+    })
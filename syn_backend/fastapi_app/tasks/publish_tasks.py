@@ -4,8 +4,8 @@ Celery 发布任务定义
 """
 from __future__ import annotations
 
-import asyncio
 import json
+import math
 import traceback
 import sys
 import os
@@ -14,14 +14,27 @@ from typing import Dict, Any
 from pathlib import Path
 
 from celery import Task
+from celery.signals import worker_process_shutdown, worker_shutdown
 from loguru import logger
 
 from fastapi_app.tasks.celery_app import celery_app
 from fastapi_app.tasks.task_state_manager import task_state_manager
 from fastapi_app.tasks.concurrency_controller import concurrency_controller, ConcurrencyLimitException
+from fastapi_app.core.rate_limiter import get_rate_limiter
 from fastapi_app.core.timezone_utils import now_beijing_naive, now_beijing_iso
+from fastapi_app.tasks.publish_runtime import get_runtime, shutdown_runtimes
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+# 发布配额不足时按建议等待时间重新入队的最大次数
+PUBLISH_RATE_LIMIT_RETRIES = 20
+
+
+class PublishRateLimited(Exception):
+    """平台 / 账号发布配额暂时用尽"""
+
+    def __init__(self, platform: str, wait_seconds: float):
+        super().__init__(f"平台 {platform} 发布频率限制，{wait_seconds:.0f}秒后重试")
+        self.countdown = max(1, math.ceil(wait_seconds))
 
 
 def _ensure_backend_on_path() -> None:
@@ -45,6 +58,10 @@ def _ensure_backend_on_path() -> None:
 
 _ensure_backend_on_path()
 
+# Worker 退出时关闭各线程常驻的浏览器与事件循环
+worker_shutdown.connect(shutdown_runtimes, weak=False)
+worker_process_shutdown.connect(shutdown_runtimes, weak=False)
+
 
 class CallbackTask(Task):
     """支持任务状态回调的基础任务类"""
@@ -236,20 +253,24 @@ def publish_single_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
             account_id=str(account_id) if account_id else None,
             task_type="publish"
         ):
-            _ensure_backend_on_path()
-            # 动态导入（避免循环依赖）
-            from myUtils.batch_publish_service import BatchPublishService
+            # 拿到并发名额后再扣发布配额（所有 Worker 通过 Redis 共享），不足时不等待，稍后重新入队
+            if platform_name:
+                wait = get_rate_limiter().try_acquire_publish(
+                    platform_name, str(account_id) if account_id else None
+                )
+                if wait > 0:
+                    raise PublishRateLimited(platform_name, wait)
 
-            # 创建临时服务实例执行发布
-            service = BatchPublishService(task_manager=None)
+            _ensure_backend_on_path()
 
-            # 执行异步发布逻辑
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                result = loop.run_until_complete(service.handle_single_publish(task_data))
-            finally:
-                loop.close()
+            # 在本线程常驻的事件循环 / 浏览器池上执行发布（见 publish_runtime.py）
+            result, timing = get_runtime().run(task_data)
+            logger.info(
+                f"[Celery] Task {task_id} runtime: wall={timing['wall_seconds']}s "
+                f"setup={timing['setup_seconds']}s upload={timing['upload_seconds']}s warm={timing['warm']}"
+            )
+            if isinstance(result, dict):
+                result = {**result, "runtime": timing}
 
             # 更新素材状态为已发布
             if task_data.get('file_id'):
@@ -258,6 +279,10 @@ def publish_single_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
             logger.info(f"[Celery] Task {task_id} completed successfully")
             return result
 
+    except PublishRateLimited as e:
+        logger.warning(f"[Celery] Task {task_id} publish quota exhausted: {e}, retrying in {e.countdown}s")
+        raise self.retry(exc=e, countdown=e.countdown, max_retries=PUBLISH_RATE_LIMIT_RETRIES)
+
     except ConcurrencyLimitException as e:
         # 并发限制异常 - 重新入队
         logger.warning(f"[Celery] Task {task_id} concurrency limited: {e}, retrying...")
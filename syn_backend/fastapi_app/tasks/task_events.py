@@ -0,0 +1,276 @@
+"""
+任务状态变更事件流
+TaskStateManager 在写任务状态的同一个 MULTI 里 XADD 一条事件到 Redis Stream，
+前端 / Agent 通过 SSE 或 WebSocket 订阅，不再轮询状态接口：
+
+- 每个进程只有一个读取线程对 Stream 做阻塞 XREAD，再按订阅条件（task_ids / parent_task_id / task_type）
+  分发给本进程的所有连接，Redis 负载与连接数无关
+- 事件 id 即 Stream id，客户端断线重连时带上 Last-Event-ID，先用 XRANGE 补齐断线期间的事件再接实时流
+- 消费过慢的连接（本地队列满）同样改走 XRANGE 补齐，不会丢事件
+- 请求的位置已被 MAXLEN 裁掉时先发送 resync 事件，提示客户端重新拉取一次列表
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+
+TASK_EVENTS_STREAM = "celery:task:events"
+STREAM_MAXLEN = 100_000
+ERROR_PREVIEW_CHARS = 500
+SUBSCRIBER_QUEUE_SIZE = 1000
+READ_BATCH = 500
+READ_BLOCK_MS = 5000
+HEARTBEAT_SECONDS = 15
+
+EVENT_STATE_FIELDS = ("status", "started_at", "completed_at", "updated_at", "retry_count")
+
+
+def event_fields(task_state: Dict[str, Any], event: str) -> Dict[str, str]:
+    """任务状态 -> Stream 条目（只带状态字段，不带任务数据 / 结果）"""
+    error = task_state.get("error_message")
+    state = {name: task_state.get(name) for name in EVENT_STATE_FIELDS}
+    state["error_message"] = error[:ERROR_PREVIEW_CHARS] if isinstance(error, str) else error
+    return {
+        "event": event,
+        "task_id": str(task_state.get("task_id") or ""),
+        "task_type": str(task_state.get("task_type") or ""),
+        "parent_task_id": str(task_state.get("parent_task_id") or ""),
+        "state": json.dumps(state, ensure_ascii=False, default=str),
+    }
+
+
+def _id_key(stream_id: str) -> Tuple[int, int]:
+    ms, _, seq = str(stream_id).partition("-")
+    return int(ms or 0), int(seq or 0)
+
+
+def _decode(stream_id: str, fields: Dict[str, str]) -> Dict[str, Any]:
+    state = json.loads(fields.get("state") or "{}")
+    return {
+        "id": stream_id,
+        "event": fields.get("event"),
+        "task_id": fields.get("task_id"),
+        "task_type": fields.get("task_type") or None,
+        "parent_task_id": fields.get("parent_task_id") or None,
+        **state,
+    }
+
+
+class EventFilter:
+    """订阅条件：各条件之间为“且”，未给出的条件不限制"""
+
+    def __init__(
+        self,
+        task_ids: Optional[Iterable[str]] = None,
+        parent_task_id: Optional[str] = None,
+        task_type: Optional[str] = None,
+    ):
+        self.task_ids = {t for t in (task_ids or []) if t} or None
+        self.parent_task_id = parent_task_id or None
+        self.task_type = task_type or None
+
+    def __call__(self, event: Dict[str, Any]) -> bool:
+        if self.task_ids is not None and event.get("task_id") not in self.task_ids:
+            return False
+        if self.parent_task_id is not None and event.get("parent_task_id") != self.parent_task_id:
+            return False
+        if self.task_type is not None and event.get("task_type") != self.task_type:
+            return False
+        return True
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, matcher: Callable[[Dict[str, Any]], bool]):
+        self.loop = loop
+        self.matcher = matcher
+        self.queue: asyncio.Queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.lagged = False
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """在订阅者所属事件循环中调用"""
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    def reset(self) -> None:
+        self.lagged = False
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+
+class TaskEventHub:
+    """进程内的事件分发中心：一个读取线程，多个订阅者"""
+
+    def __init__(self, redis_client: Any, block_ms: int = READ_BLOCK_MS):
+        self.redis = redis_client
+        self.block_ms = block_ms
+        self._subscribers: List[_Subscriber] = []
+        self._lock = threading.Lock()
+        self._reader: Optional[threading.Thread] = None
+
+    # ---------- 订阅 ----------
+
+    def subscribe(self, matcher: Callable[[Dict[str, Any]], bool]) -> _Subscriber:
+        sub = _Subscriber(asyncio.get_running_loop(), matcher)
+        with self._lock:
+            self._subscribers.append(sub)
+            if self._reader is None or not self._reader.is_alive():
+                # 读取起点在订阅者计算自己的 cursor 之前确定，两者之间不会漏事件
+                start_id = self.tail_id()
+                self._reader = threading.Thread(
+                    target=self._read_loop, args=(start_id,), name="task-event-reader", daemon=True
+                )
+                self._reader.start()
+        return sub
+
+    def unsubscribe(self, sub: _Subscriber) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def _read_loop(self, last_id: str) -> None:
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._reader = None
+                    return
+            try:
+                response = self.redis.xread({TASK_EVENTS_STREAM: last_id}, count=READ_BATCH, block=self.block_ms)
+            except Exception as e:
+                logger.warning(f"[TaskEvents] XREAD failed: {e}")
+                time.sleep(1.0)
+                continue
+            for _stream, entries in response or []:
+                for stream_id, fields in entries:
+                    last_id = stream_id
+                    self._dispatch(_decode(stream_id, fields))
+
+    def _dispatch(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            if sub.matcher(event):
+                try:
+                    sub.loop.call_soon_threadsafe(sub.offer, event)
+                except RuntimeError:
+                    # 订阅者的事件循环已关闭
+                    self.unsubscribe(sub)
+
+    # ---------- 历史 ----------
+
+    def tail_id(self) -> str:
+        latest = self.redis.xrevrange(TASK_EVENTS_STREAM, count=1)
+        return latest[0][0] if latest else "0-0"
+
+    def history_trimmed(self, after_id: str) -> bool:
+        """after_id 之后的事件是否已有部分被裁掉"""
+        first = self.redis.xrange(TASK_EVENTS_STREAM, count=1)
+        return bool(first) and _id_key(first[0][0]) > _id_key(after_id) and after_id != "0-0"
+
+    def backlog(self, after_id: str, matcher: Callable[[Dict[str, Any]], bool]) -> List[Dict[str, Any]]:
+        """after_id 之后（不含）符合条件的事件"""
+        events: List[Dict[str, Any]] = []
+        start = after_id
+        while True:
+            entries = self.redis.xrange(TASK_EVENTS_STREAM, min=start, count=READ_BATCH)
+            entries = [(sid, fields) for sid, fields in entries if _id_key(sid) > _id_key(after_id)]
+            if not entries:
+                return events
+            for stream_id, fields in entries:
+                event = _decode(stream_id, fields)
+                if matcher(event):
+                    events.append(event)
+            after_id = start = entries[-1][0]
+
+
+async def iter_task_events(
+    hub: TaskEventHub,
+    matcher: Callable[[Dict[str, Any]], bool],
+    last_event_id: Optional[str] = None,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    heartbeat: float = HEARTBEAT_SECONDS,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    产出 {"type": "task" | "resync" | "ping", ...}
+    先注册订阅再补历史，补历史期间到达的实时事件按 id 去重
+    """
+    sub = hub.subscribe(matcher)
+    try:
+        cursor = last_event_id
+        if not cursor:
+            cursor = await asyncio.to_thread(hub.tail_id)
+        elif await asyncio.to_thread(hub.history_trimmed, cursor):
+            yield {"type": "resync", "reason": "history_trimmed"}
+
+        need_catchup = True
+        while True:
+            if need_catchup:
+                need_catchup = False
+                sub.reset()
+                for event in await asyncio.to_thread(hub.backlog, cursor, matcher):
+                    cursor = event["id"]
+                    yield {"type": "task", **event}
+
+            if is_disconnected is not None and await is_disconnected():
+                return
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                need_catchup = sub.lagged
+                if not need_catchup:
+                    yield {"type": "ping"}
+                continue
+
+            if sub.lagged:
+                # 本地队列溢出过，改从 Stream 按 cursor 补齐
+                need_catchup = True
+                continue
+            if _id_key(event["id"]) <= _id_key(cursor):
+                continue
+            cursor = event["id"]
+            yield {"type": "task", **event}
+    finally:
+        hub.unsubscribe(sub)
+
+
+def format_sse(message: Dict[str, Any]) -> str:
+    kind = message.get("type")
+    if kind == "ping":
+        return ": ping\n\n"
+    payload = {k: v for k, v in message.items() if k != "type"}
+    data = json.dumps(payload, ensure_ascii=False, default=str)
+    if kind == "task":
+        return f"id: {message['id']}\nevent: task\ndata: {data}\n\n"
+    return f"event: {kind}\ndata: {data}\n\n"
+
+
+_hub: Optional[TaskEventHub] = None
+_hub_lock = threading.Lock()
+
+
+def get_event_hub() -> Optional[TaskEventHub]:
+    """Redis 不可用时返回 None"""
+    global _hub
+    if _hub is None:
+        from fastapi_app.cache.redis_client import get_redis
+
+        redis_client = get_redis()
+        if redis_client is None:
+            return None
+        with _hub_lock:
+            if _hub is None:
+                _hub = TaskEventHub(redis_client)
+    return _hub
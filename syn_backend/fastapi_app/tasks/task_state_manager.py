@@ -6,11 +6,28 @@ from __future__ import annotations
 
 import json
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any, Tuple, Union
 from loguru import logger
 
 from fastapi_app.cache.redis_client import get_redis
 from fastapi_app.core.timezone_utils import now_beijing_naive, now_beijing_iso
+from fastapi_app.tasks.task_events import STREAM_MAXLEN, TASK_EVENTS_STREAM, event_fields
+
+
+TASK_TTL_SECONDS = 86400 * 7
+ALL_STATUSES = ("pending", "running", "success", "failed", "retry", "cancelled")
+# 组合筛选的临时结果集存活时间（翻页时复用，过期后自动重算）
+FILTER_CACHE_TTL_SECONDS = 5
+UPDATE_RETRIES = 5
+
+
+def _parse_iso_ts(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
 
 
 class TaskStateManager:
@@ -20,6 +37,11 @@ class TaskStateManager:
         self.redis = get_redis()
         self.key_prefix = "celery:task:"
         self.index_prefix = "celery:index:"
+        # 全局创建时间索引（score = created_at），列表/分页均以它为序
+        self.created_index = self._index_key("created")
+        # 回填完成标记（索引本身会被新任务写入，不能用它是否存在来判断）
+        self.created_backfill_marker = self._index_key("created:backfilled")
+        self._created_index_checked = False
 
     def _task_key(self, task_id: str) -> str:
         """获取任务的 Redis key"""
@@ -29,6 +51,16 @@ class TaskStateManager:
         """获取索引的 Redis key"""
         return f"{self.index_prefix}{index_type}"
 
+    @staticmethod
+    def _publish_event(pipe, task_state: Dict[str, Any], event: str) -> None:
+        """状态变更事件与状态写入在同一个 MULTI 中提交（供 SSE / WebSocket 推送）"""
+        pipe.xadd(
+            TASK_EVENTS_STREAM,
+            event_fields(task_state, event),
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
+        )
+
     def create_task(
         self,
         task_id: str,
@@ -70,24 +102,19 @@ class TaskStateManager:
                 "retry_count": 0
             }
 
-            # 保存任务状态
-            self.redis.set(
+            score = now_beijing_naive().timestamp()
+            # 任务数据 + 创建时间/状态/类型索引在同一个 MULTI 中写入
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.set(
                 self._task_key(task_id),
                 json.dumps(task_state, ensure_ascii=False),
-                ex=86400 * 7  # 保存7天
-            )
-
-            # 添加到状态索引（用于列表查询）
-            self.redis.zadd(
-                self._index_key(f"status:{task_state['status']}"),
-                {task_id: now_beijing_naive().timestamp()}
-            )
-
-            # 添加到类型索引
-            self.redis.zadd(
-                self._index_key(f"type:{task_type}"),
-                {task_id: now_beijing_naive().timestamp()}
+                ex=TASK_TTL_SECONDS  # 保存7天
             )
+            pipe.zadd(self.created_index, {task_id: score})
+            pipe.zadd(self._index_key(f"status:{task_state['status']}"), {task_id: score})
+            pipe.zadd(self._index_key(f"type:{task_type}"), {task_id: score})
+            self._publish_event(pipe, task_state, "created")
+            pipe.execute()
 
             logger.debug(f"[TaskState] Created task {task_id}")
             return True
@@ -124,65 +151,44 @@ class TaskStateManager:
         if not self.redis:
             return False
 
-        try:
-            # 获取当前任务状态
-            task_key = self._task_key(task_id)
-            task_json = self.redis.get(task_key)
+        from redis.exceptions import WatchError  # type: ignore
 
-            if not task_json:
-                logger.warning(f"[TaskState] Task {task_id} not found, creating new state")
-                # 如果任务不存在，创建一个基础状态
-                task_state = {
-                    "task_id": task_id,
-                    "task_type": "unknown",
-                    "data": {},
-                    "priority": 5,
-                    "parent_task_id": None,
-                    "status": status or "running",
-                    "created_at": now_beijing_iso(),
-                    "started_at": None,
-                    "completed_at": None,
-                    "error_message": None,
-                    "result": None,
-                    "retry_count": 0
-                }
+        task_key = self._task_key(task_id)
+        try:
+            # WATCH 任务 key：读-改-写与状态索引维护在一个 MULTI 中原子提交，
+            # 并发更新冲突时重试，避免任务同时出现在两个状态索引里
+            for _ in range(UPDATE_RETRIES):
+                with self.redis.pipeline(transaction=True) as pipe:
+                    try:
+                        pipe.watch(task_key)
+                        task_json = pipe.get(task_key)
+                        task_state = self._apply_update(
+                            task_id, task_json, status, started_at, completed_at,
+                            error_message, result, retry_count,
+                        )
+                        old_status = task_state.pop("_old_status", None)
+                        now_ts = now_beijing_naive().timestamp()
+
+                        pipe.multi()
+                        created_ts = _parse_iso_ts(task_state.get("created_at")) or now_ts
+                        # 旧版本创建的任务不在全局索引里，更新时顺带补上
+                        pipe.zadd(self.created_index, {task_id: created_ts}, nx=True)
+                        if not task_json:
+                            pipe.zadd(self._index_key(f"type:{task_state['task_type']}"), {task_id: created_ts})
+                        new_status = task_state.get("status")
+                        if new_status and new_status != old_status:
+                            if old_status:
+                                pipe.zrem(self._index_key(f"status:{old_status}"), task_id)
+                            pipe.zadd(self._index_key(f"status:{new_status}"), {task_id: now_ts})
+                        pipe.set(task_key, json.dumps(task_state, ensure_ascii=False), ex=TASK_TTL_SECONDS)
+                        self._publish_event(pipe, task_state, "updated")
+                        pipe.execute()
+                        break
+                    except WatchError:
+                        continue
             else:
-                task_state = json.loads(task_json)
-
-            # 更新状态索引
-            old_status = task_state.get('status')
-            if status and status != old_status:
-                # 从旧状态索引中移除
-                if old_status:
-                    self.redis.zrem(self._index_key(f"status:{old_status}"), task_id)
-                # 添加到新状态索引
-                self.redis.zadd(
-                    self._index_key(f"status:{status}"),
-                    {task_id: now_beijing_naive().timestamp()}
-                )
-
-            # 更新字段
-            if status:
-                task_state['status'] = status
-            if started_at:
-                task_state['started_at'] = started_at.isoformat()
-            if completed_at:
-                task_state['completed_at'] = completed_at.isoformat()
-            if error_message is not None:
-                task_state['error_message'] = error_message
-            if result is not None:
-                task_state['result'] = result
-            if retry_count is not None:
-                task_state['retry_count'] = retry_count
-
-            task_state['updated_at'] = now_beijing_iso()
-
-            # 保存更新后的状态
-            self.redis.set(
-                task_key,
-                json.dumps(task_state, ensure_ascii=False),
-                ex=86400 * 7
-            )
+                logger.warning(f"[TaskState] Update of task {task_id} kept conflicting, giving up")
+                return False
 
             logger.debug(f"[TaskState] Updated task {task_id}, status={status}")
             return True
@@ -191,6 +197,58 @@ class TaskStateManager:
             logger.error(f"[TaskState] Failed to update task: {e}")
             return False
 
+    @staticmethod
+    def _apply_update(
+        task_id: str,
+        task_json: Optional[str],
+        status: Optional[str],
+        started_at: Optional[datetime],
+        completed_at: Optional[datetime],
+        error_message: Optional[str],
+        result: Optional[Any],
+        retry_count: Optional[int],
+    ) -> Dict[str, Any]:
+        """把更新合并进当前状态（返回值带 _old_status 供索引维护使用）"""
+        if not task_json:
+            logger.warning(f"[TaskState] Task {task_id} not found, creating new state")
+            # 如果任务不存在，创建一个基础状态
+            task_state = {
+                "task_id": task_id,
+                "task_type": "unknown",
+                "data": {},
+                "priority": 5,
+                "parent_task_id": None,
+                "status": status or "running",
+                "created_at": now_beijing_iso(),
+                "started_at": None,
+                "completed_at": None,
+                "error_message": None,
+                "result": None,
+                "retry_count": 0
+            }
+            old_status = None
+        else:
+            task_state = json.loads(task_json)
+            old_status = task_state.get('status')
+
+        # 更新字段
+        if status:
+            task_state['status'] = status
+        if started_at:
+            task_state['started_at'] = started_at.isoformat()
+        if completed_at:
+            task_state['completed_at'] = completed_at.isoformat()
+        if error_message is not None:
+            task_state['error_message'] = error_message
+        if result is not None:
+            task_state['result'] = result
+        if retry_count is not None:
+            task_state['retry_count'] = retry_count
+
+        task_state['updated_at'] = now_beijing_iso()
+        task_state['_old_status'] = old_status
+        return task_state
+
     def get_task_state(self, task_id: str) -> Optional[Dict[str, Any]]:
         """
         获取任务状态
@@ -215,74 +273,223 @@ class TaskStateManager:
             logger.error(f"[TaskState] Failed to get task state: {e}")
             return None
 
+    # ---------- 列表查询 ----------
+
+    def _ensure_created_index(self) -> None:
+        """
+        旧版本只维护了状态/类型索引：首次列表查询时用任务的 created_at 回填全局创建时间索引。
+        是否已回填由独立的标记 key 决定；回填用 NX 写入，不覆盖新任务已有的 score。
+        """
+        if self._created_index_checked:
+            return
+        self._created_index_checked = True
+        if self.redis.exists(self.created_backfill_marker):
+            return
+        status_keys = [self._index_key(f"status:{s}") for s in ALL_STATUSES]
+        task_ids: List[str] = []
+        for key in status_keys:
+            task_ids.extend(self.redis.zrange(key, 0, -1))
+        if not task_ids:
+            self.redis.set(self.created_backfill_marker, 1)
+            return
+        backfilled = 0
+        for i in range(0, len(task_ids), 500):
+            chunk = task_ids[i:i + 500]
+            values = self.redis.mget([self._task_key(t) for t in chunk])
+            mapping: Dict[str, float] = {}
+            for task_id, raw in zip(chunk, values):
+                if not raw:
+                    continue
+                try:
+                    created_ts = _parse_iso_ts(json.loads(raw).get("created_at"))
+                except (TypeError, ValueError):
+                    created_ts = None
+                mapping[task_id] = created_ts or 0.0
+            if mapping:
+                self.redis.zadd(self.created_index, mapping, nx=True)
+                backfilled += len(mapping)
+        self.redis.set(self.created_backfill_marker, 1)
+        logger.info(f"[TaskState] Backfilled created_at index with {backfilled} task(s)")
+
+    @staticmethod
+    def _normalize_filter(value: Union[str, Iterable[str], None]) -> List[str]:
+        if value is None:
+            return []
+        if isinstance(value, str):
+            items = value.split(",")
+        else:
+            items = list(value)
+        return sorted({str(v).strip() for v in items if str(v).strip()})
+
+    def _resolve_index(self, statuses: List[str], task_types: List[str]) -> str:
+        """
+        返回按创建时间排序的结果集 key。
+        无筛选时直接使用全局索引；否则在服务端 ZUNIONSTORE（同维度多值）+ ZINTERSTORE（跨维度），
+        权重 1/0/0 使结果的 score 保持为 created_at。
+        """
+        if not statuses and not task_types:
+            return self.created_index
+
+        filter_id = f"status={','.join(statuses)}|type={','.join(task_types)}"
+        dest = self._index_key(f"tmp:{filter_id}")
+        if self.redis.exists(dest):
+            return dest
+
+        pipe = self.redis.pipeline(transaction=True)
+        sources = {self.created_index: 1}
+        temp_keys = []
+        for prefix, values in (("status", statuses), ("type", task_types)):
+            if not values:
+                continue
+            if len(values) == 1:
+                sources[self._index_key(f"{prefix}:{values[0]}")] = 0
+            else:
+                union_key = f"{dest}:{prefix}"
+                pipe.zunionstore(union_key, [self._index_key(f"{prefix}:{v}") for v in values])
+                sources[union_key] = 0
+                temp_keys.append(union_key)
+        pipe.zinterstore(dest, sources, aggregate="SUM")
+        pipe.expire(dest, FILTER_CACHE_TTL_SECONDS)
+        if temp_keys:
+            pipe.delete(*temp_keys)
+        pipe.execute()
+        return dest
+
+    @staticmethod
+    def _encode_cursor(score: float, task_id: str) -> str:
+        return f"{score!r}:{task_id}"
+
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> Optional[Tuple[float, str]]:
+        if not cursor or ":" not in cursor:
+            return None
+        raw_score, task_id = cursor.split(":", 1)
+        try:
+            return float(raw_score), task_id
+        except ValueError:
+            return None
+
+    def _page_ids(
+        self, index_key: str, limit: int, offset: int, cursor: Optional[Tuple[float, str]]
+    ) -> List[Tuple[str, float]]:
+        if cursor is None:
+            return self.redis.zrevrange(index_key, offset, offset + limit - 1, withscores=True)
+
+        # keyset：score 相同的成员按成员名倒序排列，跳过游标及其之前已返回的成员
+        cursor_score, cursor_id = cursor
+        page: List[Tuple[str, float]] = []
+        start = 0
+        batch = limit + 16
+        while len(page) < limit:
+            rows = self.redis.zrevrangebyscore(
+                index_key, cursor_score, "-inf", start=start, num=batch, withscores=True
+            )
+            if not rows:
+                break
+            for member, score in rows:
+                if score == cursor_score and member >= cursor_id:
+                    continue
+                page.append((member, score))
+                if len(page) >= limit:
+                    break
+            if len(rows) < batch:
+                break
+            start += batch
+        return page
+
+    def list_tasks_page(
+        self,
+        status: Union[str, Iterable[str], None] = None,
+        task_type: Union[str, Iterable[str], None] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        按创建时间倒序分页列出任务。
+
+        Args:
+            status: 按状态筛选（可传多个，逗号分隔或列表，多个值取并集）
+            task_type: 按类型筛选（同上）
+            limit: 每页数量
+            cursor: 上一页返回的 next_cursor（优先于 offset）
+            offset: 偏移量（兼容旧调用）
+
+        Returns:
+            Dict: {"items": [...], "next_cursor": str | None}
+        """
+        empty = {"items": [], "next_cursor": None}
+        if not self.redis or limit <= 0:
+            return empty
+
+        try:
+            self._ensure_created_index()
+            index_key = self._resolve_index(
+                self._normalize_filter(status), self._normalize_filter(task_type)
+            )
+            rows = self._page_ids(index_key, limit, max(0, offset), self._decode_cursor(cursor))
+            if not rows:
+                return empty
+
+            # 一次 MGET 取回整页任务数据
+            values = self.redis.mget([self._task_key(task_id) for task_id, _ in rows])
+            tasks = []
+            expired = []
+            for (task_id, _), raw in zip(rows, values):
+                if not raw:
+                    expired.append(task_id)
+                    continue
+                tasks.append(json.loads(raw))
+
+            if expired:
+                # 任务数据已过期（TTL 7 天），顺手清理索引
+                self._remove_from_indexes(expired)
+
+            next_cursor = None
+            if len(rows) >= limit:
+                last_id, last_score = rows[-1]
+                next_cursor = self._encode_cursor(last_score, last_id)
+            return {"items": tasks, "next_cursor": next_cursor}
+
+        except Exception as e:
+            logger.error(f"[TaskState] Failed to list tasks: {e}")
+            return empty
+
     def list_tasks(
         self,
         status: Optional[str] = None,
         task_type: Optional[str] = None,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
-        列出任务
+        列出任务（按创建时间倒序）
 
         Args:
             status: 按状态筛选
             task_type: 按类型筛选
             limit: 返回数量限制
             offset: 偏移量
+            cursor: 分页游标（见 list_tasks_page）
 
         Returns:
             List[Dict]: 任务列表
         """
-        if not self.redis:
-            return []
-
-        try:
-            # 确定查询的索引
-            if status:
-                # 按指定状态筛选
-                index_key = self._index_key(f"status:{status}")
-                task_ids = self.redis.zrevrange(index_key, offset, offset + limit - 1)
-            elif task_type:
-                # 按类型筛选
-                index_key = self._index_key(f"type:{task_type}")
-                task_ids = self.redis.zrevrange(index_key, offset, offset + limit - 1)
-            else:
-                # 获取所有任务：合并所有状态索引
-                all_task_ids = set()
-                for s in ["pending", "running", "success", "failed", "retry", "cancelled"]:
-                    status_key = self._index_key(f"status:{s}")
-                    ids = self.redis.zrevrange(status_key, 0, -1)
-                    all_task_ids.update(ids)
-
-                # 获取所有任务的详情并按创建时间排序
-                all_tasks_with_time = []
-                for task_id in all_task_ids:
-                    task_state = self.get_task_state(task_id)
-                    if task_state:
-                        # 使用创建时间作为排序依据
-                        created_at = task_state.get('created_at', '')
-                        all_tasks_with_time.append((created_at, task_state))
-
-                # 按创建时间倒序排序
-                all_tasks_with_time.sort(key=lambda x: x[0], reverse=True)
-
-                # 应用分页
-                tasks = [task for _, task in all_tasks_with_time[offset:offset + limit]]
-                return tasks
-
-            # 批量获取任务详情（当按状态或类型筛选时）
-            tasks = []
-            for task_id in task_ids:
-                task_state = self.get_task_state(task_id)
-                if task_state:
-                    tasks.append(task_state)
-
-            return tasks
-
-        except Exception as e:
-            logger.error(f"[TaskState] Failed to list tasks: {e}")
-            return []
+        return self.list_tasks_page(
+            status=status, task_type=task_type, limit=limit, cursor=cursor, offset=offset
+        )["items"]
+
+    def _remove_from_indexes(self, task_ids: List[str]) -> None:
+        # 任务数据已过期，无从得知类型：从全部 type:* 索引中移除
+        type_keys = list(self.redis.scan_iter(match=self._index_key("type:*"), count=500))
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrem(self.created_index, *task_ids)
+        for s in ALL_STATUSES:
+            pipe.zrem(self._index_key(f"status:{s}"), *task_ids)
+        for key in type_keys:
+            pipe.zrem(key, *task_ids)
+        pipe.execute()
 
     def get_queue_stats(self) -> Dict[str, int]:
         """
@@ -302,13 +509,11 @@ class TaskStateManager:
             }
 
         try:
-            stats = {
-                "pending": self.redis.zcard(self._index_key("status:pending")) or 0,
-                "running": self.redis.zcard(self._index_key("status:running")) or 0,
-                "success": self.redis.zcard(self._index_key("status:success")) or 0,
-                "failed": self.redis.zcard(self._index_key("status:failed")) or 0,
-                "retry": self.redis.zcard(self._index_key("status:retry")) or 0,
-            }
+            names = ("pending", "running", "success", "failed", "retry")
+            pipe = self.redis.pipeline(transaction=False)
+            for name in names:
+                pipe.zcard(self._index_key(f"status:{name}"))
+            stats = {name: count or 0 for name, count in zip(names, pipe.execute())}
             stats["total"] = sum(stats.values())
 
             return stats
@@ -328,6 +533,10 @@ class TaskStateManager:
             bool: 是否成功
         """
         try:
+            # 尚未到点的延时任务直接从调度队列移除
+            from fastapi_app.tasks.delayed_scheduler import cancel_delayed
+            cancel_delayed(task_id)
+
             # 撤销 Celery 任务
             from fastapi_app.tasks.celery_app import celery_app
             celery_app.control.revoke(task_id, terminate=True)
@@ -359,19 +568,23 @@ class TaskStateManager:
         try:
             # 获取任务状态以便从索引中删除
             task_state = self.get_task_state(task_id)
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.zrem(self.created_index, task_id)
             if task_state:
                 # 从状态索引中移除
                 status = task_state.get('status')
                 if status:
-                    self.redis.zrem(self._index_key(f"status:{status}"), task_id)
+                    pipe.zrem(self._index_key(f"status:{status}"), task_id)
 
                 # 从类型索引中移除
                 task_type = task_state.get('task_type')
                 if task_type:
-                    self.redis.zrem(self._index_key(f"type:{task_type}"), task_id)
+                    pipe.zrem(self._index_key(f"type:{task_type}"), task_id)
 
             # 删除任务数据
-            self.redis.delete(self._task_key(task_id))
+            pipe.delete(self._task_key(task_id))
+            self._publish_event(pipe, task_state or {"task_id": task_id}, "deleted")
+            pipe.execute()
 
             logger.info(f"[TaskState] Deleted task {task_id}")
             return True
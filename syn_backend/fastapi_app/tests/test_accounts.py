@@ -52,3 +52,42 @@ def test_filter_accounts_by_status(client):
     data = response.json()
     assert "success" in data
     assert "items" in data
+
+
+def test_cookie_manager_directory_is_cached_and_cookie_loading_is_lazy(tmp_path, monkeypatch):
+    """Listing hits the DB once per change and never opens cookie files"""
+    from myUtils.cookie_manager import CookieManager
+
+    monkeypatch.setenv("COOKIE_SNAPSHOT_DEBOUNCE_SECONDS", "60")
+    manager = CookieManager(storage_path=tmp_path / "cookie_store.db")
+    manager.cookies_dir = tmp_path / "cookies"
+    manager.frontend_snapshot_path = tmp_path / "snapshot.json"
+    manager.cookies_dir.mkdir()
+    for i in range(3):
+        manager.add_account("douyin", {
+            "id": f"douyin_u{i}", "name": f"acc{i}", "user_id": f"u{i}", "cookie": {"cookies": [{"name": "sid", "value": str(i)}]},
+        })
+
+    # 防抖：三次 add_account 只排了一次待写快照
+    assert not manager.frontend_snapshot_path.exists()
+    assert manager.flush_frontend_snapshot()["count"] == 3
+    assert manager.flush_frontend_snapshot() is None
+
+    version = manager.directory_version
+    opened = []
+    monkeypatch.setattr(type(manager.cookies_dir), "open", lambda self, *a, **k: opened.append(self))
+    grouped = manager.get_all_accounts()
+    assert manager.list_flat_accounts()
+    assert manager.directory_version == version
+    assert "cookie" not in grouped[0]["accounts"][0]
+    assert opened == []
+    monkeypatch.undo()
+
+    manager.update_account_status("douyin", manager.list_flat_accounts()[0]["account_id"], "expired")
+    assert "expired" in {acc["status"] for acc in manager.list_flat_accounts()}
+    assert manager.directory_version == version + 1
+
+    first = manager.get_all_accounts(include_cookie=True)[0]["accounts"][0]["cookie"]
+    misses = manager.cookie_cache.misses
+    again = manager.get_all_accounts(include_cookie=True)[0]["accounts"][0]["cookie"]
+    assert again == first and manager.cookie_cache.misses == misses
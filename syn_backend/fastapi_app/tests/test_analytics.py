@@ -37,3 +37,178 @@ def test_analytics_export_excel(client):
     assert response.status_code == 200
     # Will either be Excel or fall back to CSV if openpyxl not available
     assert "text/csv" in response.headers["content-type"] or "spreadsheet" in response.headers["content-type"]
+
+
+def test_bulk_upsert_collapses_duplicates_and_updates_in_place(tmp_path):
+    """Bulk ingestion keys on (platform, video_id) via a real unique index"""
+    import sqlite3
+    from myUtils.analytics_db import ensure_analytics_schema, upsert_video_analytics_bulk
+
+    db_path = tmp_path / "analytics.db"
+    ensure_analytics_schema(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP INDEX uq_video_analytics_platform_video")
+        conn.execute(
+            "INSERT INTO video_analytics (platform, video_id, title, last_updated) VALUES "
+            "('douyin', 'v1', 'stale', '2024-01-01'), ('douyin', 'v1', 'fresh', '2025-01-01')"
+        )
+
+    from myUtils import analytics_db
+    analytics_db._unique_key_ready.clear()
+
+    written = upsert_video_analytics_bulk(
+        db_path,
+        [
+            {"video_id": "v1", "title": None, "play_count": 10},
+            {"video_id": "v2", "title": "second", "play_count": 3},
+            {"video_id": "  ", "title": "no id"},
+        ],
+        platform="douyin",
+    )
+    assert written == 2
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT video_id, title, play_count FROM video_analytics ORDER BY video_id"
+        ).fetchall()
+    assert rows == [("v1", "fresh", 10), ("v2", "second", 3)]
+
+
+def test_daily_rollup_matches_raw_aggregation(tmp_path):
+    """Summary / chart served from the rollup equal a scan of video_analytics after writes"""
+    import sqlite3
+    from myUtils.analytics_db import (
+        ensure_analytics_schema,
+        get_analytics_summary,
+        get_chart_data,
+        upsert_video_analytics_bulk,
+    )
+
+    db_path = tmp_path / "analytics.db"
+    ensure_analytics_schema(db_path)
+    upsert_video_analytics_bulk(
+        db_path,
+        [
+            {"video_id": "a", "account_id": 1, "publish_date": "2025-01-01", "play_count": 10, "like_count": 1},
+            {"video_id": "b", "account_id": 1, "publish_date": "2025-01-01", "play_count": 5},
+            {"video_id": "c", "account_id": 2, "publish_date": "2025-01-02", "play_count": 7, "comment_count": 2},
+        ],
+        platform="douyin",
+    )
+    upsert_video_analytics_bulk(
+        db_path,
+        [{"video_id": "a", "account_id": 1, "publish_date": "2025-01-03", "play_count": 20}],
+        platform="douyin",
+    )
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM video_analytics WHERE video_id = 'b'")
+        conn.execute("UPDATE video_analytics SET like_count = 4 WHERE video_id = 'c'")
+
+    summary = get_analytics_summary(db_path)
+    assert summary["totalVideos"] == 2
+    assert summary["totalPlays"] == 27
+    assert summary["totalLikes"] == 4  # the re-upsert of "a" overwrote its counters
+    assert summary["avgPlayCount"] == 13.5
+    assert get_analytics_summary(db_path, account_ids=["2"])["totalPlays"] == 7
+
+    chart = get_chart_data(db_path, start_date="2025-01-01", end_date="2025-01-31")
+    assert [(p["date"], p["playCount"], p["likeCount"]) for p in chart] == [
+        ("2025-01-02", 7, 4),
+        ("2025-01-03", 20, 0),
+    ]
+
+    with sqlite3.connect(db_path) as conn:
+        buckets = conn.execute("SELECT COUNT(*) FROM analytics_daily_rollup").fetchone()[0]
+        raw = conn.execute(
+            "SELECT COUNT(*), SUM(play_count), SUM(like_count), SUM(comment_count) FROM video_analytics"
+        ).fetchone()
+    assert buckets == 2
+    assert raw == (summary["totalVideos"], summary["totalPlays"], summary["totalLikes"], summary["totalComments"])
+
+
+
+def test_daily_rollup_buckets_timestamps_by_day(tmp_path):
+    """Epoch and datetime publish values share one bucket per calendar day"""
+    import sqlite3
+    from myUtils import analytics_db
+    from myUtils.analytics_db import (
+        ensure_analytics_schema,
+        get_analytics_summary,
+        get_chart_data,
+        rebuild_analytics_rollup,
+        upsert_video_analytics_bulk,
+    )
+
+    db_path = tmp_path / "analytics.db"
+    ensure_analytics_schema(db_path)
+    noon = 1736510400  # 2025-01-10 12:00:00 UTC
+    upsert_video_analytics_bulk(
+        db_path,
+        [
+            {"video_id": "s", "account_id": 1, "publish_date": noon, "play_count": 1},
+            {"video_id": "ms", "account_id": 1, "publish_date": noon * 1000 + 1500, "play_count": 2},
+            {"video_id": "iso", "account_id": 1, "publish_date": "2025-01-10T08:30:00+08:00", "play_count": 4},
+            {"video_id": "dt", "account_id": 1, "publish_date": "2025-01-10 23:59:59", "play_count": 8},
+            {"video_id": "next", "account_id": 1, "publish_date": "2025-01-11T00:10:00", "play_count": 16},
+            {"video_id": "none", "account_id": 1, "play_count": 32},
+        ],
+        platform="douyin",
+    )
+
+    def buckets():
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute(
+                "SELECT day_key, publish_date, video_count, play_count FROM analytics_daily_rollup ORDER BY day_key"
+            ).fetchall()
+
+    expected = [("", None, 1, 32), ("2025-01-10", "2025-01-10", 4, 15), ("2025-01-11", "2025-01-11", 1, 16)]
+    assert buckets() == expected
+    chart = get_chart_data(db_path, start_date="2025-01-10", end_date="2025-01-10")
+    assert [(p["date"], p["playCount"]) for p in chart] == [("2025-01-10", 15)]
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE video_analytics SET publish_date = ? WHERE video_id = 'next'", (noon,))
+        conn.execute("DELETE FROM video_analytics WHERE video_id = 'ms'")
+    assert buckets() == [("", None, 1, 32), ("2025-01-10", "2025-01-10", 4, 29)]
+    rebuild_analytics_rollup(db_path)
+    assert buckets() == [("", None, 1, 32), ("2025-01-10", "2025-01-10", 4, 29)]
+
+    # A rollup built by an older bucketing scheme is replaced and backfilled
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM analytics_daily_rollup")
+        conn.execute(
+            "CREATE TRIGGER trg_video_analytics_rollup_insert AFTER INSERT ON video_analytics BEGIN SELECT 1; END"
+        )
+    analytics_db._rollup_ready.clear()
+    assert get_analytics_summary(db_path)["totalPlays"] == 61
+    with sqlite3.connect(db_path) as conn:
+        triggers = {
+            row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_video_analytics_rollup_%'"
+            )
+        }
+    assert triggers == set(analytics_db._ROLLUP_TRIGGERS)
+    assert len(buckets()) == 2
+
+
+def test_export_iterates_all_rows_in_batches(tmp_path):
+    """Export rows stream from one cursor with no row cap"""
+    from myUtils.analytics_db import (
+        ensure_analytics_schema,
+        iter_video_analytics_export,
+        upsert_video_analytics_bulk,
+    )
+
+    db_path = tmp_path / "analytics.db"
+    ensure_analytics_schema(db_path)
+    upsert_video_analytics_bulk(
+        db_path,
+        [{"video_id": f"v{i}", "publish_date": f"2025-01-{i % 28 + 1:02d}", "play_count": i} for i in range(25)],
+        platform="kuaishou",
+    )
+
+    rows = list(iter_video_analytics_export(db_path, start_date="2025-01-01", batch_size=4))
+    assert len(rows) == 25
+    assert all(len(row) == 11 and row[3] == "kuaishou" for row in rows)
+    assert sum(row[6] for row in rows) == sum(range(25))
+    assert [row[5] for row in rows] == sorted((row[5] for row in rows), reverse=True)
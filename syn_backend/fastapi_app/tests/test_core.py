@@ -58,3 +58,205 @@ def test_redoc_endpoint(client):
     response = client.get("/api/redoc")
     assert response.status_code == 200
     assert b"redoc" in response.content.lower()
+
+
+def test_rate_limiter_shares_quota_through_redis():
+    """Two limiters on the same Redis (two workers) share one platform/account budget"""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    from fastapi_app.core.rate_limiter import RateLimiter
+
+    server = fakeredis.FakeServer()
+    worker_a = RateLimiter(redis_client=fakeredis.FakeRedis(server=server, decode_responses=True))
+    worker_b = RateLimiter(redis_client=fakeredis.FakeRedis(server=server, decode_responses=True))
+    assert worker_a.backend_name == "redis"
+
+    specs = worker_a.build_specs("douyin", account_id="42", host="https://www.douyin.com/aweme/v1/")
+    assert [spec.key for spec in specs] == [
+        "ratelimit:platform:douyin",
+        "ratelimit:account:douyin:42",
+        "ratelimit:host:www.douyin.com",
+    ]
+    assert worker_a.try_acquire(specs) == 0
+    # 同账号的最小间隔由另一个 Worker 看到
+    assert 0 < worker_b.try_acquire(specs) <= 20
+    # 另一个账号只受平台配额约束；被拒绝的请求不扣减任何桶
+    other = worker_b.build_specs("douyin", account_id="43")
+    assert worker_b.try_acquire(other) == 0
+    assert worker_a.try_acquire(worker_a.build_specs("douyin", account_id="44")) == 0
+    assert worker_b.try_acquire(worker_b.build_specs("douyin", account_id="45")) > 0
+
+
+def test_rate_limiter_falls_back_to_local_buckets_when_redis_fails():
+    """Redis errors degrade to in-process buckets with the same all-or-nothing semantics"""
+    import asyncio
+    from fastapi_app.core.rate_limiter import RateLimiter
+
+    class BrokenRedis:
+        def register_script(self, script):
+            def run(keys, args):
+                raise ConnectionError("redis down")
+            return run
+
+    limiter = RateLimiter(redis_client=BrokenRedis())
+    specs = limiter.build_specs("kuaishou", account_id="1")
+    assert limiter.try_acquire(specs) == 0
+    assert limiter.backend_name == "local"
+    assert limiter.try_acquire(specs) > 0
+    assert limiter.local.available(limiter.build_specs("kuaishou")[0]) == pytest.approx(1, abs=0.01)
+
+    assert asyncio.run(limiter.acquire("unknown-platform")) is True
+
+
+def test_rate_limiter_publish_quota_is_separate_and_non_blocking():
+    """Publish jobs draw from their own buckets; an exhausted quota reports the wait instead of sleeping"""
+    import time
+    from fastapi_app.core.rate_limiter import RateLimiter
+
+    limiter = RateLimiter()
+    # API 请求配额耗尽不影响发布
+    assert limiter.acquire_blocking("channels", account_id="1") is True
+    assert limiter.try_acquire(limiter.build_specs("channels", account_id="1")) > 0
+    started = time.monotonic()
+    assert limiter.try_acquire_publish("channels", "1") == 0
+    # 同账号第二次发布需等满账号间隔，其他账号不受影响
+    wait = limiter.try_acquire_publish("channels", "1")
+    assert wait == pytest.approx(limiter.PUBLISH_LIMITS["channels"]["account_interval_seconds"], abs=1)
+    assert limiter.try_acquire_publish("channels", "2") == 0
+    assert time.monotonic() - started < 0.5
+    assert limiter.try_acquire_publish("unknown-platform", "1") == 0
+
+
+def test_rate_limiter_waits_out_min_interval_before_timing_out():
+    """The per-account interval is always waited out; the timeout only bounds the quota wait"""
+    import asyncio
+    import time
+    from fastapi_app.core.rate_limiter import RateLimiter
+
+    limiter = RateLimiter()
+    limiter.PLATFORM_LIMITS = {
+        "channels": {"requests_per_minute": 600, "min_interval_seconds": 0.3},
+        "douyin": {"requests_per_minute": 1, "min_interval_seconds": 0.1},
+    }
+    assert limiter.acquire_blocking("channels", account_id="1") is True
+    started = time.monotonic()
+    assert asyncio.run(limiter.acquire("channels", account_id="1", timeout=0)) is True
+    assert time.monotonic() - started >= 0.25
+
+    # 平台配额耗尽（需等待约 60 秒）超过超时则立即放弃
+    assert limiter.acquire_blocking("douyin", timeout=1) is True
+    started = time.monotonic()
+    assert limiter.acquire_blocking("douyin", timeout=1) is False
+    assert asyncio.run(limiter.acquire("douyin", timeout=1)) is False
+    assert time.monotonic() - started < 1
+    # 仅按出站域名限流
+    assert limiter.acquire_blocking(None, host="https://www.douyin.com/aweme/v1/") is True
+
+
+def _concurrency_controller(server):
+    import fakeredis
+    from fastapi_app.tasks.concurrency_controller import ConcurrencyController
+
+    controller = ConcurrencyController(redis_client=fakeredis.FakeRedis(server=server, decode_responses=True))
+    controller.WAIT_POLL_SECONDS = 0.05
+    controller.update_config({
+        "enabled": True,
+        "global_max": 0,
+        "platform_max": {"douyin": 1},
+        "account_max": 0,
+        "task_type_max": {},
+        "lease_ttl": 60,
+        "max_wait": 0.2,
+    })
+    return controller
+
+
+def test_concurrency_semaphore_is_shared_and_fifo():
+    """Leases are shared across workers; a queued waiter is served before a later newcomer"""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    from fastapi_app.tasks.concurrency_controller import ConcurrencyLimitException
+
+    server = fakeredis.FakeServer()
+    worker_a = _concurrency_controller(server)
+    worker_b = _concurrency_controller(server)
+    dims = [("platform:douyin", 1)]
+
+    with worker_a.acquire(platform="douyin"):
+        with pytest.raises(ConcurrencyLimitException):
+            with worker_b.acquire(platform="douyin"):
+                pass
+        # 已排队的等待者先于后来者
+        assert worker_b._try_acquire(dims, "early", 60, enqueue=True) == 1
+        assert worker_b.get_current_usage()["platforms"]["douyin"]["current"] == 1
+
+    assert worker_b.redis.lpop(f"{worker_b.wake_prefix}early") == "1"
+    assert worker_a._try_acquire(dims, "late", 60, enqueue=False) == 1
+    assert worker_b._try_acquire(dims, "early", 60, enqueue=True) == 0
+    worker_b._release_all(dims, "early")
+    assert worker_a._try_acquire(dims, "late", 60, enqueue=False) == 0
+
+
+def test_concurrency_usage_drops_expired_leases():
+    """Usage trims leases on the same millisecond clock the acquire script scores them with"""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    from fastapi_app.tasks import concurrency_controller as cc
+
+    controller = _concurrency_controller(fakeredis.FakeServer())
+    key = f"{controller.semaphore_prefix}platform:douyin"
+    now_ms = cc._now_ms()
+    controller.redis.zadd(key, {"crashed-worker": now_ms - 1000, "live": now_ms + 60_000})
+
+    assert controller.get_current_usage()["platforms"]["douyin"]["current"] == 1
+    assert controller.redis.zrange(key, 0, -1) == ["live"]
+
+
+def test_task_state_prunes_expired_ids_from_type_indexes():
+    """Expired task ids found while listing are dropped from the type indexes as well"""
+    fakeredis = pytest.importorskip("fakeredis")
+    from fastapi_app.tasks.task_state_manager import TaskStateManager
+
+    manager = TaskStateManager()
+    manager.redis = fakeredis.FakeRedis(decode_responses=True)
+    for task_id in ("t1", "t2", "t3"):
+        assert manager.create_task(task_id, "publish", {})
+    assert manager.create_task("b1", "batch_publish", {})
+    # 模拟任务数据 TTL 到期
+    manager.redis.delete(manager._task_key("t2"))
+
+    page = manager.list_tasks_page(limit=10)
+    assert {t["task_id"] for t in page["items"]} == {"t1", "t3", "b1"}
+    assert set(manager.redis.zrange(manager._index_key("type:publish"), 0, -1)) == {"t1", "t3"}
+    assert manager.redis.zcard(manager._index_key("status:pending")) == 3
+    assert len(manager.list_tasks_page(task_type="publish", limit=10)["items"]) == 2
+
+
+def test_task_state_backfills_legacy_tasks_after_new_ones_are_created():
+    """Pre-upgrade tasks are backfilled into the created index even once new tasks have populated it"""
+    import json
+    fakeredis = pytest.importorskip("fakeredis")
+    from fastapi_app.tasks.task_state_manager import TaskStateManager
+
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    writer = TaskStateManager()
+    writer.redis = redis_client
+    # 旧版本写入的任务：只有状态 / 类型索引
+    for task_id, created_at in (("legacy_1", "2024-01-01T08:00:00"), ("legacy_2", "2024-01-02T08:00:00")):
+        redis_client.set(writer._task_key(task_id), json.dumps({
+            "task_id": task_id, "task_type": "publish", "status": "pending", "created_at": created_at,
+        }))
+        redis_client.zadd(writer._index_key("status:pending"), {task_id: 1})
+        redis_client.zadd(writer._index_key("type:publish"), {task_id: 1})
+
+    assert writer.create_task("fresh", "publish", {})
+    # 更新旧任务时顺带补进全局索引
+    assert writer.update_task_state("legacy_2", status="running")
+    assert redis_client.zscore(writer.created_index, "legacy_1") is None
+
+    reader = TaskStateManager()
+    reader.redis = redis_client
+    assert [t["task_id"] for t in reader.list_tasks_page(limit=10)["items"]] == ["fresh", "legacy_2", "legacy_1"]
+    assert [t["task_id"] for t in reader.list_tasks_page(status="pending", limit=10)["items"]] == ["fresh", "legacy_1"]
+    assert len(reader.list_tasks_page(task_type="publish", limit=10)["items"]) == 3
+    assert redis_client.exists(reader.created_backfill_marker)
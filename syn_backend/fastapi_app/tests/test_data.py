@@ -52,3 +52,83 @@ def test_publish_status(client):
     assert "total" in stats
     assert "published" in stats
     assert "pending" in stats
+
+
+def test_collection_sweep_bounds_lanes_and_resumes_after_deadline(tmp_path):
+    """Sweep caps per-lane concurrency; accounts cut off by the deadline run on the next sweep"""
+    import asyncio
+    from myUtils.collection_engine import CollectionCheckpoint, CollectionLimits, CollectionSweep
+
+    checkpoint = CollectionCheckpoint(tmp_path / "collect.db")
+    running = {"now": 0, "peak": 0}
+    calls = []
+
+    async def worker(account, sweep):
+        async with sweep.slot("api", account["platform"]):
+            calls.append(account["account_id"])
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            try:
+                await asyncio.sleep(5 if account["account_id"] == "slow" else 0.01)
+            finally:
+                running["now"] -= 1
+        return {"success": True, "count": 1}
+
+    accounts = [{"account_id": str(i), "platform": "douyin"} for i in range(6)]
+    accounts.append({"account_id": "slow", "platform": "douyin"})
+
+    first = asyncio.run(
+        CollectionSweep("s", limits=CollectionLimits(api_per_platform=2, deadline_seconds=1),
+                        checkpoint=checkpoint).run(accounts, worker)
+    )
+    assert running["peak"] == 2
+    assert first["success"] == 6
+    assert first["progress"]["deadline_hit"] is True
+    assert [d["account_id"] for d in first["details"] if d.get("deferred")] == ["slow"]
+
+    calls.clear()
+    accounts[-1] = {"account_id": "slow", "platform": "douyin", "fast": True}
+
+    async def fast_worker(account, sweep):
+        calls.append(account["account_id"])
+        return {"success": True, "count": 1}
+
+    second = asyncio.run(
+        CollectionSweep("s", limits=CollectionLimits(deadline_seconds=0), checkpoint=checkpoint).run(accounts, fast_worker)
+    )
+    assert calls == ["slow"]
+    assert second["progress"]["resumed"] == 6
+    assert checkpoint.load("s", 3600) == {}
+
+
+def test_incremental_plan_stops_at_known_videos_past_hot_window(tmp_path):
+    """After a full pass, only new or hot videos are kept and paging stops at the first stale page"""
+    import sqlite3
+    import time
+    from myUtils.collection_engine import CollectionCursorStore, RefreshTiers
+
+    db_path = tmp_path / "collect.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE video_analytics (platform TEXT, account_id TEXT, video_id TEXT)")
+    store = CollectionCursorStore(db_path, RefreshTiers())
+    now = time.time()
+    videos = [{"video_id": f"v{i}", "publish_time": int(now - i * 86400)} for i in range(40)]
+
+    first = store.plan("douyin", "acc")
+    assert first.mode == "full"
+    assert first.select(videos) == videos
+    assert first.observe(videos, cursor=40)
+    store.commit(first)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO video_analytics VALUES ('douyin', 'acc', ?)", [(v["video_id"],) for v in videos]
+        )
+
+    second = store.plan("douyin", "acc")
+    assert second.mode == "hot"
+    head = [{"video_id": "new", "publish_time": int(now) + 60}] + videos[:19]
+    assert [v["video_id"] for v in second.select(head)] == ["new", "v0", "v1"]
+    assert second.observe(head) is True
+    assert second.observe(videos[20:]) is False
+    assert second.summary()["stopped_early"] is True
+    assert second.newest_id == "new"
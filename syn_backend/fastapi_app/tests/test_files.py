@@ -122,3 +122,120 @@ def test_upload_and_save_endpoint_with_local_video(test_db_pool):
         app.dependency_overrides.pop(get_main_db, None)
         if saved_path and Path(saved_path).exists():
             Path(saved_path).unlink()
+
+
+@pytest.mark.asyncio
+async def test_keyword_search_uses_fts_and_keyset_cursor(test_db_pool):
+    """Keyword search hits the FTS index (incl. Chinese substrings) and pages via next_cursor."""
+    service = FileService()
+
+    with test_db_pool.get_connection() as conn:
+        service._ensure_file_record_columns(conn.cursor(), conn)
+        conn.executemany(
+            "INSERT INTO file_records (filename, filesize, file_path, title) VALUES (?, ?, ?, ?)",
+            [(f"clip_{i}.mp4", 1.0, f"clip_{i}.mp4", "美食探店合集" if i % 2 else "旅行日记") for i in range(6)],
+        )
+        conn.commit()
+
+        first = await service.list_files(conn, keyword="探店合", limit=2)
+        assert first.total == 3
+        assert len(first.items) == 2
+        assert first.next_cursor
+
+        second = await service.list_files(conn, keyword="探店合", limit=2, cursor=first.next_cursor)
+        seen = {item.id for item in first.items} | {item.id for item in second.items}
+        assert len(seen) == 3
+
+        # Renames are picked up by the sync triggers
+        renamed_id = first.items[0].id
+        await service.rename_file(conn, renamed_id, "旅行探店合拍.mp4", update_disk=False)
+        hits = await service.list_files(conn, keyword="探店合拍")
+        assert [item.id for item in hits.items] == [renamed_id]
+
+        # Short keywords fall back to LIKE
+        short = await service.list_files(conn, keyword="旅行")
+        assert short.total == 4
+
+
+def test_chunked_upload_resumes_and_dedups_by_sha256(test_db_pool, tmp_path, monkeypatch):
+    """Chunks stream to disk, a retried chunk is skipped, and re-uploaded content dedups after verification."""
+    import hashlib
+
+    from fastapi_app.api.v1.files.chunked_upload import chunked_uploads
+
+    monkeypatch.setattr(chunked_uploads, "root", tmp_path / "chunks")
+    payload = b"synapse-chunked-upload" * 4096
+    digest = hashlib.sha256(payload).hexdigest()
+    half = len(payload) // 2
+    saved_path = None
+
+    def override_get_db():
+        with test_db_pool.get_connection() as conn:
+            yield conn
+
+    app.dependency_overrides[get_main_db] = override_get_db
+    try:
+        with TestClient(app) as local_client:
+            init = local_client.post(
+                "/api/v1/files/uploads",
+                json={"filename": "clip.mp4", "size": len(payload), "group": "auto-test"},
+            ).json()["data"]
+            upload_id = init["upload_id"]
+
+            first = local_client.put(f"/api/v1/files/uploads/{upload_id}?offset=0", content=payload[:half])
+            assert first.json()["data"]["received"] == half
+
+            gap = local_client.put(f"/api/v1/files/uploads/{upload_id}?offset={half + 10}", content=b"x")
+            assert gap.status_code == 409
+
+            # resume with an overlapping retry: the already-received bytes are skipped
+            resumed = local_client.get(f"/api/v1/files/uploads/{upload_id}").json()["data"]["received"]
+            rest = local_client.put(
+                f"/api/v1/files/uploads/{upload_id}?offset={resumed - 100}", content=payload[resumed - 100:]
+            )
+            assert rest.json()["data"]["completed"] is True
+
+            done = local_client.post(f"/api/v1/files/uploads/{upload_id}/complete").json()["data"]
+            saved_path = done["file_path"]
+            assert done["deduplicated"] is False
+            assert hashlib.sha256(Path(saved_path).read_bytes()).hexdigest() == digest
+
+            # a claimed sha256 alone reveals nothing; dedup happens once the bytes are verified
+            again = local_client.post(
+                "/api/v1/files/uploads",
+                json={"filename": "copy.mp4", "size": len(payload), "sha256": digest},
+            ).json()["data"]
+            assert "id" not in again and "file_path" not in again
+            local_client.put(f"/api/v1/files/uploads/{again['upload_id']}?offset=0", content=payload)
+            deduped = local_client.post(f"/api/v1/files/uploads/{again['upload_id']}/complete").json()["data"]
+            assert deduped["deduplicated"] is True
+            assert deduped["id"] == done["id"]
+    finally:
+        app.dependency_overrides.pop(get_main_db, None)
+        if saved_path and Path(saved_path).exists():
+            Path(saved_path).unlink()
+
+
+def test_metadata_prober_bounds_unprobeable_memo(tmp_path):
+    """ffprobe 失败的记录按 LRU 限长，文件变化后重新探测"""
+    from fastapi_app.services.video_metadata_prober import VideoMetadataProber
+
+    prober = VideoMetadataProber(cache_db_path=str(tmp_path / "probe.db"), unprobeable_size=3)
+    prober._ensure_started = lambda: False
+    videos = []
+    for i in range(4):
+        path = tmp_path / f"broken_{i}.mp4"
+        path.write_bytes(b"not a video")
+        videos.append(str(path))
+
+    for file_id, path in enumerate(videos[:3]):
+        prober._mark_unprobeable(file_id, prober._cache_key(path))
+    # 命中后移到队尾，不会被最先淘汰
+    assert prober.submit(0, videos[0]) is False
+    prober._mark_unprobeable(3, prober._cache_key(videos[3]))
+
+    assert list(prober._unprobeable) == [2, 0, 3]
+
+    Path(videos[0]).write_bytes(b"still not a video, but longer")
+    prober.submit(0, videos[0])
+    assert 0 not in prober._unprobeable
@@ -46,3 +46,740 @@ def test_ai_status(client):
     response = client.get("/api/v1/ai/status")
     # May return 400 if AI not configured, or 200 if it is
     assert response.status_code in [200, 400]
+
+
+def test_volcano_provider_streams_sse_on_pooled_client(monkeypatch):
+    """Streaming reuses the pooled client and holds a concurrency slot until the stream is closed"""
+    import asyncio
+    import httpx
+    from ai_service.base_provider import client_pool
+    from ai_service.providers import VolcanoEngineProvider
+
+    monkeypatch.setenv("AI_PROVIDER_CONCURRENCY_VOLCANOENGINE", "1")
+    sse = (
+        'data: {"choices":[{"delta":{"content":"你"}}]}\n\n'
+        ': keep-alive\n\n'
+        'data: {"choices":[{"delta":{"content":"好"}}]}\n\n'
+        'data: [DONE]\n\n'
+    ).encode("utf-8")
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.path)
+        return httpx.Response(200, content=sse, headers={"content-type": "text/event-stream"})
+
+    provider = VolcanoEngineProvider("test-key")
+    messages = [{"role": "user", "content": "hi"}]
+
+    async def run():
+        pooled = client_pool.client(
+            "httpx",
+            lambda: httpx.AsyncClient(base_url=provider.base_url, transport=httpx.MockTransport(handler)),
+            provider.api_key,
+            provider.base_url,
+        )
+        assert provider._http() is pooled
+
+        chunks = [c async for c in provider.stream_call_model("doubao-pro-4k", messages)]
+        assert chunks == ["你", "好"]
+
+        slots = client_pool.semaphore("volcanoengine")
+        stream = provider.stream_call_model("doubao-pro-4k", messages)
+        assert await stream.__anext__() == "你"
+        assert slots.locked()
+        await stream.aclose()
+        assert not slots.locked()
+        await client_pool.aclose()
+
+    asyncio.run(run())
+    assert requests == ["/api/v3/chat/completions"] * 2
+
+
+def test_tool_gateway_dispatches_in_process_with_run_cache(monkeypatch):
+    """Agent tools hit services directly in-process; read-only lookups are cached per run"""
+    import asyncio
+    from fastapi_app.api.v1.accounts.services import AccountService
+    from fastapi_app.main import app
+    from fastapi_app.services.tool_gateway import ToolGateway
+
+    calls = []
+
+    async def fake_list_accounts(self, platform=None, status=None, skip=0, limit=100):
+        calls.append((platform, status, limit))
+        return {"total": 1, "items": [{"account_id": "douyin_1", "platform": "douyin", "status": "valid"}]}
+
+    monkeypatch.setattr(AccountService, "list_accounts", fake_list_accounts)
+    gateway = ToolGateway()
+    gateway.bind_app(app)
+
+    async def run():
+        async with gateway.client(timeout=10.0) as client:
+            with gateway.run_scope():
+                first = await client.get("http://localhost:7000/api/v1/accounts", params={"status": "valid", "limit": 1000})
+                again = await client.get("http://localhost:7000/api/v1/accounts?status=valid&limit=1000")
+                assert first.json()["items"][0]["account_id"] == "douyin_1"
+                assert again is first
+                # 写请求清空本次运行的缓存
+                missing = await client.post("http://localhost:7000/api/v1/__missing__", json={})
+                assert missing.status_code == 404
+                await client.get("http://localhost:7000/api/v1/accounts", params={"status": "valid", "limit": 1000})
+            # 进程内未直连的接口经 ASGI 分发
+            health = await client.get("http://localhost:7000/api/v1/tasks/health")
+            assert health.status_code == 200
+        await gateway.aclose()
+
+    asyncio.run(run())
+    assert calls == [(None, "valid", 1000), (None, "valid", 1000)]
+    # 任务路由下的固定子路径不会被当成 task_id
+    direct_paths = [p for m, p, _, _ in gateway._direct if m == "GET"]
+    for fixed in ("/tasks/health", "/tasks/stats", "/tasks/list", "/tasks/events", "/tasks/ws"):
+        assert not any(p.fullmatch(fixed) for p in direct_paths)
+    assert any(p.fullmatch("/tasks/abc123") for p in direct_paths)
+    assert gateway.metrics["cache_hits"] == 1
+    assert gateway.metrics["http"] == 0
+    assert gateway.metrics["asgi"] == 2
+
+
+def test_function_calling_runs_read_only_tools_concurrently(monkeypatch):
+    """Read-only tool calls of one turn overlap; side-effect tools run alone, in order"""
+    import asyncio
+    import json
+    import httpx
+    from ai_service.base_provider import client_pool
+    from ai_service.function_calling_service import FunctionCallingService, Tool
+
+    timeline = []
+
+    def make(name, side_effects=False):
+        async def run(**kwargs):
+            timeline.append(("start", name))
+            await asyncio.sleep(0.05)
+            timeline.append(("end", name))
+            return {"tool": name}
+        return Tool(name=name, description=name, parameters={"type": "object", "properties": {}},
+                    function=run, side_effects=side_effects)
+
+    def call(i, name):
+        return {"id": f"call_{i}", "type": "function", "function": {"name": name, "arguments": "{}"}}
+
+    turns = [
+        {"finish_reason": "tool_calls", "message": {"role": "assistant", "content": None, "tool_calls": [
+            call(0, "list_accounts"), call(1, "list_videos"), call(2, "delete_file"), call(3, "get_file_tags"),
+        ]}},
+        {"finish_reason": "stop", "message": {"role": "assistant", "content": "完成"}},
+    ]
+    bodies = []
+
+    def handler(request):
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"choices": [turns[len(bodies) - 1]]})
+
+    service = FunctionCallingService(api_key="test-key", base_url="http://llm.test/v1")
+    service.register_tools([make("list_accounts"), make("list_videos"), make("delete_file", True), make("get_file_tags")])
+
+    async def run():
+        pooled = client_pool.client(
+            "function_calling",
+            lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            service.api_key,
+            service.base_url,
+        )
+        assert service._http() is pooled
+        events = [e async for e in service.stream([{"role": "user", "content": "整理素材"}], max_iterations=3)]
+        await client_pool.aclose()
+        return events
+
+    events = asyncio.run(run())
+    # 前两个只读调用重叠执行，删除在它们之后单独执行，最后一个只读调用在删除之后
+    assert timeline[:2] == [("start", "list_accounts"), ("start", "list_videos")]
+    assert timeline[4:] == [("start", "delete_file"), ("end", "delete_file"), ("start", "get_file_tags"), ("end", "get_file_tags")]
+
+    assert [e["type"] for e in events] == ["iteration", "assistant"] + ["tool_result"] * 4 + ["iteration", "final"]
+    result = events[-1]["result"]
+    assert result["success"] is True and result["message"] == "完成"
+    assert [c["name"] for c in result["tool_calls"]] == ["list_accounts", "list_videos", "delete_file", "get_file_tags"]
+    tool_messages = [m for m in bodies[1]["messages"] if m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tool_messages] == ["call_0", "call_1", "call_2", "call_3"]
+
+
+def test_playwright_session_reuses_warm_browser_from_pool():
+    """Inside a publish runtime, uploader launches borrow a pooled browser and close() only drops contexts"""
+    import asyncio
+    from myUtils.playwright_session import playwright_session, use_browser_pool
+    from playwright_worker.browser_pool import BrowserPool
+
+    launches = []
+    closed_contexts = []
+
+    class FakeContext:
+        async def close(self):
+            closed_contexts.append(self)
+
+    class FakeBrowser:
+        closed = False
+
+        def is_connected(self):
+            return not self.closed
+
+        async def new_context(self, **kwargs):
+            return FakeContext()
+
+        async def close(self):
+            self.closed = True
+
+    class FakeEngine:
+        def __init__(self, name):
+            self.name = name
+
+        async def launch(self, **opts):
+            launches.append((self.name, opts))
+            return FakeBrowser()
+
+    class FakePlaywright:
+        chromium = FakeEngine("chromium")
+        firefox = FakeEngine("firefox")
+
+        async def stop(self):
+            pass
+
+    pool = BrowserPool(max_browser_memory_mb=0)
+    pool._playwright = FakePlaywright()
+
+    async def publish(engine):
+        async with playwright_session() as playwright:
+            browser = await getattr(playwright, engine).launch(headless=True)
+            await browser.new_context(storage_state="cookie.json")
+            await browser.close()
+            return browser
+
+    async def run():
+        with use_browser_pool(pool):
+            first = await publish("firefox")
+            second = await publish("firefox")
+            await publish("chromium")
+        assert not first._entry.browser.closed
+        assert first._entry is second._entry
+        stats = pool.stats()
+        await pool.close()
+        return stats
+
+    stats = asyncio.run(run())
+    assert launches == [("firefox", {"headless": True}), ("chromium", {"headless": True})]
+    assert len(closed_contexts) == 3
+    assert stats["contexts_created"] == 3 and stats["hits"] == 1 and stats["active_contexts"] == 0
+
+
+
+def test_browser_pool_starts_one_driver_and_recycles_browsers(monkeypatch):
+    """Concurrent cold misses share one Playwright driver; leases queue, recycle and evict idle browsers"""
+    import asyncio
+    import sys
+    import types
+    from playwright_worker.browser_pool import BrowserPool
+
+    drivers = []
+    browsers = []
+
+    class FakeBrowser:
+        def __init__(self):
+            self.closed = False
+            browsers.append(self)
+
+        def is_connected(self):
+            return not self.closed
+
+        async def close(self):
+            self.closed = True
+
+    class FakeEngine:
+        async def launch(self, **opts):
+            await asyncio.sleep(0.01)
+            return FakeBrowser()
+
+    class FakePlaywright:
+        chromium = FakeEngine()
+
+        async def stop(self):
+            pass
+
+    class FakeStarter:
+        async def start(self):
+            await asyncio.sleep(0.01)
+            drivers.append(FakePlaywright())
+            return drivers[-1]
+
+    fake_api = types.ModuleType("playwright.async_api")
+    fake_api.async_playwright = FakeStarter
+    monkeypatch.setitem(sys.modules, "playwright", types.ModuleType("playwright"))
+    monkeypatch.setitem(sys.modules, "playwright.async_api", fake_api)
+
+    pool = BrowserPool(
+        max_browsers_per_key=2, max_contexts_per_browser=3, max_concurrent_contexts=1,
+        max_browser_memory_mb=0, idle_timeout=60,
+    )
+    opts_a, opts_b = {"headless": True}, {"headless": False}
+
+    async def use(opts, hold=0.02):
+        async with pool.lease(opts) as entry:
+            pool.note_context(entry)
+            await asyncio.sleep(hold)
+            return entry
+
+    async def run():
+        # 同组最多 2 个浏览器、每个 1 个并发 context：第 3 个借用排队等待
+        await asyncio.gather(use(opts_a), use(opts_a), use(opts_a))
+        concurrent = pool.stats()
+
+        # 服务满 3 个 context 的浏览器在归还时关闭，下一次借用重新启动
+        served = [await use(opts_b, hold=0) for _ in range(4)]
+        recycled = pool.stats()
+
+        # 空闲浏览器被淘汰，但每组保留一个热浏览器
+        for entry in [b for group in pool._browsers.values() for b in group]:
+            entry.last_used_at -= 120
+        evicted = await pool.evict_idle()
+        remaining = pool.stats()["browsers"]
+        await pool.close()
+        return concurrent, served, recycled, evicted, remaining
+
+    concurrent, served, recycled, evicted, remaining = asyncio.run(run())
+    assert len(drivers) == 1
+    assert concurrent["launches"] == 2 and concurrent["waits"] == 1 and concurrent["hits"] == 1
+    assert served[0] is served[2] and served[3] is not served[0]
+    assert served[0].browser.closed and recycled["recycled_max_contexts"] == 1
+    assert evicted == 1 and remaining == 2
+    assert all(b.closed for b in browsers)
+
+
+def test_ip_pool_store_counts_atomically_and_checks_concurrently(tmp_path, monkeypatch):
+    """Two service instances share one SQLite store; probes run concurrently and feed selection"""
+    import asyncio
+    from fastapi_app.models.ip_pool import AddIPRequest, IPStatus
+    from fastapi_app.services.ip_pool_service import IPPoolService
+
+    db_path = tmp_path / "ip_pool.db"
+    api_side = IPPoolService(db_path=db_path)
+    worker_side = IPPoolService(db_path=db_path)
+
+    fast = api_side.add_ip(AddIPRequest(ip="10.0.0.1", port=8000, max_bindings=1, region="gd"))
+    slow = api_side.add_ip(AddIPRequest(ip="10.0.0.2", port=8000, max_bindings=5))
+
+    for _ in range(3):
+        api_side.record_usage(fast.id, True)
+        worker_side.record_usage(fast.id, False)
+    stored = worker_side.get_ip(fast.id)
+    assert (stored.total_used, stored.success_count, stored.fail_count) == (6, 3, 3)
+
+    in_flight = []
+    peak = []
+
+    async def fake_probe(ip, timeout=8.0):
+        in_flight.append(ip.id)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.05)
+        in_flight.remove(ip.id)
+        return (True, 50.0) if ip.id == fast.id else (False, None)
+
+    monkeypatch.setattr(api_side, "probe_ip", fake_probe)
+    results = asyncio.run(api_side.batch_check_health())
+    assert results == {fast.id: True, slow.id: False}
+    assert max(peak) == 2
+    assert worker_side.get_ip(fast.id).latency_ms == 50.0
+    assert worker_side.get_ip(slow.id).status == IPStatus.FAILED
+
+    # slow 已失效，只能分配到 fast；fast 只有 1 个名额
+    assert worker_side.auto_bind_account("acc_1").id == fast.id
+    assert api_side.get_ip_for_account("acc_1").id == fast.id
+    assert api_side.auto_bind_account("acc_2") is None
+    stats = api_side.get_statistics()
+    assert (stats.total, stats.available, stats.failed, stats.total_bindings) == (2, 1, 1, 1)
+
+
+def test_ip_pool_legacy_json_migrates_once_without_touching_source(tmp_path):
+    """The legacy JSON is imported once into an empty store and left in place"""
+    import json
+    from fastapi_app.models.ip_pool import ProxyIP
+    from fastapi_app.services.ip_pool_service import IPPoolService
+
+    legacy = tmp_path / "ip_pool.json"
+    legacy.write_text(json.dumps([ProxyIP(ip="10.0.0.9", port=8000).model_dump(mode="json")]), encoding="utf-8")
+    db_path = tmp_path / "ip_pool.db"
+
+    # 显式传入存储路径时不迁移
+    assert IPPoolService(db_path=db_path).get_statistics().total == 0
+    assert IPPoolService(db_path=tmp_path / "other.db", legacy_json=legacy).get_statistics().total == 1
+    service = IPPoolService(db_path=tmp_path / "other.db", legacy_json=legacy)
+    service.delete_ip(service.list_ips()[0].id)
+    # 迁移只做一次：清空后再次构建也不会重新导入
+    assert IPPoolService(db_path=tmp_path / "other.db", legacy_json=legacy).get_statistics().total == 0
+    assert legacy.exists()
+
+
+def test_delayed_scheduler_dispatches_at_due_time_and_survives_restart(tmp_path):
+    """Delayed jobs persist, fire once when due, and support cancel / reschedule"""
+    import time
+    from fastapi_app.tasks.delayed_scheduler import DelayedScheduler, SQLiteDelayedStore
+
+    sent = []
+    db_path = tmp_path / "delayed_jobs.db"
+    scheduler = DelayedScheduler(SQLiteDelayedStore(db_path), dispatch=lambda *job: sent.append(job))
+    now = time.time()
+    scheduler.schedule("t1", now - 1, "publish.single", {"task_data": {"n": 1}}, priority=5)
+    scheduler.schedule("t2", now + 3600, "publish.single", {"task_data": {"n": 2}})
+    scheduler.schedule("t3", now + 3600, "publish.single", {"task_data": {"n": 3}})
+    assert scheduler.cancel("t3") is True
+    assert scheduler.cancel("t3") is False
+
+    assert scheduler.run_due() == 1
+    assert sent == [("t1", "publish.single", {"task_data": {"n": 1}}, 5)]
+    assert scheduler.run_due() == 0
+    scheduler.store.close()
+
+    # 重启后任务仍在；改期到过去立即投递
+    restarted = DelayedScheduler(SQLiteDelayedStore(db_path), dispatch=lambda *job: sent.append(job))
+    assert restarted.stats()["due"] == 1
+    assert restarted.get("t2")["kwargs"] == {"task_data": {"n": 2}}
+    assert restarted.reschedule("t2", now - 1) is True
+
+    restarted.start()
+    try:
+        deadline = time.time() + 5
+        while len(sent) < 2 and time.time() < deadline:
+            time.sleep(0.02)
+    finally:
+        restarted.stop()
+    assert [job[0] for job in sent] == ["t1", "t2"]
+    assert SQLiteDelayedStore(db_path).counts() == {"due": 0, "inflight": 0}
+
+
+class _FakeStreamRedis:
+    """Minimal Redis stream (XADD / XRANGE / XREVRANGE / blocking XREAD) for event tests"""
+
+    def __init__(self):
+        import threading
+
+        self.entries = []
+        self.seq = 0
+        self.cond = threading.Condition()
+
+    def xadd(self, name, fields, maxlen=None, approximate=True):
+        with self.cond:
+            self.seq += 1
+            stream_id = f"{1000 + self.seq}-0"
+            self.entries.append((stream_id, dict(fields)))
+            if maxlen is not None:
+                del self.entries[:-maxlen]
+            self.cond.notify_all()
+            return stream_id
+
+    @staticmethod
+    def _key(stream_id):
+        ms, _, seq = stream_id.partition("-")
+        return int(ms), int(seq or 0)
+
+    def xrange(self, name, min="-", max="+", count=None):
+        with self.cond:
+            found = [e for e in self.entries if min == "-" or self._key(e[0]) >= self._key(min)]
+        return found[:count] if count else found
+
+    def xrevrange(self, name, max="+", min="-", count=None):
+        with self.cond:
+            found = list(reversed(self.entries))
+        return found[:count] if count else found
+
+    def xread(self, streams, count=None, block=None):
+        (name, last_id), = streams.items()
+        with self.cond:
+            def newer():
+                return [e for e in self.entries if self._key(e[0]) > self._key(last_id)]
+            self.cond.wait_for(newer, timeout=(block or 0) / 1000)
+            found = newer()[:count]
+        return [(name, found)] if found else []
+
+
+def test_scheduled_time_with_offset_compares_as_beijing_naive():
+    """Client schedule times carrying an offset or Z convert to naive Beijing time for due checks"""
+    from datetime import datetime, timedelta
+    from fastapi_app.core.timezone_utils import now_beijing_naive, to_beijing_naive
+
+    assert to_beijing_naive(datetime.fromisoformat("2025-01-15T02:30:00+00:00")) == datetime(2025, 1, 15, 10, 30)
+    assert to_beijing_naive(datetime(2025, 1, 15, 10, 30)) == datetime(2025, 1, 15, 10, 30)
+    soon = datetime.now().astimezone() + timedelta(minutes=5)
+    run_at = to_beijing_naive(datetime.fromisoformat(soon.isoformat()))
+    assert run_at > now_beijing_naive()
+    assert run_at - now_beijing_naive() < timedelta(minutes=6)
+
+
+def test_task_event_stream_resumes_from_last_event_id_and_filters():
+    """Clients resume after their Last-Event-ID and only see events they subscribed to"""
+    import asyncio
+    from fastapi_app.tasks.task_events import (
+        TASK_EVENTS_STREAM,
+        EventFilter,
+        TaskEventHub,
+        event_fields,
+        format_sse,
+        iter_task_events,
+    )
+
+    redis = _FakeStreamRedis()
+
+    def publish(task_id, status, parent="batch-1"):
+        state = {"task_id": task_id, "task_type": "publish", "parent_task_id": parent, "status": status}
+        return redis.xadd(TASK_EVENTS_STREAM, event_fields(state, "updated"))
+
+    first = publish("t1", "pending")
+    publish("t2", "pending")
+    publish("other", "pending", parent="batch-2")
+    publish("t1", "running")
+
+    async def run():
+        hub = TaskEventHub(redis, block_ms=50)
+        events = iter_task_events(hub, EventFilter(parent_task_id="batch-1"), last_event_id=first, heartbeat=0.2)
+        received = []
+        async for message in events:
+            if message["type"] == "task":
+                received.append((message["task_id"], message["status"]))
+                if len(received) == 2:
+                    # 补历史完成后的实时事件
+                    await asyncio.to_thread(publish, "t2", "success")
+                    await asyncio.to_thread(publish, "other", "success", "batch-2")
+                if len(received) == 3:
+                    break
+        await events.aclose()
+        return received, hub.subscriber_count(), message
+
+    received, subscribers, last = asyncio.run(run())
+    assert received == [("t2", "pending"), ("t1", "running"), ("t2", "success")]
+    assert subscribers == 0
+    assert format_sse(last).startswith(f"id: {last['id']}\nevent: task\n")
+
+
+def test_fast_cookie_validator_isolates_accounts_across_redirects():
+    """Pooled clients keep no cookie jar: a Set-Cookie seen for one account never reaches another"""
+    import asyncio
+    import httpx
+    from myUtils import fast_cookie_validator as fcv
+
+    seen = []
+
+    def handler(request):
+        cookie = request.headers.get("cookie", "")
+        seen.append((request.url.host, request.url.path, cookie))
+        if request.url.path == "/x/web-interface/nav":
+            headers = {"location": "https://www.bilibili.com/nav/check"}
+            if "SESSDATA=alive" in cookie:
+                headers["set-cookie"] = "SESSDATA=alive; Domain=.bilibili.com; Path=/"
+            return httpx.Response(302, headers=headers)
+        logged_in = "SESSDATA=alive" in cookie
+        data = {"isLogin": logged_in, "mid": cookie.split("DedeUserID=")[-1] if logged_in else None}
+        return httpx.Response(200, json={"code": 0, "data": data})
+
+    accounts = [
+        {"platform": "bilibili", "cookie_data": "SESSDATA=alive; DedeUserID=1001"},
+        {"platform": "bilibili", "cookie_data": "SESSDATA=expired; DedeUserID=1002"},
+        {"platform": "unknown", "cookie_data": "a=b"},
+    ]
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        client = fcv._new_client(transport=httpx.MockTransport(handler))
+        fcv._client_pool._clients[(id(loop), "bilibili")] = fcv._PooledClient(loop, client, asyncio.Semaphore(4))
+        validator = fcv.FastCookieValidator()
+        try:
+            first = await validator.validate_cookie_fast("bilibili", cookie_data=accounts[0]["cookie_data"])
+            second = await validator.validate_cookie_fast("bilibili", cookie_data=accounts[1]["cookie_data"])
+            batch = [item async for item in validator.validate_many(accounts, concurrency=2)]
+        finally:
+            await fcv._client_pool.aclose()
+        return first, second, batch
+
+    first, second, batch = asyncio.run(run())
+    assert first["status"] == "valid" and first["user_id"] == "1001"
+    assert second["status"] == "expired"
+    # 重定向后的请求只带本账号的 Cookie
+    for host, path, cookie in seen:
+        if path == "/nav/check":
+            assert cookie.count("SESSDATA=") == 1
+
+    results = {account["cookie_data"]: result for account, result in batch}
+    assert len(batch) == 3
+    assert results[accounts[0]["cookie_data"]]["status"] == "valid"
+    assert results[accounts[1]["cookie_data"]]["status"] == "expired"
+    assert results["a=b"]["status"] == "error"
+
+
+def test_fast_cookie_sign_cache_reuses_and_expires(monkeypatch):
+    """X-Bogus signatures are cached per (query, ua) and dropped after the TTL"""
+    import asyncio
+    import time
+    from myUtils import fast_cookie_validator as fcv
+
+    monkeypatch.delenv("DOUYIN_SIGNER_URL", raising=False)
+    monkeypatch.delenv("DOUYIN_SIGN_URL", raising=False)
+    cache = fcv._TTLCache(30, maxsize=2)
+    monkeypatch.setattr(fcv, "_sign_cache", cache)
+    calls = []
+    monkeypatch.setattr(fcv, "_xbogus_encode", lambda query, *_: calls.append(query) or f"xb-{len(calls)}")
+
+    async def sign(params):
+        return await fcv._sign_douyin("https://www.douyin.com/aweme/v1/web/user/info/", params, "ua")
+
+    first = asyncio.run(sign({"aid": 6383}))
+    again = asyncio.run(sign({"aid": 6383}))
+    other = asyncio.run(sign({"aid": 1128}))
+    assert first["x_bogus"] == again["x_bogus"] == "xb-1"
+    assert other["x_bogus"] == "xb-2"
+    assert fcv.sign_cache_stats() == {"hits": 1, "misses": 2, "size": 2}
+
+    cache.set("third", "v")
+    assert len(cache._data) == 2
+    now = time.monotonic()
+    monkeypatch.setattr(fcv.time, "monotonic", lambda: now + 31)
+    assert cache.get("third") is None
+    assert asyncio.run(sign({"aid": 6383}))["x_bogus"] == "xb-3"
+
+
+def test_douyin_token_pool_never_pools_false_tokens(monkeypatch):
+    """Failed msToken fetches stay out of the pool; generated tokens only when the pool is empty"""
+    import asyncio
+    from pathlib import Path
+
+    pytest.importorskip("qrcode")
+    monkeypatch.syspath_prepend(str(Path(__file__).resolve().parents[2] / "douyin_tiktok_api"))
+    from crawlers.douyin.web import utils
+
+    upstream = {"up": False, "served": 0}
+
+    async def fetch(client=None):
+        if not upstream["up"]:
+            raise utils.APIConnectionError("msToken endpoint down")
+        upstream["served"] += 1
+        return f"real-{upstream['served']}".ljust(128, "x")
+
+    monkeypatch.setattr(utils.TokenManager, "afetch_real_msToken", staticmethod(fetch))
+    pool = utils.TokenPool(size=2, ttl={"msToken": 100, "verify_fp": 100}, refresh_margin=10)
+
+    # 上游故障：不入池，get() 只在池空时给出本地生成的令牌
+    asyncio.run(pool.refill(None))
+    assert pool.stats()["available"] == {"msToken": 0, "verify_fp": 2}
+    assert pool.stats()["fetch_errors"] == 2
+    assert len(pool.get("msToken")) == 128
+    assert pool.stats()["fallbacks"] == 1
+    assert asyncio.run(utils.TokenManager.agen_real_msToken()) != ""
+
+    upstream["up"] = True
+    asyncio.run(pool.refill(None))
+    handed = {pool.get("msToken") for _ in range(4)}
+    assert handed == {"real-1".ljust(128, "x"), "real-2".ljust(128, "x")}
+    assert pool.stats()["hits"] == 4
+
+    # 接近过期的令牌触发补充，过期后只剩新令牌
+    now = utils.time.monotonic()
+    monkeypatch.setattr(utils.time, "monotonic", lambda: now + 95)
+    asyncio.run(pool.refill(None))
+    assert upstream["served"] == 4
+    assert pool.stats()["available"]["msToken"] == 4
+    monkeypatch.setattr(utils.time, "monotonic", lambda: now + 101)
+    assert {pool.get("msToken")[:6] for _ in range(4)} == {"real-3", "real-4"}
+
+
+def test_task_scheduler_wait_is_floored_and_capped(tmp_path):
+    """A due row that is not executed never makes the scheduler spin; idle waits keep the 30s cap"""
+    import sqlite3
+    from datetime import datetime, timedelta
+    from myUtils.task_scheduler import TaskScheduler
+
+    db_path = tmp_path / "database.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE publish_tasks (task_id INTEGER PRIMARY KEY, status TEXT, publish_mode TEXT, schedule_time TEXT)"
+        )
+    scheduler = TaskScheduler(db_path=str(db_path))
+    assert scheduler.seconds_until_next_task() == TaskScheduler.IDLE_SECONDS == 30
+
+    soon = (datetime.now() + timedelta(seconds=10)).strftime("%Y-%m-%dT%H:%M:%S")
+    overdue = (datetime.now() - timedelta(minutes=5)).strftime("%Y-%m-%dT%H:%M:%S")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO publish_tasks VALUES (1, 'pending', 'auto', ?)", (soon,))
+    assert 8 < scheduler.seconds_until_next_task() <= 10
+
+    executed = []
+    scheduler.execute_task = lambda task: executed.append(task["task_id"])
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO publish_tasks VALUES (2, 'pending', 'auto', ?)", (overdue,))
+    scheduler.check_and_execute_tasks()
+    # ISO 格式的到期时间同样会被执行；执行失败仍为 pending 时至少等待 1 秒
+    assert executed == [2]
+    assert scheduler.seconds_until_next_task() == TaskScheduler.MIN_WAIT_SECONDS
+
+
+def test_crawler_registry_sweeps_idle_clients_in_background(monkeypatch):
+    """Idle shared crawler clients are closed by the per-loop sweeper even without further misses"""
+    import asyncio
+    from pathlib import Path
+
+    pytest.importorskip("rich")
+    monkeypatch.syspath_prepend(str(Path(__file__).resolve().parents[2] / "douyin_tiktok_api"))
+    from crawlers.client_registry import CrawlerClientRegistry
+
+    registry = CrawlerClientRegistry(idle_timeout=60, max_clients=8)
+    registry.sweep_interval = 0.02
+
+    async def run():
+        idle = registry.get(crawler_headers={"User-Agent": "a"})
+        busy = registry.get(crawler_headers={"User-Agent": "b"})
+        assert registry.get(crawler_headers={"User-Agent": "a"}) is idle
+        async with busy:
+            idle.last_used -= 120
+            busy.last_used -= 120
+            await asyncio.sleep(0.1)
+            # 借用中的客户端不会被回收
+            assert idle.aclient.is_closed and not busy.aclient.is_closed
+            assert registry.stats()["clients"] == 1
+        busy.last_used -= 120
+        await asyncio.sleep(0.1)
+        assert busy.aclient.is_closed
+        # 没有共享实例后后台任务自行退出
+        assert not registry._sweepers
+        return registry.stats()
+
+    stats = asyncio.run(run())
+    assert stats["evicted_idle"] == 2 and stats["clients"] == 0
+
+
+def test_matrix_scheduler_state_survives_store_reload(tmp_path, monkeypatch):
+    """Upserted state transitions persist; a reload keeps only active tasks in memory, in queue order"""
+    from fastapi_app.models.matrix_task import TaskStatus
+    from fastapi_app.services.matrix_scheduler import MatrixScheduler
+
+    # 避免迁移工作目录下的旧 data/matrix_tasks.json
+    monkeypatch.chdir(tmp_path)
+    db_path = tmp_path / "matrix_tasks.db"
+    scheduler = MatrixScheduler(db_path=db_path)
+    tasks = scheduler.generate_tasks(["douyin"], {"douyin": ["a1", "a2"]}, [f"m{i}" for i in range(6)])
+    assert len(tasks) == 6
+
+    done, flaky, crashed = scheduler.pop_next_tasks(3)
+    scheduler.report_result(done.task_id, "success")
+    scheduler.report_result(flaky.task_id, "fail", message="timeout")
+    waiting = [t.task_id for t in scheduler.pending_queue]
+    assert done.task_id not in scheduler.task_index
+    scheduler.store.close()
+
+    # 连续重启两次，恢复结果一致
+    for _ in range(2):
+        reloaded = MatrixScheduler(db_path=db_path)
+        # 已完成的任务只在存储中
+        assert done.task_id not in reloaded.task_index
+        assert reloaded.get_task_by_id(done.task_id).status == TaskStatus.FINISHED
+        assert set(reloaded.task_index) == {flaky.task_id, crashed.task_id, *waiting}
+        # 重启时运行中的任务转入重试，保留原入队顺序
+        assert [t.task_id for t in reloaded.retry_queue] == [crashed.task_id, flaky.task_id]
+        assert reloaded.task_index[flaky.task_id].error_message == "timeout"
+        assert reloaded.task_index[crashed.task_id].retry_count == 1
+        assert [t.task_id for t in reloaded.pending_queue] == waiting
+        assert reloaded.get_statistics() == {
+            "pending": 3, "retry": 2, "running": 0, "finished": 1, "failed": 0, "total": 6,
+        }
+        reloaded.store.close()
@@ -4,7 +4,7 @@ Analytics database schema and helper functions
 import sqlite3
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Iterable, Iterator, List, Dict, Optional
 import json
 
 try:
@@ -65,6 +65,238 @@ def ensure_analytics_schema(db_path: Path):
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_analytics_history_video_id ON analytics_history(video_analytics_id)")
         
         conn.commit()
+        ensure_video_analytics_unique_key(conn)
+        ensure_analytics_rollup(conn)
+
+
+VIDEO_ANALYTICS_UNIQUE_INDEX = "uq_video_analytics_platform_video"
+_unique_key_ready: Dict[str, bool] = {}
+
+
+def _db_key(conn: sqlite3.Connection) -> str:
+    try:
+        row = conn.execute("PRAGMA database_list").fetchone()
+        return str(row[2]) if row else ""
+    except Exception:
+        return ""
+
+
+def ensure_video_analytics_unique_key(conn: sqlite3.Connection) -> bool:
+    """
+    Back (platform, video_id) with a real UNIQUE index so writers can use
+    INSERT ... ON CONFLICT. Existing duplicates are collapsed first: the most
+    recently updated row is kept and analytics_history is re-pointed to it.
+    Returns False if the index could not be created.
+    """
+    key = _db_key(conn)
+    if _unique_key_ready.get(key):
+        return True
+    try:
+        cursor = conn.cursor()
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?",
+            (VIDEO_ANALYTICS_UNIQUE_INDEX,),
+        ).fetchone()
+        if not exists:
+            cols = {row[1] for row in cursor.execute("PRAGMA table_info(video_analytics)")}
+            order = "last_updated DESC, id DESC" if "last_updated" in cols else "id DESC"
+            dupes = cursor.execute(f"""
+                SELECT id, keep_id FROM (
+                    SELECT id,
+                           FIRST_VALUE(id) OVER (PARTITION BY platform, video_id ORDER BY {order}) AS keep_id
+                    FROM video_analytics
+                    WHERE video_id IS NOT NULL
+                ) WHERE id != keep_id
+            """).fetchall()
+            if dupes:
+                has_history = cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'analytics_history'"
+                ).fetchone()
+                if has_history:
+                    cursor.executemany(
+                        "UPDATE analytics_history SET video_analytics_id = ? WHERE video_analytics_id = ?",
+                        [(keep_id, dup_id) for dup_id, keep_id in dupes],
+                    )
+                cursor.executemany("DELETE FROM video_analytics WHERE id = ?", [(dup_id,) for dup_id, _ in dupes])
+                print(f"[Analytics] Collapsed {len(dupes)} duplicate video_analytics rows")
+            cursor.execute(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {VIDEO_ANALYTICS_UNIQUE_INDEX} "
+                "ON video_analytics(platform, video_id)"
+            )
+            conn.commit()
+        _unique_key_ready[key] = True
+        return True
+    except sqlite3.Error as e:
+        print(f"[Analytics] Unique key on video_analytics(platform, video_id) unavailable: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        return False
+
+
+ANALYTICS_ROLLUP_TABLE = "analytics_daily_rollup"
+_ROLLUP_METRICS = ("play_count", "like_count", "comment_count", "collect_count", "share_count")
+# Bump when the bucketing changes; stale triggers are replaced and the rollup rebuilt.
+_ROLLUP_VERSION = 2
+_ROLLUP_TRIGGERS = tuple(
+    f"trg_video_analytics_rollup_{op}_v{_ROLLUP_VERSION}" for op in ("insert", "delete", "update")
+)
+_rollup_ready: Dict[str, bool] = {}
+
+
+def _rollup_day_sql(value: str) -> str:
+    """
+    publish_date normalised to a YYYY-MM-DD day. Collectors store what the platform
+    returns: a date, an ISO / space-separated datetime, or epoch seconds / milliseconds
+    (Douyin create_time). Unrecognised text is kept as-is.
+    """
+    return f"""(CASE
+            WHEN {value} IS NULL OR TRIM({value}) = '' THEN NULL
+            WHEN typeof({value}) IN ('integer', 'real') OR TRIM({value}) NOT GLOB '*[^0-9]*' THEN date(
+                CASE WHEN CAST({value} AS INTEGER) >= 100000000000
+                     THEN CAST({value} AS INTEGER) / 1000 ELSE CAST({value} AS INTEGER) END,
+                'unixepoch', 'localtime')
+            WHEN TRIM({value}) GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' THEN substr(TRIM({value}), 1, 10)
+            ELSE {value}
+        END)"""
+
+
+def _rollup_apply_sql(row: str, sign: int) -> str:
+    """Add (sign=1) or remove (sign=-1) one video_analytics row from its rollup bucket."""
+    metrics = ", ".join(_ROLLUP_METRICS)
+    values = ", ".join(f"{sign} * COALESCE({row}.{m}, 0)" for m in _ROLLUP_METRICS)
+    updates = ", ".join(f"{m} = {m} + excluded.{m}" for m in ("video_count", "play_samples") + _ROLLUP_METRICS)
+    day = _rollup_day_sql(f"{row}.publish_date")
+    return f"""
+        INSERT INTO {ANALYTICS_ROLLUP_TABLE} (
+            platform, account_key, day_key, account_id, publish_date, video_count, play_samples, {metrics}
+        ) VALUES (
+            {row}.platform, COALESCE({row}.account_id, ''), COALESCE({day}, ''),
+            {row}.account_id, {day}, {sign}, {sign} * ({row}.play_count IS NOT NULL), {values}
+        )
+        ON CONFLICT(platform, account_key, day_key) DO UPDATE SET {updates};
+    """
+
+
+def _rollup_prune_sql(row: str) -> str:
+    return f"""
+        DELETE FROM {ANALYTICS_ROLLUP_TABLE}
+        WHERE platform = {row}.platform
+          AND account_key = COALESCE({row}.account_id, '')
+          AND day_key = COALESCE({_rollup_day_sql(f"{row}.publish_date")}, '')
+          AND video_count <= 0;
+    """
+
+
+def _create_rollup(cursor: sqlite3.Cursor) -> None:
+    metrics = ",\n".join(f"                {m} INTEGER NOT NULL DEFAULT 0" for m in _ROLLUP_METRICS)
+    # account_id keeps the source column type so filters compare the same way; publish_date is
+    # the normalised day. account_key / day_key are their NULL-safe forms for the primary key.
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ANALYTICS_ROLLUP_TABLE} (
+            platform VARCHAR(20) NOT NULL,
+            account_key TEXT NOT NULL,
+            day_key TEXT NOT NULL,
+            account_id INTEGER,
+            publish_date DATE,
+            video_count INTEGER NOT NULL DEFAULT 0,
+            play_samples INTEGER NOT NULL DEFAULT 0,
+{metrics},
+            PRIMARY KEY (platform, account_key, day_key)
+        )
+    """)
+    cursor.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{ANALYTICS_ROLLUP_TABLE}_date ON {ANALYTICS_ROLLUP_TABLE}(publish_date)"
+    )
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {_ROLLUP_TRIGGERS[0]}
+        AFTER INSERT ON video_analytics
+        BEGIN
+            {_rollup_apply_sql("NEW", 1)}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {_ROLLUP_TRIGGERS[1]}
+        AFTER DELETE ON video_analytics
+        BEGIN
+            {_rollup_apply_sql("OLD", -1)}
+            {_rollup_prune_sql("OLD")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {_ROLLUP_TRIGGERS[2]}
+        AFTER UPDATE OF platform, account_id, publish_date, {", ".join(_ROLLUP_METRICS)} ON video_analytics
+        BEGIN
+            {_rollup_apply_sql("OLD", -1)}
+            {_rollup_apply_sql("NEW", 1)}
+            {_rollup_prune_sql("OLD")}
+        END
+    """)
+
+
+def _backfill_rollup(cursor: sqlite3.Cursor) -> None:
+    metrics = ", ".join(_ROLLUP_METRICS)
+    sums = ", ".join(f"COALESCE(SUM({m}), 0)" for m in _ROLLUP_METRICS)
+    cursor.execute(f"DELETE FROM {ANALYTICS_ROLLUP_TABLE}")
+    cursor.execute(f"""
+        INSERT INTO {ANALYTICS_ROLLUP_TABLE} (
+            platform, account_key, day_key, account_id, publish_date, video_count, play_samples, {metrics}
+        )
+        SELECT platform, COALESCE(account_id, ''), COALESCE(day, ''), account_id, day,
+               COUNT(*), COUNT(play_count), {sums}
+        FROM (
+            SELECT *, {_rollup_day_sql("publish_date")} AS day FROM video_analytics
+        )
+        GROUP BY platform, COALESCE(account_id, ''), COALESCE(day, '')
+    """)
+
+
+def ensure_analytics_rollup(conn: sqlite3.Connection) -> bool:
+    """
+    Maintain a per-(platform, account, publish day) rollup of video_analytics.
+    Triggers keep it in step with every write path (bulk / keyed upserts, legacy
+    insert / update, duplicate cleanup); it is backfilled in the same transaction
+    that creates it. Returns False if the rollup is unavailable.
+    """
+    key = _db_key(conn)
+    if _rollup_ready.get(key):
+        return True
+    try:
+        cursor = conn.cursor()
+        triggers = {
+            row[0] for row in cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_video_analytics_rollup_%'"
+            )
+        }
+        if triggers != set(_ROLLUP_TRIGGERS):
+            if not conn.in_transaction:
+                cursor.execute("BEGIN IMMEDIATE")
+            for name in triggers - set(_ROLLUP_TRIGGERS):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            _create_rollup(cursor)
+            _backfill_rollup(cursor)
+            conn.commit()
+            print(f"[Analytics] Built {ANALYTICS_ROLLUP_TABLE}")
+        _rollup_ready[key] = True
+        return True
+    except sqlite3.Error as e:
+        print(f"[Analytics] Daily rollup unavailable, falling back to video_analytics scans: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        return False
+
+
+def rebuild_analytics_rollup(db_path: Path) -> None:
+    """Recompute the rollup from video_analytics (repair tool)."""
+    with sqlite3.connect(db_path) as conn:
+        if ensure_analytics_rollup(conn):
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            _backfill_rollup(cursor)
+            conn.commit()
 
 
 def _build_filter_clause(
@@ -120,7 +352,7 @@ def get_analytics_summary(
     platforms: Optional[List[str]] = None,
     account_ids: Optional[List[str]] = None,
 ) -> Dict:
-    """Get analytics summary statistics"""
+    """Get analytics summary statistics (served from the daily rollup)"""
     with sqlite3.connect(db_path) as conn:
         cursor = conn.cursor()
         
@@ -128,17 +360,30 @@ def get_analytics_summary(
             start_date, end_date, platform, platforms, account_ids
         )
         
-        cursor.execute(f"""
-            SELECT 
-                COUNT(*) as total_videos,
-                COALESCE(SUM(play_count), 0) as total_plays,
-                COALESCE(SUM(like_count), 0) as total_likes,
-                COALESCE(SUM(comment_count), 0) as total_comments,
-                COALESCE(SUM(collect_count), 0) as total_collects,
-                COALESCE(AVG(play_count), 0) as avg_play_count
-            FROM video_analytics
-            {where_clause}
-        """, params)
+        if ensure_analytics_rollup(conn):
+            cursor.execute(f"""
+                SELECT
+                    COALESCE(SUM(video_count), 0) as total_videos,
+                    COALESCE(SUM(play_count), 0) as total_plays,
+                    COALESCE(SUM(like_count), 0) as total_likes,
+                    COALESCE(SUM(comment_count), 0) as total_comments,
+                    COALESCE(SUM(collect_count), 0) as total_collects,
+                    COALESCE(SUM(play_count) * 1.0 / NULLIF(SUM(play_samples), 0), 0) as avg_play_count
+                FROM {ANALYTICS_ROLLUP_TABLE}
+                {where_clause}
+            """, params)
+        else:
+            cursor.execute(f"""
+                SELECT 
+                    COUNT(*) as total_videos,
+                    COALESCE(SUM(play_count), 0) as total_plays,
+                    COALESCE(SUM(like_count), 0) as total_likes,
+                    COALESCE(SUM(comment_count), 0) as total_comments,
+                    COALESCE(SUM(collect_count), 0) as total_collects,
+                    COALESCE(AVG(play_count), 0) as avg_play_count
+                FROM video_analytics
+                {where_clause}
+            """, params)
         
         row = cursor.fetchone()
         
@@ -196,6 +441,47 @@ def get_analytics_videos(
         return [dict(row) for row in cursor.fetchall()]
 
 
+EXPORT_COLUMNS = (
+    "id", "video_id", "title", "platform", "video_url", "publish_date",
+    "play_count", "like_count", "comment_count", "collect_count", "last_updated",
+)
+
+
+def iter_video_analytics_export(
+    db_path: Path,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    platforms: Optional[List[str]] = None,
+    account_ids: Optional[List[str]] = None,
+    batch_size: int = 1000,
+) -> Iterator[tuple]:
+    """
+    Yield EXPORT_COLUMNS tuples for every matching row, fetched from one cursor
+    in batches so memory stays flat regardless of result size.
+    The connection may be advanced from different worker threads (Starlette
+    iterates sync generators in a threadpool) but never concurrently.
+    """
+    where_clause, params = _build_filter_clause(start_date, end_date, None, platforms, account_ids)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    try:
+        cursor = conn.execute(f"""
+            SELECT
+                id, video_id, title, platform, COALESCE(video_url, ''), publish_date,
+                COALESCE(play_count, 0), COALESCE(like_count, 0), COALESCE(comment_count, 0),
+                COALESCE(collect_count, 0), last_updated
+            FROM video_analytics
+            {where_clause}
+            ORDER BY publish_date DESC
+        """, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+
 def get_chart_data(
     db_path: Path,
     start_date: Optional[str] = None,
@@ -204,7 +490,7 @@ def get_chart_data(
     platforms: Optional[List[str]] = None,
     account_ids: Optional[List[str]] = None,
 ) -> List[Dict]:
-    """Get chart data for trend visualization"""
+    """Get chart data for trend visualization (served from the daily rollup)"""
     with sqlite3.connect(db_path) as conn:
         cursor = conn.cursor()
 
@@ -214,6 +500,8 @@ def get_chart_data(
             start_date, end_date, None, platforms, account_ids
         )
         
+        # One row per (platform, account, day) instead of one per video
+        source = ANALYTICS_ROLLUP_TABLE if ensure_analytics_rollup(conn) else "video_analytics"
         cursor.execute(f"""
             SELECT 
                 publish_date as date,
@@ -221,7 +509,7 @@ def get_chart_data(
                 SUM(like_count) as likeCount,
                 SUM(comment_count) as commentCount,
                 SUM(collect_count) as collectCount
-            FROM video_analytics
+            FROM {source}
             {where_clause}
             GROUP BY publish_date
             ORDER BY publish_date ASC
@@ -294,6 +582,132 @@ def update_video_analytics(db_path: Path, video_id: int, data: Dict):
         ))
 
 
+_BULK_UPSERT_SQL = """
+    INSERT INTO video_analytics (
+        task_id, account_id, platform, video_id, video_url,
+        title, thumbnail, publish_date, play_count, like_count,
+        comment_count, collect_count, share_count, match_confidence, raw_data,
+        last_updated
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(platform, video_id) DO UPDATE SET
+        task_id = COALESCE(excluded.task_id, video_analytics.task_id),
+        account_id = COALESCE(excluded.account_id, video_analytics.account_id),
+        video_url = COALESCE(excluded.video_url, video_analytics.video_url),
+        title = COALESCE(excluded.title, video_analytics.title),
+        thumbnail = COALESCE(excluded.thumbnail, video_analytics.thumbnail),
+        publish_date = COALESCE(excluded.publish_date, video_analytics.publish_date),
+        play_count = excluded.play_count,
+        like_count = excluded.like_count,
+        comment_count = excluded.comment_count,
+        collect_count = excluded.collect_count,
+        share_count = excluded.share_count,
+        match_confidence = COALESCE(excluded.match_confidence, video_analytics.match_confidence),
+        raw_data = excluded.raw_data,
+        last_updated = CURRENT_TIMESTAMP
+"""
+
+
+def _upsert_params(platform: str, video_id: str, data: Dict) -> tuple:
+    return (
+        data.get("task_id"),
+        data.get("account_id"),
+        platform,
+        video_id,
+        data.get("video_url"),
+        data.get("title"),
+        data.get("thumbnail"),
+        data.get("publish_date"),
+        data.get("play_count", 0),
+        data.get("like_count", 0),
+        data.get("comment_count", 0),
+        data.get("collect_count", 0),
+        data.get("share_count", 0),
+        data.get("match_confidence"),
+        json.dumps(data.get("raw_data", {})),
+    )
+
+
+def upsert_video_analytics_bulk(db_path: Path, records: Iterable[Dict], *, platform: Optional[str] = None) -> int:
+    """
+    Insert or update many video_analytics rows keyed by (platform, video_id)
+    with one executemany in a single transaction.
+    Records without a video_id are skipped. Returns the number of rows written.
+    """
+    params = []
+    for data in records:
+        row_platform = (data.get("platform") or platform or "").lower()
+        video_id = str(data.get("video_id") or "").strip()
+        if not row_platform or not video_id:
+            continue
+        params.append(_upsert_params(row_platform, video_id, data))
+    if not params:
+        return 0
+
+    with sqlite3.connect(db_path) as conn:
+        if ensure_video_analytics_unique_key(conn):
+            conn.executemany(_BULK_UPSERT_SQL, params)
+        else:
+            cursor = conn.cursor()
+            for row in params:
+                _legacy_upsert(cursor, row)
+        conn.commit()
+    return len(params)
+
+
+def _legacy_upsert(cursor: sqlite3.Cursor, row: tuple) -> int:
+    """SELECT-then-UPDATE/INSERT path for databases without the unique key."""
+    platform, video_id = row[2], row[3]
+    cursor.execute(
+        """
+        SELECT id
+        FROM video_analytics
+        WHERE platform = ?
+          AND video_id = ?
+        ORDER BY last_updated DESC
+        LIMIT 1
+        """,
+        (platform, video_id),
+    )
+    existing = cursor.fetchone()
+    if existing:
+        row_id = int(existing[0])
+        cursor.execute(
+            """
+            UPDATE video_analytics
+            SET
+                task_id = COALESCE(?, task_id),
+                account_id = COALESCE(?, account_id),
+                video_url = COALESCE(?, video_url),
+                title = COALESCE(?, title),
+                thumbnail = COALESCE(?, thumbnail),
+                publish_date = COALESCE(?, publish_date),
+                play_count = ?,
+                like_count = ?,
+                comment_count = ?,
+                collect_count = ?,
+                share_count = ?,
+                match_confidence = COALESCE(?, match_confidence),
+                raw_data = ?,
+                last_updated = CURRENT_TIMESTAMP
+            WHERE id = ?
+            """,
+            row[:2] + row[4:] + (row_id,),
+        )
+        return row_id
+
+    cursor.execute(
+        """
+        INSERT INTO video_analytics (
+            task_id, account_id, platform, video_id, video_url,
+            title, thumbnail, publish_date, play_count, like_count,
+            comment_count, collect_count, share_count, match_confidence, raw_data
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        row,
+    )
+    return cursor.lastrowid
+
+
 def upsert_video_analytics_by_key(db_path: Path, *, platform: str, video_id: str, data: Dict) -> int:
     """
     Insert or update a video_analytics row by (platform, video_id).
@@ -304,94 +718,20 @@ def upsert_video_analytics_by_key(db_path: Path, *, platform: str, video_id: str
     if not platform or not video_id:
         raise ValueError("platform and video_id are required for upsert")
 
+    row = _upsert_params(platform, video_id, data)
     with sqlite3.connect(db_path) as conn:
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT id
-            FROM video_analytics
-            WHERE platform = ?
-              AND video_id = ?
-            ORDER BY last_updated DESC
-            LIMIT 1
-            """,
-            (platform, video_id),
-        )
-        row = cursor.fetchone()
-
-        raw_json = json.dumps(data.get("raw_data", {}))
-
-        if row:
-            row_id = int(row["id"])
-            cursor.execute(
-                """
-                UPDATE video_analytics
-                SET
-                    task_id = COALESCE(?, task_id),
-                    account_id = COALESCE(?, account_id),
-                    video_url = COALESCE(?, video_url),
-                    title = COALESCE(?, title),
-                    thumbnail = COALESCE(?, thumbnail),
-                    publish_date = COALESCE(?, publish_date),
-                    play_count = ?,
-                    like_count = ?,
-                    comment_count = ?,
-                    collect_count = ?,
-                    share_count = ?,
-                    match_confidence = COALESCE(?, match_confidence),
-                    raw_data = ?,
-                    last_updated = CURRENT_TIMESTAMP
-                WHERE id = ?
-                """,
-                (
-                    data.get("task_id"),
-                    data.get("account_id"),
-                    data.get("video_url"),
-                    data.get("title"),
-                    data.get("thumbnail"),
-                    data.get("publish_date"),
-                    data.get("play_count", 0),
-                    data.get("like_count", 0),
-                    data.get("comment_count", 0),
-                    data.get("collect_count", 0),
-                    data.get("share_count", 0),
-                    data.get("match_confidence"),
-                    raw_json,
-                    row_id,
-                ),
-            )
+        if not ensure_video_analytics_unique_key(conn):
+            row_id = _legacy_upsert(cursor, row)
             conn.commit()
             return row_id
-
-        cursor.execute(
-            """
-            INSERT INTO video_analytics (
-                task_id, account_id, platform, video_id, video_url,
-                title, thumbnail, publish_date, play_count, like_count,
-                comment_count, collect_count, share_count, match_confidence, raw_data
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                data.get("task_id"),
-                data.get("account_id"),
-                platform,
-                video_id,
-                data.get("video_url"),
-                data.get("title"),
-                data.get("thumbnail"),
-                data.get("publish_date"),
-                data.get("play_count", 0),
-                data.get("like_count", 0),
-                data.get("comment_count", 0),
-                data.get("collect_count", 0),
-                data.get("share_count", 0),
-                data.get("match_confidence"),
-                raw_json,
-            ),
-        )
+        cursor.execute(_BULK_UPSERT_SQL, row)
+        row_id = cursor.execute(
+            "SELECT id FROM video_analytics WHERE platform = ? AND video_id = ?",
+            (platform, video_id),
+        ).fetchone()[0]
         conn.commit()
-        return cursor.lastrowid
+        return int(row_id)
 
 
 def record_analytics_history(db_path: Path, video_analytics_id: int):
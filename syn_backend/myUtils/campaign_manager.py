@@ -250,7 +250,11 @@ class CampaignManager:
                 """, (len(tasks), package_id))
                 
                 conn.commit()
-                return {"success": True, "task_count": len(tasks), "tasks": tasks}
+            # 新的待发布任务立即生效，不必等调度器下一轮查询
+            from myUtils.task_scheduler import task_scheduler
+
+            task_scheduler.notify()
+            return {"success": True, "task_count": len(tasks), "tasks": tasks}
                 
         except Exception as e:
             print(f"Error generating tasks: {e}")
@@ -0,0 +1,603 @@
+"""
+Concurrent account collection engine.
+
+A sweep used to visit every account strictly one after another, so a fleet of a
+few hundred accounts could not finish inside the 2h collection interval. Here
+each account runs as its own task, bounded by lanes:
+
+- api:     direct platform APIs (e.g. collect_douyin_data_api), per platform
+- tikhub:  TikHub calls, per API key
+- browser: Playwright sessions, per platform
+
+Finished accounts are checkpointed (SQLite, keyed by sweep) so a sweep that hit
+its global deadline or crashed resumes with the remaining accounts next run.
+
+Collection is also incremental: each account keeps a high-water mark
+(collection_cursors) and an IncrementalPlan decides how deep pagination goes.
+New videos are always taken; known ones are only refreshed by age tier
+(hot < 48h every run, warm < 30d every warm_every, the rest every cold_every).
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import inspect
+import os
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw.strip())
+    except ValueError:
+        return default
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+LANES = ("api", "tikhub", "browser")
+
+
+@dataclass(frozen=True)
+class CollectionLimits:
+    api_per_platform: int = 8
+    browser_per_platform: int = 2
+    per_tikhub_key: int = 4
+    # 0 = no global deadline
+    deadline_seconds: int = 6600
+    # a checkpoint older than this is ignored (the sweep starts over)
+    checkpoint_ttl_seconds: int = 6 * 3600
+    progress_log_seconds: int = 30
+
+    @classmethod
+    def from_env(cls) -> "CollectionLimits":
+        return cls(
+            api_per_platform=max(1, _env_int("COLLECT_API_CONCURRENCY", 8)),
+            browser_per_platform=max(1, _env_int("COLLECT_BROWSER_CONCURRENCY", 2)),
+            per_tikhub_key=max(1, _env_int("COLLECT_TIKHUB_CONCURRENCY", 4)),
+            deadline_seconds=max(0, _env_int("COLLECT_DEADLINE_SECONDS", 6600)),
+            checkpoint_ttl_seconds=max(0, _env_int("COLLECT_CHECKPOINT_TTL_SECONDS", 6 * 3600)),
+            progress_log_seconds=max(1, _env_int("COLLECT_PROGRESS_LOG_SECONDS", 30)),
+        )
+
+    def lane_limit(self, lane: str) -> int:
+        if lane == "api":
+            return self.api_per_platform
+        if lane == "tikhub":
+            return self.per_tikhub_key
+        if lane == "browser":
+            return self.browser_per_platform
+        raise ValueError(f"unknown collection lane: {lane}")
+
+
+def sweep_key(name: str, *parts: Any) -> str:
+    """Stable checkpoint key for a sweep over the same account selection."""
+    normalized = []
+    for part in parts:
+        if part is None:
+            normalized.append("")
+        elif isinstance(part, (list, set, tuple)):
+            normalized.append(",".join(sorted(map(str, part))))
+        else:
+            normalized.append(str(part))
+    raw = "|".join(normalized)
+    return f"{name}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]}"
+
+
+def tikhub_lane_key(api_key: str) -> str:
+    # 不把原始 key 写进日志/指标
+    return hashlib.sha1((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+
+class CollectionCheckpoint:
+    """Per-sweep record of accounts that already finished (SQLite)."""
+
+    def __init__(self, db_path: Any):
+        self.db_path = str(db_path)
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        if not self._ready:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS collection_checkpoints (
+                    sweep_key TEXT NOT NULL,
+                    account_id TEXT NOT NULL,
+                    platform TEXT,
+                    success INTEGER NOT NULL DEFAULT 0,
+                    count INTEGER DEFAULT 0,
+                    error TEXT,
+                    finished_at TEXT NOT NULL,
+                    PRIMARY KEY (sweep_key, account_id)
+                )
+                """
+            )
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def load(self, key: str, ttl_seconds: int) -> Dict[str, Dict[str, Any]]:
+        """Successful accounts of an unfinished sweep that is still fresh."""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT account_id, platform, count, finished_at FROM collection_checkpoints "
+                "WHERE sweep_key = ? AND success = 1",
+                (key,),
+            ).fetchall()
+        if not rows:
+            return {}
+        if ttl_seconds:
+            cutoff = (datetime.now() - timedelta(seconds=ttl_seconds)).isoformat()
+            if min(r["finished_at"] for r in rows) < cutoff:
+                self.clear(key)
+                return {}
+        return {r["account_id"]: dict(r) for r in rows}
+
+    def record(self, key: str, account_id: str, platform: str, result: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO collection_checkpoints "
+                "(sweep_key, account_id, platform, success, count, error, finished_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    account_id,
+                    platform,
+                    1 if result.get("success") else 0,
+                    int(result.get("count") or 0),
+                    result.get("error"),
+                    datetime.now().isoformat(),
+                ),
+            )
+
+    def clear(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM collection_checkpoints WHERE sweep_key = ?", (key,))
+
+
+AccountWorker = Callable[[Dict[str, Any], "CollectionSweep"], Awaitable[Optional[Dict[str, Any]]]]
+ProgressCallback = Callable[[Dict[str, Any]], Any]
+
+
+class CollectionSweep:
+    """
+    One bounded-concurrency pass over a set of accounts.
+
+    The worker receives (account, sweep) and wraps each network/browser step in
+    ``async with sweep.slot(lane, key)``; it returns a result dict
+    ({"success": bool, "count": int, "error": str, ...}) or None to skip.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        *,
+        limits: Optional[CollectionLimits] = None,
+        checkpoint: Optional[CollectionCheckpoint] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+    ):
+        self.key = key
+        self.limits = limits or CollectionLimits.from_env()
+        self.checkpoint = checkpoint
+        self.progress_callback = progress_callback
+        self._semaphores: Dict[Tuple[str, str], asyncio.Semaphore] = {}
+        self._started_at = 0.0
+        self._deadline: Optional[float] = None
+        self._last_log = 0.0
+        self._progress: Dict[str, Any] = {
+            "sweep": key,
+            "total": 0,
+            "done": 0,
+            "success": 0,
+            "failed": 0,
+            "resumed": 0,
+            "running": 0,
+            "deadline_hit": False,
+            "elapsed_seconds": 0.0,
+        }
+
+    # ---------- lanes ----------
+
+    @asynccontextmanager
+    async def slot(self, lane: str, key: str):
+        sem_key = (lane, key or "")
+        sem = self._semaphores.get(sem_key)
+        if sem is None:
+            sem = self._semaphores[sem_key] = asyncio.Semaphore(self.limits.lane_limit(lane))
+        async with sem:
+            yield
+
+    def remaining(self) -> Optional[float]:
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+
+    # ---------- progress ----------
+
+    def progress(self) -> Dict[str, Any]:
+        snapshot = dict(self._progress)
+        if self._started_at:
+            snapshot["elapsed_seconds"] = round(time.monotonic() - self._started_at, 1)
+        return snapshot
+
+    async def _report(self, force: bool = False) -> None:
+        snapshot = self.progress()
+        now = time.monotonic()
+        if force or now - self._last_log >= self.limits.progress_log_seconds:
+            self._last_log = now
+            logger.info(
+                f"[Collector] Sweep {self.key}: {snapshot['done']}/{snapshot['total']} done "
+                f"(ok={snapshot['success']}, failed={snapshot['failed']}, running={snapshot['running']}, "
+                f"{snapshot['elapsed_seconds']}s)"
+            )
+        if self.progress_callback is not None:
+            try:
+                ret = self.progress_callback(snapshot)
+                if inspect.isawaitable(ret):
+                    await ret
+            except Exception as exc:  # noqa: BLE001
+                logger.debug(f"[Collector] Progress callback failed: {exc}")
+
+    # ---------- run ----------
+
+    async def _checkpoint_call(self, fn, *args):
+        if self.checkpoint is None:
+            return None
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(f"[Collector] Checkpoint {fn.__name__} failed: {exc}")
+            return None
+
+    async def _run_one(self, account: Dict[str, Any], worker: AccountWorker) -> Optional[Dict[str, Any]]:
+        self._progress["running"] += 1
+        try:
+            try:
+                result = await worker(account, self)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                logger.exception(f"[Collector] Account {account.get('account_id')} crashed: {exc}")
+                result = {"success": False, "error": str(exc)}
+        finally:
+            self._progress["running"] -= 1
+
+        if result is not None:
+            self._progress["done"] += 1
+            self._progress["success" if result.get("success") else "failed"] += 1
+            if self.checkpoint is not None:
+                await self._checkpoint_call(
+                    self.checkpoint.record,
+                    self.key,
+                    account.get("account_id"),
+                    account.get("platform"),
+                    result,
+                )
+        else:
+            self._progress["total"] -= 1
+        await self._report()
+        return result
+
+    async def run(self, accounts: Iterable[Dict[str, Any]], worker: AccountWorker) -> Dict[str, Any]:
+        accounts = list(accounts)
+        self._started_at = self._last_log = time.monotonic()
+        if self.limits.deadline_seconds:
+            self._deadline = self._started_at + self.limits.deadline_seconds
+
+        results: Dict[str, Any] = {"total": 0, "success": 0, "failed": 0, "details": []}
+
+        finished: Dict[str, Dict[str, Any]] = {}
+        if self.checkpoint is not None:
+            finished = await self._checkpoint_call(
+                self.checkpoint.load, self.key, self.limits.checkpoint_ttl_seconds
+            ) or {}
+        pending = [a for a in accounts if a.get("account_id") not in finished]
+        resumed = [a for a in accounts if a.get("account_id") in finished]
+        if resumed:
+            logger.info(f"[Collector] Sweep {self.key}: resuming, {len(resumed)} account(s) already collected")
+
+        self._progress.update(total=len(pending) + len(resumed), done=len(resumed), success=len(resumed),
+                              resumed=len(resumed))
+        for account in resumed:
+            row = finished[account["account_id"]]
+            results["details"].append({
+                "account": account.get("name"),
+                "account_id": account["account_id"],
+                "platform": account.get("platform"),
+                "success": True,
+                "count": row.get("count") or 0,
+                "resumed": True,
+            })
+
+        tasks = {asyncio.ensure_future(self._run_one(account, worker)): account for account in pending}
+        done: set = set()
+        not_done: set = set()
+        if tasks:
+            done, not_done = await asyncio.wait(tasks, timeout=self.remaining())
+        if not_done:
+            self._progress["deadline_hit"] = True
+            for task in not_done:
+                task.cancel()
+            await asyncio.gather(*not_done, return_exceptions=True)
+            logger.warning(
+                f"[Collector] Sweep {self.key}: deadline {self.limits.deadline_seconds}s reached, "
+                f"{len(not_done)} account(s) deferred to the next run"
+            )
+
+        for task, account in tasks.items():
+            if task in done:
+                result = task.result()
+                if result is None:
+                    continue
+            else:
+                result = {"success": False, "error": "deadline exceeded", "deferred": True}
+            results["details"].append({
+                "account": account.get("name"),
+                "account_id": account.get("account_id"),
+                "platform": account.get("platform"),
+                **result,
+            })
+
+        for detail in results["details"]:
+            results["total"] += 1
+            results["success" if detail.get("success") else "failed"] += 1
+
+        if not not_done and self.checkpoint is not None:
+            # 整轮完成：下一次从头开始
+            await self._checkpoint_call(self.checkpoint.clear, self.key)
+
+        await self._report(force=True)
+        results["progress"] = self.progress()
+        return results
+
+
+# ---------- incremental collection ----------
+
+
+def to_epoch(value: Any) -> Optional[int]:
+    """Epoch seconds from epoch s/ms, digit strings or ISO / 'YYYY-MM-DD HH:MM:SS' text."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        ts = float(value)
+        if ts > 1e11:
+            ts /= 1000.0
+        return int(ts) if ts > 0 else None
+    text = str(value).strip()
+    if not text:
+        return None
+    if text.isdigit():
+        return to_epoch(int(text))
+    try:
+        return int(datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True)
+class RefreshTiers:
+    enabled: bool = True
+    hot_window: int = 48 * 3600
+    warm_window: int = 30 * 86400
+    warm_every: int = 24 * 3600
+    cold_every: int = 7 * 86400
+
+    @classmethod
+    def from_env(cls) -> "RefreshTiers":
+        return cls(
+            enabled=_env_flag("COLLECT_INCREMENTAL", True),
+            hot_window=max(0, _env_int("COLLECT_HOT_WINDOW_SECONDS", 48 * 3600)),
+            warm_window=max(0, _env_int("COLLECT_WARM_WINDOW_SECONDS", 30 * 86400)),
+            warm_every=max(0, _env_int("COLLECT_WARM_REFRESH_SECONDS", 24 * 3600)),
+            cold_every=max(0, _env_int("COLLECT_COLD_REFRESH_SECONDS", 7 * 86400)),
+        )
+
+
+class IncrementalPlan:
+    """
+    How far one account's pagination goes in this run.
+
+    mode "full" walks everything (first run / cold refresh due), "warm" stops
+    past warm_window, "hot" stops past hot_window. Unknown video ids are always
+    kept. Videos are dicts with "video_id" and a "publish_time" (any format
+    accepted by to_epoch).
+    """
+
+    def __init__(
+        self,
+        platform: str,
+        account_id: str,
+        mark: Optional[Dict[str, Any]],
+        known_ids: set,
+        tiers: RefreshTiers,
+        now: Optional[float] = None,
+    ):
+        self.platform = platform
+        self.account_id = account_id
+        self.mark = dict(mark or {})
+        self.known_ids = known_ids
+        self.tiers = tiers
+        self.now = now if now is not None else time.time()
+
+        if not tiers.enabled or not mark or self._due(self.mark.get("full_refreshed_at"), tiers.cold_every):
+            self.mode, self.depth = "full", None
+        elif self._due(self.mark.get("warm_refreshed_at"), tiers.warm_every):
+            self.mode, self.depth = "warm", tiers.warm_window
+        else:
+            self.mode, self.depth = "hot", tiers.hot_window
+
+        self.newest_id: Optional[str] = self.mark.get("newest_video_id")
+        self.newest_time: Optional[int] = self.mark.get("newest_create_time")
+        self.last_cursor: Optional[str] = None
+        self.pages = 0
+        self.kept = 0
+        self.skipped = 0
+        self.stopped_early = False
+
+    def _due(self, refreshed_at: Optional[str], every: int) -> bool:
+        ts = to_epoch(refreshed_at)
+        return ts is None or self.now - ts >= every
+
+    @property
+    def is_full(self) -> bool:
+        return self.depth is None
+
+    def keep(self, video: Dict[str, Any]) -> bool:
+        video_id = str(video.get("video_id") or "")
+        if not video_id or video_id not in self.known_ids:
+            return True
+        if self.depth is None:
+            return True
+        published = to_epoch(video.get("publish_time"))
+        return published is not None and self.now - published < self.depth
+
+    def select(self, videos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        kept = [v for v in videos if self.keep(v)]
+        self.kept += len(kept)
+        self.skipped += len(videos) - len(kept)
+        return kept
+
+    def observe(self, videos: List[Dict[str, Any]], cursor: Any = None) -> bool:
+        """Record one page (newest first); False once it holds nothing worth refreshing."""
+        self.pages += 1
+        if cursor is not None:
+            self.last_cursor = str(cursor)
+        for video in videos:
+            published = to_epoch(video.get("publish_time"))
+            if published is not None and (self.newest_time is None or published > self.newest_time):
+                self.newest_time = published
+                self.newest_id = str(video.get("video_id") or "") or self.newest_id
+        if self.is_full or not videos:
+            return True
+        if any(self.keep(v) for v in videos):
+            return True
+        self.stopped_early = True
+        return False
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "pages": self.pages,
+            "unchanged": self.skipped,
+            "stopped_early": self.stopped_early,
+        }
+
+
+class CollectionCursorStore:
+    """Per-account high-water marks (collection_cursors) next to video_analytics."""
+
+    def __init__(self, db_path: Any, tiers: Optional[RefreshTiers] = None):
+        self.db_path = str(db_path)
+        self.tiers = tiers or RefreshTiers.from_env()
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        if not self._ready:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS collection_cursors (
+                    platform TEXT NOT NULL,
+                    account_id TEXT NOT NULL,
+                    newest_video_id TEXT,
+                    newest_create_time INTEGER,
+                    last_cursor TEXT,
+                    last_run_at TEXT,
+                    warm_refreshed_at TEXT,
+                    full_refreshed_at TEXT,
+                    PRIMARY KEY (platform, account_id)
+                )
+                """
+            )
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def plan(self, platform: str, account_id: str) -> IncrementalPlan:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            mark = conn.execute(
+                "SELECT * FROM collection_cursors WHERE platform = ? AND account_id = ?",
+                (platform, account_id),
+            ).fetchone()
+            known: set = set()
+            if mark is not None and self.tiers.enabled:
+                try:
+                    known = {
+                        str(r[0]) for r in conn.execute(
+                            "SELECT video_id FROM video_analytics WHERE platform = ? AND account_id = ?",
+                            (platform, account_id),
+                        )
+                    }
+                except sqlite3.OperationalError:
+                    known = set()
+        return IncrementalPlan(platform, account_id, dict(mark) if mark else None, known, self.tiers)
+
+    def commit(self, plan: IncrementalPlan) -> None:
+        """
+        Persist the mark after a pagination pass that finished without errors
+        (ran out of pages, hit its page cap or stopped at the tier boundary).
+        """
+        now = datetime.fromtimestamp(plan.now).isoformat()
+        full_at = plan.mark.get("full_refreshed_at")
+        warm_at = plan.mark.get("warm_refreshed_at")
+        if plan.mode == "full":
+            full_at = warm_at = now
+        elif plan.mode == "warm":
+            warm_at = now
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO collection_cursors "
+                "(platform, account_id, newest_video_id, newest_create_time, last_cursor, "
+                " last_run_at, warm_refreshed_at, full_refreshed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(platform, account_id) DO UPDATE SET "
+                "newest_video_id = excluded.newest_video_id, "
+                "newest_create_time = excluded.newest_create_time, "
+                "last_cursor = excluded.last_cursor, "
+                "last_run_at = excluded.last_run_at, "
+                "warm_refreshed_at = excluded.warm_refreshed_at, "
+                "full_refreshed_at = excluded.full_refreshed_at",
+                (
+                    plan.platform,
+                    plan.account_id,
+                    plan.newest_id,
+                    plan.newest_time,
+                    plan.last_cursor,
+                    now,
+                    warm_at,
+                    full_at,
+                ),
+            )
+
+    def reset(self, platform: Optional[str] = None, account_id: Optional[str] = None) -> None:
+        """Forget marks so the next run does a full refresh."""
+        clauses, params = [], []
+        if platform:
+            clauses.append("platform = ?")
+            params.append(platform)
+        if account_id:
+            clauses.append("account_id = ?")
+            params.append(account_id)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM collection_cursors{where}", params)
@@ -1,7 +1,10 @@
+import atexit
+import copy
 import json
 import sqlite3
 import threading
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -64,6 +67,63 @@ PLATFORM_CODES = {
 }
 CODE_TO_PLATFORM = {value: key for key, value in PLATFORM_CODES.items()}
 
+ACCOUNT_COLUMNS = (
+    "account_id, platform, platform_code, name, status, cookie_file, last_checked, "
+    "avatar, original_name, note, user_id, login_status"
+)
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return float(raw.strip())
+    except ValueError:
+        return default
+
+
+class CookieFileCache:
+    """Cookie 文件内容的小型 LRU，键为 (路径, mtime_ns, size)，文件被改写后自然失效"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, target: Path) -> Dict[str, Any]:
+        try:
+            stat = target.stat()
+        except OSError:
+            self.invalidate(target)
+            return {}
+        key = str(target)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+        self.misses += 1
+        try:
+            with target.open("r", encoding="utf-8") as fp:
+                data = json.load(fp)
+        except Exception:
+            return {}
+        with self._lock:
+            self._entries[key] = (stamp, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return copy.deepcopy(data)
+
+    def invalidate(self, target: Path) -> None:
+        with self._lock:
+            self._entries.pop(str(target), None)
+
 
 class CookieManager:
     def __init__(self, storage_path: Optional[Path] = None):
@@ -95,7 +155,19 @@ class CookieManager:
         self.frontend_snapshot_path.parent.mkdir(parents=True, exist_ok=True)
 
         self.lock = threading.Lock()
+        self.cookie_cache = CookieFileCache(int(_env_float("COOKIE_CACHE_ENTRIES", 256)))
+        self.snapshot_debounce = _env_float("COOKIE_SNAPSHOT_DEBOUNCE_SECONDS", 2.0)
+        self._snapshot_timer: Optional[threading.Timer] = None
+        self._snapshot_lock = threading.Lock()
+        # 账号目录缓存：PRAGMA data_version 在任意其它连接（含其它进程）提交后变化，
+        # 未变化时列表直接返回内存副本，不查询也不读 Cookie 文件
+        self._directory_lock = threading.Lock()
+        self._directory_rows: Optional[List[Dict[str, Any]]] = None
+        self._directory_stamp: Optional[int] = None
+        self.directory_version = 0
         self._ensure_database()
+        self._watch_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        atexit.register(self.flush_frontend_snapshot)
         self._migrate_legacy_json()
         try:
             self.reconcile_missing_user_ids()
@@ -199,6 +271,8 @@ class CookieManager:
                 conn.execute("ALTER TABLE cookie_accounts ADD COLUMN user_id TEXT")
             if "login_status" not in columns:
                 conn.execute("ALTER TABLE cookie_accounts ADD COLUMN login_status TEXT DEFAULT 'unknown'")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cookie_accounts_platform_name ON cookie_accounts(platform, name)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cookie_accounts_user_id ON cookie_accounts(platform, user_id)")
 
     def _ensure_database(self):
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -286,16 +360,12 @@ class CookieManager:
                 fp.write(data)
             else:
                 json.dump(data, fp, ensure_ascii=False, indent=2)
+        self.cookie_cache.invalidate(target)
 
     def _read_cookie_file(self, cookie_file: str) -> Dict[str, Any]:
-        target = self.cookies_dir / cookie_file
-        if not target.exists():
-            return {}
-        try:
-            with target.open("r", encoding="utf-8") as fp:
-                return json.load(fp)
-        except Exception:
+        if not cookie_file:
             return {}
+        return self.cookie_cache.get(self.cookies_dir / cookie_file)
 
     def _normalize_platform(self, platform_name: str) -> str:
         return (platform_name or "").strip().lower()
@@ -789,53 +859,54 @@ class CookieManager:
             logger.info(f"[CookieManager] 数据库插入/更新成功: ID={account_id}, Name={account_name}, Note={note}, UserID={user_id}")
             conn.commit()
 
-        # 自动更新前端快照
-        try:
-            accounts = self.list_flat_accounts()
-            snapshot_accounts = [{"account_id": acc["account_id"], "platform": acc["platform"], "user_id": acc.get("user_id")} for acc in accounts]
-            self.save_frontend_snapshot(snapshot_accounts)
-            logger.info(f"[CookieManager] 前端快照已自动更新: {len(snapshot_accounts)} 个账号")
-        except Exception as e:
-            logger.warning(f"[CookieManager] 更新前端快照失败: {e}")
+        # 前端快照合并写入（批量导入时只写一次）
+        self._schedule_frontend_snapshot()
 
-    def _group_accounts(self, rows: List[sqlite3.Row]) -> List[Dict[str, Any]]:
+    def _group_accounts(self, rows: List[Dict[str, Any]], include_cookie: bool = False) -> List[Dict[str, Any]]:
         grouped: Dict[str, List[Dict[str, Any]]] = {}
         for row in rows:
             account = {
                 "id": row["account_id"],
                 "name": row["name"],
                 "status": row["status"],
-                "cookie": self._read_cookie_file(row["cookie_file"]),
                 "platform": row["platform"],
                 "platform_code": row["platform_code"],
                 "filePath": row["cookie_file"],
                 "last_checked": row["last_checked"],
-                "avatar": row["avatar"] if "avatar" in row.keys() else None,
-                "original_name": row["original_name"] if "original_name" in row.keys() else None,
-                "note": row["note"] if "note" in row.keys() else None,
-                "user_id": row["user_id"] if "user_id" in row.keys() else None,
-                "login_status": row["login_status"] if "login_status" in row.keys() else None,
+                "avatar": row.get("avatar"),
+                "original_name": row.get("original_name"),
+                "note": row.get("note"),
+                "user_id": row.get("user_id"),
+                "login_status": row.get("login_status"),
             }
+            if include_cookie:
+                account["cookie"] = self._read_cookie_file(row["cookie_file"])
             grouped.setdefault(row["platform"], []).append(account)
         return [{"name": name, "accounts": accounts} for name, accounts in grouped.items()]
 
-    def get_all_accounts(self) -> List[Dict[str, Any]]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            rows = conn.execute(
-                "SELECT account_id, platform, platform_code, name, status, cookie_file, last_checked, avatar, original_name, note, user_id, login_status FROM cookie_accounts "
-                "ORDER BY platform, name"
-            ).fetchall()
-        return self._group_accounts(rows)
+    def _account_directory(self) -> List[Dict[str, Any]]:
+        """按 (platform, name) 排序的账号行；数据库自上次加载后无提交时直接返回缓存"""
+        with self._directory_lock:
+            stamp = self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._directory_rows is None or stamp != self._directory_stamp:
+                self._watch_conn.row_factory = sqlite3.Row
+                try:
+                    rows = self._watch_conn.execute(
+                        f"SELECT {ACCOUNT_COLUMNS} FROM cookie_accounts ORDER BY platform, name"
+                    ).fetchall()
+                finally:
+                    self._watch_conn.row_factory = None
+                self._directory_rows = [dict(row) for row in rows]
+                self._directory_stamp = stamp
+                self.directory_version += 1
+            return self._directory_rows
+
+    def get_all_accounts(self, include_cookie: bool = False) -> List[Dict[str, Any]]:
+        """按平台分组的账号列表；Cookie 内容按需加载（include_cookie=True 时经 LRU 读取）"""
+        return self._group_accounts(self._account_directory(), include_cookie=include_cookie)
 
     def list_flat_accounts(self) -> List[Dict[str, Any]]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            rows = conn.execute(
-                "SELECT account_id, platform, platform_code, name, status, cookie_file, last_checked, avatar, original_name, note, user_id, login_status FROM cookie_accounts "
-                "ORDER BY platform, name"
-            ).fetchall()
-        return [dict(row) for row in rows]
+        return [dict(row) for row in self._account_directory()]
 
     def cleanup_duplicate_accounts(self) -> Dict[str, int]:
         """Remove duplicated accounts with same platform + user_id, keep the latest one."""
@@ -907,6 +978,40 @@ class CookieManager:
 
         return {"removed": removed}
 
+    def _schedule_frontend_snapshot(self) -> None:
+        """Debounce snapshot rewrites: a burst of add_account calls produces one write."""
+        if self.snapshot_debounce <= 0:
+            self.flush_frontend_snapshot(force=True)
+            return
+        with self._snapshot_lock:
+            if self._snapshot_timer is not None:
+                self._snapshot_timer.cancel()
+            timer = threading.Timer(self.snapshot_debounce, self.flush_frontend_snapshot, kwargs={"force": True})
+            timer.daemon = True
+            self._snapshot_timer = timer
+            timer.start()
+
+    def flush_frontend_snapshot(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """Write the pending snapshot now (force=True writes even if nothing is pending)."""
+        with self._snapshot_lock:
+            pending = self._snapshot_timer is not None
+            if pending:
+                self._snapshot_timer.cancel()
+                self._snapshot_timer = None
+        if not (pending or force):
+            return None
+        try:
+            snapshot_accounts = [
+                {"account_id": acc["account_id"], "platform": acc["platform"], "user_id": acc.get("user_id")}
+                for acc in self._account_directory()
+            ]
+            result = self.save_frontend_snapshot(snapshot_accounts)
+            logger.info(f"[CookieManager] 前端快照已自动更新: {len(snapshot_accounts)} 个账号")
+            return result
+        except Exception as e:
+            logger.warning(f"[CookieManager] 更新前端快照失败: {e}")
+            return {"success": False, "error": str(e)}
+
     def save_frontend_snapshot(self, accounts: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Persist frontend account snapshot for later cleanup."""
         payload = {
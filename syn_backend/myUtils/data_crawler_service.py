@@ -16,6 +16,15 @@ from myUtils.cookie_manager import cookie_manager
 class DataCrawlerService:
     """数据抓取服务"""
 
+    # 请求最终到达的平台域名：出站配额按真实上游计算（抖音/B站经由本地 TikHub 代理转发）
+    UPSTREAM_HOSTS = {
+        "douyin": "www.douyin.com",
+        "xiaohongshu": "edith.xiaohongshu.com",
+        "kuaishou": "www.kuaishou.com",
+        "bilibili": "api.bilibili.com",
+    }
+    RATE_LIMIT_WAIT = 30
+
     def __init__(self, tk_api_base_url: str = None):
         """
         初始化数据抓取服务
@@ -43,6 +52,15 @@ class DataCrawlerService:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.close()
 
+    async def _throttle(self, platform: str) -> Optional[Dict[str, Any]]:
+        """获取跨进程共享的出站域名配额；未获得许可时返回失败结果"""
+        from fastapi_app.core.rate_limiter import get_rate_limiter
+
+        host = self.UPSTREAM_HOSTS[platform]
+        if await get_rate_limiter().acquire(None, host=host, timeout=self.RATE_LIMIT_WAIT):
+            return None
+        return {"success": False, "error": "请求频率受限，请稍后重试", "platform": platform}
+
     # ==================== 抖音数据抓取 ====================
 
     async def fetch_douyin_video(self, aweme_id: str) -> Dict[str, Any]:
@@ -56,6 +74,9 @@ class DataCrawlerService:
             视频详细信息
         """
         try:
+            limited = await self._throttle("douyin")
+            if limited:
+                return limited
             url = f"{self.tk_api_base_url}/douyin/web/fetch_one_video"
             response = await self.client.get(url, params={"aweme_id": aweme_id})
             response.raise_for_status()
@@ -106,6 +127,9 @@ class DataCrawlerService:
             account_file: cookiesFile 下的账号 cookie 存储文件
         """
         try:
+            limited = await self._throttle("xiaohongshu")
+            if limited:
+                return limited
             cookie_state = await self._load_cookie_file(account_file)
             if not cookie_state:
                 return {"success": False, "error": "Cookie 文件不存在", "platform": "xiaohongshu"}
@@ -171,6 +195,9 @@ class DataCrawlerService:
             视频列表
         """
         try:
+            limited = await self._throttle("douyin")
+            if limited:
+                return limited
             url = f"{self.tk_api_base_url}/douyin/web/fetch_user_post_videos"
             response = await self.client.get(
                 url,
@@ -222,6 +249,9 @@ class DataCrawlerService:
             评论列表
         """
         try:
+            limited = await self._throttle("douyin")
+            if limited:
+                return limited
             url = f"{self.tk_api_base_url}/douyin/web/fetch_video_comments"
             response = await self.client.get(
                 url,
@@ -263,6 +293,9 @@ class DataCrawlerService:
             热榜数据
         """
         try:
+            limited = await self._throttle("douyin")
+            if limited:
+                return limited
             url = f"{self.tk_api_base_url}/douyin/web/fetch_hot_search"
             response = await self.client.get(url)
             response.raise_for_status()
@@ -302,6 +335,9 @@ class DataCrawlerService:
             视频详细信息
         """
         try:
+            limited = await self._throttle("bilibili")
+            if limited:
+                return limited
             url = f"{self.tk_api_base_url}/bilibili/web/fetch_one_video"
             response = await self.client.get(url, params={"bvid": bvid})
             response.raise_for_status()
@@ -466,6 +502,9 @@ class DataCrawlerService:
     async def fetch_kuaishou_video(self, photo_id: str, account_file: str) -> Dict[str, Any]:
         """使用 MediaCrawler 的 API 客户端抓取快手视频详情"""
         try:
+            limited = await self._throttle("kuaishou")
+            if limited:
+                return limited
             cookie_state = await self._load_cookie_file(account_file)
             if not cookie_state:
                 return {"success": False, "error": "Cookie 文件不存在", "platform": "kuaishou"}
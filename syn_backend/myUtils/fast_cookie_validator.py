@@ -3,10 +3,14 @@ import contextlib
 import json
 import os
 import tempfile
+import threading
 import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from http.cookiejar import CookieJar, DefaultCookiePolicy
 from urllib.parse import urlencode, urlparse
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
 
 import httpx
 
@@ -41,7 +45,143 @@ def _env_flag(name: str, default: bool = False) -> bool:
     return raw in {"1", "true", "yes", "y", "on"}
 
 
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw.strip())
+    except ValueError:
+        return default
+
+
 DEFAULT_FALLBACK = _env_flag("FAST_COOKIE_FALLBACK", False)
+# 每个平台（即每个目标 host）的连接/并发上限
+MAX_CONNECTIONS_PER_HOST = max(1, _env_int("FAST_COOKIE_MAX_CONN_PER_HOST", 20))
+KEEPALIVE_EXPIRY = max(1, _env_int("FAST_COOKIE_KEEPALIVE_SECONDS", 60))
+USE_HTTP2 = _env_flag("FAST_COOKIE_HTTP2", True)
+# 签名结果（XHS x-s/x-t、抖音 X-Bogus）缓存秒数，0 表示不缓存
+SIGN_CACHE_TTL = max(0, _env_int("FAST_COOKIE_SIGN_TTL", 30))
+MAX_REDIRECTS = 5
+
+
+def _http2_available() -> bool:
+    if not USE_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@dataclass
+class _PooledClient:
+    loop: asyncio.AbstractEventLoop
+    client: httpx.AsyncClient
+    semaphore: asyncio.Semaphore
+
+
+def _new_client(**kwargs: Any) -> httpx.AsyncClient:
+    """
+    共享客户端不能保留任何 Cookie：连接池被多个账号共用，
+    Set-Cookie 一旦进了客户端的 jar 就会在重定向时发给其他账号的校验请求。
+    jar 拒收一切 Cookie，重定向由调用方手动跟随并带上本账号的 Cookie 头。
+    """
+    options: Dict[str, Any] = {
+        "http2": _http2_available(),
+        "follow_redirects": False,
+        "cookies": httpx.Cookies(CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))),
+        "timeout": httpx.Timeout(8.0),
+        "limits": httpx.Limits(
+            max_connections=MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=MAX_CONNECTIONS_PER_HOST,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    }
+    options.update(kwargs)
+    return httpx.AsyncClient(**options)
+
+
+class _HttpClientPool:
+    """
+    按 (事件循环, 平台) 复用 httpx.AsyncClient：keep-alive + HTTP/2，
+    同一平台的校验共享连接，避免每次校验/签名都重新握手 TLS。
+    httpx 客户端绑定事件循环，脚本里多次 asyncio.run() 时按循环分别建池。
+    """
+
+    def __init__(self) -> None:
+        self._clients: Dict[Tuple[int, str], _PooledClient] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> _PooledClient:
+        loop = asyncio.get_running_loop()
+        key = (id(loop), name)
+        entry = self._clients.get(key)
+        if entry is not None and entry.loop is loop:
+            return entry
+        with self._lock:
+            # 丢弃已关闭事件循环遗留的客户端（其连接随循环一起失效）
+            for stale_key in [k for k, v in self._clients.items() if v.loop.is_closed()]:
+                self._clients.pop(stale_key, None)
+            entry = self._clients.get(key)
+            if entry is None or entry.loop is not loop:
+                client = _new_client()
+                # HTTP/2 下多个请求复用同一连接，连接数限制不等于并发限制，另加信号量
+                entry = _PooledClient(loop, client, asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST))
+                self._clients[key] = entry
+            return entry
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环上的全部客户端"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entries = [(k, v) for k, v in self._clients.items() if v.loop is loop]
+            for key, _ in entries:
+                self._clients.pop(key, None)
+        for _, entry in entries:
+            with contextlib.suppress(Exception):
+                await entry.client.aclose()
+
+
+class _TTLCache:
+    """带过期时间的小型 LRU（签名结果缓存）"""
+
+    def __init__(self, ttl: float, maxsize: int = 1024) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        if self.ttl <= 0:
+            return None
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                self._data.pop(key, None)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: Any, value: Any) -> None:
+        if self.ttl <= 0 or value is None:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+_client_pool = _HttpClientPool()
+_sign_cache = _TTLCache(SIGN_CACHE_TTL)
+
+
+async def close_http_clients() -> None:
+    await _client_pool.aclose()
 
 
 def _douyin_params() -> Dict[str, Any]:
@@ -458,17 +598,24 @@ async def _sign_xhs(url: str, data: Any, cookie_data: Any, timeout: float = 8.0)
             signer_url = ""
 
     path = _xhs_sign_path(url)
+    cache_key = ("xhs", path, json.dumps(data, sort_keys=True, default=str), a1, web_session)
+    cached = _sign_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+
     if signer_url:
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                resp = await client.post(
-                    signer_url.rstrip("/") + "/sign",
-                    json={"uri": path, "data": data, "a1": a1, "web_session": web_session},
-                )
+            resp = await _client_pool.get("signer:xhs").client.post(
+                signer_url.rstrip("/") + "/sign",
+                json={"uri": path, "data": data, "a1": a1, "web_session": web_session},
+                timeout=timeout,
+            )
             if resp.status_code < 400:
                 payload = resp.json()
                 if payload.get("x-s") and payload.get("x-t"):
-                    return {"x-s": str(payload["x-s"]), "x-t": str(payload["x-t"])}
+                    signed = {"x-s": str(payload["x-s"]), "x-t": str(payload["x-t"])}
+                    _sign_cache.set(cache_key, signed)
+                    return dict(signed)
         except Exception:
             pass
 
@@ -477,7 +624,9 @@ async def _sign_xhs(url: str, data: Any, cookie_data: Any, timeout: float = 8.0)
 
         signed = await asyncio.to_thread(sign_local, path, data, a1, web_session)
         if signed and signed.get("x-s") and signed.get("x-t"):
-            return {"x-s": str(signed["x-s"]), "x-t": str(signed["x-t"])}
+            signed = {"x-s": str(signed["x-s"]), "x-t": str(signed["x-t"])}
+            _sign_cache.set(cache_key, signed)
+            return dict(signed)
     except Exception:
         return None
     return None
@@ -485,19 +634,31 @@ async def _sign_xhs(url: str, data: Any, cookie_data: Any, timeout: float = 8.0)
 
 async def _sign_douyin(url: str, params: Dict[str, Any], ua: str, timeout: float = 8.0) -> Optional[Dict[str, Any]]:
     signer_url = os.getenv("DOUYIN_SIGNER_URL") or os.getenv("DOUYIN_SIGN_URL")
+    query = _encode_query(params)
     if not signer_url:
-        query = _encode_query(params)
         if not query:
             return None
-        x_bogus = _xbogus_encode(query, "", ua, int(time.time()))
+        cache_key = ("xbogus", query, ua)
+        x_bogus = _sign_cache.get(cache_key)
+        if x_bogus is None:
+            x_bogus = _xbogus_encode(query, "", ua, int(time.time()))
+            _sign_cache.set(cache_key, x_bogus)
         return {"x_bogus": x_bogus, "params": params}
+
+    cache_key = ("douyin", signer_url, url, query, ua)
+    cached = _sign_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
     payload = {"url": url, "params": params, "user_agent": ua}
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            resp = await client.post(signer_url, json=payload)
+        resp = await _client_pool.get("signer:douyin").client.post(signer_url, json=payload, timeout=timeout)
         if resp.status_code >= 400:
             return None
-        return resp.json()
+        signed = resp.json()
+        if isinstance(signed, dict):
+            _sign_cache.set(cache_key, signed)
+            return dict(signed)
+        return signed
     except Exception:
         return None
 
@@ -615,12 +776,28 @@ class FastCookieValidator:
             req_url = url_override or url
             req_params = params if params_override is None else params_override
             if method == "POST":
-                return await client.post(req_url, json=json_body, params=req_params, headers=req_headers)
-            return await client.get(req_url, params=req_params, headers=req_headers)
-
+                response = await client.post(
+                    req_url, json=json_body, params=req_params, headers=req_headers, timeout=timeout
+                )
+            else:
+                response = await client.get(req_url, params=req_params, headers=req_headers, timeout=timeout)
+            # 手动跟随重定向：httpx 会丢掉请求级 Cookie 头，这里只对本平台域名补回本账号的 Cookie
+            for _ in range(MAX_REDIRECTS):
+                next_request = response.next_request
+                if next_request is None:
+                    break
+                await response.aclose()
+                host = next_request.url.host or ""
+                if not domain_filter or host == domain_filter or host.endswith("." + domain_filter):
+                    next_request.headers["Cookie"] = req_headers["Cookie"]
+                response = await client.send(next_request)
+            return response
+
+        pooled = _client_pool.get(platform_name)
         start = time.monotonic()
         try:
-            async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
+            async with pooled.semaphore:
+                client = pooled.client
                 resp = await _send(client, headers)
                 text_preview = _preview(resp)
 
@@ -781,5 +958,54 @@ class FastCookieValidator:
             payload["data"] = data
         return payload
 
+    async def validate_many(
+        self,
+        accounts: Iterable[Dict[str, Any]],
+        *,
+        concurrency: int = 20,
+        timeout: float = 3.0,
+        fallback: Optional[bool] = None,
+    ) -> AsyncIterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        批量校验，按完成顺序逐个产出 (account, result)。
+
+        account 为 dict：platform + account_file/cookie_file 或 cookie_data。
+        所有请求共享各平台的连接池；concurrency 限制整体并发，单平台另受连接池上限约束。
+        """
+        sem = asyncio.Semaphore(max(1, int(concurrency or 1)))
+
+        async def _run(account: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+            async with sem:
+                try:
+                    result = await self.validate_cookie_fast(
+                        account.get("platform"),
+                        account_file=account.get("account_file") or account.get("cookie_file"),
+                        cookie_data=account.get("cookie_data"),
+                        timeout=timeout,
+                        fallback=fallback,
+                    )
+                except Exception as exc:
+                    result = {"status": "error", "error": str(exc)}
+                return account, result
+
+        tasks = [asyncio.ensure_future(_run(account)) for account in accounts]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+def sign_cache_stats() -> Dict[str, int]:
+    return {"hits": _sign_cache.hits, "misses": _sign_cache.misses, "size": len(_sign_cache._data)}
+
 
-__all__ = ["FastCookieValidator", "PLATFORM_NAMES", "PLATFORM_CODES"]
+__all__ = [
+    "FastCookieValidator",
+    "PLATFORM_NAMES",
+    "PLATFORM_CODES",
+    "close_http_clients",
+    "sign_cache_stats",
+]
@@ -10,42 +10,12 @@ from myUtils.fingerprint_policy import get_fingerprint_policy, resolve_proxy
 from utils.base_social_media import set_init_script
 
 
-async def create_context_with_policy(
-    playwright,
+def _resolve_launch_options(
+    policy: Dict[str, Any],
     *,
-    platform: str,
-    account_id: Optional[str],
     headless: bool,
-    storage_state: Any = None,
-    force_ephemeral: bool = False,
-    base_context_opts: Optional[Dict[str, Any]] = None,
     launch_kwargs: Optional[Dict[str, Any]] = None,
-) -> Tuple[Optional[Any], Any, Optional[Dict[str, Any]], Dict[str, Any]]:
-    """
-    Build a Playwright context with fingerprint policy, proxy, and persistence.
-    Returns (browser, context, fingerprint, policy).
-    """
-    policy = get_fingerprint_policy(account_id, platform)
-    apply_fingerprint = bool(policy.get("apply_fingerprint", True)) and bool(account_id)
-    apply_stealth = bool(policy.get("apply_stealth", True))
-    use_persistent_profile = bool(policy.get("use_persistent_profile", True)) and bool(account_id)
-    user_id = None
-    if account_id:
-        try:
-            from myUtils.cookie_manager import cookie_manager
-            acc = cookie_manager.get_account_by_id(account_id)
-            user_id = acc.get("user_id") if acc else None
-        except Exception as e:
-            logger.warning(f"[playwright] Failed to load user_id: {e}")
-    if use_persistent_profile and not user_id:
-        logger.warning("[playwright] Missing user_id; disabling persistent profile")
-        use_persistent_profile = False
-    if force_ephemeral:
-        use_persistent_profile = False
-    if storage_state is not None and use_persistent_profile:
-        # storage_state is not supported by launch_persistent_context; fall back to non-persistent
-        use_persistent_profile = False
-
+) -> Dict[str, Any]:
     launch_opts = {"headless": headless}
     if launch_kwargs:
         launch_opts.update(launch_kwargs)
@@ -75,6 +45,31 @@ async def create_context_with_policy(
     proxy = resolve_proxy(policy)
     if proxy:
         launch_opts["proxy"] = proxy
+    return launch_opts
+
+
+def _resolve_user_id(account_id: Optional[str]) -> Optional[str]:
+    if not account_id:
+        return None
+    try:
+        from myUtils.cookie_manager import cookie_manager
+        acc = cookie_manager.get_account_by_id(account_id)
+        return acc.get("user_id") if acc else None
+    except Exception as e:
+        logger.warning(f"[playwright] Failed to load user_id: {e}")
+        return None
+
+
+def _build_context_options_with_fingerprint(
+    policy: Dict[str, Any],
+    *,
+    platform: str,
+    account_id: Optional[str],
+    user_id: Optional[str],
+    storage_state: Any = None,
+    base_context_opts: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    apply_fingerprint = bool(policy.get("apply_fingerprint", True)) and bool(account_id)
 
     context_opts = build_context_options(**(base_context_opts or {}))
     if storage_state is not None:
@@ -93,6 +88,97 @@ async def create_context_with_policy(
             context_opts = device_fingerprint_manager.apply_to_context(fingerprint, context_opts)
         except Exception as e:
             logger.warning(f"[fp] apply failed: {e}")
+    return context_opts, fingerprint
+
+
+async def apply_context_init_scripts(
+    context,
+    fingerprint: Optional[Dict[str, Any]],
+    policy: Dict[str, Any],
+) -> None:
+    """Install fingerprint / stealth init scripts on a freshly created context."""
+    if fingerprint:
+        try:
+            from myUtils.device_fingerprint import device_fingerprint_manager
+
+            await context.add_init_script(device_fingerprint_manager.get_init_script(fingerprint))
+        except Exception as e:
+            logger.warning(f"[fp] add init failed: {e}")
+
+    if bool(policy.get("apply_stealth", True)):
+        try:
+            await set_init_script(context)
+        except Exception as e:
+            logger.warning(f"[fp] stealth init failed: {e}")
+
+    if (policy.get("tls_ja3") or {}).get("enabled"):
+        logger.warning("[fp] tls_ja3 enabled in policy, but Playwright does not support JA3 spoofing.")
+
+
+def prepare_ephemeral_context(
+    *,
+    platform: str,
+    account_id: Optional[str],
+    headless: bool,
+    storage_state: Any = None,
+    base_context_opts: Optional[Dict[str, Any]] = None,
+    launch_kwargs: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any], Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Resolve the options for a non-persistent context without launching anything.
+    Returns (launch_opts, context_opts, fingerprint, policy); the caller owns the
+    browser, so several accounts can share one launched process.
+    """
+    policy = get_fingerprint_policy(account_id, platform)
+    user_id = _resolve_user_id(account_id)
+    launch_opts = _resolve_launch_options(policy, headless=headless, launch_kwargs=launch_kwargs)
+    context_opts, fingerprint = _build_context_options_with_fingerprint(
+        policy,
+        platform=platform,
+        account_id=account_id,
+        user_id=user_id,
+        storage_state=storage_state,
+        base_context_opts=base_context_opts,
+    )
+    return launch_opts, context_opts, fingerprint, policy
+
+
+async def create_context_with_policy(
+    playwright,
+    *,
+    platform: str,
+    account_id: Optional[str],
+    headless: bool,
+    storage_state: Any = None,
+    force_ephemeral: bool = False,
+    base_context_opts: Optional[Dict[str, Any]] = None,
+    launch_kwargs: Optional[Dict[str, Any]] = None,
+) -> Tuple[Optional[Any], Any, Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Build a Playwright context with fingerprint policy, proxy, and persistence.
+    Returns (browser, context, fingerprint, policy).
+    """
+    policy = get_fingerprint_policy(account_id, platform)
+    use_persistent_profile = bool(policy.get("use_persistent_profile", True)) and bool(account_id)
+    user_id = _resolve_user_id(account_id)
+    if use_persistent_profile and not user_id:
+        logger.warning("[playwright] Missing user_id; disabling persistent profile")
+        use_persistent_profile = False
+    if force_ephemeral:
+        use_persistent_profile = False
+    if storage_state is not None and use_persistent_profile:
+        # storage_state is not supported by launch_persistent_context; fall back to non-persistent
+        use_persistent_profile = False
+
+    launch_opts = _resolve_launch_options(policy, headless=headless, launch_kwargs=launch_kwargs)
+    context_opts, fingerprint = _build_context_options_with_fingerprint(
+        policy,
+        platform=platform,
+        account_id=account_id,
+        user_id=user_id,
+        storage_state=storage_state,
+        base_context_opts=base_context_opts,
+    )
 
     if use_persistent_profile:
         profile_root = policy.get("persistent_profile_dir") or "browser_profiles"
@@ -122,21 +208,6 @@ async def create_context_with_policy(
         browser = await playwright.chromium.launch(**launch_opts)
         context = await browser.new_context(**context_opts)
 
-    if fingerprint:
-        try:
-            from myUtils.device_fingerprint import device_fingerprint_manager
-
-            await context.add_init_script(device_fingerprint_manager.get_init_script(fingerprint))
-        except Exception as e:
-            logger.warning(f"[fp] add init failed: {e}")
-
-    if apply_stealth:
-        try:
-            await set_init_script(context)
-        except Exception as e:
-            logger.warning(f"[fp] stealth init failed: {e}")
-
-    if (policy.get("tls_ja3") or {}).get("enabled"):
-        logger.warning("[fp] tls_ja3 enabled in policy, but Playwright does not support JA3 spoofing.")
+    await apply_context_init_scripts(context, fingerprint, policy)
 
     return browser, context, fingerprint, policy
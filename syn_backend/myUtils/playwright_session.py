@@ -0,0 +1,125 @@
+"""
+上传器使用的 Playwright 会话
+
+上传器原本的写法是 ``async with async_playwright() as playwright`` + ``playwright.chromium.launch(...)``，
+每次发布都启动一遍驱动和浏览器。改为 ``async with playwright_session() as playwright`` 后：
+
+- 当前上下文未绑定浏览器池（API 进程 / 脚本直接调用）：行为与 async_playwright() 完全一致
+- 发布 Worker 通过 use_browser_pool() 绑定了常驻浏览器池：chromium / firefox.launch() 从池中借出
+  同启动参数的热浏览器，new_context() 照常创建全新的隔离 context；browser.close() 只关闭本次
+  创建的 context 并把浏览器还给池
+"""
+from __future__ import annotations
+
+import contextlib
+import contextvars
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from loguru import logger
+
+
+_active_pool: contextvars.ContextVar[Optional[Any]] = contextvars.ContextVar("publish_browser_pool", default=None)
+
+
+@contextlib.contextmanager
+def use_browser_pool(pool):
+    """在当前上下文内让 playwright_session() 使用给定的 BrowserPool"""
+    token = _active_pool.set(pool)
+    try:
+        yield pool
+    finally:
+        _active_pool.reset(token)
+
+
+class LeasedBrowser:
+    """池中浏览器的借用句柄：接口与 playwright Browser 相同，close() 归还而不是关闭进程"""
+
+    def __init__(self, pool, entry, lease):
+        self._pool = pool
+        self._entry = entry
+        self._lease = lease
+        self._contexts: List[Any] = []
+        self._released = False
+
+    async def new_context(self, **kwargs):
+        context = await self._entry.browser.new_context(**kwargs)
+        self._pool.note_context(self._entry)
+        self._contexts.append(context)
+        return context
+
+    async def new_page(self, **kwargs):
+        context = await self.new_context(**kwargs)
+        return await context.new_page()
+
+    @property
+    def contexts(self) -> List[Any]:
+        return list(self._contexts)
+
+    def is_connected(self) -> bool:
+        return self._entry.is_connected()
+
+    async def close(self, **kwargs) -> None:
+        if self._released:
+            return
+        self._released = True
+        for context in self._contexts:
+            with contextlib.suppress(Exception):
+                await context.close()
+        self._contexts.clear()
+        await self._lease.__aexit__(None, None, None)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._entry.browser, name)
+
+
+class _PooledBrowserType:
+    def __init__(self, session: "PooledPlaywright", engine: str):
+        self._session = session
+        self.name = engine
+
+    async def launch(self, **launch_opts) -> LeasedBrowser:
+        return await self._session._lease(self.name, launch_opts)
+
+
+class PooledPlaywright:
+    """async_playwright() 返回对象的替身（只提供上传器用到的 chromium / firefox / webkit.launch）"""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._browsers: List[LeasedBrowser] = []
+        self.chromium = _PooledBrowserType(self, "chromium")
+        self.firefox = _PooledBrowserType(self, "firefox")
+        self.webkit = _PooledBrowserType(self, "webkit")
+
+    async def _lease(self, engine: str, launch_opts: Dict[str, Any]) -> LeasedBrowser:
+        lease = self._pool.lease(launch_opts, engine=engine)
+        entry = await lease.__aenter__()
+        browser = LeasedBrowser(self._pool, entry, lease)
+        self._browsers.append(browser)
+        return browser
+
+    async def release_all(self) -> None:
+        """上传器异常退出、未调用 browser.close() 时兜底归还"""
+        for browser in self._browsers:
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.warning(f"[PlaywrightSession] release browser failed: {e}")
+        self._browsers.clear()
+
+
+@contextlib.asynccontextmanager
+async def playwright_session() -> AsyncIterator[Any]:
+    pool = _active_pool.get()
+    if pool is None:
+        from playwright.async_api import async_playwright
+
+        async with async_playwright() as playwright:
+            yield playwright
+        return
+
+    session = PooledPlaywright(pool)
+    try:
+        yield session
+    finally:
+        await session.release_all()
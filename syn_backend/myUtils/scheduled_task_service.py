@@ -27,6 +27,7 @@ class ScheduledTaskService:
         self.db_path = db_path
         self.running = False
         self.scheduler_thread = None
+        self._stop_event = threading.Event()
 
         # 注册任务处理器
         self.task_manager.register_handler(TaskType.DATA_COLLECT, self.handle_data_collect)
@@ -183,16 +184,18 @@ class ScheduledTaskService:
             return
 
         self.running = True
+        self._stop_event.clear()
         print("🚀 [Scheduler] 启动定时任务调度器...")
 
         # 设置调度
         self.setup_default_schedules()
 
-        # 启动调度线程
+        # 启动调度线程：等待到下一个任务的执行时间，而不是每分钟检查一次
         def run_scheduler():
             while self.running:
                 schedule.run_pending()
-                time.sleep(60)  # 每分钟检查一次
+                idle = schedule.idle_seconds()
+                self._stop_event.wait(60 if idle is None else min(max(idle, 0), 3600))
 
         self.scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
         self.scheduler_thread.start()
@@ -203,6 +206,7 @@ class ScheduledTaskService:
         """停止调度器"""
         print("🛑 [Scheduler] 停止调度器...")
         self.running = False
+        self._stop_event.set()
 
         if self.scheduler_thread:
             self.scheduler_thread.join(timeout=5)
@@ -1,15 +1,26 @@
 import sqlite3
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
 import json
 
 class TaskScheduler:
-    """发布任务调度器 - 自动执行待发布任务"""
+    """
+    发布任务调度器 - 自动执行待发布任务
+
+    每轮只查询最早的 schedule_time，等待到点（或被 notify() 唤醒）后再执行。
+    notify() 只能唤醒同一进程内的调度器，其他进程写入的任务最迟 IDLE_SECONDS 后被发现；
+    每轮至少等待 MIN_WAIT_SECONDS，到期任务执行失败时不会空转。
+    """
+
+    IDLE_SECONDS = 30
+    MIN_WAIT_SECONDS = 1.0
     
     def __init__(self, db_path='db/database.db'):
         self.db_path = db_path
         self.running = False
+        self._wake = threading.Event()
     
     def start(self):
         """启动调度器"""
@@ -18,8 +29,9 @@ class TaskScheduler:
         
         while self.running:
             try:
+                self._wake.clear()
                 self.check_and_execute_tasks()
-                time.sleep(30)  # 每30秒检查一次
+                self._wake.wait(self.seconds_until_next_task())
             except Exception as e:
                 print(f"❌ 调度器错误: {e}")
                 time.sleep(60)
@@ -27,7 +39,32 @@ class TaskScheduler:
     def stop(self):
         """停止调度器"""
         self.running = False
+        self._wake.set()
         print("🛑 任务调度器已停止")
+
+    def notify(self):
+        """有新任务或改期时唤醒调度器"""
+        self._wake.set()
+
+    def seconds_until_next_task(self) -> float:
+        """距离最早一个待执行任务的秒数，限制在 [MIN_WAIT_SECONDS, IDLE_SECONDS]"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                row = conn.execute("""
+                    SELECT MIN(COALESCE(schedule_time, datetime('now', 'localtime')))
+                    FROM publish_tasks
+                    WHERE status = 'pending' AND publish_mode = 'auto'
+                """).fetchone()
+        except Exception as e:
+            print(f"查询下次任务时间失败: {e}")
+            return self.IDLE_SECONDS
+        if not row or not row[0]:
+            return self.IDLE_SECONDS
+        try:
+            next_time = datetime.fromisoformat(str(row[0]).replace("T", " "))
+        except ValueError:
+            return self.IDLE_SECONDS
+        return min(max((next_time - datetime.now()).total_seconds(), self.MIN_WAIT_SECONDS), self.IDLE_SECONDS)
     
     def check_and_execute_tasks(self):
         """检查并执行待发布的任务"""
@@ -42,7 +79,7 @@ class TaskScheduler:
                     SELECT * FROM publish_tasks 
                     WHERE status = 'pending' 
                     AND publish_mode = 'auto'
-                    AND (schedule_time IS NULL OR schedule_time <= datetime('now', 'localtime'))
+                    AND (schedule_time IS NULL OR replace(schedule_time, 'T', ' ') <= datetime('now', 'localtime'))
                     LIMIT 10
                 """)
                 
@@ -4,7 +4,7 @@ import os
 import re
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 import httpx
 from sqlalchemy import text
@@ -324,7 +324,12 @@ class TikHubClient:
             )
         return videos, last_buffer
 
-    async def collect_kuaishou_posts(self, user_id: str, max_pages: int = 5) -> Tuple[List[Dict[str, Any]], int]:
+    async def collect_kuaishou_posts(
+        self,
+        user_id: str,
+        max_pages: int = 5,
+        stop_when: Optional[Callable[[List[Dict[str, Any]]], bool]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
         pcursor: Optional[str] = None
         videos: List[Dict[str, Any]] = []
         pages = 0
@@ -335,12 +340,20 @@ class TikHubClient:
                 break
             videos.extend(batch)
             pages += 1
+            # 增量采集：调用方判断本页已全部是无需刷新的旧内容时提前停止翻页
+            if stop_when is not None and stop_when(batch):
+                break
             if not next_cursor or next_cursor == pcursor:
                 break
             pcursor = next_cursor
         return videos, pages
 
-    async def collect_xiaohongshu_notes(self, user_id: str, max_pages: int = 5) -> Tuple[List[Dict[str, Any]], int]:
+    async def collect_xiaohongshu_notes(
+        self,
+        user_id: str,
+        max_pages: int = 5,
+        stop_when: Optional[Callable[[List[Dict[str, Any]]], bool]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
         cursor: Optional[str] = None
         videos: List[Dict[str, Any]] = []
         pages = 0
@@ -351,12 +364,20 @@ class TikHubClient:
                 break
             videos.extend(batch)
             pages += 1
+            # 增量采集：调用方判断本页已全部是无需刷新的旧内容时提前停止翻页
+            if stop_when is not None and stop_when(batch):
+                break
             if not next_cursor or next_cursor == cursor:
                 break
             cursor = next_cursor
         return videos, pages
 
-    async def collect_channels_home(self, username: str, max_pages: int = 5) -> Tuple[List[Dict[str, Any]], int]:
+    async def collect_channels_home(
+        self,
+        username: str,
+        max_pages: int = 5,
+        stop_when: Optional[Callable[[List[Dict[str, Any]]], bool]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
         last_buffer: Optional[str] = None
         videos: List[Dict[str, Any]] = []
         pages = 0
@@ -367,6 +388,9 @@ class TikHubClient:
                 break
             videos.extend(batch)
             pages += 1
+            # 增量采集：调用方判断本页已全部是无需刷新的旧内容时提前停止翻页
+            if stop_when is not None and stop_when(batch):
+                break
             if not next_cursor or next_cursor == last_buffer:
                 break
             last_buffer = next_cursor
@@ -14,7 +14,7 @@ from datetime import datetime
 from loguru import logger
 
 from myUtils.cookie_manager import cookie_manager
-from myUtils.fast_cookie_validator import FastCookieValidator
+from myUtils.fast_cookie_validator import FastCookieValidator, close_http_clients
 from myUtils.profile_manager import cleanup_profiles, cleanup_fingerprints, export_profile_storage_states, ensure_profiles_for_accounts
 from myUtils.login_status_checker import login_status_checker
 
@@ -42,35 +42,17 @@ class UserInfoSyncScheduler:
 
     async def _check_accounts_async(self, accounts):
         validator = FastCookieValidator()
-        tasks = []
-        for account in accounts:
-            tasks.append(
-                validator.validate_cookie_fast(
-                    account.get("platform"),
-                    account_file=account.get("cookie_file"),
-                    fallback=False,
-                )
-            )
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
         checked = 0
         valid = 0
         expired = 0
         details = []
 
-        for account, result in zip(accounts, results):
+        async for account, result in validator.validate_many(accounts, fallback=False):
             checked += 1
-            status = "expired"
-            error = None
-            elapsed_ms = None
-            source = None
-            if isinstance(result, Exception):
-                error = str(result)
-            else:
-                status = "valid" if result.get("status") == "valid" else "expired"
-                error = result.get("error")
-                elapsed_ms = result.get("elapsed_ms")
-                source = result.get("source")
+            status = "valid" if result.get("status") == "valid" else "expired"
+            error = result.get("error")
+            elapsed_ms = result.get("elapsed_ms")
+            source = result.get("source")
 
             cookie_manager.update_account_status(account.get("platform"), account.get("account_id"), status)
             if status == "valid":
@@ -91,6 +73,13 @@ class UserInfoSyncScheduler:
 
         return {"checked": checked, "valid": valid, "expired": expired, "details": details}
 
+    async def _check_accounts_sweep(self, accounts):
+        # asyncio.run() 每次新建事件循环：本轮复用连接池，结束时关闭
+        try:
+            return await self._check_accounts_async(accounts)
+        finally:
+            await close_http_clients()
+
     async def _collect_platform_videos_async(self, platform: str):
         try:
             import importlib
@@ -128,7 +117,7 @@ class UserInfoSyncScheduler:
             logger.info(
                 f"[AccountStatus] Start status check ({sample_size}/{len(accounts)}) - {datetime.now().isoformat()}"
             )
-            stats = asyncio.run(self._check_accounts_async(sample_accounts))
+            stats = asyncio.run(self._check_accounts_sweep(sample_accounts))
             logger.info(f"[AccountStatus] Status check done: {stats}")
             return stats
         except Exception as e:
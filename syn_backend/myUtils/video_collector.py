@@ -16,7 +16,7 @@ import json
 import re
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import httpx
 from playwright.async_api import Page, async_playwright, TimeoutError as PlaywrightTimeoutError
@@ -39,7 +39,20 @@ except ImportError:
     def now_beijing_naive():
         return dt.now()
 
-from myUtils.analytics_db import ensure_analytics_schema, upsert_video_analytics_by_key
+from myUtils.analytics_db import (
+    ensure_analytics_schema,
+    ensure_video_analytics_unique_key,
+    upsert_video_analytics_bulk,
+)
+from myUtils.collection_engine import (
+    CollectionCheckpoint,
+    CollectionCursorStore,
+    CollectionLimits,
+    CollectionSweep,
+    IncrementalPlan,
+    sweep_key,
+    tikhub_lane_key,
+)
 from myUtils.functional_route_manager import functional_route_manager
 from myUtils.cookie_manager import cookie_manager
 from myUtils.tikhub_client import get_tikhub_client, TikHubClient
@@ -57,6 +70,7 @@ DEFAULT_UA = os.getenv(
 class VideoDataCollector:
     def __init__(self):
         self.init_database()
+        self.cursor_store = CollectionCursorStore(DB_PATH)
 
     def _build_launch_args(self) -> Dict[str, Any]:
         """Build Playwright launch args with optional local Chrome path."""
@@ -136,6 +150,7 @@ class VideoDataCollector:
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_v_a_collected ON video_analytics(collected_at)")
                 
                 conn.commit()
+                ensure_video_analytics_unique_key(conn)
                 print("[Collector] Database initialized (consolidated)")
         except Exception as e:
             logger.error(f"[Collector] Database init failed at {db_str}: {e}")
@@ -165,23 +180,39 @@ class VideoDataCollector:
             logger.warning(f"Failed to recover ID by clicking: {e}")
         return None
 
-    def _proximity_match_and_recover(self, account_id: str, platform: str, scraped_video: Dict[str, Any]):
+    @staticmethod
+    def _match_task(title: str, scraped_tags: List[Any], tasks: List[sqlite3.Row]) -> Optional[sqlite3.Row]:
+        for task in tasks:
+            task_title = (task["title"] or "").strip()
+            task_tags = json.loads(task["tags"]) if task["tags"] else []
+
+            # 1. 标题完全匹配或高度相似
+            if title and task_title:
+                if title == task_title or title in task_title or task_title in title:
+                    return task
+
+            # 2. 标签匹配 (如果有)
+            if scraped_tags and task_tags:
+                overlap = set(scraped_tags) & set(task_tags)
+                if len(overlap) >= 1: # 至少有一个标签相同
+                    # 这里可以进一步结合标题或时间
+                    if not title or not task_title or (title[:5] == task_title[:5]):
+                        return task
+        return None
+
+    def _proximity_match_and_recover(self, account_id: str, platform: str, scraped_videos: List[Dict[str, Any]]):
         """
-        近似对比与 ID 回收逻辑。
+        近似对比与 ID 回收逻辑（按批处理）。
         对比维度：标题、预览图、发布时间、标签。
+        候选任务只查询一次，逐个视频匹配后用 executemany 一次性回写。
         """
+        videos = [v for v in scraped_videos if v.get("video_id")]
+        if not videos:
+            return
         try:
             with sqlite3.connect(DB_PATH) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
-                
-                title = scraped_video.get("title", "").strip()
-                publish_time_str = scraped_video.get("publish_time", "")
-                video_id = scraped_video.get("video_id")
-                scraped_tags = scraped_video.get("tags", [])
-                
-                if not video_id:
-                    return
 
                 # 查找匹配的任务 (24小时内或待处理的)
                 query = """
@@ -191,80 +222,80 @@ class VideoDataCollector:
                 ORDER BY created_at DESC LIMIT 50
                 """
                 cursor.execute(query, (platform, account_id))
-                tasks = cursor.fetchall()
+                candidates = cursor.fetchall()
+                if not candidates:
+                    return
 
-                best_match = None
-                for task in tasks:
-                    task_title = (task["title"] or "").strip()
-                    task_tags = json.loads(task["tags"]) if task["tags"] else []
-                    
-                    # 1. 标题完全匹配或高度相似
-                    if title and task_title:
-                        if title == task_title or title in task_title or task_title in title:
-                            best_match = task
-                            break
-                    
-                    # 2. 标签匹配 (如果有)
-                    if scraped_tags and task_tags:
-                        overlap = set(scraped_tags) & set(task_tags)
-                        if len(overlap) >= 1: # 至少有一个标签相同
-                            # 这里可以进一步结合标题或时间
-                            if not title or not task_title or (title[:5] == task_title[:5]):
-                                best_match = task
-                                break
-
-                if best_match:
-                    task_id = best_match["task_id"]
-                    cursor.execute(
+                updates = []
+                for video in videos:
+                    best_match = self._match_task(
+                        (video.get("title") or "").strip(), video.get("tags", []), candidates
+                    )
+                    if best_match is None:
+                        continue
+                    # 已回写的任务不再参与后续匹配（与逐条回写时的查询结果一致）
+                    candidates = [t for t in candidates if t["task_id"] != best_match["task_id"]]
+                    updates.append((video["video_id"], video.get("publish_time", ""), best_match["task_id"]))
+                    logger.info(
+                        f"Recovered video_id {video['video_id']} for platform {platform} matching task {best_match['task_id']}"
+                    )
+                    if not candidates:
+                        break
+
+                if updates:
+                    cursor.executemany(
                         "UPDATE publish_tasks SET video_id = ?, status = 'success', published_at = ? WHERE task_id = ?",
-                        (video_id, publish_time_str, task_id)
+                        updates,
                     )
-                    logger.info(f"Recovered video_id {video_id} for platform {platform} matching task {task_id}")
                     conn.commit()
-                    
-                    # 同时尝试同步到 manual_tasks (如果 task_id 对应)
-                    # ...
         except Exception as e:
             logger.error(f"Error in proximity matching: {e}")
 
-    def save_video_data(self, account_id: str, platform: str, video: Dict[str, Any]):
-        """Save video data using analytics_db helper and trigger recovery."""
-        # ✅ CRITICAL: Validate video_id before saving
-        video_id = video.get("video_id")
-        if not video_id or not str(video_id).strip():
-            logger.warning(f"[Collector] Skipping video without valid ID: {video.get('title', 'NO_TITLE')[:40]}")
-            return
-
-        data_to_save = {
-            "account_id": account_id,
-            "platform": platform,
-            "video_id": str(video_id).strip(),
-            "title": video.get("title") or "",
-            "thumbnail": video.get("cover_url") or "",
-            "publish_date": video.get("publish_time") or "",
-            "play_count": video.get("play_count") or 0,
-            "like_count": video.get("like_count") or 0,
-            "comment_count": video.get("comment_count") or 0,
-            "share_count": video.get("share_count") or 0,
-            "collect_count": video.get("collect_count") or 0,
-            "collected_at": now_beijing_naive().isoformat(),
-            "raw_data": video
-        }
+    def save_videos_batch(self, account_id: str, platform: str, videos: List[Dict[str, Any]]) -> int:
+        """
+        Save a page of videos in one transaction (native UPSERT) and run one
+        task-matching pass for the whole batch. Returns the number of videos saved.
+        """
+        collected_at = now_beijing_naive().isoformat()
+        records = []
+        for video in videos:
+            # ✅ CRITICAL: Validate video_id before saving
+            video_id = video.get("video_id")
+            if not video_id or not str(video_id).strip():
+                logger.warning(f"[Collector] Skipping video without valid ID: {(video.get('title') or 'NO_TITLE')[:40]}")
+                continue
+            records.append({
+                "account_id": account_id,
+                "platform": platform,
+                "video_id": str(video_id).strip(),
+                "title": video.get("title") or "",
+                "thumbnail": video.get("cover_url") or "",
+                "publish_date": video.get("publish_time") or "",
+                "play_count": video.get("play_count") or 0,
+                "like_count": video.get("like_count") or 0,
+                "comment_count": video.get("comment_count") or 0,
+                "share_count": video.get("share_count") or 0,
+                "collect_count": video.get("collect_count") or 0,
+                "collected_at": collected_at,
+                "raw_data": video
+            })
+        if not records:
+            return 0
 
         try:
-            upsert_video_analytics_by_key(
-                DB_PATH,
-                platform=platform,
-                video_id=data_to_save["video_id"],
-                data=data_to_save
-            )
-            logger.debug(f"[Collector] Saved {platform} video {data_to_save['video_id']}: {data_to_save['title'][:30] if data_to_save['title'] else 'NO_TITLE'}")
+            saved = upsert_video_analytics_bulk(DB_PATH, records, platform=platform)
+            logger.debug(f"[Collector] Saved {saved} {platform} videos for {account_id}")
         except Exception as e:
             logger.error(f"[Collector] Error saving to DB: {e}")
-            return
+            return 0
 
         # 触发 ID 回写到后端任务表
-        self._proximity_match_and_recover(account_id, platform, video)
+        self._proximity_match_and_recover(account_id, platform, videos)
+        return saved
+
+    def save_video_data(self, account_id: str, platform: str, video: Dict[str, Any]):
+        """Save a single video (see save_videos_batch)."""
+        self.save_videos_batch(account_id, platform, [video])
 
     async def collect_douyin_data_api(self, cookie_file: str, account_id: str) -> Dict[str, Any]:
         cookies = self._load_cookie_list(cookie_file)
@@ -286,10 +317,17 @@ class VideoDataCollector:
         has_more = True
         videos: List[Dict[str, Any]] = []
         rounds = 0
+        plan = await asyncio.to_thread(self.cursor_store.plan, "douyin", account_id)
+        from fastapi_app.core.rate_limiter import get_rate_limiter
+
+        limiter = get_rate_limiter()
 
         async with httpx.AsyncClient(headers=headers, timeout=30.0) as client:
             while has_more and rounds < 200:
                 rounds += 1
+                # 翻页请求计入所有进程共享的出站域名配额
+                if not await limiter.acquire(None, host=url, timeout=30):
+                    return {"success": False, "error": "Rate limited by outbound host quota"}
                 try:
                     resp = await client.get(url, params={"cursor": cursor, "count": 20, "status": 1})
                 except httpx.HTTPError as exc:  # noqa: BLE001
@@ -306,6 +344,7 @@ class VideoDataCollector:
                 data = resp.json()
                 payload = data.get("data") or data
                 aweme_list = payload.get("aweme_list") or []
+                page: List[Dict[str, Any]] = []
                 for item in aweme_list:
                     stats = item.get("statistics", {}) if isinstance(item, dict) else {}
                     title = item.get("desc") or item.get("title") or ""
@@ -314,7 +353,7 @@ class VideoDataCollector:
                         cover = item.get("video", {}).get("cover", {}).get("url_list", [None])[0]
                     except Exception:
                         cover = None
-                    videos.append(
+                    page.append(
                         {
                             "video_id": item.get("aweme_id") or "",
                             "title": title,
@@ -327,17 +366,17 @@ class VideoDataCollector:
                         }
                     )
 
+                videos.extend(plan.select(page))
                 has_more_raw = payload.get("has_more")
                 has_more = has_more_raw in (1, "1", True)
                 cursor = payload.get("cursor", cursor + 20)
+                if not plan.observe(page, cursor):
+                    break
 
-        saved_count = 0
-        for video in videos:
-            if video.get("video_id"):
-                self.save_video_data(account_id, "douyin", video)
-                saved_count += 1
+        saved_count = self.save_videos_batch(account_id, "douyin", videos)
+        await asyncio.to_thread(self.cursor_store.commit, plan)
 
-        return {"success": True, "count": saved_count, "videos": videos}
+        return {"success": True, "count": saved_count, "videos": videos, **plan.summary()}
 
     def _load_cookie_list(self, cookie_file: str) -> List[Dict[str, Any]]:
         """Load cookies from playwright storage or raw list."""
@@ -383,15 +422,18 @@ class VideoDataCollector:
         if user_id.isdigit():
             return {"success": False, "error": "TikHub requires Kuaishou eid (non-numeric). Update account.user_id"}
 
-        videos, pages = await client.collect_kuaishou_posts(user_id=user_id, max_pages=max_pages)
-        saved_count = 0
-        for video in videos:
-            if video.get("video_id"):
-                self.save_video_data(account["account_id"], "kuaishou", video)
-                saved_count += 1
+        plan = await asyncio.to_thread(self.cursor_store.plan, "kuaishou", account["account_id"])
+        videos, pages = await client.collect_kuaishou_posts(
+            user_id=user_id, max_pages=max_pages, stop_when=lambda batch: not plan.observe(batch)
+        )
+        videos = plan.select(videos)
+        saved_count = self.save_videos_batch(account["account_id"], "kuaishou", videos)
+        await asyncio.to_thread(self.cursor_store.commit, plan)
 
         return {
-            "success": saved_count > 0,
+            **plan.summary(),
+            # 增量模式下全部命中已知内容也算成功，不再回退到浏览器采集
+            "success": saved_count > 0 or plan.skipped > 0,
             "count": saved_count,
             "videos": videos,
             "pages": pages,
@@ -408,15 +450,18 @@ class VideoDataCollector:
         if not user_id:
             return {"success": False, "error": "TikHub requires Xiaohongshu user_id in account.user_id"}
 
-        videos, pages = await client.collect_xiaohongshu_notes(user_id=user_id, max_pages=max_pages)
-        saved_count = 0
-        for video in videos:
-            if video.get("video_id"):
-                self.save_video_data(account["account_id"], "xiaohongshu", video)
-                saved_count += 1
+        plan = await asyncio.to_thread(self.cursor_store.plan, "xiaohongshu", account["account_id"])
+        videos, pages = await client.collect_xiaohongshu_notes(
+            user_id=user_id, max_pages=max_pages, stop_when=lambda batch: not plan.observe(batch)
+        )
+        videos = plan.select(videos)
+        saved_count = self.save_videos_batch(account["account_id"], "xiaohongshu", videos)
+        await asyncio.to_thread(self.cursor_store.commit, plan)
 
         return {
-            "success": saved_count > 0,
+            **plan.summary(),
+            # 增量模式下全部命中已知内容也算成功，不再回退到浏览器采集
+            "success": saved_count > 0 or plan.skipped > 0,
             "count": saved_count,
             "videos": videos,
             "pages": pages,
@@ -433,21 +478,46 @@ class VideoDataCollector:
         if not username:
             return {"success": False, "error": "TikHub requires WeChat Channels username in account.user_id"}
 
-        videos, pages = await client.collect_channels_home(username=username, max_pages=max_pages)
-        saved_count = 0
-        for video in videos:
-            if video.get("video_id"):
-                self.save_video_data(account["account_id"], "channels", video)
-                saved_count += 1
+        plan = await asyncio.to_thread(self.cursor_store.plan, "channels", account["account_id"])
+        videos, pages = await client.collect_channels_home(
+            username=username, max_pages=max_pages, stop_when=lambda batch: not plan.observe(batch)
+        )
+        videos = plan.select(videos)
+        saved_count = self.save_videos_batch(account["account_id"], "channels", videos)
+        await asyncio.to_thread(self.cursor_store.commit, plan)
 
         return {
-            "success": saved_count > 0,
+            **plan.summary(),
+            # 增量模式下全部命中已知内容也算成功，不再回退到浏览器采集
+            "success": saved_count > 0 or plan.skipped > 0,
             "count": saved_count,
             "videos": videos,
             "pages": pages,
             "source": "tikhub",
         }
 
+    async def _scroll_known_ids(self, platform: str, account_id: str) -> Optional[set]:
+        """Stored video ids for an incremental scroll, or None when a full refresh is due."""
+        try:
+            plan: IncrementalPlan = await asyncio.to_thread(self.cursor_store.plan, platform, account_id)
+        except Exception as exc:  # noqa: BLE001
+            logger.debug(f"[Collector] Load collection cursor failed: {exc}")
+            return None
+        if plan.is_full:
+            return None
+        return plan.known_ids
+
+    async def _record_browser_pass(self, platform: str, account_id: str, result: Dict[str, Any]) -> None:
+        """Advance the account's collection cursor after a successful scroll-based pass."""
+        if not result or not result.get("success"):
+            return
+        try:
+            plan = await asyncio.to_thread(self.cursor_store.plan, platform, account_id)
+            plan.observe(result.get("videos") or [])
+            await asyncio.to_thread(self.cursor_store.commit, plan)
+        except Exception as exc:  # noqa: BLE001
+            logger.debug(f"[Collector] Save collection cursor failed: {exc}")
+
     async def _collect_with_scroll(
         self,
         page: Page,
@@ -456,10 +526,13 @@ class VideoDataCollector:
         scroll_script: Optional[str] = None,
         max_rounds: int = 30,
         wait_ms: int = 800,
+        known_ids: Optional[set] = None,
     ) -> List[Dict[str, Any]]:
         """
         Repeatedly extract items while scrolling to load more results.
         Stops after two rounds with no new items or hitting max_rounds.
+        With known_ids (incremental run), also stops once a scroll only
+        surfaces videos that are already stored.
         """
         collected: Dict[str, Dict[str, Any]] = {}
         idle_rounds = 0
@@ -475,11 +548,14 @@ class VideoDataCollector:
                 items = []
 
             new_items = 0
+            unseen_items = 0
             for item in items:
                 video_id = item.get("video_id") or item.get("id")
                 if video_id and video_id not in collected:
                     collected[video_id] = item
                     new_items += 1
+                    if known_ids is None or str(video_id) not in known_ids:
+                        unseen_items += 1
 
             if new_items == 0:
                 idle_rounds += 1
@@ -495,6 +571,8 @@ class VideoDataCollector:
 
             if idle_rounds >= 2:
                 break
+            if known_ids is not None and new_items and not unseen_items and len(collected) > new_items:
+                break
 
         return list(collected.values())
 
@@ -548,6 +626,7 @@ class VideoDataCollector:
                         });
                     }
                     """,
+                    known_ids=await self._scroll_known_ids("kuaishou", account_id),
                 )
 
                 # 增强型采集：如果缺少 ID，尝试通过点击回收
@@ -574,11 +653,7 @@ class VideoDataCollector:
                     except Exception as e:
                         logger.warning(f"Failed to recover ID for video {video.get('title')}: {e}")
 
-                saved_count = 0
-                for video in videos:
-                    if video.get("video_id"):
-                        self.save_video_data(account_id, "kuaishou", video)
-                        saved_count += 1
+                saved_count = self.save_videos_batch(account_id, "kuaishou", videos)
 
                 if saved_count > 0:
                     print(f"[Kuaishou] Collected {saved_count} videos")
@@ -587,11 +662,7 @@ class VideoDataCollector:
                 # Fallback to click-to-detail if no IDs found
                 print("[Kuaishou] No ids from DOM, trying click-to-detail fallback...")
                 click_videos = await self._collect_kuaishou_ids_by_click(page, max_items=30)
-                click_saved = 0
-                for video in click_videos:
-                    if video.get("video_id"):
-                        self.save_video_data(account_id, "kuaishou", video)
-                        click_saved += 1
+                click_saved = self.save_videos_batch(account_id, "kuaishou", click_videos)
                 
                 if click_saved > 0:
                     return {"success": True, "count": click_saved, "videos": click_videos}
@@ -660,13 +731,10 @@ class VideoDataCollector:
                     """,
                     max_rounds=40,
                     wait_ms=1200,
+                    known_ids=await self._scroll_known_ids("xiaohongshu", account_id),
                 )
 
-                saved_count = 0
-                for video in videos:
-                    if video.get("video_id"):
-                        self.save_video_data(account_id, "xiaohongshu", video)
-                        saved_count += 1
+                saved_count = self.save_videos_batch(account_id, "xiaohongshu", videos)
 
                 print(f"[XHS] Collected {saved_count} videos")
                 return {"success": True, "count": saved_count, "videos": videos}
@@ -679,7 +747,7 @@ class VideoDataCollector:
             finally:
                 await browser.close()
 
-    async def collect_douyin_data(self, cookie_file: str, account_id: str) -> Dict[str, Any]:
+    async def collect_douyin_data(self, cookie_file: str, account_id: str, try_api: bool = True) -> Dict[str, Any]:
         """
         Collect Douyin videos for the given account.
 
@@ -700,10 +768,11 @@ class VideoDataCollector:
             return {"success": False, "error": "Cookie file not found"}
 
         # Prefer API crawling for speed and stability
-        api_result = await self.collect_douyin_data_api(cookie_file, account_id)
-        if api_result.get("success") and api_result.get("count", 0) > 0:
-            return api_result
-        else:
+        # (try_api=False: the caller already ran the API path in its own concurrency lane)
+        if try_api:
+            api_result = await self.collect_douyin_data_api(cookie_file, account_id)
+            if api_result.get("success") and (api_result.get("count", 0) > 0 or api_result.get("unchanged", 0) > 0):
+                return api_result
             # success=true but count=0 is a common case; still fallback
             print(f"[Douyin] API collect failed, fallback to page: {api_result.get('error')}")
 
@@ -754,14 +823,11 @@ class VideoDataCollector:
                                 };
                             } ).filter(v => v.title);
                         }
-                        """
+                        """,
+                        known_ids=await self._scroll_known_ids("douyin", account_id),
                     )
 
-                saved_count = 0
-                for video in videos:
-                    if video.get("video_id"):  # ✅ Changed from title to video_id
-                        self.save_video_data(account_id, "douyin", video)
-                        saved_count += 1
+                saved_count = self.save_videos_batch(account_id, "douyin", videos)
 
                 if saved_count > 0:
                     print(f"[Douyin] Page collect finished: {saved_count} videos")
@@ -770,11 +836,7 @@ class VideoDataCollector:
                 # Fallback: click each video card to navigate to work-detail page and extract ID from URL.
                 print("[Douyin] No ids from DOM, trying click-to-detail fallback...")
                 click_videos = await self._collect_douyin_ids_by_click(page, max_items=50)
-                click_saved = 0
-                for video in click_videos:
-                    if video.get("video_id"):
-                        self.save_video_data(account_id, "douyin", video)
-                        click_saved += 1
+                click_saved = self.save_videos_batch(account_id, "douyin", click_videos)
 
                 if click_saved > 0:
                     print(f"[Douyin] Collected {click_saved} videos (click fallback)")
@@ -1046,13 +1108,10 @@ class VideoDataCollector:
                     """,
                     max_rounds=40,
                     wait_ms=1200,
+                    known_ids=await self._scroll_known_ids("channels", account_id),
                 )
 
-                saved_count = 0
-                for video in videos:
-                    if video.get("video_id"):
-                        self.save_video_data(account_id, "channels", video)
-                        saved_count += 1
+                saved_count = self.save_videos_batch(account_id, "channels", videos)
 
                 print(f"[Channels] Collected {saved_count} videos")
                 return {"success": True, "count": saved_count, "videos": videos}
@@ -1164,19 +1223,89 @@ class VideoDataCollector:
         return results
 
 
+    async def _collect_account(
+        self,
+        account: Dict[str, Any],
+        tikhub: Optional[TikHubClient],
+        sweep: CollectionSweep,
+    ) -> Optional[Dict[str, Any]]:
+        """Collect one account, taking an API/TikHub slot before any browser slot."""
+        platform = account["platform"]
+        account_id = account["account_id"]
+        cookie_file = account["cookie_file"]
+
+        logger.info(f"[Collector] Collect account: {account['name']} ({platform})")
+
+        if platform == "douyin":
+            async with sweep.slot("api", platform):
+                result = await self.collect_douyin_data_api(cookie_file, account_id)
+            if result.get("success") and (result.get("count", 0) > 0 or result.get("unchanged", 0) > 0):
+                return result
+            logger.info(f"[Douyin] API collect failed, fallback to page: {result.get('error')}")
+            async with sweep.slot("browser", platform):
+                result = await self.collect_douyin_data(cookie_file, account_id, try_api=False)
+            await self._record_browser_pass(platform, account_id, result)
+            return result
+
+        collectors = {
+            "kuaishou": ("Kuaishou", self.collect_kuaishou_data_tikhub, self.collect_kuaishou_data),
+            "xiaohongshu": ("XHS", self.collect_xiaohongshu_data_tikhub, self.collect_xiaohongshu_data),
+            "channels": ("Channels", self.collect_channels_data_tikhub, self.collect_channels_data),
+        }
+        if platform not in collectors:
+            return None
+        label, via_tikhub, via_browser = collectors[platform]
+
+        if tikhub:
+            async with sweep.slot("tikhub", tikhub_lane_key(tikhub.api_key)):
+                result = await via_tikhub(account, tikhub, TIKHUB_MAX_PAGES)
+            if result.get("success"):
+                return result
+            logger.warning(f"[{label}] TikHub failed, falling back: {result.get('error')}")
+        async with sweep.slot("browser", platform):
+            result = await via_browser(cookie_file, account_id)
+        await self._record_browser_pass(platform, account_id, result)
+        return result
+
     async def collect_all_accounts(
         self,
         account_ids: Optional[List[str]] = None,
         platform_filter: Optional[str] = None,
+        *,
+        resume: bool = True,
+        limits: Optional[CollectionLimits] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], Any]] = None,
     ) -> Dict[str, Any]:
-        """Collect videos for all valid accounts, optionally filtered."""
+        """
+        Collect videos for all valid accounts, optionally filtered.
+
+        Accounts run concurrently, bounded per platform (API / browser lanes) and
+        per TikHub key; a sweep cut short by the global deadline resumes from its
+        checkpoint on the next call unless resume=False.
+        """
         from myUtils.cookie_manager import cookie_manager
 
         allowed_ids = set(account_ids) if account_ids else None
         platform_name = platform_filter.lower() if platform_filter else None
 
-        accounts = cookie_manager.list_flat_accounts()
-        results: Dict[str, Any] = {"total": 0, "success": 0, "failed": 0, "details": []}
+        accounts = [
+            account for account in cookie_manager.list_flat_accounts()
+            if account.get("status") == "valid"
+            and account.get("cookie_file")
+            and (not allowed_ids or account.get("account_id") in allowed_ids)
+            and (not platform_name or account.get("platform") == platform_name)
+        ]
+
+        key = sweep_key("collect_all", platform_name, sorted(allowed_ids) if allowed_ids else None)
+        checkpoint = CollectionCheckpoint(DB_PATH)
+        if not resume:
+            await asyncio.to_thread(checkpoint.clear, key)
+        sweep = CollectionSweep(
+            key,
+            limits=limits,
+            checkpoint=checkpoint,
+            progress_callback=progress_callback,
+        )
 
         tikhub_client = get_tikhub_client()
 
@@ -1189,74 +1318,10 @@ class VideoDataCollector:
                 yield opened
 
         async with _maybe_tikhub(tikhub_client) as tikhub:
-            for account in accounts:
-                if account.get("status") != "valid" or not account.get("cookie_file"):
-                    continue
-                if allowed_ids and account.get("account_id") not in allowed_ids:
-                    continue
-                if platform_name and account.get("platform") != platform_name:
-                    continue
-
-                platform = account["platform"]
-                account_id = account["account_id"]
-                cookie_file = account["cookie_file"]
-
-                print("\n" + "=" * 50)
-                print(f"[Collector] Collect account: {account['name']} ({platform})")
-                print("=" * 50)
-
-                result: Optional[Dict[str, Any]] = None
-                if platform == "kuaishou":
-                    if tikhub:
-                        result = await self.collect_kuaishou_data_tikhub(account, tikhub, TIKHUB_MAX_PAGES)
-                        if result.get("success"):
-                            pass
-                        else:
-                            logger.warning(f"[Kuaishou] TikHub failed, falling back: {result.get('error')}")
-                            result = await self.collect_kuaishou_data(cookie_file, account_id)
-                    else:
-                        result = await self.collect_kuaishou_data(cookie_file, account_id)
-                elif platform == "xiaohongshu":
-                    if tikhub:
-                        result = await self.collect_xiaohongshu_data_tikhub(account, tikhub, TIKHUB_MAX_PAGES)
-                        if result.get("success"):
-                            pass
-                        else:
-                            logger.warning(f"[XHS] TikHub failed, falling back: {result.get('error')}")
-                            result = await self.collect_xiaohongshu_data(cookie_file, account_id)
-                    else:
-                        result = await self.collect_xiaohongshu_data(cookie_file, account_id)
-                elif platform == "douyin":
-                    result = await self.collect_douyin_data(cookie_file, account_id)
-                elif platform == "channels":
-                    if tikhub:
-                        result = await self.collect_channels_data_tikhub(account, tikhub, TIKHUB_MAX_PAGES)
-                        if result.get("success"):
-                            pass
-                        else:
-                            logger.warning(f"[Channels] TikHub failed, falling back: {result.get('error')}")
-                            result = await self.collect_channels_data(cookie_file, account_id)
-                    else:
-                        result = await self.collect_channels_data(cookie_file, account_id)
-
-                if result:
-                    results["total"] += 1
-                    if result.get("success"):
-                        results["success"] += 1
-                    else:
-                        results["failed"] += 1
-
-                    results["details"].append(
-                        {
-                            "account": account["name"],
-                            "account_id": account_id,
-                            "platform": platform,
-                            **result,
-                        }
-                    )
-
-        return results
-
+            return await sweep.run(
+                accounts,
+                lambda account, current: self._collect_account(account, tikhub, current),
+            )
 
 collector = VideoDataCollector()
 
@@ -7,12 +7,13 @@ import time
 import logging
 from pathlib import Path
 from datetime import datetime
-from playwright.async_api import async_playwright, Page
+from playwright.async_api import Page
 from typing import Dict, Any, Optional
 # from config.conf import LOCAL_CHROME_PATH
 from utils.base_social_media import set_init_script, HEADLESS_FLAG
 from myUtils.browser_context import build_context_options, build_browser_args
 from myUtils.close_guide import try_close_guide
+from myUtils.playwright_session import playwright_session
 from utils.video_probe import probe_video_metadata
 from ..base import BasePlatform
 from ..path_utils import resolve_cookie_file, resolve_video_file
@@ -182,7 +183,7 @@ class DouyinUpload(BasePlatform):
             上传结果
         """
         try:
-            async with async_playwright() as playwright:
+            async with playwright_session() as playwright:
                 logger.info(f"[DouyinUpload] 实现版本: {DOUYIN_PLATFORM_UPLOAD_BUILD_TAG} (file={__file__})")
 
                 # 🆕 标题清理逻辑（从旧版迁移）
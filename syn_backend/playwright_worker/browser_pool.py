@@ -0,0 +1,378 @@
+"""
+Playwright Worker 浏览器池
+在 Worker 进程内常驻少量 Chromium，按账号分发隔离的 BrowserContext
+
+- 按启动参数（engine / headless / executable_path / proxy）分组，每组最多 N 个热浏览器
+- 每个浏览器创建满 max_contexts 个 context 后回收（避免长期运行的内存泄漏）
+- 可选内存上限：通过 CDP SystemInfo.getProcessInfo + psutil 统计浏览器进程 RSS
+- 命中/未命中/回收等指标通过 stats() 暴露
+- lease() 按调用方自带的启动参数借出整个浏览器（发布 Worker 的上传器自行创建 context）
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from loguru import logger
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw.strip())
+    except ValueError:
+        return default
+
+
+@dataclass
+class _PooledBrowser:
+    key: str
+    browser: Any
+    launched_at: float = field(default_factory=time.monotonic)
+    last_used_at: float = field(default_factory=time.monotonic)
+    contexts_created: int = 0
+    active_contexts: int = 0
+    retiring: bool = False
+    retire_reason: Optional[str] = None
+    last_rss_mb: Optional[float] = None
+
+    def is_connected(self) -> bool:
+        try:
+            return bool(self.browser.is_connected())
+        except Exception:
+            return False
+
+
+class BrowserPool:
+    """Worker 内共享的热浏览器池"""
+
+    def __init__(
+        self,
+        *,
+        max_browsers_per_key: int = 2,
+        max_contexts_per_browser: int = 50,
+        max_concurrent_contexts: int = 10,
+        max_browser_memory_mb: int = 0,
+        memory_check_every: int = 10,
+        idle_timeout: int = 300,
+    ):
+        self.max_browsers_per_key = max(1, max_browsers_per_key)
+        self.max_contexts_per_browser = max(1, max_contexts_per_browser)
+        self.max_concurrent_contexts = max(1, max_concurrent_contexts)
+        # 0 表示不做内存检查
+        self.max_browser_memory_mb = max(0, max_browser_memory_mb)
+        self.memory_check_every = max(1, memory_check_every)
+        self.idle_timeout = max(0, idle_timeout)
+
+        self._playwright = None
+        self._playwright_lock: Optional[asyncio.Lock] = None
+        self._browsers: Dict[str, List[_PooledBrowser]] = {}
+        self._launching: Dict[str, int] = {}
+        self._cond: Optional[asyncio.Condition] = None
+        self._closed = False
+        self._metrics: Dict[str, float] = {
+            "hits": 0,
+            "misses": 0,
+            "waits": 0,
+            "launches": 0,
+            "launch_failures": 0,
+            "contexts_created": 0,
+            "recycled_max_contexts": 0,
+            "recycled_memory": 0,
+            "recycled_disconnected": 0,
+            "evicted_idle": 0,
+            "launch_seconds": 0.0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "BrowserPool":
+        return cls(
+            max_browsers_per_key=_env_int("PLAYWRIGHT_POOL_BROWSERS", 2),
+            max_contexts_per_browser=_env_int("PLAYWRIGHT_POOL_MAX_CONTEXTS", 50),
+            max_concurrent_contexts=_env_int("PLAYWRIGHT_POOL_CONCURRENT_CONTEXTS", 10),
+            max_browser_memory_mb=_env_int("PLAYWRIGHT_POOL_MAX_MEMORY_MB", 1536),
+            memory_check_every=_env_int("PLAYWRIGHT_POOL_MEMORY_CHECK_EVERY", 10),
+            idle_timeout=_env_int("PLAYWRIGHT_POOL_IDLE_TIMEOUT", 300),
+        )
+
+    def _condition(self) -> asyncio.Condition:
+        # 延迟创建，确保绑定到 Worker 的运行中事件循环
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def _ensure_playwright(self):
+        if self._playwright is None:
+            # 多个未命中同时到达时只启动一个 Playwright driver
+            if self._playwright_lock is None:
+                self._playwright_lock = asyncio.Lock()
+            async with self._playwright_lock:
+                if self._playwright is None:
+                    from playwright.async_api import async_playwright
+
+                    self._playwright = await async_playwright().start()
+        return self._playwright
+
+    @staticmethod
+    def _pool_key(launch_opts: Dict[str, Any], engine: str = "chromium") -> str:
+        return json.dumps({"engine": engine, **launch_opts}, sort_keys=True, default=str)
+
+    def _pick_browser(self, key: str) -> Optional[_PooledBrowser]:
+        candidates = [
+            b for b in self._browsers.get(key, [])
+            if not b.retiring and b.is_connected() and b.active_contexts < self.max_concurrent_contexts
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda b: b.active_contexts)
+
+    def _browser_count(self, key: str) -> int:
+        alive = sum(1 for b in self._browsers.get(key, []) if not b.retiring)
+        return alive + self._launching.get(key, 0)
+
+    async def _reserve_browser(self, key: str, launch_opts: Dict[str, Any], engine: str = "chromium") -> _PooledBrowser:
+        cond = self._condition()
+        waited = False
+        async with cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("BrowserPool is closed")
+                self._drop_disconnected(key)
+                entry = self._pick_browser(key)
+                if entry is not None:
+                    entry.active_contexts += 1
+                    entry.last_used_at = time.monotonic()
+                    self._metrics["hits"] += 1
+                    return entry
+                if self._browser_count(key) < self.max_browsers_per_key:
+                    self._launching[key] = self._launching.get(key, 0) + 1
+                    break
+                if not waited:
+                    self._metrics["waits"] += 1
+                    waited = True
+                await cond.wait()
+
+        # 在锁外启动浏览器，其它账号可继续使用已有的热浏览器
+        self._metrics["misses"] += 1
+        started = time.monotonic()
+        try:
+            pw = await self._ensure_playwright()
+            browser = await getattr(pw, engine).launch(**launch_opts)
+        except Exception:
+            self._metrics["launch_failures"] += 1
+            async with cond:
+                self._launching[key] -= 1
+                cond.notify_all()
+            raise
+        finally:
+            self._metrics["launch_seconds"] += time.monotonic() - started
+
+        entry = _PooledBrowser(key=key, browser=browser)
+        entry.active_contexts = 1
+        self._metrics["launches"] += 1
+        async with cond:
+            self._launching[key] -= 1
+            self._browsers.setdefault(key, []).append(entry)
+            cond.notify_all()
+        logger.info(f"[BrowserPool] Launched browser ({len(self._browsers[key])}/{self.max_browsers_per_key} for key)")
+        return entry
+
+    def _drop_disconnected(self, key: str) -> None:
+        entries = self._browsers.get(key, [])
+        for entry in list(entries):
+            if not entry.is_connected():
+                entries.remove(entry)
+                self._metrics["recycled_disconnected"] += 1
+                logger.warning("[BrowserPool] Dropped disconnected browser")
+
+    async def _browser_rss_mb(self, entry: _PooledBrowser) -> Optional[float]:
+        """通过 CDP 获取浏览器全部进程 PID，再用 psutil 汇总 RSS（任一不可用则返回 None）"""
+        try:
+            import psutil
+        except ImportError:
+            return None
+        session = None
+        try:
+            session = await entry.browser.new_browser_cdp_session()
+            info = await session.send("SystemInfo.getProcessInfo")
+            total = 0
+            for proc in info.get("processInfo") or []:
+                with contextlib.suppress(Exception):
+                    total += psutil.Process(int(proc["id"])).memory_info().rss
+            return total / (1024 * 1024) if total else None
+        except Exception as e:
+            logger.debug(f"[BrowserPool] Memory probe failed: {e}")
+            return None
+        finally:
+            if session is not None:
+                with contextlib.suppress(Exception):
+                    await session.detach()
+
+    async def _release(self, entry: _PooledBrowser) -> None:
+        check_memory = (
+            self.max_browser_memory_mb > 0
+            and not entry.retiring
+            and entry.contexts_created % self.memory_check_every == 0
+        )
+        if check_memory:
+            rss = await self._browser_rss_mb(entry)
+            entry.last_rss_mb = rss
+            if rss is not None and rss > self.max_browser_memory_mb:
+                entry.retiring = True
+                entry.retire_reason = f"memory {rss:.0f}MB > {self.max_browser_memory_mb}MB"
+                self._metrics["recycled_memory"] += 1
+
+        close_now = False
+        cond = self._condition()
+        async with cond:
+            entry.active_contexts -= 1
+            entry.last_used_at = time.monotonic()
+            if not entry.retiring and entry.contexts_created >= self.max_contexts_per_browser:
+                entry.retiring = True
+                entry.retire_reason = f"served {entry.contexts_created} contexts"
+                self._metrics["recycled_max_contexts"] += 1
+            if entry.retiring and entry.active_contexts <= 0:
+                entries = self._browsers.get(entry.key, [])
+                if entry in entries:
+                    entries.remove(entry)
+                close_now = True
+            cond.notify_all()
+
+        if close_now:
+            logger.info(f"[BrowserPool] Recycling browser: {entry.retire_reason}")
+            await self._close_browser(entry)
+
+    @staticmethod
+    async def _close_browser(entry: _PooledBrowser) -> None:
+        try:
+            await entry.browser.close()
+        except Exception as e:
+            logger.warning(f"[BrowserPool] Close browser failed: {e}")
+
+    @contextlib.asynccontextmanager
+    async def context(
+        self,
+        *,
+        platform: str,
+        account_id: Optional[str],
+        storage_state: Any = None,
+        headless: bool = True,
+    ) -> AsyncIterator[Any]:
+        """
+        从池中借出一个隔离的 BrowserContext（已加载 storage_state / 指纹 / stealth 脚本）。
+        退出时关闭 context 并把浏览器归还给池。
+        """
+        from myUtils.playwright_context_factory import apply_context_init_scripts, prepare_ephemeral_context
+
+        launch_opts, context_opts, fingerprint, policy = prepare_ephemeral_context(
+            platform=platform,
+            account_id=account_id,
+            headless=headless,
+            storage_state=storage_state,
+        )
+        key = self._pool_key(launch_opts)
+        entry = await self._reserve_browser(key, launch_opts)
+        context = None
+        try:
+            context = await entry.browser.new_context(**context_opts)
+            self.note_context(entry)
+            await apply_context_init_scripts(context, fingerprint, policy)
+            yield context
+        finally:
+            if context is not None:
+                with contextlib.suppress(Exception):
+                    await context.close()
+            await self._release(entry)
+
+    @contextlib.asynccontextmanager
+    async def lease(self, launch_opts: Dict[str, Any], *, engine: str = "chromium") -> AsyncIterator[_PooledBrowser]:
+        """
+        借出一个热浏览器（同样按启动参数分组），由调用方自行 new_context；
+        调用方应通过 note_context() 计数，以便按 max_contexts 回收
+        """
+        entry = await self._reserve_browser(self._pool_key(launch_opts, engine), launch_opts, engine)
+        try:
+            yield entry
+        finally:
+            await self._release(entry)
+
+    def note_context(self, entry: _PooledBrowser) -> None:
+        entry.contexts_created += 1
+        self._metrics["contexts_created"] += 1
+
+    async def evict_idle(self) -> int:
+        """关闭空闲超过 idle_timeout 的浏览器（每组保留 1 个热浏览器）"""
+        if self.idle_timeout <= 0:
+            return 0
+        now = time.monotonic()
+        victims: List[_PooledBrowser] = []
+        cond = self._condition()
+        async with cond:
+            for entries in self._browsers.values():
+                idle = [
+                    b for b in entries
+                    if b.active_contexts <= 0 and now - b.last_used_at > self.idle_timeout
+                ]
+                keep_one = len(idle) == len(entries)
+                for b in idle[1:] if keep_one else idle:
+                    entries.remove(b)
+                    victims.append(b)
+            self._metrics["evicted_idle"] += len(victims)
+        for b in victims:
+            await self._close_browser(b)
+        if victims:
+            logger.info(f"[BrowserPool] Evicted {len(victims)} idle browser(s)")
+        return len(victims)
+
+    async def close(self) -> None:
+        cond = self._condition()
+        async with cond:
+            self._closed = True
+            entries = [b for group in self._browsers.values() for b in group]
+            self._browsers.clear()
+            cond.notify_all()
+        for b in entries:
+            await self._close_browser(b)
+        if self._playwright is not None:
+            with contextlib.suppress(Exception):
+                await self._playwright.stop()
+            self._playwright = None
+
+    def stats(self) -> Dict[str, Any]:
+        browsers = [b for group in self._browsers.values() for b in group]
+        lookups = self._metrics["hits"] + self._metrics["misses"]
+        return {
+            **self._metrics,
+            "launch_seconds": round(self._metrics["launch_seconds"], 3),
+            "hit_rate": round(self._metrics["hits"] / lookups, 4) if lookups else None,
+            "browsers": len(browsers),
+            "keys": len(self._browsers),
+            "active_contexts": sum(b.active_contexts for b in browsers),
+            "config": {
+                "max_browsers_per_key": self.max_browsers_per_key,
+                "max_contexts_per_browser": self.max_contexts_per_browser,
+                "max_concurrent_contexts": self.max_concurrent_contexts,
+                "max_browser_memory_mb": self.max_browser_memory_mb,
+                "idle_timeout": self.idle_timeout,
+            },
+            "details": [
+                {
+                    "contexts_created": b.contexts_created,
+                    "active_contexts": b.active_contexts,
+                    "age_seconds": round(time.monotonic() - b.launched_at, 1),
+                    "retiring": b.retiring,
+                    "rss_mb": round(b.last_rss_mb, 1) if b.last_rss_mb is not None else None,
+                }
+                for b in browsers
+            ],
+        }
+
+
+browser_pool = BrowserPool.from_env()
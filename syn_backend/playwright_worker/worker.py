@@ -336,6 +336,14 @@ async def debug_playwright(headless: bool | None = None):
         return JSONResponse(status_code=500, content={"success": False, "error": err})
 
 
+@app.get("/browser-pool/stats")
+async def browser_pool_stats():
+    """浏览器池指标（命中/未命中/回收/活跃 context）"""
+    from playwright_worker.browser_pool import browser_pool
+
+    return {"success": True, "data": browser_pool.stats()}
+
+
 @app.post("/creator/open")
 async def open_creator_center(req: OpenCreatorCenterRequest):
     """
@@ -891,36 +899,27 @@ async def _check_single_account_login_worker(account_id: str, platform: str, coo
         result["error"] = f"读取Cookie文件失败: {str(e)}"
         return result
 
-    # 直接在 Worker 内部启动浏览器检查
-    browser = None
-    context = None
-    page = None
+    # 从 Worker 浏览器池借用热浏览器，每个账号只创建一个隔离 context
     try:
-        from playwright.async_api import async_playwright
-        from myUtils.playwright_context_factory import create_context_with_policy
-
-        pw = await async_playwright().start()
+        from playwright_worker.browser_pool import browser_pool
 
-        # 使用 create_context_with_policy 创建浏览器上下文
-        browser, context, fingerprint, policy = await create_context_with_policy(
-            pw,
+        async with browser_pool.context(
             platform=platform,
             account_id=account_id,
-            headless=True,
             storage_state=storage_state,
-        )
-
-        page = await context.new_page()
+            headless=True,
+        ) as context:
+            page = await context.new_page()
 
-        # 访问创作者中心
-        logger.info(f"[Worker] 直接检查 {platform} 账号: {account_id}")
-        response = await page.goto(creator_url, wait_until="domcontentloaded", timeout=30000)
+            # 访问创作者中心
+            logger.info(f"[Worker] 直接检查 {platform} 账号: {account_id}")
+            await page.goto(creator_url, wait_until="domcontentloaded", timeout=30000)
 
-        # 等待1-2秒让页面加载/重定向
-        wait_time = random.uniform(1, 2)
-        await asyncio.sleep(wait_time)
+            # 等待1-2秒让页面加载/重定向
+            wait_time = random.uniform(1, 2)
+            await asyncio.sleep(wait_time)
 
-        final_url = page.url
+            final_url = page.url
 
         # 判断登录状态: 如果URL包含login则表示掉线
         if "login" in final_url.lower():
@@ -940,17 +939,6 @@ async def _check_single_account_login_worker(account_id: str, platform: str, coo
         result["login_status"] = "error"
         result["error"] = str(e)
         logger.error(f"[Worker] {account_id} 检查失败: {e}")
-    finally:
-        # 清理资源
-        try:
-            if page:
-                await page.close()
-            if context:
-                await context.close()
-            if browser:
-                await browser.close()
-        except Exception as e:
-            logger.warning(f"[Worker] 清理资源失败: {e}")
 
     return result
 
@@ -1329,6 +1317,8 @@ async def startup_event():
     logger.info(f"Supported Platforms: {list(PLATFORM_ADAPTERS.keys())}")
     logger.info("=" * 60)
 
+    from playwright_worker.browser_pool import browser_pool
+
     async def _periodic_cleanup():
         while True:
             try:
@@ -1347,6 +1337,7 @@ async def startup_event():
                     finally:
                         async with sessions_lock:
                             sessions.pop(sid, None)
+                await browser_pool.evict_idle()
                 await asyncio.sleep(15)
             except asyncio.CancelledError:
                 raise
@@ -1383,6 +1374,14 @@ async def shutdown_event():
         sessions.clear()
     logger.info("[Worker] All sessions cleaned")
 
+    try:
+        from playwright_worker.browser_pool import browser_pool
+
+        await browser_pool.close()
+        logger.info("[Worker] Browser pool closed")
+    except Exception as e:
+        logger.error(f"[Worker] Browser pool close failed: {e}")
+
 
 if __name__ == "__main__":
     # 配置
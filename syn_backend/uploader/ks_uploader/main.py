@@ -9,6 +9,7 @@ from config.conf import LOCAL_CHROME_PATH
 from utils.base_social_media import set_init_script, HEADLESS_FLAG
 from myUtils.browser_context import build_context_options
 from myUtils.close_guide import try_close_guide
+from myUtils.playwright_session import playwright_session
 from utils.files_times import get_absolute_path
 from utils.log import kuaishou_logger
 
@@ -775,7 +776,8 @@ class KSVideo(object):
         await browser.close()
 
     async def main(self):
-        async with async_playwright() as playwright:
+        # 发布 Worker 内复用常驻浏览器（见 myUtils/playwright_session.py），其它场景等同 async_playwright()
+        async with playwright_session() as playwright:
             await self.upload(playwright)
 
     async def set_schedule_time(self, page, publish_date):
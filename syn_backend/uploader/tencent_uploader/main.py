@@ -15,6 +15,7 @@ from config.conf import LOCAL_CHROME_PATH
 from utils.base_social_media import set_init_script, HEADLESS_FLAG
 from myUtils.browser_context import build_context_options, build_browser_args, build_firefox_args
 from myUtils.close_guide import try_close_guide
+from myUtils.playwright_session import playwright_session
 from utils.files_times import get_absolute_path
 from utils.log import tencent_logger
 
@@ -673,5 +674,6 @@ class TencentVideo(object):
             tencent_logger.warning(f"[-] 声明原创步骤出现异常(可能是非原创账号/UI变动)，跳过: {e}")
 
     async def main(self):
-        async with async_playwright() as playwright:
+        # 发布 Worker 内复用常驻浏览器（见 myUtils/playwright_session.py），其它场景等同 async_playwright()
+        async with playwright_session() as playwright:
             await self.upload(playwright)
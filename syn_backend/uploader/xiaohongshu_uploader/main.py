@@ -9,6 +9,7 @@ from config.conf import LOCAL_CHROME_PATH
 from utils.base_social_media import set_init_script, HEADLESS_FLAG
 from myUtils.browser_context import build_context_options
 from myUtils.close_guide import try_close_guide
+from myUtils.playwright_session import playwright_session
 from utils.log import xiaohongshu_logger
 
 XHS_TOUR_CONTAINERS = [
@@ -725,5 +726,6 @@ class XiaoHongShuVideo(object):
             return False
 
     async def main(self):
-        async with async_playwright() as playwright:
+        # 发布 Worker 内复用常驻浏览器（见 myUtils/playwright_session.py），其它场景等同 async_playwright()
+        async with playwright_session() as playwright:
             await self.upload(playwright)
@@ -146,3 +146,11 @@ def probe_video_metadata(file_path: str, *, timeout_sec: int = 10) -> dict:
             "cover_aspect_ratio": "1:1",
         }
 
+
+
+def probe_video_metadata_batch(file_paths: list, *, timeout_sec: int = 10) -> list:
+    """
+    Probe several files in one call (used as a single process-pool job to amortize IPC).
+    Returns one metadata dict per input path, in order.
+    """
+    return [probe_video_metadata(p, timeout_sec=timeout_sec) for p in file_paths]